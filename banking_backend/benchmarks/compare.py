@@ -0,0 +1,55 @@
+"""Compare two benchmark reports.
+
+Usage::
+
+    python -m benchmarks.compare old.json new.json [--threshold 10]
+
+Prints one line per path with the median (p50) wall time and max query count of both
+reports, marking changes beyond ``--threshold`` percent (or any change in the
+query count). Exits with status 1 when a path got slower or issues more queries.
+"""
+
+import argparse
+import json
+import sys
+
+
+def compare(old, new, threshold=10.0):
+    """Yield ``(name, old_p50, new_p50, old_queries, new_queries, regressed)`` rows."""
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        before, after = old["results"].get(name), new["results"].get(name)
+        if before is None or after is None:
+            yield name, before and before["wall_ms"]["p50"], after and after["wall_ms"]["p50"], None, None, False
+            continue
+        old_p50, new_p50 = before["wall_ms"]["p50"], after["wall_ms"]["p50"]
+        old_queries, new_queries = before["queries"]["max"], after["queries"]["max"]
+        slower = old_p50 > 0 and (new_p50 - old_p50) / old_p50 * 100 > threshold
+        yield name, old_p50, new_p50, old_queries, new_queries, slower or new_queries > old_queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed median slowdown in percent.")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = 0
+    print(f"{'path':32} {'p50 ms (old → new)':>26} {'queries':>12}")
+    for name, old_p50, new_p50, old_queries, new_queries, regressed in compare(old, new, args.threshold):
+        if old_queries is None:
+            print(f"{name:32} {'only in ' + ('new' if old_p50 is None else 'old'):>26}")
+            continue
+        regressions += regressed
+        marker = "  REGRESSED" if regressed else ""
+        print(f"{name:32} {old_p50:>11.2f} → {new_p50:>11.2f} {old_queries:>5} → {new_queries:<5}{marker}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""pytest wiring for the benchmark suite.
+
+Run from ``banking_backend``::
+
+    pytest benchmarks --no-cov -p no:cacheprovider --bench-report=benchmarks/report.json
+
+``--bench-iterations`` overrides the per-path iteration counts in ``budgets.json``.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import django
+from django.db import connection
+from django.utils import timezone
+
+import pytest
+
+from benchmarks.harness import BenchmarkRunner
+from benchmarks.seed import seed_bank
+
+_runner = None
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-report", default=None, help="Write the JSON benchmark report to this path.")
+    group.addoption("--bench-iterations", type=int, default=None, help="Iterations per benchmarked path.")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+@pytest.fixture(scope="session")
+def bench_runner(request):
+    global _runner
+    _runner = BenchmarkRunner(iterations=request.config.getoption("--bench-iterations"))
+    return _runner
+
+
+@pytest.fixture
+def bench(bench_runner):
+    """Run a benchmark and fail the test if it breaks its budget."""
+
+    def run(name, fn, **kwargs):
+        result = bench_runner.run(name, fn, **kwargs)
+        assert not result.violations(), f"{name}: " + "; ".join(result.violations())
+        return result
+
+    return run
+
+
+@pytest.fixture
+def seeded(db):
+    """A deterministic bank: members with accounts and history, staff, and a chat room."""
+    return seed_bank()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    path = session.config.getoption("--bench-report", default=None)
+    if not path or _runner is None or not _runner.results:
+        return
+    environment = {
+        "generated_at": timezone.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    with open(path, "w") as f:
+        json.dump(_runner.report(environment), f, indent=2, sort_keys=True)
+        f.write("\n")
@@ -0,0 +1,172 @@
+"""Timing, query counting and budget checks for the hot-path benchmarks.
+
+Every benchmark runs a callable for a number of iterations and records, per
+iteration, the wall time, the number of SQL statements and the time spent in
+the database. Queries are counted on every connection and thread (the chat
+consumer runs its ORM calls in a worker thread), so the counts also cover
+``database_sync_to_async`` code.
+
+Results are checked against ``budgets.json`` and collected into a JSON report
+(see ``conftest.py``) that can be compared between releases with
+``python -m benchmarks.compare``.
+"""
+
+import json
+import math
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db.backends.utils import CursorWrapper
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "budgets.json")
+DEFAULT_ITERATIONS = 20
+
+
+def load_budgets(path=BUDGETS_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class QueryCounter:
+    """Counts SQL statements and database time across all connections while active."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def capture(self):
+        original = CursorWrapper._execute_with_wrappers
+        counter = self
+
+        def counting(cursor, sql, params, many, executor):
+            started = time.perf_counter()
+            try:
+                return original(cursor, sql, params, many, executor)
+            finally:
+                with counter._lock:
+                    counter.count += 1
+                    counter.seconds += time.perf_counter() - started
+
+        with mock.patch.object(CursorWrapper, "_execute_with_wrappers", counting):
+            yield self
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.seconds = 0.0
+
+
+class BenchmarkResult:
+    """Samples for one benchmarked path."""
+
+    def __init__(self, name, budget=None):
+        self.name = name
+        self.budget = budget or {}
+        self.wall_ms = []
+        self.db_ms = []
+        self.queries = []
+
+    def add(self, wall_seconds, queries, db_seconds):
+        self.wall_ms.append(wall_seconds * 1000)
+        self.db_ms.append(db_seconds * 1000)
+        self.queries.append(queries)
+
+    def violations(self):
+        """Human-readable budget breaches (empty when within budget)."""
+        problems = []
+        max_queries = self.budget.get("max_queries")
+        if max_queries is not None and max(self.queries) > max_queries:
+            problems.append(f"{max(self.queries)} queries > budget {max_queries}")
+        # The median, not the p95: a single GC pause or noisy CI neighbour
+        # moves the tail of 20 samples but not the middle.
+        median_budget = self.budget.get("median_ms")
+        median = statistics.median(self.wall_ms)
+        if median_budget is not None and median > median_budget:
+            problems.append(f"median {median:.3f}ms > budget {median_budget}ms")
+        return problems
+
+    def as_dict(self):
+        def summary(samples):
+            return {
+                "min": round(min(samples), 3),
+                "p50": round(percentile(samples, 50), 3),
+                "p95": round(percentile(samples, 95), 3),
+                "max": round(max(samples), 3),
+                "mean": round(statistics.fmean(samples), 3),
+            }
+
+        return {
+            "iterations": len(self.wall_ms),
+            "wall_ms": summary(self.wall_ms),
+            "db_ms": summary(self.db_ms),
+            "queries": {"min": min(self.queries), "max": max(self.queries)},
+            "budget": self.budget,
+            "violations": self.violations(),
+        }
+
+
+class BenchmarkRunner:
+    """Runs benchmarks and keeps their results for the session report."""
+
+    def __init__(self, budgets=None, iterations=None):
+        self.budgets = budgets if budgets is not None else load_budgets()
+        self.iterations = iterations
+        self.results = {}
+
+    def _result(self, name):
+        result = BenchmarkResult(name, self.budgets.get(name))
+        self.results[name] = result
+        return result
+
+    def _iterations(self, name, iterations):
+        return self.iterations or iterations or self.budgets.get(name, {}).get("iterations", DEFAULT_ITERATIONS)
+
+    def run(self, name, fn, setup=None, iterations=None, warmup=1):
+        """Time ``fn(setup())`` (or ``fn()``) per iteration; ``setup`` is not measured."""
+        result = self._result(name)
+        counter = QueryCounter()
+        for i in range(warmup + self._iterations(name, iterations)):
+            args = (setup(),) if setup else ()
+            with counter.capture():
+                counter.reset()
+                started = time.perf_counter()
+                fn(*args)
+                elapsed = time.perf_counter() - started
+            if i >= warmup:
+                result.add(elapsed, counter.count, counter.seconds)
+        return result
+
+    async def run_async(self, name, fn, iterations=None, warmup=1):
+        """Async variant of ``run`` for coroutine functions."""
+        result = self._result(name)
+        counter = QueryCounter()
+        for i in range(warmup + self._iterations(name, iterations)):
+            with counter.capture():
+                counter.reset()
+                started = time.perf_counter()
+                await fn()
+                elapsed = time.perf_counter() - started
+            if i >= warmup:
+                result.add(elapsed, counter.count, counter.seconds)
+        return result
+
+    def report(self, environment=None):
+        return {
+            "environment": environment or {},
+            "results": {name: result.as_dict() for name, result in sorted(self.results.items())},
+        }
@@ -0,0 +1,85 @@
+"""Deterministic seed data for the benchmarks.
+
+Volumes are kept small enough for a laptop run but large enough that an N+1
+or a missing index shows up in the query counts and timings.
+"""
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core.models import Account, ChatRoom, Transaction
+
+SEED = 20240601
+MEMBERS = 40
+TRANSACTIONS_PER_ACCOUNT = 25
+HISTORY_DAYS = 30
+
+
+def seed_bank(seed=SEED, members=MEMBERS, transactions_per_account=TRANSACTIONS_PER_ACCOUNT):
+    """Create members, accounts, transaction history, staff users and a chat room."""
+    User = get_user_model()
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def staff(role, name):
+        return User.objects.create_user(
+            username=f"bench_{role}",
+            email=f"bench.{role}@coastal.test",
+            first_name="Bench",
+            last_name=name,
+            role=role,
+            is_staff=True,
+            is_approved=True,
+        )
+
+    manager = staff("manager", "Manager")
+    cashier = staff("cashier", "Cashier")
+
+    member_users = [
+        User.objects.create_user(
+            username=f"bench_member_{i}", email=f"bench.member{i}@coastal.test", role="customer", is_approved=True
+        )
+        for i in range(members)
+    ]
+    accounts = Account.objects.bulk_create(
+        Account(
+            user=user,
+            account_number=f"BENCH{i:06d}",
+            account_type=rng.choice(["daily_susu", "member_savings", "shares"]),
+            balance=Decimal(rng.randrange(50_000, 5_000_000)) / 100,
+        )
+        for i, user in enumerate(member_users)
+    )
+
+    history = []
+    for account in accounts:
+        for _ in range(transactions_per_account):
+            kind = rng.choice(["deposit", "withdrawal", "transfer"])
+            counterparty = rng.choice(accounts)
+            history.append(
+                Transaction(
+                    from_account=None if kind == "deposit" else account,
+                    to_account=account if kind == "deposit" else counterparty if kind == "transfer" else None,
+                    amount=Decimal(rng.randrange(500, 400_000)) / 100,
+                    transaction_type=kind,
+                    description=f"Seeded {kind}",
+                    status="completed",
+                )
+            )
+    history = Transaction.objects.bulk_create(history)
+    # ``timestamp`` is auto_now_add; spread the history over the window afterwards.
+    for tx in history:
+        tx.timestamp = now - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+    Transaction.objects.bulk_update(history, ["timestamp"], batch_size=500)
+
+    room = ChatRoom.objects.create(is_group=True, name="Benchmarks", created_by=manager)
+    room.members.add(manager, cashier)
+
+    return SimpleNamespace(
+        manager=manager, cashier=cashier, members=member_users, accounts=accounts, transactions=history, room=room
+    )
@@ -0,0 +1,68 @@
+"""Connection setup cost of a short endpoint: per-request connections vs reuse.
+
+Each iteration is what a request that runs one small query costs in connection
+handling: the request_started/request_finished hygiene Django runs
+(``close_if_unusable_or_obsolete``) around a ``SELECT 1``. Only meaningful
+against a database server (connect, auth and TLS), so it is skipped on SQLite.
+"""
+
+import copy
+import importlib.util
+
+from django.db import connection, connections
+
+import pytest
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.skipif(connection.vendor == "sqlite", reason="SQLite has no connection setup to measure"),
+]
+
+
+@pytest.fixture
+def alias_with():
+    """Register a copy of the default database under a new alias with overridden settings."""
+    created = []
+
+    def make(name, pool=None, **overrides):
+        settings_dict = {**copy.deepcopy(connections["default"].settings_dict), **overrides}
+        settings_dict["OPTIONS"].pop("pool", None)
+        if pool:
+            settings_dict["OPTIONS"]["pool"] = pool
+        connections.settings[name] = settings_dict
+        created.append(name)
+        return name
+
+    yield make
+
+    for name in created:
+        conn = connections[name]
+        conn.close()
+        if getattr(conn, "pool", None) is not None:
+            conn.close_pool()
+        del connections[name]
+        del connections.settings[name]
+
+
+def short_request(alias):
+    conn = connections[alias]
+    conn.close_if_unusable_or_obsolete()  # request_started
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    conn.close_if_unusable_or_obsolete()  # request_finished
+
+
+def test_connect_per_request(bench, alias_with):
+    alias = alias_with("bench_per_request", CONN_MAX_AGE=0)
+    bench("db.connect_per_request", lambda: short_request(alias))
+
+
+def test_persistent_connection(bench, alias_with):
+    alias = alias_with("bench_persistent", CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+    bench("db.persistent_connection", lambda: short_request(alias))
+
+
+@pytest.mark.skipif(not importlib.util.find_spec("psycopg_pool"), reason="psycopg[pool] is not installed")
+def test_pooled_connection(bench, alias_with):
+    alias = alias_with("bench_pooled", pool={"min_size": 1, "max_size": 2}, CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=True)
+    bench("db.pooled_connection", lambda: short_request(alias))
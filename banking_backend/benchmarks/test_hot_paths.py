@@ -0,0 +1,158 @@
+"""Hot-path benchmarks with query-count and latency budgets (see ``budgets.json``)."""
+
+import json
+from decimal import Decimal
+from itertools import count
+
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.test import APIClient
+
+import pytest
+
+from core.models import AccountStatement, Transaction
+from core.services.transactions import TransactionService
+from core.utils.field_encryption import decrypt_field, encrypt_field
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def cold_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_create_transaction(bench, seeded):
+    sender, receiver = seeded.accounts[0], seeded.accounts[1]
+    sender.balance = Decimal("1000000.00")
+    sender.save(update_fields=["balance"])
+
+    bench(
+        "transaction.create",
+        lambda: TransactionService.create_transaction(sender, receiver, Decimal("25.00"), "transfer", "bench"),
+    )
+
+
+def test_approve_transaction(bench, seeded):
+    sender, receiver = seeded.accounts[2], seeded.accounts[3]
+    sender.balance = Decimal("10000000.00")
+    sender.save(update_fields=["balance"])
+
+    def pending():
+        return Transaction.objects.create(
+            from_account=sender, to_account=receiver, amount=Decimal("6000.00"), transaction_type="transfer"
+        ).pk
+
+    bench(
+        "transaction.approve",
+        lambda tx_id: TransactionService.approve_transaction(tx_id, seeded.manager),
+        setup=pending,
+    )
+
+
+def test_operations_metrics_view(bench, seeded):
+    client = APIClient()
+    client.force_authenticate(user=seeded.manager)
+
+    def fetch(_):
+        response = client.get("/api/operations/metrics/")
+        assert response.status_code == 200
+
+    # The view caches its payload; clear it so every iteration measures the aggregation work.
+    bench("view.operations_metrics", fetch, setup=cache.clear)
+
+
+def test_member_dashboard_view(bench, seeded):
+    client = APIClient()
+    client.force_authenticate(user=seeded.members[0])
+
+    def fetch(_=None):
+        response = client.get("/api/users/member-dashboard/")
+        assert response.status_code == 200
+
+    # Cold: every iteration rebuilds the snapshot; warm: polling between writes
+    bench("view.member_dashboard", fetch, setup=cache.clear)
+    fetch()
+    bench("view.member_dashboard_cached", fetch)
+
+
+def test_field_encryption(bench):
+    values = (f"GHA-{i:09d}-7" for i in count())
+    bench("crypto.encrypt_field", lambda: encrypt_field(next(values)))
+
+    ciphertext = encrypt_field("GHA-000000001-7")
+    bench("crypto.decrypt_field", lambda: decrypt_field(ciphertext))
+
+
+def test_ml_fraud_predict(bench, seeded):
+    from core.ml.fraud_detector import get_fraud_detector
+
+    detector = get_fraud_detector()
+    transaction = seeded.transactions[-1]
+    bench("ml.fraud_predict", lambda: detector.predict(transaction))
+
+
+def test_statement_pdf(bench, seeded):
+    from core.pdf_services import generate_statement_pdf
+
+    account = seeded.accounts[0]
+    transactions = list(
+        Transaction.objects.filter(Q(from_account=account) | Q(to_account=account)).order_by("timestamp")
+    )
+    statement = AccountStatement.objects.create(
+        account=account,
+        requested_by=account.user,
+        start_date=transactions[0].timestamp.date(),
+        end_date=transactions[-1].timestamp.date(),
+        transaction_count=len(transactions),
+    )
+    bench("report.statement_pdf", lambda: generate_statement_pdf(statement, transactions))
+
+
+def test_xlsx_report(bench, seeded):
+    from core.xlsx_services import generate_xlsx_report
+
+    bench("report.xlsx", generate_xlsx_report)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_chat_round_trip(bench_runner):
+    from channels.db import database_sync_to_async
+    from channels.testing import WebsocketCommunicator
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from benchmarks.seed import seed_bank
+    from config.asgi import application
+
+    seeded = await database_sync_to_async(seed_bank)(members=2, transactions_per_account=1)
+
+    async def connect(user):
+        communicator = WebsocketCommunicator(
+            application,
+            f"ws/messaging/{seeded.room.id}/?token={AccessToken.for_user(user)}",
+            headers=[(b"origin", b"http://testserver"), (b"host", b"testserver")],
+        )
+        connected, _ = await communicator.connect()
+        assert connected
+        await communicator.receive_json_from(timeout=3)  # presence snapshot
+        return communicator
+
+    sender = await connect(seeded.cashier)
+    receiver = await connect(seeded.manager)
+    sequence = count()
+
+    async def round_trip():
+        content = f"bench {next(sequence)}"
+        await sender.send_to(text_data=json.dumps({"type": "message", "content": content}))
+        while True:
+            event = await receiver.receive_json_from(timeout=3)
+            if event.get("type") != "presence_update" and event.get("content") == content:
+                return
+
+    result = await bench_runner.run_async("consumer.chat_round_trip", round_trip)
+    await sender.disconnect()
+    await receiver.disconnect()
+    assert not result.violations(), "consumer.chat_round_trip: " + "; ".join(result.violations())
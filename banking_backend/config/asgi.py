@@ -8,7 +8,7 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 from channels.routing import ProtocolTypeRouter, URLRouter
 
@@ -16,14 +16,19 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 # Initialize Django ASGI application early to ensure the AppRegistry
 # is populated before importing code that may import ORM models.
-django_asgi_app = get_asgi_application()
+# Same as get_asgi_application(), with per-middleware timing (core.middleware.timing).
+django.setup(set_prefix=False)
 
 # Import routing and middleware after Django setup
 from channels.security.websocket import AllowedHostsOriginValidator
 
+from core.middleware.timing import TimedASGIHandler
+
 from .channels_middleware import TokenAuthMiddleware
 from .routing import websocket_urlpatterns
 
+django_asgi_app = TimedASGIHandler()
+
 # In test mode, we bypass AllowedHostsOriginValidator to prevent host/origin validation issues.
 is_testing = "test" in os.environ.get("DJANGO_SETTINGS_MODULE", "")
 
@@ -25,6 +25,22 @@ app.conf.beat_schedule = {
         "task": "core.tasks.system_health_check",
         "schedule": crontab(minute="*/30"),  # Every 30 minutes
     },
+    "analyze-fraud-patterns": {
+        "task": "core.tasks.analyze_fraud_patterns",
+        "schedule": crontab(minute="*/15"),  # Every 15 minutes; alerts are idempotent per transaction
+    },
+    "detect-mule-accounts": {
+        "task": "core.tasks.detect_mule_accounts",
+        "schedule": crontab(minute=45),  # Hourly transfer-graph sweep over FRAUD_GRAPH_WINDOW_HOURS
+    },
+    "downsample-performance-metrics": {
+        "task": "core.tasks.downsample_performance_metrics",
+        "schedule": crontab(minute=5),  # Hourly: roll raw latency rows into hourly rows, apply retention
+    },
+    "prune-request-profiles": {
+        "task": "core.tasks.prune_request_profiles",
+        "schedule": crontab(hour=3, minute=15),  # Daily: drop profiles older than PROFILING_RETENTION_DAYS
+    },
 }
 
 
@@ -1,26 +1,34 @@
+import logging
 from urllib.parse import parse_qs
 
 from django.conf import settings
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from django.http import parse_cookie
 
-from channels.db import database_sync_to_async
 from channels.middleware import BaseMiddleware
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import UntypedToken
 
+logger = logging.getLogger(__name__)
+
+
+async def get_user(token):
+    """Resolve the JWT's user through the short-TTL principal cache (native async ORM on a miss)."""
+    from core.channels_cache import aget_active_user
 
-@database_sync_to_async
-def get_user(token):
-    User = get_user_model()
     try:
         decoded_data = UntypedToken(token)
         user_id = decoded_data["user_id"]
-        return User.objects.get(id=user_id)
+    except (InvalidToken, TokenError, KeyError) as e:
+        logger.warning(f"WebSocket token rejected: {e!r}")
+        return AnonymousUser()
+
+    try:
+        user = await aget_active_user(user_id)
     except Exception as e:
-        print(f"\n[MIDDLEWARE ERROR] get_user failed: {e!r}")
+        logger.error(f"WebSocket principal lookup failed: {e!r}")
         return AnonymousUser()
+    return user if user is not None else AnonymousUser()
 
 
 
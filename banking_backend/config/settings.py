@@ -1,4 +1,6 @@
+import importlib.util
 import os
+import sys
 import warnings
 from decimal import Decimal
 from urllib.parse import urlparse
@@ -249,12 +251,17 @@ MIDDLEWARE = [
     "core.middleware.mtls_verification.MTLSVerificationMiddleware",
     "core.middleware.base.LogCorrelationMiddleware",
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
+    "core.middleware.tracing.TracingMiddleware",  # Root trace span per request; SQL spans when sampled
+    "core.middleware.latency.RequestLatencyMiddleware",  # In-process latency histograms -> PerformanceMetric
+    "core.middleware.query_metrics.QueryMetricsMiddleware",  # Per-view SQL counts/time; wraps all DB access below
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.profiling.ProfilingMiddleware",  # cProfile on superuser X-Profile header or sampling
+    "core.middleware.replicas.ReplicaStickinessMiddleware",  # Read-your-writes: writers read from primary briefly
     "core.middleware.base.RequestContextMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "core.middleware.anomaly_detection.BulkAccessDetectionMiddleware",
@@ -326,12 +333,54 @@ if not DEBUG:
             if sslrootcert:
                 db_config["OPTIONS"]["sslrootcert"] = sslrootcert
 
-# Connection Pooling for Production Performance
-# Reuse database connections to reduce overhead
-if not DEBUG:
-    # Set to 0 by default to avoid connection exhaustion on shared database tiers
-    conn_max_age = env.int("CONN_MAX_AGE", default=0)
-    DATABASES["default"]["CONN_MAX_AGE"] = conn_max_age
+# Connection Pooling
+# Web processes (ASGI/WSGI) and Celery workers size their connections differently: a web
+# worker serves many concurrent requests and async consumers from threads, a Celery prefork
+# child runs one task at a time. DB_PROCESS_ROLE overrides the detection ("web" or "worker").
+DB_PROCESS_ROLE = env("DB_PROCESS_ROLE", default="worker" if "celery" in os.path.basename(sys.argv[0]) else "web")
+
+if DATABASES["default"].get("ENGINE") == "django.db.backends.postgresql":
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    if env.bool("DB_POOL", default=True) and importlib.util.find_spec("psycopg_pool"):
+        # psycopg 3 pool (Django 5.1+). Connections are returned to the pool when Django closes
+        # them, which is safe in async code where persistent per-thread connections are not.
+        worker = DB_PROCESS_ROLE == "worker"
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=1 if worker else 2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=2 if worker else 10),
+            # Seconds a request waits for a free connection before failing with PoolTimeout
+            "timeout": env.float("DB_POOL_TIMEOUT", default=30.0 if worker else 10.0),
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=600.0 if worker else 300.0),
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600.0),
+            "name": f"{DB_PROCESS_ROLE}-default",
+        }
+    else:
+        # psycopg2: persistent connections for Celery workers only. ASGI request threads come
+        # and go, so persistent connections there leak until the database limit is hit.
+        DATABASES["default"]["CONN_MAX_AGE"] = env.int(
+            "CONN_MAX_AGE", default=600 if DB_PROCESS_ROLE == "worker" else 0
+        )
+
+# Read Replicas
+# Replica-eligible reads (see core.db_router) go to these when they are less than
+# REPLICA_MAX_LAG_SECONDS behind; everything else uses "default".
+DATABASE_REPLICAS = []
+for index, replica_url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    replica = env.db_url_config(replica_url)
+    replica["OPTIONS"] = {**DATABASES["default"].get("OPTIONS", {}), **replica.get("OPTIONS", {})}
+    for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS"):
+        if key in DATABASES["default"]:
+            replica[key] = DATABASES["default"][key]
+    replica["TEST"] = {"MIRROR": "default"}
+    DATABASES[f"replica_{index}"] = replica
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+REPLICA_MAX_LAG_SECONDS = env.float("REPLICA_MAX_LAG_SECONDS", default=10.0)
+REPLICA_LAG_CHECK_SECONDS = env.float("REPLICA_LAG_CHECK_SECONDS", default=5.0)
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=5)
 
 # Authentication Backends
 # https://docs.djangoproject.com/en/5.1/ref/settings/#authentication-backends
@@ -513,8 +562,18 @@ if env("REDIS_URL", default=None):
 
     CACHES = {
         "default": {
-            "BACKEND": "core.utils.cache.FallbackRedisCache",
+            "BACKEND": "core.utils.cache.TieredRedisCache",
             "LOCATION": REDIS_URL,
+            "OPTIONS": {
+                # Hot, read-mostly keys also kept in process for a few seconds, invalidated over pub/sub:
+                # fraud rule version, WebSocket principals and room membership, cached catalog/settings pages.
+                "L1_NAMESPACES": env.list(
+                    "CACHE_L1_NAMESPACES",
+                    default=["fraud_rules:", "ws:principal:", "ws:room_member", "views.decorators.cache."],
+                ),
+                "L1_MAX_ENTRIES": env.int("CACHE_L1_MAX_ENTRIES", default=2000),
+                "L1_TIMEOUT": env.int("CACHE_L1_TIMEOUT", default=5),
+            },
         }
     }
 
@@ -554,6 +613,68 @@ else:
     # Celery disabled - tasks will run synchronously if called
     CELERY_ENABLED = False
 
+# Real-time notifications (core.services.notifications / NotificationConsumer)
+# The background dispatcher needs a cross-process channel layer; the in-memory
+# layer is bound to the server's own event loop, so deliver inline without Redis.
+NOTIFICATION_DISPATCHER_ENABLED = env.bool(
+    "NOTIFICATION_DISPATCHER_ENABLED", default=bool(env("REDIS_URL", default=None))
+)
+NOTIFICATION_COALESCE_WINDOW_MS = env.int("NOTIFICATION_COALESCE_WINDOW_MS", default=200)
+NOTIFICATION_DISPATCH_CONCURRENCY = env.int("NOTIFICATION_DISPATCH_CONCURRENCY", default=50)
+# Per-socket outbox: frames beyond this are dropped oldest-first for slow clients.
+NOTIFICATION_OUTBOX_LIMIT = env.int("NOTIFICATION_OUTBOX_LIMIT", default=100)
+# Seconds a single frame may take to write before the socket is considered stalled.
+NOTIFICATION_SEND_TIMEOUT = env.float("NOTIFICATION_SEND_TIMEOUT", default=10.0)
+
+# Per-view SQL instrumentation (core.middleware.query_metrics). Histograms are always recorded;
+# requests crossing a threshold are logged with probability QUERY_METRICS_LOG_SAMPLE_RATE.
+QUERY_METRICS_ENABLED = env.bool("QUERY_METRICS_ENABLED", default=True)
+QUERY_METRICS_LOG_QUERIES = env.int("QUERY_METRICS_LOG_QUERIES", default=50)
+QUERY_METRICS_LOG_DB_SECONDS = env.float("QUERY_METRICS_LOG_DB_SECONDS", default=0.5)
+QUERY_METRICS_LOG_DUPLICATES = env.int("QUERY_METRICS_LOG_DUPLICATES", default=10)
+QUERY_METRICS_LOG_SAMPLE_RATE = env.float("QUERY_METRICS_LOG_SAMPLE_RATE", default=0.1)
+
+# Request latency aggregation (core.services.performance_metrics): flushed to PerformanceMetric each interval,
+# raw rows rolled up hourly after the raw retention and deleted after the full retention.
+PERFORMANCE_METRICS_FLUSH_ENABLED = env.bool("PERFORMANCE_METRICS_FLUSH_ENABLED", default=True)
+PERFORMANCE_METRICS_FLUSH_SECONDS = env.int("PERFORMANCE_METRICS_FLUSH_SECONDS", default=60)
+PERFORMANCE_METRICS_RAW_RETENTION_HOURS = env.int("PERFORMANCE_METRICS_RAW_RETENTION_HOURS", default=48)
+PERFORMANCE_METRICS_RETENTION_DAYS = env.int("PERFORMANCE_METRICS_RETENTION_DAYS", default=90)
+
+# Distributed tracing (core.tracing): OTLP/JSON spans for requests, services, SQL, cache, HTTP, consumers and
+# Celery tasks. TRACING_SAMPLE_RATE is the fraction of new traces recorded; incoming traceparent decisions win.
+TRACING_ENABLED = env.bool("TRACING_ENABLED", default=False)
+TRACING_SAMPLE_RATE = env.float("TRACING_SAMPLE_RATE", default=0.05)
+TRACING_SERVICE_NAME = env("TRACING_SERVICE_NAME", default="coastal-banking")
+TRACING_EXPORTER = env("TRACING_EXPORTER", default="file")  # "file" or "otlp"
+TRACING_FILE_PATH = env("TRACING_FILE_PATH", default=os.path.join(BASE_DIR, "logs", "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = env("TRACING_OTLP_ENDPOINT", default="http://localhost:4318/v1/traces")
+TRACING_EXPORT_INTERVAL_SECONDS = env.int("TRACING_EXPORT_INTERVAL_SECONDS", default=5)
+
+# On-demand profiling (core.middleware.profiling): superusers send "X-Profile: 1" to capture a cProfile + SQL timing
+# report as a RequestProfile (Django admin); PROFILING_SAMPLE_RATE additionally profiles a fraction of all requests.
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=True)
+PROFILING_HEADER = env("PROFILING_HEADER", default="X-Profile")
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+PROFILING_RETENTION_DAYS = env.int("PROFILING_RETENTION_DAYS", default=14)
+
+# Per-middleware latency breakdown (core.middleware.timing): django_middleware_seconds{middleware, phase}, recorded
+# by the TimedWSGIHandler/TimedASGIHandler that config/wsgi.py and config/asgi.py serve.
+# MIDDLEWARE_SKIPPABLE layers are bypassed for paths under MIDDLEWARE_SKIP_PATHS; security layers never are.
+MIDDLEWARE_TIMING_ENABLED = env.bool("MIDDLEWARE_TIMING_ENABLED", default=True)
+MIDDLEWARE_SKIP_PATHS = env.list("MIDDLEWARE_SKIP_PATHS", default=["/api/health/", "/static/", "/favicon.ico"])
+MIDDLEWARE_SKIPPABLE = env.list(
+    "MIDDLEWARE_SKIPPABLE",
+    default=[
+        "core.middleware.tracing.TracingMiddleware",
+        "core.middleware.profiling.ProfilingMiddleware",
+        "core.middleware.query_metrics.QueryMetricsMiddleware",
+        "core.middleware.base.RequestContextMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+        "core.middleware.anomaly_detection.BulkAccessDetectionMiddleware",
+    ],
+)
+
 # Flower (Celery monitoring) Configuration
 FLOWER_PORT = env.int("FLOWER_PORT", default=5555)
 # SECURITY: FLOWER_BASIC_AUTH must ALWAYS be set via environment variable
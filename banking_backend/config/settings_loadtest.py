@@ -0,0 +1,39 @@
+"""Settings for a server under the load-test suite (``loadtest/``).
+
+Production settings (run with DEBUG off) plus what an offline run on one
+machine needs:
+
+* plain-HTTP cookies, so the load clients can reuse the cookie JWT login;
+* throttles and the login rate limit raised beyond what the test generates,
+  so the throttle classes still run but never answer 429;
+* SMS delivery pointed at the fake Sendexa server (``python -m loadtest fake-sendexa``);
+* the in-memory channel layer by default (``LOADTEST_CHANNEL_LAYER=redis``
+  keeps Redis when ``REDIS_URL`` is set). The in-memory layer only spans one
+  process: run a single ASGI worker with it.
+"""
+
+from .settings import *
+
+# Keys come straight from the environment on a load-test box
+KMS_PROVIDER = env("KMS_PROVIDER", default="none")
+
+SECURE_SSL_REDIRECT = False
+SECURE_HSTS_SECONDS = 0
+SESSION_COOKIE_SECURE = False
+CSRF_COOKIE_SECURE = False
+SIMPLE_JWT["AUTH_COOKIE_SECURE"] = False
+
+REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"] = dict.fromkeys(REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "100000/min")
+LOGIN_RATE_LIMIT_MAX = 1_000_000
+
+SENDEXA_API_URL = env("LOADTEST_SENDEXA_URL", default="http://127.0.0.1:8765/v1/messages")
+SENDEXA_AUTH_TOKEN = env("SENDEXA_AUTH_TOKEN", default="loadtest")
+
+if env("LOADTEST_CHANNEL_LAYER", default="memory") == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+        },
+    }
+    # The background dispatcher cannot reach an in-memory layer bound to the server's loop
+    NOTIFICATION_DISPATCHER_ENABLED = False
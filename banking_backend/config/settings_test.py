@@ -23,6 +23,9 @@ Override the MIDDLEWARE in settings_test.py to exclude SecurityMiddleware, or en
 all security settings are properly overridden before middleware initialization.
 """
 
+import os
+import tempfile
+
 from .settings import *
 
 DEBUG = True
@@ -48,6 +51,10 @@ PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
 
+# A second alias onto the test database, standing in for a read replica. Routing stays
+# off (DATABASE_REPLICAS is empty) unless a test turns it on; see core/tests/test_db_router.py.
+DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
 # Ensure we use in-memory layers
 CHANNEL_LAYERS = {
     "default": {
@@ -62,5 +69,14 @@ CACHES = {
     }
 }
 
+# Deliver notifications inline on the caller's loop (in-memory channel layer)
+NOTIFICATION_DISPATCHER_ENABLED = False
+
+# Latency histograms stay in memory; tests flush explicitly
+PERFORMANCE_METRICS_FLUSH_ENABLED = False
+
+# Keep trained fraud models and published artifacts out of the source tree
+FRAUD_MODEL_DIR = os.path.join(tempfile.gettempdir(), f"coastal-test-ml-models-{os.getpid()}")
+
 TESTING = True
 
@@ -1,7 +1,12 @@
 import os
 
-from django.core.wsgi import get_wsgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_wsgi_application()
+# get_wsgi_application(), with per-middleware timing (core.middleware.timing)
+django.setup(set_prefix=False)
+
+from core.middleware.timing import TimedWSGIHandler
+
+application = TimedWSGIHandler()
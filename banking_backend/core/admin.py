@@ -3,18 +3,23 @@ Features: Enhanced displays, filters, export capabilities.
 """
 
 import csv
+import gzip
 import json
 from datetime import datetime
 from decimal import Decimal
 
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
 from django.http import HttpResponse
-from django.utils.html import format_html
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
 
 from core.models.accounts import Account
 from core.models.fraud import FraudAlert
 from core.models.loans import Loan
 from core.models.messaging import BankingMessage
+from core.models.reporting import RequestProfile
 from core.models.transactions import Transaction
 
 # =============================================================================
@@ -551,3 +556,106 @@ class SmsOutboxAdmin(admin.ModelAdmin):
 
     status_display.short_description = "Status"
 
+
+# =============================================================================
+# Request Profiles (core.middleware.profiling)
+# =============================================================================
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Superuser-only list of captured request profiles, with pstats download."""
+
+    list_display = (
+        "id",
+        "created_at",
+        "method",
+        "view_name",
+        "status_code",
+        "duration_ms",
+        "db_queries",
+        "db_time_ms",
+        "trigger",
+        "user",
+        "download_link",
+    )
+    list_filter = ("trigger", "method", "status_code", "created_at")
+    search_fields = ("path", "view_name")
+    ordering = ("-created_at",)
+    exclude = ("profile_data", "sql")
+    readonly_fields = (
+        "method",
+        "path",
+        "view_name",
+        "status_code",
+        "trigger",
+        "user",
+        "duration_ms",
+        "db_queries",
+        "db_time_ms",
+        "created_at",
+        "download_link",
+        "sql_table",
+        "summary_display",
+    )
+
+    def has_module_permission(self, request):
+        return request.user.is_active and request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_active and request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_active and request.user.is_superuser
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:profile_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="core_requestprofile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, profile_id):
+        """Serve the decompressed pstats dump (``python -m pstats``, snakeviz, flameprof)."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=profile_id)
+        response = HttpResponse(gzip.decompress(bytes(profile.profile_data)), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="request-profile-{profile.pk}.prof"'
+        return response
+
+    def download_link(self, obj):
+        """Link to the pstats download."""
+        return format_html(
+            '<a href="{}">Download .prof</a>', reverse("admin:core_requestprofile_download", args=[obj.pk])
+        )
+
+    download_link.short_description = "Profile"
+
+    def sql_table(self, obj):
+        """SQL statement shapes, slowest first."""
+        rows = format_html_join(
+            "",
+            "<tr><td>{}</td><td>{}</td><td>{}</td><td><code>{}</code></td></tr>",
+            ((row["count"], row["total_ms"], row["max_ms"], row["sql"][:500]) for row in obj.sql),
+        )
+        return format_html(
+            "<table><tr><th>Count</th><th>Total ms</th><th>Max ms</th><th>Statement</th></tr>{}</table>", rows
+        )
+
+    sql_table.short_description = "SQL"
+
+    def summary_display(self, obj):
+        """Top functions by cumulative time."""
+        return format_html("<pre>{}</pre>", obj.summary)
+
+    summary_display.short_description = "Profile Summary"
@@ -18,6 +18,20 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.audit_signals  # noqa - Enable audit logging
+        import core.channels_cache  # noqa - WebSocket principal/membership cache invalidation
+        import core.dashboard_cache  # noqa - Member dashboard snapshot invalidation
+        import core.services.fraud_rules  # noqa - Compiled fraud rule set invalidation
+
+        from core.db_pool import register_pool_metrics
+
+        register_pool_metrics()  # Connection pool size, saturation and wait time gauges
+
+        from django.conf import settings as django_settings
+
+        if getattr(django_settings, "TRACING_ENABLED", False):
+            from core import tracing
+
+            tracing.install()
 
         # Connection created signal to register SQLite custom functions for test bypass
         from django.db.backends.signals import connection_created
@@ -0,0 +1,134 @@
+"""Native async DRF views whose independent aggregates run concurrently.
+
+Dashboards used to issue a dozen independent queries one after another, so
+their latency was the sum of the round trips. ``AsyncAPIView`` lets a DRF
+view declare ``async def get(...)``; the handler passes its independent
+queries to ``gather_queries`` as plain callables and merges the results into
+the usual response.
+
+``gather_queries`` runs each callable in a worker thread with its own
+database connection, at most ``DASHBOARD_QUERY_CONCURRENCY`` at a time, and
+returns each connection to the pool afterwards. That only pays off when
+connections are pooled (see ``core.db_pool``), so without a pool, or on
+SQLite, the callables run one after another on the request's own connection,
+exactly as the synchronous view did. Either way the request's
+``execute_wrapper``s (query metrics, profiler SQL timings, tracing spans) are
+re-entered on the connection that runs the queries, so they are recorded.
+"""
+
+import asyncio
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from rest_framework.views import APIView
+
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# Queries one dashboard request may run at once (also capped by the pool's max_size)
+DASHBOARD_QUERY_CONCURRENCY = getattr(settings, "DASHBOARD_QUERY_CONCURRENCY", 4)
+
+# psycopg_pool's default when OPTIONS["pool"] is True
+_DEFAULT_POOL_MAX_SIZE = 4
+
+
+def query_concurrency(alias=DEFAULT_DB_ALIAS):
+    """How many queries may run at once: 1 unless ``alias`` hands out pooled connections."""
+    pool = connections.settings[alias].get("OPTIONS", {}).get("pool")
+    if not pool:
+        return 1
+    max_size = pool.get("max_size", _DEFAULT_POOL_MAX_SIZE) if isinstance(pool, dict) else _DEFAULT_POOL_MAX_SIZE
+    return max(1, min(DASHBOARD_QUERY_CONCURRENCY, max_size))
+
+
+def _execute_wrappers():
+    """``{alias: [wrapper, ...]}`` installed on the current thread's connections."""
+    return {alias: list(connections[alias].execute_wrappers) for alias in connections}
+
+
+def _enter_execute_wrappers(wrappers):
+    """Install ``wrappers`` on this thread's connections, skipping any already there."""
+    stack = ExitStack()
+    for alias, alias_wrappers in wrappers.items():
+        connection = connections[alias]
+        for wrapper in alias_wrappers:
+            if wrapper not in connection.execute_wrappers:
+                stack.enter_context(connection.execute_wrapper(wrapper))
+    return stack
+
+
+def _run_in_order(queries, wrappers):
+    with _enter_execute_wrappers(wrappers):
+        return {name: fn() for name, fn in queries.items()}
+
+
+def _run_and_release(fn, wrappers):
+    try:
+        with _enter_execute_wrappers(wrappers):
+            return fn()
+    finally:
+        # Executor threads never see request_finished: hand the connection back now
+        close_old_connections()
+
+
+async def gather_queries(queries, concurrency=None):
+    """
+    Run ``{name: callable}`` independent blocking queries and return ``{name: result}``.
+
+    The first exception raised by a callable propagates once all of them have finished.
+    """
+    concurrency = concurrency or query_concurrency()
+    # Worker threads use their own connections: take the request's wrappers along
+    wrappers = _execute_wrappers()
+    if concurrency <= 1:
+        return await sync_to_async(_run_in_order)(queries, wrappers)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(fn):
+        async with semaphore:
+            return await sync_to_async(_run_and_release, thread_sensitive=False)(fn, wrappers)
+
+    results = await asyncio.gather(*(run(fn) for fn in queries.values()), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return dict(zip(queries, results, strict=True))
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines, served natively under ASGI.
+
+    Authentication, permission and throttle checks (which may query the
+    database) and the exception handler run in a thread; the handler runs on
+    the event loop.
+    """
+
+    # Mirrors rest_framework.views.APIView.dispatch from DRF 3.16.1 (the version
+    # pinned in requirements.txt): re-check it when upgrading DRF.
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = await sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,178 @@
+"""Short-TTL principal and chat-room membership cache for the Channels stack.
+
+Every WebSocket connect used to decode the JWT, load the user with a
+synchronous ``User.objects.get`` and check room membership through
+``database_sync_to_async``. After a deploy, reconnect storms turned that into
+a flood of identical queries. Lookups here go through the shared Django cache
+first and the native async ORM on a miss.
+
+Only the fields WebSocket authorization needs are cached (``PRINCIPAL_FIELDS``),
+never the encrypted PII columns or their lookup hashes; consumers get a
+lightweight ``Principal`` rebuilt from them.
+
+Entries are short-lived (``CHANNELS_AUTH_CACHE_TTL`` seconds) and are also
+invalidated explicitly: any save or delete of a user drops their principal
+entry (deactivation, role or key changes), bulk ``QuerySet.update`` calls
+that (de)activate users call ``invalidate_principals``, and any change to a
+room's members drops the affected membership and member-list entries.
+"""
+
+import logging
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models.messaging import ChatRoom
+
+logger = logging.getLogger(__name__)
+
+CHANNELS_AUTH_CACHE_TTL = getattr(settings, "CHANNELS_AUTH_CACHE_TTL", 60)
+
+# The only user columns read and cached for a WebSocket principal.
+PRINCIPAL_FIELDS = ("id", "role", "is_active", "is_staff", "is_superuser")
+
+# Cached marker for "no active user with this id", distinct from a cache miss.
+_INACTIVE = "inactive"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user of a WebSocket connection, without profile data."""
+
+    id: int
+    role: str
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def pk(self):
+        return self.id
+
+
+def principal_cache_key(user_id):
+    return f"ws:principal:{user_id}"
+
+
+def membership_cache_key(room_id, user_id):
+    return f"ws:room_member:{room_id}:{user_id}"
+
+
+def room_members_cache_key(room_id):
+    return f"ws:room_members:{room_id}"
+
+
+async def aget_active_user(user_id):
+    """Return the ``Principal`` of active user ``user_id`` or None, consulting the cache first."""
+    key = principal_cache_key(user_id)
+    try:
+        cached = await cache.aget(key)
+    except Exception as e:
+        logger.warning(f"Principal cache read failed: {e}")
+        cached = None
+
+    if cached == _INACTIVE:
+        return None
+    if cached is not None:
+        return Principal(**cached)
+
+    fields = await get_user_model().objects.filter(id=user_id, is_active=True).values(*PRINCIPAL_FIELDS).afirst()
+    try:
+        await cache.aset(key, fields if fields is not None else _INACTIVE, CHANNELS_AUTH_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Principal cache write failed: {e}")
+    return Principal(**fields) if fields is not None else None
+
+
+async def ais_room_member(room_id, user_id):
+    """Return True if ``user_id`` belongs to chat room ``room_id``, consulting the cache first."""
+    key = membership_cache_key(room_id, user_id)
+    try:
+        cached = await cache.aget(key)
+    except Exception as e:
+        logger.warning(f"Membership cache read failed: {e}")
+        cached = None
+
+    if cached is not None:
+        return cached
+
+    is_member = await ChatRoom.objects.filter(id=room_id, members__id=user_id).aexists()
+    try:
+        await cache.aset(key, is_member, CHANNELS_AUTH_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Membership cache write failed: {e}")
+    return is_member
+
+
+async def aget_room_member_ids(room_id):
+    """Return the ids of all members of chat room ``room_id``, consulting the cache first."""
+    key = room_members_cache_key(room_id)
+    try:
+        cached = await cache.aget(key)
+    except Exception as e:
+        logger.warning(f"Room members cache read failed: {e}")
+        cached = None
+
+    if cached is not None:
+        return cached
+
+    member_ids = [
+        user_id
+        async for user_id in ChatRoom.members.through.objects.filter(chatroom_id=room_id).values_list(
+            "user_id", flat=True
+        )
+    ]
+    try:
+        await cache.aset(key, member_ids, CHANNELS_AUTH_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Room members cache write failed: {e}")
+    return member_ids
+
+
+def _safe_delete_many(keys):
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"Channels auth cache invalidation failed: {e}")
+
+
+def invalidate_principals(user_ids):
+    """Drop cached principals; call after changing users without ``save()`` (e.g. ``QuerySet.update``)."""
+    _safe_delete_many([principal_cache_key(user_id) for user_id in user_ids])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_principal(sender, instance, **kwargs):
+    """Drop the cached principal whenever the user row changes (e.g. deactivation)."""
+    invalidate_principals([instance.pk])
+
+
+@receiver(m2m_changed, sender=ChatRoom.members.through)
+def invalidate_room_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached membership entries affected by a change to ``ChatRoom.members``."""
+    if action == "pre_clear":
+        # pk_set is not provided for clear(); capture the members that are about to go.
+        if reverse:
+            pairs = [(room_id, instance.pk) for room_id in instance.chat_rooms.values_list("id", flat=True)]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in instance.members.values_list("id", flat=True)]
+    elif action in ("post_add", "post_remove") and pk_set:
+        if reverse:
+            pairs = [(room_id, instance.pk) for room_id in pk_set]
+        else:
+            pairs = [(instance.pk, user_id) for user_id in pk_set]
+    else:
+        return
+    keys = [membership_cache_key(room_id, user_id) for room_id, user_id in pairs]
+    keys += [room_members_cache_key(room_id) for room_id in {room_id for room_id, _ in pairs}]
+    _safe_delete_many(keys)
@@ -0,0 +1,278 @@
+"""Write-coalescing persistence for chat rooms.
+
+``ChatConsumer`` used to hop through ``database_sync_to_async`` for every
+message (room lookup, encrypted INSERT, full ``room.save()``) and every read
+receipt (get, M2M ``exists``, M2M add, full ``message.save()``). In busy group
+rooms that saturates the thread pool behind ``database_sync_to_async``.
+
+A ``RoomWriteBuffer`` collects the writes of every consumer connected to the
+same room in this process and persists them together after a short window:
+
+* new messages are inserted with one ``bulk_create``,
+* read receipts become one ``bulk_create`` of M2M through rows plus one
+  ``UPDATE`` of the read flags,
+* the room's ``updated_at`` is bumped with a single ``UPDATE`` per batch.
+
+Each flush is one executor hop inside one transaction. If that transaction
+fails (say one sender's row violates a constraint), the batch is retried one
+row per transaction so only the offending writes fail. Flushes are serialised
+per room, and messages are broadcast in insertion order only after they are
+committed, so clients never see a message that was not persisted and never
+see messages out of order. Submitters await the outcome of their own write,
+which also gives natural backpressure to chatty clients.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from channels.db import database_sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for more writes before flushing a room's buffer.
+CHAT_WRITE_FLUSH_INTERVAL = getattr(settings, "CHAT_WRITE_FLUSH_INTERVAL", 0.02)
+# Upper bound on writes persisted per executor hop.
+CHAT_WRITE_MAX_BATCH = getattr(settings, "CHAT_WRITE_MAX_BATCH", 200)
+
+
+@dataclass
+class PendingMessage:
+    sender_id: int
+    sender_name: str
+    content: str
+    parent_id: int | None
+    future: asyncio.Future = field(repr=False)
+
+
+@dataclass
+class PendingReceipt:
+    message_id: int
+    user_id: int
+    future: asyncio.Future = field(repr=False)
+
+
+class RoomWriteBuffer:
+    """Per-room, per-process buffer that batches chat writes."""
+
+    def __init__(self, room_id, channel_layer, group_name):
+        self.room_id = int(room_id)
+        self.channel_layer = channel_layer
+        self.group_name = group_name
+        self.loop = asyncio.get_running_loop()
+        self.subscribers = 0
+        self._messages: list[PendingMessage] = []
+        self._receipts: list[PendingReceipt] = []
+        self._flush_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_idle(self):
+        return not self._messages and not self._receipts and (self._flush_task is None or self._flush_task.done())
+
+    async def submit_message(self, sender_id, sender_name, content, parent_id=None):
+        """Queue a message and wait until it is persisted and broadcast.
+
+        Returns the broadcast payload (including the new message id).
+        """
+        future = self.loop.create_future()
+        self._messages.append(PendingMessage(sender_id, sender_name, content, parent_id, future))
+        self._schedule_flush()
+        return await future
+
+    async def submit_read_receipt(self, message_id, user_id):
+        """Queue a read receipt; returns True if it newly marked the message as read."""
+        future = self.loop.create_future()
+        self._receipts.append(PendingReceipt(message_id, user_id, future))
+        self._schedule_flush()
+        return await future
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self.loop.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        if len(self._messages) + len(self._receipts) < CHAT_WRITE_MAX_BATCH:
+            await asyncio.sleep(CHAT_WRITE_FLUSH_INTERVAL)
+        await self.flush()
+
+    async def flush(self):
+        """Persist everything queued so far, batch by batch, in submission order."""
+        async with self._lock:
+            while self._messages or self._receipts:
+                messages = self._messages[:CHAT_WRITE_MAX_BATCH]
+                self._messages = self._messages[CHAT_WRITE_MAX_BATCH:]
+                receipts = self._receipts[:CHAT_WRITE_MAX_BATCH]
+                self._receipts = self._receipts[CHAT_WRITE_MAX_BATCH:]
+
+                try:
+                    payloads, marked = await self._persist(
+                        [(m.sender_id, m.content, m.parent_id) for m in messages],
+                        [(r.message_id, r.user_id) for r in receipts],
+                    )
+                except Exception as exc:
+                    logger.error(f"Chat write flush failed for room {self.room_id}: {exc}", exc_info=True)
+                    for pending in [*messages, *receipts]:
+                        if not pending.future.done():
+                            pending.future.set_exception(exc)
+                    continue
+
+                for pending, payload in zip(messages, payloads, strict=True):
+                    if isinstance(payload, Exception):
+                        pending.future.set_exception(payload)
+                        continue
+                    payload["sender_name"] = pending.sender_name
+                    # Broadcast strictly in insertion order, only after commit.
+                    try:
+                        await self.channel_layer.group_send(self.group_name, {"type": "chat_message", **payload})
+                    except Exception as exc:
+                        logger.error(f"Chat broadcast failed for message {payload['id']}: {exc}", exc_info=True)
+                        if not pending.future.done():
+                            pending.future.set_exception(exc)
+                        continue
+                    if not pending.future.done():
+                        pending.future.set_result(payload)
+
+                for pending in receipts:
+                    if pending.future.done():
+                        continue
+                    if isinstance(marked, Exception):
+                        pending.future.set_exception(marked)
+                    else:
+                        pending.future.set_result((pending.message_id, pending.user_id) in marked)
+
+    @database_sync_to_async
+    def _persist(self, messages, receipts):
+        """
+        Write one batch; returns (payloads, newly-marked receipt pairs).
+
+        Normally the whole batch is one transaction. When it fails, the writes
+        are retried one per transaction: a message that still fails gets its
+        exception in place of its payload, and failed receipts return the
+        exception instead of the marked pairs.
+        """
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                payloads = self._insert_messages(messages, now)
+                marked = self._apply_read_receipts(receipts, now) if receipts else set()
+            return payloads, marked
+        except DatabaseError as exc:
+            if len(messages) + len(receipts) <= 1:
+                raise
+            logger.warning(
+                f"Chat batch of {len(messages)} messages and {len(receipts)} receipts failed for room "
+                f"{self.room_id} ({exc}); retrying row by row"
+            )
+
+        payloads = []
+        for message in messages:
+            try:
+                with transaction.atomic():
+                    (payload,) = self._insert_messages([message], now)
+            except DatabaseError as exc:
+                logger.error(f"Dropping chat message from user {message[0]} in room {self.room_id}: {exc}")
+                payload = exc
+            payloads.append(payload)
+        try:
+            with transaction.atomic():
+                marked = self._apply_read_receipts(receipts, now) if receipts else set()
+        except DatabaseError as exc:
+            logger.error(f"Dropping {len(receipts)} read receipts in room {self.room_id}: {exc}")
+            marked = exc
+        return payloads, marked
+
+    def _insert_messages(self, messages, now):
+        from core.models import ChatMessage, ChatRoom
+
+        if not messages:
+            return []
+        # One bad reply reference must not fail the whole batch: drop parents outside this room.
+        parent_ids = {parent_id for _, _, parent_id in messages if parent_id is not None}
+        valid_parents = (
+            set(ChatMessage.objects.filter(id__in=parent_ids, room_id=self.room_id).values_list("id", flat=True))
+            if parent_ids
+            else set()
+        )
+        created = ChatMessage.objects.bulk_create(
+            [
+                ChatMessage(
+                    room_id=self.room_id,
+                    sender_id=sender_id,
+                    content=content,
+                    parent_id=parent_id if parent_id in valid_parents else None,
+                )
+                for sender_id, content, parent_id in messages
+            ]
+        )
+        # Debounced room ordering bump: one UPDATE per batch instead of a full save per message.
+        ChatRoom.objects.filter(id=self.room_id).update(updated_at=now)
+        return [
+            {
+                "id": message.id,
+                "content": content,
+                "sender_id": message.sender_id,
+                "created_at": message.created_at.isoformat(),
+                "parent_id": message.parent_id,
+            }
+            for message, (_, content, _) in zip(created, messages, strict=True)
+        ]
+
+    def _apply_read_receipts(self, receipts, now):
+        from core.models import ChatMessage
+
+        message_ids = {message_id for message_id, _ in receipts}
+        senders = dict(
+            ChatMessage.objects.filter(id__in=message_ids, room_id=self.room_id).values_list("id", "sender_id")
+        )
+        Through = ChatMessage.read_by.through
+        already_read = set(
+            Through.objects.filter(chatmessage_id__in=senders.keys(), user_id__in={u for _, u in receipts}).values_list(
+                "chatmessage_id", "user_id"
+            )
+        )
+
+        new_pairs = []
+        for message_id, user_id in dict.fromkeys(receipts):
+            # Only messages in this room, not sent by the reader, and not already read by them.
+            if message_id not in senders or senders[message_id] == user_id or (message_id, user_id) in already_read:
+                continue
+            new_pairs.append((message_id, user_id))
+
+        if new_pairs:
+            Through.objects.bulk_create(
+                [Through(chatmessage_id=message_id, user_id=user_id) for message_id, user_id in new_pairs],
+                ignore_conflicts=True,
+            )
+            ChatMessage.objects.filter(id__in={message_id for message_id, _ in new_pairs}).update(
+                is_read=True, read_at=now
+            )
+        return set(new_pairs)
+
+
+_buffers: dict[int, RoomWriteBuffer] = {}
+
+
+def acquire_room_buffer(room_id, channel_layer, group_name):
+    """Return the shared buffer for ``room_id`` on the running loop, registering a subscriber."""
+    loop = asyncio.get_running_loop()
+    buffer = _buffers.get(int(room_id))
+    if buffer is None or buffer.loop is not loop:
+        buffer = RoomWriteBuffer(room_id, channel_layer, group_name)
+        _buffers[int(room_id)] = buffer
+    buffer.subscribers += 1
+    return buffer
+
+
+async def release_room_buffer(buffer):
+    """Drop a subscriber; flush remaining writes and forget the buffer once nobody uses it."""
+    buffer.subscribers -= 1
+    if buffer.subscribers > 0:
+        return
+    await buffer.flush()
+    if buffer.subscribers <= 0 and buffer.is_idle and _buffers.get(buffer.room_id) is buffer:
+        del _buffers[buffer.room_id]
@@ -0,0 +1,187 @@
+"""Server-side coalescing of typing and presence events for chat rooms.
+
+Clients emit ``typing_start``/``typing_stop`` on keystrokes and
+``presence_update`` whenever focus changes. Relaying each frame as a
+``group_send`` fans it out through Redis to every member of the room, so a
+few chatty clients in a large group room generate most of the channel-layer
+traffic. This module reduces that to state changes:
+
+* ``TypingThrottle`` forwards at most one typing update per user per room per
+  ``CHAT_TYPING_THROTTLE_MS``. Repeats of the same state are dropped, and the
+  latest state is always delivered on the trailing edge, so a stop is never lost.
+* ``RoomPresence`` keeps each member's status in the shared cache (Redis in
+  production) under a TTL that client heartbeats refresh. A presence update
+  is broadcast only when the stored status actually changes. Connecting
+  clients receive a snapshot of the room instead of waiting for frames.
+  Members may be connected from several tabs or devices: live connections
+  are counted per (room, user), and a member goes offline only when the last
+  one leaves.
+
+The connection counter goes through the backends' sync ``incr``/``decr``
+(Redis ``INCR``/``DECR``, or LocMem under its lock). Their async variants
+are ``BaseCache``'s read-then-write, which loses counts when two tabs connect
+at the same time.
+"""
+
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from asgiref.sync import sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# Minimum interval between typing updates relayed for one user in one room.
+CHAT_TYPING_THROTTLE_MS = getattr(settings, "CHAT_TYPING_THROTTLE_MS", 1500)
+# Presence entries expire unless a heartbeat refreshes them within this many seconds.
+CHAT_PRESENCE_TTL = getattr(settings, "CHAT_PRESENCE_TTL", 60)
+
+
+class TypingThrottle:
+    """Throttle with trailing-edge delivery for one connection's typing state.
+
+    ``send`` is an async callable taking the event type to broadcast.
+    """
+
+    def __init__(self, send, interval_ms=None):
+        self._send = send
+        self._interval = (CHAT_TYPING_THROTTLE_MS if interval_ms is None else interval_ms) / 1000
+        self._last_sent_state = "typing_stop"
+        self._last_sent_at = 0.0
+        self._pending_state = None
+        self._timer: asyncio.Task | None = None
+
+    async def update(self, state):
+        """Record a typing frame from the client, broadcasting it if allowed."""
+        self._pending_state = state
+        if self._timer is not None and not self._timer.done():
+            # A trailing send is already scheduled; it will pick up the latest state.
+            return
+
+        wait = self._last_sent_at + self._interval - time.monotonic()
+        if wait <= 0:
+            await self._flush()
+        else:
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later(wait))
+
+    async def _flush_later(self, wait):
+        await asyncio.sleep(wait)
+        await self._flush()
+
+    async def _flush(self):
+        state, self._pending_state = self._pending_state, None
+        if state is None or state == self._last_sent_state:
+            return
+        self._last_sent_state = state
+        self._last_sent_at = time.monotonic()
+        try:
+            await self._send(state)
+        except Exception as e:
+            logger.warning(f"Typing broadcast failed: {e}")
+
+    async def close(self):
+        """Cancel any pending send; tell the room we stopped typing if we were."""
+        if self._timer is not None and not self._timer.done():
+            self._timer.cancel()
+        if self._last_sent_state == "typing_start":
+            self._pending_state = "typing_stop"
+            await self._flush()
+
+
+def presence_cache_key(room_id, user_id):
+    return f"chat:presence:{room_id}:{user_id}"
+
+
+def connections_cache_key(room_id, user_id):
+    return f"chat:presence:connections:{room_id}:{user_id}"
+
+
+class RoomPresence:
+    """Presence state for one connection, stored in the shared cache with a TTL."""
+
+    def __init__(self, room_id, user_id):
+        self.room_id = room_id
+        self.user_id = user_id
+        self.key = presence_cache_key(room_id, user_id)
+        self.connections_key = connections_cache_key(room_id, user_id)
+        self._last_refresh = 0.0
+
+    def _count_connection(self):
+        cache.add(self.connections_key, 0, CHAT_PRESENCE_TTL)
+        if cache.incr(self.connections_key) < 1:
+            # Left negative by a leave after the counter expired
+            cache.set(self.connections_key, 1, CHAT_PRESENCE_TTL)
+        else:
+            cache.touch(self.connections_key, CHAT_PRESENCE_TTL)
+
+    def _uncount_connection(self):
+        try:
+            remaining = cache.decr(self.connections_key)
+        except ValueError:
+            # Counter expired: no other connection has heartbeated since
+            return 0
+        cache.touch(self.connections_key, CHAT_PRESENCE_TTL)
+        return remaining
+
+    async def join(self):
+        """Count this connection among the user's live connections to the room."""
+        try:
+            await sync_to_async(self._count_connection)()
+        except Exception as e:
+            logger.warning(f"Presence connection count failed: {e}")
+
+    async def set_status(self, status):
+        """Store ``status`` and return True if it differs from what the room last saw."""
+        try:
+            previous = await cache.aget(self.key)
+            await cache.aset(self.key, status, CHAT_PRESENCE_TTL)
+        except Exception as e:
+            logger.warning(f"Presence cache write failed: {e}")
+            return True
+        self._last_refresh = time.monotonic()
+        return previous != status
+
+    async def heartbeat(self):
+        """Extend the presence TTL, at most a few times per TTL window."""
+        now = time.monotonic()
+        if now - self._last_refresh < CHAT_PRESENCE_TTL / 3:
+            return
+        self._last_refresh = now
+        try:
+            if not await cache.atouch(self.key, CHAT_PRESENCE_TTL):
+                # Entry expired (e.g. a long network stall); restore it.
+                await cache.aset(self.key, "online", CHAT_PRESENCE_TTL)
+            if not await cache.atouch(self.connections_key, CHAT_PRESENCE_TTL):
+                # Counter expired (no heartbeat for a whole TTL): count at least this connection
+                await cache.aadd(self.connections_key, 1, CHAT_PRESENCE_TTL)
+        except Exception as e:
+            logger.warning(f"Presence heartbeat failed: {e}")
+
+    async def leave(self):
+        """Uncount this connection; clear the status and return True if it was the user's last one."""
+        try:
+            remaining = await sync_to_async(self._uncount_connection)()
+        except Exception as e:
+            logger.warning(f"Presence connection count failed: {e}")
+            remaining = 0
+        if remaining > 0:
+            return False
+        try:
+            await cache.adelete(self.key)
+        except Exception as e:
+            logger.warning(f"Presence cache delete failed: {e}")
+        return True
+
+    @staticmethod
+    async def snapshot(room_id, member_ids):
+        """Return ``[{"user_id", "status"}]`` for members with a live presence entry."""
+        keys = {presence_cache_key(room_id, user_id): user_id for user_id in member_ids}
+        try:
+            statuses = await cache.aget_many(list(keys))
+        except Exception as e:
+            logger.warning(f"Presence snapshot failed: {e}")
+            return []
+        return [{"user_id": keys[key], "status": status} for key, status in statuses.items()]
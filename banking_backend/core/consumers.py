@@ -2,17 +2,32 @@
 Uses Django Channels with cookie-based JWT authentication.
 """
 
+import asyncio
 import json
-from django.utils import timezone
+import logging
+from collections import deque
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
-from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from core.channels_cache import aget_room_member_ids, ais_room_member
+from core.chat_buffer import acquire_room_buffer, release_room_buffer
+from core.chat_presence import RoomPresence, TypingThrottle
+from core.db_pool import ConnectionReleasingMixin
+from core.services.notifications import batching_enabled, build_frame, notification_group_name, unbatch
+
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
+NOTIFICATION_OUTBOX_LIMIT = getattr(settings, "NOTIFICATION_OUTBOX_LIMIT", 100)
+NOTIFICATION_SEND_TIMEOUT = getattr(settings, "NOTIFICATION_SEND_TIMEOUT", 10.0)
+
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(ConnectionReleasingMixin, AsyncWebsocketConsumer):
     """WebSocket consumer for real-time chat.
     Connects to a specific room and broadcasts messages.
     """
@@ -33,15 +48,43 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close(code=4003)
             return
 
+        # Resolve the (encrypted) display name once per connection, not per message
+        self.user_display_name = await self.load_display_name()
+
         # Join room group
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
 
+        # Share the room's write buffer with other connections in this process
+        self.write_buffer = acquire_room_buffer(self.room_id, self.channel_layer, self.room_group_name)
+
+        # Typing frames are throttled and presence is kept in the cache, not relayed raw
+        self.typing = TypingThrottle(self.broadcast_typing)
+        self.presence = RoomPresence(self.room_id, self.user.id)
+        await self.presence.join()
+
         await self.accept()
 
+        # Give the new client the room's current presence, then announce ourselves if that changed it
+        snapshot = await RoomPresence.snapshot(self.room_id, await aget_room_member_ids(self.room_id))
+        await self.send(
+            text_data=json.dumps(
+                {"type": "presence_snapshot", "users": [p for p in snapshot if p["user_id"] != self.user.id]}
+            )
+        )
+        await self.update_presence("online")
+
     async def disconnect(self, close_code):
+        if getattr(self, "typing", None) is not None:
+            await self.typing.close()
+        # Other tabs or devices of the same user keep them online
+        if getattr(self, "presence", None) is not None and await self.presence.leave():
+            await self.broadcast_presence("offline")
         # Leave room group
         if hasattr(self, "room_group_name"):
             await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        if getattr(self, "write_buffer", None) is not None:
+            await release_room_buffer(self.write_buffer)
+            self.write_buffer = None
 
     async def receive(self, text_data):
         """Handle incoming messages from WebSocket."""
@@ -54,35 +97,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 parent_id = data.get("parent_id")
                 if not content:
                     return
+                try:
+                    parent_id = int(parent_id) if parent_id is not None else None
+                except (TypeError, ValueError):
+                    parent_id = None
 
-                # Save message to database
-                message = await self.save_message(content, parent_id=parent_id)
-
-                # Broadcast to room
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "chat_message",
-                        "id": message["id"],
-                        "content": message["content"],
-                        "sender_id": message["sender_id"],
-                        "sender_name": message["sender_name"],
-                        "created_at": message["created_at"],
-                        "parent_id": parent_id,
-                    },
-                )
+                # Persisted and broadcast to the room by the write buffer, in order
+                await self.save_message(content, parent_id=parent_id)
 
             elif message_type in ["typing_start", "typing_stop"]:
-                # Broadcast typing indicator
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "typing_indicator",
-                        "event_type": message_type,
-                        "user_id": self.user.id,
-                        "user_name": self.user.get_full_name() or self.user.email,
-                    },
-                )
+                # Coalesced: at most one typing update per user per CHAT_TYPING_THROTTLE_MS
+                await self.typing.update(message_type)
 
             elif message_type in ["reaction_added", "reaction_removed"]:
                 # Persist reaction to database
@@ -116,15 +141,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 )
 
             elif message_type == "presence_update":
-                # User's online status
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "presence_broadcast",
-                        "user_id": self.user.id,
-                        "status": data.get("status", "online"),
-                    },
-                )
+                # User's online status; only changes are broadcast
+                await self.update_presence(str(data.get("status") or "online")[:20])
 
             elif message_type == "message_read":
                 # Handle read receipt from client
@@ -133,12 +151,36 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     await self.handle_read_receipt(message_id)
 
             elif message_type == "ping":
-                # Heartbeat from client
+                # Heartbeat from client keeps the presence entry alive
+                await self.presence.heartbeat()
                 await self.send(text_data=json.dumps({"type": "pong"}))
 
         except json.JSONDecodeError:
             pass
 
+    async def broadcast_typing(self, event_type):
+        """Relay a (throttled) typing state change to the room."""
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                "type": "typing_indicator",
+                "event_type": event_type,
+                "user_id": self.user.id,
+                "user_name": self.user_display_name,
+            },
+        )
+
+    async def update_presence(self, status):
+        """Store the user's presence and broadcast it only if it changed."""
+        if await self.presence.set_status(status):
+            await self.broadcast_presence(status)
+
+    async def broadcast_presence(self, status):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {"type": "presence_broadcast", "user_id": self.user.id, "status": status},
+        )
+
     async def chat_message(self, event):
         """Send message to WebSocket."""
         await self.send(
@@ -227,39 +269,35 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 },
             )
 
-    @database_sync_to_async
-    def mark_message_as_read(self, message_id):
-        """Update message read status in database."""
-        from .models import ChatMessage
+    async def mark_message_as_read(self, message_id):
+        """Update message read status in database.
 
+        Receipts are batched by the room's write buffer; only messages in this
+        room that were sent by someone else and not yet read by this user are marked.
+        """
         try:
-            message = ChatMessage.objects.get(id=message_id, room_id=self.room_id)
-            # Only mark if not already read by this user and not sent by this user
-            if message.sender_id != self.user.id:
-                if not message.read_by.filter(id=self.user.id).exists():
-                    message.is_read = True
-                    message.read_at = timezone.now()
-                    message.read_by.add(self.user)
-                    message.save()
-                    return True
-            return False
-        except ChatMessage.DoesNotExist:
+            message_id = int(message_id)
+        except (TypeError, ValueError):
             return False
+        return await self.write_buffer.submit_read_receipt(message_id, self.user.id)
 
-    @database_sync_to_async
-    def check_room_membership(self):
-        """Check if user is a member of the room."""
-        from .models import ChatRoom
+    async def load_display_name(self):
+        """Decrypt the sender name; the cached principal deliberately carries no profile data."""
+        user = await User.objects.only("first_name_encrypted", "last_name_encrypted", "email", "key_version").aget(
+            pk=self.user.id
+        )
+        return f"{user.first_name} {user.last_name}".strip() or user.email
 
-        return ChatRoom.objects.filter(id=self.room_id, members=self.user).exists()
+    async def check_room_membership(self):
+        """Check if user is a member of the room (cached, invalidated on membership changes)."""
+        return await ais_room_member(self.room_id, self.user.id)
 
-    @database_sync_to_async
-    def update_reaction(self, message_id, emoji, action="add"):
+    async def update_reaction(self, message_id, emoji, action="add"):
         """Persist reaction state to ChatMessage JSONField."""
         from .models import ChatMessage
 
         try:
-            message = ChatMessage.objects.get(id=message_id, room_id=self.room_id)
+            message = await ChatMessage.objects.only("id", "reactions").aget(id=message_id, room_id=self.room_id)
             reactions = message.reactions or {}
             user_id_str = str(self.user.id)
 
@@ -275,34 +313,31 @@ class ChatConsumer(AsyncWebsocketConsumer):
                         del reactions[emoji]
 
             message.reactions = reactions
-            message.save()
+            await message.asave(update_fields=["reactions"])
             return True
-        except ChatMessage.DoesNotExist:
+        except (ChatMessage.DoesNotExist, ValueError, TypeError):
             return False
 
-    @database_sync_to_async
-    def save_message(self, content, parent_id=None):
-        """Save message to database and return serialized data."""
-        from .models import ChatMessage, ChatRoom
-
-        room = ChatRoom.objects.get(id=self.room_id)
-        message = ChatMessage.objects.create(room=room, sender=self.user, content=content, parent_id=parent_id)
+    async def save_message(self, content, parent_id=None):
+        """Save message to database and return serialized data.
 
-        # Update room's updated_at for ordering
-        room.save()
+        The write buffer coalesces inserts from every connection in the room into
+        one ``bulk_create`` and broadcasts each message once it is committed.
+        """
+        return await self.write_buffer.submit_message(
+            self.user.id, self.user_display_name, content, parent_id=parent_id
+        )
 
-        return {
-            "id": message.id,
-            "content": message.content,
-            "sender_id": self.user.id,
-            "sender_name": f"{self.user.first_name} {self.user.last_name}".strip() or self.user.email,
-            "created_at": message.created_at.isoformat(),
-            "parent_id": parent_id,
-        }
 
+class NotificationConsumer(ConnectionReleasingMixin, AsyncWebsocketConsumer):
+    """WebSocket consumer for real-time user notifications (e.g. transactions).
 
-class NotificationConsumer(AsyncWebsocketConsumer):
-    """WebSocket consumer for real-time user notifications (e.g. transactions)."""
+    Frames are written by a per-connection sender task from a bounded outbox,
+    so a slow client never stalls the channel-layer receive loop. When the
+    outbox overflows the oldest frames are dropped and the client is told how
+    many with a ``notifications_dropped`` frame; a socket that cannot accept a
+    single frame within ``NOTIFICATION_SEND_TIMEOUT`` is closed (4008).
+    """
 
     async def connect(self):
         self.user = self.scope.get("user")
@@ -312,17 +347,62 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.close(code=4001)
             return
 
-        self.group_name = f"notifications_{self.user.id}"
+        self.group_name = notification_group_name(self.user.id)
+        self.start_outbox()
 
         # Join notifications group
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
+        sender = getattr(self, "sender_task", None)
+        if sender is not None and not sender.done():
+            sender.cancel()
         if hasattr(self, "group_name"):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
+    def start_outbox(self):
+        self.outbox = deque()
+        self.outbox_ready = asyncio.Event()
+        self.dropped_count = 0
+        self.sender_task = asyncio.get_running_loop().create_task(self.drain_outbox())
+
     async def send_notification(self, event):
-        """Send notification data to the client WebSocket."""
-        await self.send(text_data=json.dumps(event["data"]))
+        """Queue notification data for the client WebSocket, dropping the oldest ones if the client lags."""
+        for notification in unbatch(event["data"]):
+            if len(self.outbox) >= NOTIFICATION_OUTBOX_LIMIT:
+                self.outbox.popleft()
+                self.dropped_count += 1
+            self.outbox.append(notification)
+        self.outbox_ready.set()
+
+    async def drain_outbox(self):
+        while True:
+            await self.outbox_ready.wait()
+            self.outbox_ready.clear()
+            if self.dropped_count:
+                dropped, self.dropped_count = self.dropped_count, 0
+                logger.warning(f"Dropped {dropped} notification(s) for slow client of user {self.user.id}")
+                if not await self.send_frame({"type": "notifications_dropped", "count": dropped}):
+                    return
+            if not self.outbox:
+                continue
+            pending = list(self.outbox)
+            self.outbox.clear()
+            if batching_enabled():
+                # Everything that queued up while the previous write was in flight goes out as one frame.
+                frames = [build_frame(pending)]
+            else:
+                frames = pending
+            for frame in frames:
+                if not await self.send_frame(frame):
+                    return
 
+    async def send_frame(self, data):
+        try:
+            await asyncio.wait_for(self.send(text_data=json.dumps(data)), NOTIFICATION_SEND_TIMEOUT)
+        except TimeoutError:
+            logger.warning(f"Notification socket for user {self.user.id} stalled, closing")
+            await self.close(code=4008)
+            return False
+        return True
@@ -0,0 +1,100 @@
+"""Versioned per-member snapshot of the member dashboard.
+
+Mobile clients poll ``MemberDashboardView``, which used to recompute totals,
+accounts, recent transactions and the decrypted profile on every refresh.
+The rendered payload is now kept in the shared cache next to a per-member
+version key, and both are read in a single ``get_many`` round trip. The
+snapshot is served only while it was built under the current version;
+otherwise it is rebuilt on that request.
+
+Writes bump the version once they commit (``invalidate_member_dashboards``):
+``AccountService`` balance, open, lock and unlock changes,
+``TransactionService`` create and reject, and any save of the user row
+(profile edits, deactivation). The version is read *before* the dashboard
+queries run, so a snapshot built while a write was committing is stored under
+the old version and never served. Snapshots are always built from the
+primary: a lagging replica could pair old balances with the new version.
+"""
+
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on a snapshot's life when no write invalidates it (seconds).
+MEMBER_DASHBOARD_CACHE_TTL = getattr(settings, "MEMBER_DASHBOARD_CACHE_TTL", 300)
+
+
+def version_cache_key(user_id):
+    return f"member_dashboard:version:{user_id}"
+
+
+def snapshot_cache_key(user_id):
+    return f"member_dashboard:snapshot:{user_id}"
+
+
+async def aget_member_dashboard(user_id):
+    """
+    Return ``(version, payload)`` for ``user_id``.
+
+    ``payload`` is None when the snapshot is missing or stale; build a new one
+    and pass it to ``astore_member_dashboard`` with the returned ``version``.
+    ``version`` is None when the cache is unavailable (do not store).
+    """
+    version_key, snapshot_key = version_cache_key(user_id), snapshot_cache_key(user_id)
+    try:
+        cached = await cache.aget_many([version_key, snapshot_key])
+        version = cached.get(version_key)
+        if version is None:
+            # First visit or evicted version: any surviving snapshot is unusable
+            await cache.aadd(version_key, uuid.uuid4().hex, MEMBER_DASHBOARD_CACHE_TTL)
+            return await cache.aget(version_key), None
+    except Exception as e:
+        logger.warning(f"Member dashboard cache read failed: {e}")
+        return None, None
+
+    snapshot = cached.get(snapshot_key)
+    if snapshot is not None and snapshot["version"] == version:
+        return version, snapshot["payload"]
+    return version, None
+
+
+async def astore_member_dashboard(user_id, version, payload):
+    if version is None:
+        return
+    try:
+        await cache.aset(
+            snapshot_cache_key(user_id), {"version": version, "payload": payload}, MEMBER_DASHBOARD_CACHE_TTL
+        )
+    except Exception as e:
+        logger.warning(f"Member dashboard cache write failed: {e}")
+
+
+def _bump_versions(user_ids):
+    try:
+        cache.set_many(
+            {version_cache_key(user_id): uuid.uuid4().hex for user_id in user_ids}, MEMBER_DASHBOARD_CACHE_TTL
+        )
+    except Exception as e:
+        logger.warning(f"Member dashboard invalidation failed: {e}")
+
+
+def invalidate_member_dashboards(*user_ids):
+    """Mark the dashboards of ``user_ids`` stale once the current transaction commits."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        # Before the commit other requests would rebuild from (and re-cache) the old rows
+        transaction.on_commit(lambda: _bump_versions(user_ids))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """The snapshot embeds the serialized profile."""
+    invalidate_member_dashboards(instance.pk)
@@ -0,0 +1,125 @@
+"""Database connection pool metrics and connection hygiene for async consumers.
+
+``DATABASES["default"]`` uses psycopg 3's connection pool when it is installed
+(see settings). ``PoolCollector`` reads each pool's counters at scrape time and
+exports them to the default Prometheus registry:
+
+* ``django_db_pool_size`` / ``_available`` / ``_max_size``: connections open,
+  idle in the pool, and the configured ceiling;
+* ``django_db_pool_saturation``: connections in use as a fraction of
+  ``max_size``. At 1.0 new requests queue for a connection;
+* ``django_db_pool_requests_waiting`` plus the cumulative
+  ``django_db_pool_requests_wait_seconds`` and ``_requests`` counters; the
+  average wait is their ratio;
+* ``django_db_pool_timeouts`` and ``django_db_pool_connections_lost``.
+
+WebSocket consumers never go through the request_started/request_finished
+signals that return a request's connection, so ``ConnectionReleasingMixin``
+does it after every consumer message instead.
+"""
+
+import logging
+
+from django.db import close_old_connections, connections
+
+from asgiref.sync import sync_to_async
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+
+def pooled_aliases():
+    """Aliases of databases configured with a connection pool."""
+    return [alias for alias in connections.settings if connections.settings[alias].get("OPTIONS", {}).get("pool")]
+
+
+def pool_stats():
+    """Current ``psycopg_pool`` statistics per pooled alias."""
+    stats = {}
+    for alias in pooled_aliases():
+        pool = connections[alias].pool
+        if pool is not None:
+            stats[alias] = {**pool.get_stats(), "pool_max": pool.max_size}
+    return stats
+
+
+class PoolCollector:
+    """Prometheus collector exporting connection pool statistics at scrape time."""
+
+    def collect(self):
+        gauges = {
+            "size": GaugeMetricFamily("django_db_pool_size", "Connections currently open.", labels=["alias"]),
+            "available": GaugeMetricFamily(
+                "django_db_pool_available", "Idle connections ready in the pool.", labels=["alias"]
+            ),
+            "max_size": GaugeMetricFamily("django_db_pool_max_size", "Configured pool ceiling.", labels=["alias"]),
+            "saturation": GaugeMetricFamily(
+                "django_db_pool_saturation", "Connections in use as a fraction of max_size.", labels=["alias"]
+            ),
+            "waiting": GaugeMetricFamily(
+                "django_db_pool_requests_waiting", "Requests queued for a connection.", labels=["alias"]
+            ),
+        }
+        counters = {
+            "requests_num": CounterMetricFamily(
+                "django_db_pool_requests", "Connections requested from the pool.", labels=["alias"]
+            ),
+            "requests_wait_ms": CounterMetricFamily(
+                "django_db_pool_requests_wait_seconds", "Time spent waiting for a connection.", labels=["alias"]
+            ),
+            "requests_errors": CounterMetricFamily(
+                "django_db_pool_timeouts", "Requests that timed out waiting for a connection.", labels=["alias"]
+            ),
+            "connections_lost": CounterMetricFamily(
+                "django_db_pool_connections_lost", "Pooled connections found broken and replaced.", labels=["alias"]
+            ),
+        }
+        try:
+            stats = pool_stats()
+        except Exception as e:
+            logger.warning(f"Connection pool stats unavailable: {e}")
+            stats = {}
+
+        for alias, values in stats.items():
+            size, available, max_size = values.get("pool_size", 0), values.get("pool_available", 0), values["pool_max"]
+            gauges["size"].add_metric([alias], size)
+            gauges["available"].add_metric([alias], available)
+            gauges["max_size"].add_metric([alias], max_size)
+            gauges["saturation"].add_metric([alias], (size - available) / max_size if max_size else 0)
+            gauges["waiting"].add_metric([alias], values.get("requests_waiting", 0))
+            for key, family in counters.items():
+                value = values.get(key, 0)
+                family.add_metric([alias], value / 1000 if key.endswith("_ms") else value)
+
+        yield from gauges.values()
+        yield from counters.values()
+
+
+_collector = None
+
+
+def register_pool_metrics(registry=REGISTRY):
+    """Register ``PoolCollector`` once per process when any database is pooled."""
+    global _collector
+    if _collector is None and pooled_aliases():
+        _collector = PoolCollector()
+        registry.register(_collector)
+    return _collector
+
+
+class ConnectionReleasingMixin:
+    """
+    Consumer mixin returning database connections after each message.
+
+    The async ORM runs queries in the shared sync thread, where a connection
+    would otherwise stay checked out of the pool (or open, unpooled) for as
+    long as the WebSocket lives. Closing is a no-op when the message did not
+    touch the database.
+    """
+
+    async def dispatch(self, message):
+        try:
+            await super().dispatch(message)
+        finally:
+            await sync_to_async(close_old_connections)()
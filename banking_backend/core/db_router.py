@@ -0,0 +1,210 @@
+"""Read-replica routing for annotated read-only workloads.
+
+Everything reads from and writes to ``default`` unless code opts in with
+``read_from_replica()`` (a context manager and decorator) or, for DRF views,
+``ReplicaReadMixin``. Inside such a scope ``ReplicaRouter`` sends reads to one
+of ``settings.DATABASE_REPLICAS``, except:
+
+* inside ``transaction.atomic()`` on the primary (the transaction must see its
+  own writes, and ``select_for_update`` always goes to the primary anyway);
+* after the scope has written anything: later reads stay on the primary;
+* for a user who wrote in the last ``REPLICA_STICKY_SECONDS`` (read-your-writes,
+  recorded by ``core.middleware.replicas.ReplicaStickinessMiddleware``);
+* when a replica lags more than ``REPLICA_MAX_LAG_SECONDS`` or cannot be
+  reached. Lag is measured at most every ``REPLICA_LAG_CHECK_SECONDS`` per
+  replica and process.
+
+With no replicas configured every read goes to ``default``.
+"""
+
+import contextvars
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_MAX_LAG_SECONDS = getattr(settings, "REPLICA_MAX_LAG_SECONDS", 10.0)
+REPLICA_LAG_CHECK_SECONDS = getattr(settings, "REPLICA_LAG_CHECK_SECONDS", 5.0)
+REPLICA_STICKY_SECONDS = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+# Zero when the standby has replayed everything it received (an idle primary is not lag)
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+# Per request (middleware) or per read_from_replica() scope: {"wrote", "pinned", "parent"}
+_session = contextvars.ContextVar("replica_session", default=None)
+
+_lag = {}
+_lag_lock = threading.Lock()
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def sticky_cache_key(user_id):
+    return f"db_replica:sticky:{user_id}"
+
+
+@contextmanager
+def replica_session():
+    """Track writes for the duration of a request or task; reads after a write stay on the primary."""
+    # Writes in a nested session also count for the enclosing one (the request)
+    state = {"wrote": False, "pinned": False, "parent": _session.get()}
+    token = _session.set(state)
+    try:
+        yield state
+    finally:
+        _session.reset(token)
+
+
+@contextmanager
+def read_from_replica(independent=False):
+    """
+    Allow reads in this scope to be served by a replica (usable as a decorator).
+
+    ``independent=True`` declares that the reads do not depend on writes made
+    earlier in the enclosing request, so those writes do not pin them to the primary.
+    """
+    token = _replica_reads.set(True)
+    try:
+        if independent or _session.get() is None:
+            with replica_session():
+                yield
+        else:
+            yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary():
+    """Keep the rest of the current request or scope on the primary."""
+    state = _session.get()
+    if state is not None:
+        state["pinned"] = True
+
+
+def recently_wrote(user):
+    if not replica_aliases() or not getattr(user, "is_authenticated", False):
+        return False
+    try:
+        return bool(cache.get(sticky_cache_key(user.pk)))
+    except Exception as e:
+        logger.warning(f"Replica stickiness lookup failed, reading from primary: {e}")
+        return True
+
+
+def remember_write(user):
+    """Route ``user``'s replica-eligible reads to the primary for the next few seconds."""
+    if not getattr(user, "is_authenticated", False):
+        return
+    try:
+        cache.set(sticky_cache_key(user.pk), 1, REPLICA_STICKY_SECONDS)
+    except Exception as e:
+        logger.warning(f"Replica stickiness could not be recorded: {e}")
+
+
+def measure_lag(alias):
+    """Replication lag of ``alias`` in seconds; infinite when it cannot be measured."""
+    try:
+        conn = connections[alias]
+        if conn.vendor != "postgresql":
+            conn.ensure_connection()
+            return 0.0
+        with conn.cursor() as cursor:
+            cursor.execute(POSTGRES_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning(f"Replica {alias} lag check failed, reading from primary: {e}")
+        return math.inf
+
+
+def replica_lag(alias):
+    """Cached ``measure_lag``, re-measured every ``REPLICA_LAG_CHECK_SECONDS``."""
+    now = time.monotonic()
+    checked_at, lag = _lag.get(alias, (None, None))
+    if checked_at is not None and now - checked_at < REPLICA_LAG_CHECK_SECONDS:
+        return lag
+    with _lag_lock:
+        checked_at, lag = _lag.get(alias, (None, None))
+        if checked_at is None or now - checked_at >= REPLICA_LAG_CHECK_SECONDS:
+            lag = measure_lag(alias)
+            if lag > REPLICA_MAX_LAG_SECONDS:
+                logger.warning(f"Replica {alias} is {lag:.1f}s behind, reading from primary")
+            _lag[alias] = (now, lag)
+        return lag
+
+
+def healthy_replicas():
+    return [alias for alias in replica_aliases() if replica_lag(alias) <= REPLICA_MAX_LAG_SECONDS]
+
+
+class ReplicaRouter:
+    """Sends reads in ``read_from_replica()`` scopes to an up-to-date replica; everything else to default."""
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get():
+            return None
+        state = _session.get()
+        if state is not None and (state["wrote"] or state["pinned"]):
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replicas = healthy_replicas()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        state = _session.get()
+        while state is not None:
+            state["wrote"] = True
+            state = state["parent"]
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db not in replica_aliases()
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin: reads for safe-method requests may be served by a replica.
+
+    Applied to read-heavy dashboards and reports. The user's own recent writes
+    (see ``REPLICA_STICKY_SECONDS``) pin the request to the primary.
+    """
+
+    replica_methods = ("GET", "HEAD", "OPTIONS")
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in self.replica_methods or not replica_aliases():
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self._adispatch_from_replica(request, *args, **kwargs)
+        with read_from_replica():
+            return super().dispatch(request, *args, **kwargs)
+
+    async def _adispatch_from_replica(self, request, *args, **kwargs):
+        with read_from_replica():
+            return await super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if recently_wrote(request.user):
+            pin_to_primary()
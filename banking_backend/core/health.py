@@ -77,10 +77,13 @@ def check_cache():
         cache.delete(test_key)
 
         if result == test_value:
-            return {
+            status = {
                 "status": "healthy",
                 "message": "Cache connection successful",
             }
+            if hasattr(cache, "tier_stats"):
+                status["tiers"] = cache.tier_stats()
+            return status
         else:
             return {
                 "status": "degraded",
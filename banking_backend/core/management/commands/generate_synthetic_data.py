@@ -0,0 +1,703 @@
+"""Generate a large, realistic synthetic dataset for scale testing.
+
+Usage:
+    python manage.py generate_synthetic_data --users 200000 --transactions 10000000 --workers 8 --seed 42
+
+Creates staff and members with encrypted and hashed PII, their accounts, a
+skewed transaction history, loans with their disbursements, chat rooms with
+encrypted messages and audit log rows. Every row references rows created in
+the same run, and account balances match their completed transactions.
+
+Rows are written with explicit primary keys through PostgreSQL ``COPY`` (or
+batched ``INSERT`` statements on other databases), so backdated
+``created_at``/``timestamp`` values survive instead of being replaced by
+``auto_now_add``. Encryption runs in ``--workers`` processes while the main
+process writes the previous batch. The whole run is one transaction.
+
+The same ``--seed`` and sizes reproduce the same data, whatever the number of
+workers. Only the ciphertexts differ, since every encryption uses a fresh
+nonce, and timestamps are relative to when the command runs. Run it against a dedicated
+database: synthetic users share the ``@synthetic.coastal.test`` email domain
+and the command refuses to run twice on the same database.
+"""
+
+import io
+import json
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+import numpy as np
+
+from core.models import Account, ChatMessage, ChatRoom, Loan, Transaction
+from core.services.accounts import AccountService
+from core.utils.field_encryption import encrypt_field, hash_field
+from core.utils.secret_service import SecretManager
+from users.models import AuditLog, User
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_DOMAIN = "synthetic.coastal.test"
+# Account numbers follow the real Luhn layout under a branch code no real branch uses
+SYNTHETIC_BRANCH_CODE = "2299"
+MEMBER_NUMBER_ALPHABET = "ACDEFGHJKMNPQRTUVWXYZ234679"
+
+FIRST_NAMES = [
+    "Kwame", "Ama", "Kofi", "Akosua", "Yaw", "Abena", "Kwabena", "Adwoa", "Kwaku", "Efua",
+    "Kojo", "Esi", "Kwesi", "Akua", "Fiifi", "Yaa", "Nana", "Afia", "Ekow", "Araba",
+]
+LAST_NAMES = [
+    "Mensah", "Owusu", "Boateng", "Asante", "Osei", "Agyeman", "Appiah", "Addo", "Quaye", "Amoah",
+    "Ansah", "Darko", "Tetteh", "Ofori", "Sarpong", "Acheampong", "Badu", "Nkrumah", "Quartey", "Annan",
+]
+OCCUPATIONS = ["Trader", "Fisher", "Teacher", "Nurse", "Farmer", "Tailor", "Driver", "Carpenter", "Caterer", "Clerk"]
+TOWNS = [
+    ("Cape Coast", "Cape Coast"), ("Elmina", "Cape Coast"), ("Kasoa", "Accra"), ("Tema", "Accra"),
+    ("Takoradi", "Takoradi"),
+]
+LOAN_PURPOSES = ["Stock for market stall", "School fees", "Fishing equipment", "Farm inputs", "Shop renovation"]
+CHAT_LINES = [
+    "Good morning, please can you come for my susu today?",
+    "I will pass by the market at 11.",
+    "Has my deposit reflected?",
+    "Yes, it is on your account now.",
+    "Please what is my balance?",
+    "I want to ask about the loan.",
+    "Thank you very much.",
+    "I am not home today, come tomorrow.",
+]
+
+ACCOUNT_TYPES = (["daily_susu", "member_savings", "youth_savings", "shares"], [0.55, 0.3, 0.05, 0.1])
+TRANSACTION_TYPES = (["deposit", "withdrawal", "transfer", "payment", "fee"], [0.42, 0.26, 0.22, 0.06, 0.04])
+LOAN_STATUSES = (
+    ["pending", "approved", "active", "paid_off", "defaulted", "rejected"],
+    [0.1, 0.05, 0.45, 0.3, 0.04, 0.06],
+)
+AUDITED_MODELS = ["Transaction", "Account", "Loan", "User"]
+AUDITED_CHANGES = {
+    "Transaction": {"status": ["pending_approval", "completed"]},
+    "Account": {"is_active": [True, False]},
+    "Loan": {"status": ["pending", "approved"]},
+    "User": {"is_approved": [False, True]},
+}
+MODELS = [User, Account, Transaction, Loan, ChatRoom, ChatRoom.members.through, ChatMessage, AuditLog]
+
+DAY = 86400.0
+
+
+def _init_worker():
+    """Set up Django in a spawned encryption worker; forked workers inherit it."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _encrypt_rows(job):
+    """Encrypt one batch of plaintext rows; ``hashed`` columns are followed by their HMAC."""
+    rows, hashed, version = job
+    encrypted = []
+    for row in rows:
+        values = []
+        for value, with_hash in zip(row, hashed, strict=True):
+            values.append(encrypt_field(value, version=version) if value else "")
+            if with_hash:
+                values.append(hash_field(value) if value else "")
+        encrypted.append(values)
+    return encrypted
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_text(value):
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return str(value).translate(_COPY_ESCAPES)
+
+
+class TableWriter:
+    """Append rows to one table with ``COPY`` on PostgreSQL or batched ``INSERT`` elsewhere.
+
+    ``columns`` name the values in every row. Other non-null columns are filled
+    with the field's default, as ``Model.save()`` would.
+    """
+
+    def __init__(self, model, columns, use_copy):
+        fields = {f.column: f for f in model._meta.concrete_fields}
+        self.constants = []
+        for column, field in fields.items():
+            if column in columns or field.null:
+                continue
+            default = field.get_default()
+            if default is None:
+                raise CommandError(f"{model.__name__}.{field.name} needs a value from the generator")
+            if field.get_internal_type() == "JSONField":
+                default = json.dumps(default)
+            elif isinstance(default, Decimal):
+                default = str(default)
+            self.constants.append((column, default))
+
+        self.table = model._meta.db_table
+        self.columns = list(columns) + [column for column, _ in self.constants]
+        self.suffix = tuple(value for _, value in self.constants)
+        self.use_copy = use_copy
+        self.rows = 0
+
+    def write(self, rows):
+        rows = [tuple(row) + self.suffix for row in rows]
+        if not rows:
+            return
+        quote = connection.ops.quote_name
+        names = ", ".join(quote(column) for column in self.columns)
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                buffer = io.StringIO("".join("\t".join(map(_copy_text, row)) + "\n" for row in rows))
+                sql = f"COPY {quote(self.table)} ({names}) FROM STDIN"
+                raw = cursor.cursor
+                if hasattr(raw, "copy_expert"):  # psycopg2
+                    raw.copy_expert(sql, buffer)
+                else:  # psycopg 3
+                    with raw.copy(sql) as copy:
+                        copy.write(buffer.getvalue())
+            else:
+                placeholders = ", ".join(["%s"] * len(self.columns))
+                cursor.executemany(f"INSERT INTO {quote(self.table)} ({names}) VALUES ({placeholders})", rows)
+        self.rows += len(rows)
+
+
+def _timestamps(seconds):
+    """Format epoch seconds as timestamps the current database accepts for a datetime column."""
+    micros = np.asarray(np.round(np.asarray(seconds, dtype=np.float64) * 1e6), dtype="int64")
+    values = np.datetime_as_string(micros.astype("datetime64[us]"), unit="us").tolist()
+    # SQLite stores naive UTC text when USE_TZ is on; PostgreSQL wants the offset
+    suffix = "+00:00" if connection.vendor == "postgresql" else ""
+    return [value.replace("T", " ") + suffix for value in values]
+
+
+def _money(cents):
+    return np.char.mod("%.2f", np.asarray(cents, dtype=np.float64) / 100).tolist()
+
+
+def _member_number(index):
+    """Unique for every index: multiplying by a unit modulo 27**10 is a bijection."""
+    value = (index * 127_381_591_442_389) % len(MEMBER_NUMBER_ALPHABET) ** 10
+    chars = []
+    for _ in range(10):
+        value, digit = divmod(value, len(MEMBER_NUMBER_ALPHABET))
+        chars.append(MEMBER_NUMBER_ALPHABET[digit])
+    return "CB-" + "".join(chars)
+
+
+def _account_number(index):
+    partial = f"{SYNTHETIC_BRANCH_CODE}{(index * 48271) % 10**8:08d}"
+    return f"{partial}{AccountService._calculate_luhn(partial)}"
+
+
+def _batches(total, size):
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+class Command(BaseCommand):
+    help = "Generate a large synthetic dataset (users, accounts, transactions, loans, chat, audit) for scale testing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000, help="Users to create, staff included.")
+        parser.add_argument(
+            "--transactions", type=int, default=1_000_000, help="Transactions besides loan disbursements."
+        )
+        parser.add_argument("--loan-ratio", type=float, default=0.15, help="Share of members with a loan.")
+        parser.add_argument("--chat-rooms", type=int, default=None, help="Member/banker rooms (default: members / 5).")
+        parser.add_argument("--messages-per-room", type=float, default=12, help="Mean messages per chat room.")
+        parser.add_argument("--audit-rows", type=int, default=None, help="Audit log rows (default: transactions / 5).")
+        parser.add_argument("--history-days", type=int, default=730, help="Days over which members join.")
+        parser.add_argument("--seed", type=int, default=20240601)
+        parser.add_argument("--batch-size", type=int, default=20_000, help="Rows generated and written per batch.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(1, (multiprocessing.cpu_count() or 2) - 1),
+            help="Encryption processes; 1 encrypts in this process.",
+        )
+        parser.add_argument("--method", choices=["auto", "copy", "insert"], default="auto")
+        parser.add_argument("--password", default=None, help="Password for every user (default: unusable).")
+        parser.add_argument("--key-version", type=int, default=1, help="Encryption key version for the PII.")
+
+    def handle(self, *args, **options):
+        if options["users"] < 8:
+            raise CommandError("--users must be at least 8 to cover every staff role and some members.")
+        if User.objects.filter(email__endswith="@" + SYNTHETIC_DOMAIN).exists():
+            raise CommandError(f"Synthetic users (@{SYNTHETIC_DOMAIN}) already exist; use a fresh database.")
+
+        use_copy = connection.vendor == "postgresql" and options["method"] != "insert"
+        if options["method"] == "copy" and not use_copy:
+            raise CommandError("--method copy needs PostgreSQL.")
+
+        self.options = options
+        self.seed = options["seed"]
+        self.batch_size = options["batch_size"]
+        self.use_copy = use_copy
+        self.now = timezone.now().timestamp()
+        self.threshold_cents = int(getattr(settings, "TRANSACTION_APPROVAL_THRESHOLD", Decimal("5000.00")) * 100)
+        self.key_version = options["key_version"]
+
+        # Resolve the keys once here so forked workers inherit them (and the same ephemeral dev key)
+        SecretManager.get_encryption_key(version=self.key_version)
+        SecretManager.get_hash_key()
+
+        started = time.monotonic()
+        with transaction.atomic(), self.encryptor(options["workers"]) as encrypt:
+            self.encrypt = encrypt
+            self.next_ids = {model: (model.objects.aggregate(top=Max("id"))["top"] or 0) + 1 for model in MODELS}
+            self.first_ids = dict(self.next_ids)
+            self.step("users", self.create_users)
+            self.plan_accounts()
+            self.step("loans", self.create_loans)
+            self.step("transactions", self.create_transactions)
+            # Accounts go in last so their balances can include every transaction; the FKs are deferred
+            self.step("accounts", self.create_accounts)
+            self.step("chat messages", self.create_chat)
+            self.step("audit rows", self.create_audit)
+            self.reset_sequences()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Synthetic dataset generated in {time.monotonic() - started:.1f}s (seed {self.seed}).")
+        )
+
+    @contextmanager
+    def encryptor(self, workers):
+        if workers <= 1:
+            yield lambda jobs: map(_encrypt_rows, jobs)
+            return
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            yield lambda jobs: pool.map(_encrypt_rows, jobs)
+
+    def step(self, label, create):
+        started = time.monotonic()
+        rows = create()
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"  {rows:>12,} {label:<14} {elapsed:8.1f}s  {rows / max(elapsed, 1e-9):>12,.0f} rows/s")
+
+    def rng(self, *stream):
+        """An independent, reproducible random stream per phase and batch."""
+        return np.random.default_rng([self.seed, *stream])
+
+    def allocate(self, model, count):
+        start = self.next_ids[model]
+        self.next_ids[model] = start + count
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def writer(self, model, columns):
+        return TableWriter(model, columns, self.use_copy)
+
+    def jobs(self, chunks, hashed):
+        return [(rows, hashed, self.key_version) for rows in chunks]
+
+    # Users
+
+    def create_users(self):
+        total = self.options["users"]
+        rng = self.rng(1)
+        staff = max(4, total // 250)
+        roles = np.array(["cashier", "mobile_banker", "manager"])[np.arange(staff) % 3]
+        self.user_ids = self.allocate(User, total)
+        self.staff = {role: self.user_ids[:staff][roles == role] for role in ("cashier", "mobile_banker", "manager")}
+        self.member_ids = self.user_ids[staff:]
+        members = len(self.member_ids)
+
+        # Staff joined before the window; members join over it, more of them recently
+        history = self.options["history_days"] * DAY
+        self.member_joined = self.now - DAY - (history - DAY) * (1 - rng.power(1.6, members))
+        joined = np.concatenate([self.now - history - rng.uniform(DAY, 365 * DAY, staff), self.member_joined])
+        self.assigned_banker = rng.choice(self.staff["mobile_banker"], members)
+
+        first = rng.integers(0, len(FIRST_NAMES), total)
+        last = rng.integers(0, len(LAST_NAMES), total)
+        birth_years = rng.integers(1955, 2005, total)
+        birth_days = rng.integers(1, 28, total)
+        birth_months = rng.integers(1, 13, total)
+        occupations = rng.integers(0, len(OCCUPATIONS), total)
+        genders = rng.choice(["M", "F"], total)
+        password = make_password(self.options["password"])
+        date_joined = _timestamps(joined)
+
+        hashed = (True, True, True, True, True, False, False, False)
+        columns = [
+            "id", "password", "is_superuser", "username", "is_staff", "is_active", "date_joined", "role", "gender",
+            "email", "is_approved", "member_number", "id_type", "assigned_banker_id", "key_version",
+            "first_name_encrypted", "first_name_hash", "last_name_encrypted", "last_name_hash",
+            "phone_number_encrypted", "phone_number_hash", "id_number_encrypted", "id_number_hash",
+            "staff_id_encrypted", "staff_id_hash", "date_of_birth_encrypted", "digital_address_encrypted",
+            "occupation_encrypted",
+        ]  # fmt: skip
+        writer = self.writer(User, columns)
+
+        plain, meta = [], []
+        for start, count in _batches(total, self.batch_size):
+            rows, plain_rows = [], []
+            for i in range(start, start + count):
+                user_id = int(self.user_ids[i])
+                is_staff = i < staff
+                role = str(roles[i]) if is_staff else "customer"
+                rows.append(
+                    [
+                        user_id, password, False, f"synthetic_{i}", is_staff, True, date_joined[i], role,
+                        str(genders[i]), f"synthetic.{i}@{SYNTHETIC_DOMAIN}", True,
+                        None if is_staff else _member_number(i), "ghana_card",
+                        None if is_staff else int(self.assigned_banker[i - staff]), self.key_version,
+                    ]
+                )  # fmt: skip
+                plain_rows.append(
+                    (
+                        FIRST_NAMES[first[i]],
+                        LAST_NAMES[last[i]],
+                        f"+233{200_000_000 + (i * 7919) % 700_000_000}",
+                        f"GHA-{(i * 104729) % 10**9:09d}-{i % 10}",
+                        f"STF{i:05d}" if is_staff else "",
+                        f"{birth_years[i]}-{birth_months[i]:02d}-{birth_days[i]:02d}",
+                        f"CC-{(i * 31) % 1000:03d}-{(i * 7) % 10000:04d}",
+                        "" if is_staff else OCCUPATIONS[occupations[i]],
+                    )
+                )
+            plain.append(plain_rows)
+            meta.append(rows)
+
+        self.first_names = [FIRST_NAMES[n] for n in first[staff:]]
+        for rows, encrypted in zip(meta, self.encrypt(self.jobs(plain, hashed)), strict=True):
+            writer.write(row + values for row, values in zip(rows, encrypted, strict=True))
+        return writer.rows
+
+    # Accounts
+
+    def plan_accounts(self):
+        """Pick every member's accounts now; they are written once the balances are known."""
+        rng = self.rng(2)
+        members = len(self.member_ids)
+        per_member = 1 + rng.binomial(2, 0.25, members)
+        self.account_owner = np.repeat(np.arange(members), per_member)
+        count = len(self.account_owner)
+        self.account_ids = self.allocate(Account, count)
+        self.account_types = rng.choice(ACCOUNT_TYPES[0], count, p=ACCOUNT_TYPES[1])
+        self.account_opened = self.member_joined[self.account_owner] + rng.uniform(60, 7 * DAY, count)
+        self.account_opened = np.minimum(self.account_opened, self.now - 3600)
+        # Heavy-tailed activity: a few accounts see most of the traffic
+        activity = rng.pareto(1.2, count) + 1
+        self.activity = activity / activity.sum()
+        self.net_cents = np.zeros(count, dtype=np.float64)
+        self.primary_account = np.searchsorted(self.account_owner, np.arange(members))
+
+    def create_accounts(self):
+        rng = self.rng(3)
+        count = len(self.account_ids)
+        # Start every account with enough to have covered its history, plus a cushion
+        cushion = np.round(rng.lognormal(np.log(20_000), 1.0, count))
+        initial = np.maximum(0, -self.net_cents) + cushion
+        balance = initial + self.net_cents
+        opened = _timestamps(self.account_opened)
+        initial, balance = _money(initial), _money(balance)
+        owners = self.member_ids[self.account_owner]
+
+        writer = self.writer(
+            Account,
+            ["id", "user_id", "account_number", "account_type", "initial_balance", "balance", "is_active",
+             "created_at", "updated_at"],
+        )  # fmt: skip
+        for start, size in _batches(count, self.batch_size):
+            writer.write(
+                (
+                    int(self.account_ids[i]), int(owners[i]), _account_number(int(self.account_ids[i])),
+                    str(self.account_types[i]), initial[i], balance[i], True, opened[i], opened[i],
+                )
+                for i in range(start, start + size)
+            )  # fmt: skip
+        return writer.rows
+
+    # Transactions
+
+    def transaction_writer(self):
+        return self.writer(
+            Transaction,
+            ["id", "from_account_id", "to_account_id", "amount", "transaction_type", "description", "status",
+             "timestamp", "processed_at", "processed_by_id", "approved_by_id", "approval_date",
+             "is_flagged_for_review"],
+        )  # fmt: skip
+
+    def create_transactions(self):
+        writer = self.transaction_writer()
+        account_count = len(self.account_ids)
+        tellers = np.concatenate([self.staff["cashier"], self.staff["mobile_banker"]])
+        managers = self.staff["manager"]
+
+        for batch, (_, count) in enumerate(_batches(self.options["transactions"], self.batch_size)):
+            rng = self.rng(4, batch)
+            kind = rng.choice(TRANSACTION_TYPES[0], count, p=TRANSACTION_TYPES[1])
+            account = rng.choice(account_count, count, p=self.activity)
+            counterparty = rng.choice(account_count, count, p=self.activity)
+            counterparty = np.where(counterparty == account, (counterparty + 1) % account_count, counterparty)
+            cents = np.minimum(np.round(rng.lognormal(np.log(15_000), 1.1, count)), 2_000_000 * 100)
+            cents = np.where(kind == "fee", np.round(rng.uniform(100, 2_000, count)), cents)
+
+            # Recent activity dominates within the lifetime of every account involved
+            opened = self.account_opened[account]
+            opened = np.where(kind == "transfer", np.maximum(opened, self.account_opened[counterparty]), opened)
+            when = self.now - (self.now - opened) * rng.random(count) ** 2
+            when = np.maximum(when, opened + 1)
+
+            large = cents > self.threshold_cents
+            roll = rng.random(count)
+            status = np.where(roll < 0.01, "failed", "completed").astype(object)
+            status[large & (roll < 0.07)] = "pending_approval"
+            status[large & (roll >= 0.07) & (roll < 0.1)] = "cancelled"
+            status[roll > 0.999] = "reversed"
+            approved = large & ((status == "completed") | (status == "reversed"))
+
+            incoming = kind == "deposit"
+            from_account = np.where(incoming, -1, account)
+            to_account = np.where(incoming, account, np.where(kind == "transfer", counterparty, -1))
+            counter = np.isin(kind, ["deposit", "withdrawal"])
+            processed_by = np.where(counter, rng.choice(tellers, count), -1)
+            approver = np.where(approved, rng.choice(managers, count), -1)
+            approval_when = when + rng.uniform(60, 4 * 3600, count)
+
+            completed = status == "completed"
+            debit, credit = completed & (from_account >= 0), completed & (to_account >= 0)
+            self.net_cents -= np.bincount(from_account[debit], weights=cents[debit], minlength=account_count)
+            self.net_cents += np.bincount(to_account[credit], weights=cents[credit], minlength=account_count)
+
+            ids = self.allocate(Transaction, count).tolist()
+            amounts, stamps, approvals = _money(cents), _timestamps(when), _timestamps(approval_when)
+            account_ids = self.account_ids
+            flagged = (rng.random(count) < 0.002).tolist()
+            rows = []
+            for i in range(count):
+                source, target = from_account[i], to_account[i]
+                done = status[i] == "completed" or status[i] == "reversed"
+                rows.append(
+                    (
+                        ids[i], int(account_ids[source]) if source >= 0 else None,
+                        int(account_ids[target]) if target >= 0 else None, amounts[i], kind[i],
+                        f"Synthetic {kind[i]}", status[i], stamps[i], approvals[i] if done else None,
+                        int(processed_by[i]) if processed_by[i] >= 0 else None,
+                        int(approver[i]) if approver[i] >= 0 else None, approvals[i] if approver[i] >= 0 else None,
+                        flagged[i],
+                    )
+                )  # fmt: skip
+            writer.write(rows)
+        return writer.rows
+
+    # Loans
+
+    def create_loans(self):
+        rng = self.rng(5)
+        members = len(self.member_ids)
+        borrowers = np.flatnonzero(rng.random(members) < self.options["loan_ratio"])
+        count = len(borrowers)
+        ids = self.allocate(Loan, count).tolist()
+        status = rng.choice(LOAN_STATUSES[0], count, p=LOAN_STATUSES[1])
+        cents = np.round(rng.lognormal(np.log(300_000), 0.8, count) / 1000) * 1000
+        rates = rng.choice([12, 15, 18, 24], count)
+        terms = rng.choice([3, 6, 12, 18, 24], count)
+        joined = self.member_joined[borrowers]
+        created = joined + (self.now - joined) * rng.random(count)
+        approved_at = created + rng.uniform(DAY, 10 * DAY, count)
+        # Paid out into the member's first account, so not before it was opened
+        approved_at = np.maximum(approved_at, self.account_opened[self.primary_account[borrowers]] + 60)
+        approved_at = np.minimum(approved_at, self.now - 60)
+        disbursed = np.isin(status, ["approved", "active", "paid_off", "defaulted"])
+        repaid = np.where(status == "active", rng.uniform(0.1, 0.9, count), 1.0)
+        repaid = np.where(status == "defaulted", rng.uniform(0.0, 0.4, count), repaid)
+        outstanding = np.where(
+            np.isin(status, ["active", "defaulted"]), np.round(cents * (1 + rates / 100) * (1 - repaid)), 0
+        )
+        outstanding = np.where(status == "approved", cents, outstanding)
+        incomes = np.round(rng.lognormal(np.log(150_000), 0.6, count))
+        managers = self.staff["manager"]
+        approvers = rng.choice(managers, count)
+        relationships = rng.choice(["Spouse", "Sibling", "Parent", "Child"], count)
+        towns = rng.integers(0, len(TOWNS), count)
+        purposes = rng.integers(0, len(LOAN_PURPOSES), count)
+        names = rng.integers(0, len(FIRST_NAMES) * len(LAST_NAMES), (count, 2))
+
+        columns = [
+            "id", "user_id", "requested_by_id", "amount", "interest_rate", "term_months", "purpose", "town", "city",
+            "next_of_kin_1_relationship", "monthly_income", "outstanding_balance", "status", "processed_by_id",
+            "approved_by_id", "approved_at", "created_at", "updated_at", "key_version",
+            "date_of_birth_encrypted", "id_number_encrypted", "id_number_hash", "digital_address_encrypted",
+            "next_of_kin_1_name_encrypted", "next_of_kin_1_phone_encrypted", "guarantor_1_name_encrypted",
+            "guarantor_1_id_number_encrypted", "guarantor_1_id_number_hash", "guarantor_1_phone_encrypted",
+        ]  # fmt: skip
+        hashed = (False, True, False, False, False, False, True, False)
+        writer = self.writer(Loan, columns)
+        amounts, stamps, approvals = _money(cents), _timestamps(created), _timestamps(approved_at)
+        outstanding_text, incomes = _money(outstanding), _money(incomes)
+
+        def person(n):
+            return f"{FIRST_NAMES[n % len(FIRST_NAMES)]} {LAST_NAMES[n // len(FIRST_NAMES)]}"
+
+        plain, meta = [], []
+        for start, size in _batches(count, self.batch_size):
+            rows, plain_rows = [], []
+            for i in range(start, start + size):
+                member = int(borrowers[i])
+                index = member + len(self.user_ids) - members  # the borrower's index among all users
+                decided = status[i] != "pending"
+                town, city = TOWNS[towns[i]]
+                rows.append(
+                    [
+                        ids[i], int(self.member_ids[member]), int(self.assigned_banker[member]), amounts[i],
+                        f"{rates[i]:.2f}", int(terms[i]), LOAN_PURPOSES[purposes[i]], town, city,
+                        str(relationships[i]), incomes[i], outstanding_text[i], str(status[i]),
+                        int(approvers[i]) if decided else None, int(approvers[i]) if disbursed[i] else None,
+                        approvals[i] if disbursed[i] else None, stamps[i], approvals[i] if decided else stamps[i],
+                        self.key_version,
+                    ]
+                )  # fmt: skip
+                plain_rows.append(
+                    (
+                        f"{1960 + index % 40}-{1 + index % 12:02d}-{1 + index % 27:02d}",
+                        f"GHA-{(index * 104729) % 10**9:09d}-{index % 10}",
+                        f"CC-{(index * 31) % 1000:03d}-{(index * 7) % 10000:04d}",
+                        person(int(names[i, 0])),
+                        f"+233{200_000_000 + (index * 6007 + 13) % 700_000_000}",
+                        person(int(names[i, 1])),
+                        f"GHA-{(index * 7727 + 11) % 10**9:09d}-{(index + 3) % 10}",
+                        f"+233{200_000_000 + (index * 4111 + 29) % 700_000_000}",
+                    )
+                )
+            plain.append(plain_rows)
+            meta.append(rows)
+
+        for rows, encrypted in zip(meta, self.encrypt(self.jobs(plain, hashed)), strict=True):
+            writer.write(row + values for row, values in zip(rows, encrypted, strict=True))
+
+        # Every loan that went out has its disbursement
+        payouts = self.transaction_writer()
+        out = np.flatnonzero(disbursed)
+        accounts = self.primary_account[borrowers[out]]
+        np.add.at(self.net_cents, accounts, cents[out])
+        payout_ids = self.allocate(Transaction, len(out)).tolist()
+        payouts.write(
+            (
+                payout_ids[n], None, int(self.account_ids[accounts[n]]), amounts[i], "disbursement",
+                f"Loan disbursement #{ids[i]}", "completed", approvals[i], approvals[i],
+                int(self.assigned_banker[borrowers[i]]), int(approvers[i]), approvals[i], False,
+            )
+            for n, i in enumerate(out.tolist())
+        )  # fmt: skip
+        return writer.rows
+
+    # Chat
+
+    def create_chat(self):
+        rng = self.rng(6)
+        members = len(self.member_ids)
+        rooms = self.options["chat_rooms"]
+        rooms = min(members, members // 5 if rooms is None else rooms)
+        chosen = np.sort(rng.choice(members, rooms, replace=False))
+        room_ids = self.allocate(ChatRoom, rooms).tolist()
+        opened = self.member_joined[chosen] + rng.uniform(DAY, 30 * DAY, rooms)
+        opened = np.minimum(opened, self.now - 3600)
+        messages = rng.poisson(self.options["messages_per_room"], rooms)
+        stamps = _timestamps(opened)
+
+        room_writer = self.writer(ChatRoom, ["id", "name", "is_group", "created_by_id", "created_at", "updated_at"])
+        room_writer.write(
+            (room_ids[r], None, False, int(self.member_ids[m]), stamps[r], stamps[r]) for r, m in enumerate(chosen)
+        )
+        through = ChatRoom.members.through
+        member_ids = self.allocate(through, rooms * 2).tolist()
+        member_writer = self.writer(through, ["id", "chatroom_id", "user_id"])
+        member_writer.write(
+            (member_ids[2 * r + side], room_ids[r], int(user))
+            for r, m in enumerate(chosen)
+            for side, user in enumerate((self.member_ids[m], self.assigned_banker[m]))
+        )
+
+        room_of = np.repeat(np.arange(rooms), messages)
+        total = len(room_of)
+        message_ids = self.allocate(ChatMessage, total).tolist()
+        sent = opened[room_of] + (self.now - opened[room_of]) * np.sort(rng.random(total))
+        from_member = rng.random(total) < 0.55
+        lines = rng.integers(0, len(CHAT_LINES), total)
+        sent_text = _timestamps(sent)
+        writer = self.writer(ChatMessage, ["id", "room_id", "sender_id", "is_read", "created_at", "content_encrypted"])
+
+        plain, meta = [], []
+        for start, size in _batches(total, self.batch_size):
+            rows, plain_rows = [], []
+            for i in range(start, start + size):
+                member = chosen[room_of[i]]
+                sender = self.member_ids[member] if from_member[i] else self.assigned_banker[member]
+                read = bool(sent[i] < self.now - DAY)
+                rows.append([message_ids[i], room_ids[room_of[i]], int(sender), read, sent_text[i]])
+                plain_rows.append((CHAT_LINES[lines[i]],))
+            plain.append(plain_rows)
+            meta.append(rows)
+
+        for rows, encrypted in zip(meta, self.encrypt(self.jobs(plain, (False,))), strict=True):
+            writer.write(row + values for row, values in zip(rows, encrypted, strict=True))
+        return writer.rows
+
+    # Audit log
+
+    def create_audit(self):
+        total = self.options["audit_rows"]
+        total = self.options["transactions"] // 5 if total is None else total
+        staff = np.concatenate(list(self.staff.values()))
+        # Audited objects are rows of this run: (first id, how many)
+        ranges = {
+            name: (self.first_ids[model], self.next_ids[model] - self.first_ids[model])
+            for name, model in zip(AUDITED_MODELS, (Transaction, Account, Loan, User), strict=True)
+        }
+        writer = self.writer(
+            AuditLog,
+            ["id", "user_id", "action", "model_name", "object_id", "object_repr", "changes", "ip_address",
+             "created_at"],
+        )  # fmt: skip
+        start_of_history = self.now - self.options["history_days"] * DAY
+        for batch, (_, count) in enumerate(_batches(total, self.batch_size)):
+            rng = self.rng(7, batch)
+            ids = self.allocate(AuditLog, count).tolist()
+            users = rng.choice(staff, count).tolist()
+            actions = rng.choice(["create", "update", "delete"], count, p=[0.5, 0.45, 0.05]).tolist()
+            models = rng.choice(AUDITED_MODELS, count, p=[0.6, 0.15, 0.1, 0.15]).tolist()
+            picks = rng.random(count)
+            stamps = _timestamps(self.now - (self.now - start_of_history) * rng.random(count) ** 1.5)
+            hosts = rng.integers(1, 255, (count, 2)).tolist()
+            rows = []
+            for i in range(count):
+                first, span = ranges[models[i]]
+                object_id = first + int(picks[i] * span)
+                changes = AUDITED_CHANGES[models[i]] if actions[i] == "update" else {}
+                rows.append(
+                    (
+                        ids[i], users[i], actions[i], models[i], str(object_id), f"{models[i]} #{object_id}",
+                        json.dumps(changes), f"10.20.{hosts[i][0]}.{hosts[i][1]}", stamps[i],
+                    )
+                )  # fmt: skip
+            writer.write(rows)
+        return writer.rows
+
+    def reset_sequences(self):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+                cursor.execute(sql)
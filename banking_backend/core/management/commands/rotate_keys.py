@@ -1,20 +1,26 @@
 """Management command to rotate encryption keys for PII-encrypted models.
 
-Iterates through records that are encrypted with an older key version and
-re-encrypts them with the latest key. This allows for safe, atomic, 
-and resumable rotation.
+Re-encrypts every row on an older ``key_version`` under the target key, and
+rewrites legacy Fernet ciphertexts as AES-GCM, using the parallel engine in
+``core.utils.rotation``. Progress is checkpointed after every chunk: rerun the
+same command to resume an interrupted rotation.
+
+Usage:
+    python manage.py rotate_keys --target-version 2 --workers 4
+    python manage.py rotate_keys --target-version 2 --status
 """
 
 import logging
+import multiprocessing
+
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from users.models import User
-from core.models.accounts import AccountOpeningRequest, AccountClosureRequest
-from core.models.loans import Loan
+
+from core.utils.rotation import Checkpoint, KeyRotation, LoadThrottle, rotation_targets
 from core.utils.secret_service import SecretManager
 
 logger = logging.getLogger(__name__)
 
+
 class Command(BaseCommand):
     help = "Rotate encryption keys for PII-encrypted models."
 
@@ -28,8 +34,47 @@ class Command(BaseCommand):
         parser.add_argument(
             "--batch-size",
             type=int,
-            default=100,
-            help="Number of records to process per batch."
+            default=500,
+            help="Number of records read, re-encrypted and written per chunk."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(1, (multiprocessing.cpu_count() or 2) - 1),
+            help="Processes that decrypt and re-encrypt; 1 does it in this process."
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default="key_rotation_checkpoint.json",
+            help="File recording progress, so an interrupted run resumes where it stopped."
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and walk every model from the start."
+        )
+        parser.add_argument(
+            "--model",
+            action="append",
+            dest="models",
+            help="Only rotate this model (app_label.Model); repeatable."
+        )
+        parser.add_argument(
+            "--max-slowdown",
+            type=float,
+            default=3.0,
+            help="Back off while chunk writes are this many times slower than the fastest one."
+        )
+        parser.add_argument(
+            "--max-active-queries",
+            type=int,
+            default=None,
+            help="PostgreSQL only: back off while more sessions than this are running queries."
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Only report the rows still on a legacy ciphertext or an older key version."
         )
         parser.add_argument(
             "--dry-run",
@@ -39,12 +84,8 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         target_version = options["target_version"]
-        batch_size = options["batch_size"]
         dry_run = options["dry_run"]
 
-        if dry_run:
-            self.stdout.write(self.style.WARNING("DRY RUN MODE: Changes will not be committed."))
-
         # 1. Verify target key exists
         try:
             SecretManager.get_encryption_key(version=target_version)
@@ -52,88 +93,72 @@ class Command(BaseCommand):
             self.stderr.write(self.style.ERROR(f"Target key version {target_version} is not available: {e}"))
             return
 
-        models_to_rotate = [
-             (User, ["first_name", "last_name", "staff_id"]),
-             (AccountOpeningRequest, [
-                 "first_name", "last_name", "date_of_birth", "address", 
-                 "occupation", "work_address", "position", "digital_address", 
-                 "location", "next_of_kin_data", "photo", "id_number", "phone_number"
-             ]),
-             (AccountClosureRequest, ["phone_number"]),
-             (Loan, [
-                 "date_of_birth", "id_number", "digital_address",
-                 "next_of_kin_1_name", "next_of_kin_1_phone", "next_of_kin_1_address",
-                 "next_of_kin_2_name", "next_of_kin_2_phone", "next_of_kin_2_address",
-                 "guarantor_1_name", "guarantor_1_id_number", "guarantor_1_phone", "guarantor_1_address",
-                 "guarantor_2_name", "guarantor_2_id_number", "guarantor_2_phone", "guarantor_2_address"
-             ])
-        ]
-
-        # Tracking for Integrity Check
-        rotated_samples = []
-
-        for model_class, fields in models_to_rotate:
-            self.stdout.write(f"Rotating keys for {model_class.__name__}...")
-            
-            # Find records with older key versions
-            unrotated_queryset = model_class.objects.filter(key_version__lt=target_version)
-            total_count = unrotated_queryset.count()
-            
-            if total_count == 0:
-                self.stdout.write(self.style.SUCCESS(f"  All {model_class.__name__} records already on version {target_version} or higher."))
-                continue
+        targets = rotation_targets(options["models"])
+        rotation = KeyRotation(
+            target_version,
+            chunk_size=options["batch_size"],
+            workers=options["workers"],
+            checkpoint=Checkpoint(options["checkpoint"], target_version, restart=options["restart"]),
+            throttle=LoadThrottle(max_slowdown=options["max_slowdown"], max_active=options["max_active_queries"]),
+            dry_run=dry_run,
+            progress=self.progress,
+        )
+
+        if options["status"]:
+            self.report(rotation, targets)
+            return
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN MODE: Changes will not be committed."))
+
+        self.stdout.write(f"Rotating {len(targets)} models to key version {target_version}...")
+        rotation.run(targets)
 
-            processed_count = 0
-            while processed_count < total_count:
-                batch = list(unrotated_queryset[:batch_size])
-                if not batch:
-                    break
-                
-                with transaction.atomic():
-                    for record in batch:
-                        # Properties automatically use record.key_version for decryption
-                        # and currently active key_version (target_version) for re-encryption
-                        # when we set them and save.
-                        
-                        # We force the re-encryption by reading and writing each field
-                        for field_name in fields:
-                           val = getattr(record, field_name)
-                           if val:
-                               setattr(record, field_name, val)
-                        
-                        record.key_version = target_version
-                        if not dry_run:
-                            record.save()
-                        
-                        # Collect sample for Step 5: Integrity Check
-                        if len(rotated_samples) < 5:
-                            rotated_samples.append((record, fields[0]))
-                    
-                processed_count += len(batch)
-                self.stdout.write(f"  Processed {processed_count}/{total_count} {model_class.__name__} records...")
-
-        # 5. Integrity Check (Validation phase)
-        if rotated_samples:
-            self.stdout.write("Running Step 5: Deep Integrity Check...")
-            success_count = 0
-            for record, test_field in rotated_samples:
-                try:
-                    # In dry run, we didn't save, so we refresh from DB to see if old key still works
-                    # or if the current object state in memory is correct.
-                    # In a real run, we verify we can decrypt the newly saved record.
-                    val = getattr(record, test_field)
-                    if val:
-                        success_count += 1
-                except Exception as e:
-                    self.stderr.write(self.style.ERROR(f"Integrity Check FAILED for {record.__class__.__name__} {record.id}: {e}"))
-            
-            if success_count == len(rotated_samples):
-                self.stdout.write(self.style.SUCCESS(f"  Integrity Check passed: {success_count}/{len(rotated_samples)} verified."))
-            else:
+        # 2. Integrity check: rotated rows decrypt with the target key
+        if not dry_run:
+            failures = {target.label: rotation.verify(target) for target in targets}
+            failures = {label: pks for label, pks in failures.items() if pks}
+            if failures:
+                for label, pks in failures.items():
+                    self.stderr.write(self.style.ERROR(f"Integrity Check FAILED for {label}: {pks}"))
                 self.stderr.write(self.style.ERROR("  INTEGRITY CHECK FAILED. Manual review required."))
                 return
+            self.stdout.write(self.style.SUCCESS("  Integrity Check passed."))
 
+        remaining = self.report(rotation, targets)
         if dry_run:
             self.stdout.write(self.style.SUCCESS("Dry run completed successfully. No changes were committed."))
+        elif remaining:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{remaining} rows still need rotating (changed during the run or failed to decrypt); "
+                    "rerun with --restart to retry them."
+                )
+            )
         else:
             self.stdout.write(self.style.SUCCESS("Encryption key rotation completed successfully."))
+
+    def progress(self, label, state, remaining, rate, delay):
+        throttled = f", throttled {delay:.2f}s" if delay else ""
+        self.stdout.write(
+            f"  {label}: {state['rotated']} rotated, {state['skipped']} changed meanwhile, "
+            f"{state['failed']} failed, {max(remaining, 0)} to go ({rate:,.0f} rows/s{throttled})"
+        )
+
+    def report(self, rotation, targets):
+        """Print per-model counts of rows still to rotate and return their total."""
+        remaining = 0
+        for label, counts in rotation.status(targets).items():
+            if not counts["pending"]:
+                continue
+            remaining += counts["pending"]
+            self.stdout.write(
+                f"  {label}: {counts['legacy']} rows with a legacy Fernet ciphertext, "
+                f"{counts['old_key_version']} on a key version below {rotation.target_version} "
+                f"(of {counts['total']})"
+            )
+        if not remaining:
+            self.stdout.write(
+                self.style.SUCCESS(f"  All rows use AES-GCM under key version {rotation.target_version} or higher.")
+            )
+        return remaining
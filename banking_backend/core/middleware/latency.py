@@ -0,0 +1,30 @@
+"""Request latency sampling for the performance dashboards.
+
+Records every request's wall time into the process-local
+``core.services.performance_metrics.latency_aggregator``, keyed by resolved
+URL name. The aggregator flushes histograms into ``PerformanceMetric`` once
+a minute, so requests never write to the database themselves.
+"""
+
+import time
+
+from core.middleware.query_metrics import HybridMiddleware, view_name
+from core.services.performance_metrics import record_request_latency
+
+
+class RequestLatencyMiddleware(HybridMiddleware):
+    """Feeds per-endpoint latency and 5xx counts into the in-process aggregator."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        record_request_latency(view_name(request), time.perf_counter() - started, response.status_code >= 500)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        record_request_latency(view_name(request), time.perf_counter() - started, response.status_code >= 500)
+        return response
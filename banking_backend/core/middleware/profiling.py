@@ -0,0 +1,231 @@
+"""On-demand request profiling.
+
+A request is profiled when either:
+
+* it carries the ``PROFILING_HEADER`` header (``X-Profile: 1``) and
+  authenticates as a superuser. A session or a JWT (cookie or bearer) is
+  checked only when the header is present;
+* it falls in the ``PROFILING_SAMPLE_RATE`` fraction of requests (0 by default).
+
+Profiled requests run under ``cProfile`` with a database execute wrapper
+timing every statement. The result is saved as a ``RequestProfile``:
+
+* a gzip-compressed pstats dump;
+* the top functions by cumulative time;
+* SQL statement shapes with counts and timings. Parameters are never stored.
+
+Superusers can list and download profiles in the Django admin. The dump
+opens with ``python -m pstats`` or snakeviz, and flameprof renders it as a
+flame graph.
+
+Every other request pays one header lookup and, only when sampling is
+enabled, one random draw. The middleware can therefore stay enabled next to
+the Prometheus middlewares.
+
+cProfile hooks the whole interpreter (on Python 3.12+ it takes the single
+``sys.monitoring`` profiler slot), so each process profiles at most one
+request at a time. Requests that overlap a running profile, or arrive while
+another tool holds the hook, are served unprofiled. Under ASGI a profiled
+request runs the rest of the chain from a worker thread, so the sync code
+beneath it (including sync views) is captured; code on the event loop is
+not. Unprofiled requests stay on the loop. Profiles older than
+``PROFILING_RETENTION_DAYS`` are deleted by the ``prune_request_profiles``
+task.
+"""
+
+import cProfile
+import gzip
+import io
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from core.middleware.query_metrics import HybridMiddleware, fingerprint, view_name
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = getattr(settings, "PROFILING_ENABLED", True)
+PROFILING_HEADER = getattr(settings, "PROFILING_HEADER", "X-Profile")
+PROFILING_SAMPLE_RATE = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+PROFILING_RETENTION_DAYS = getattr(settings, "PROFILING_RETENTION_DAYS", 14)
+PROFILING_SUMMARY_LINES = 40
+PROFILING_SQL_SHAPES = 50
+
+_META_HEADER = "HTTP_" + PROFILING_HEADER.upper().replace("-", "_")
+
+# Held while a request of this process is being profiled
+_profiling_lock = threading.Lock()
+
+
+def authenticates_as_superuser(request):
+    """Whether the request carries superuser credentials (session, or the API's JWT authenticators)."""
+    user = getattr(request, "user", None)
+    if getattr(user, "is_superuser", False):
+        return True
+
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    drf_request = Request(request)
+    for authenticator_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authenticator_class().authenticate(drf_request)
+        except Exception:
+            return False
+        if result is not None:
+            return bool(getattr(result[0], "is_superuser", False))
+    return False
+
+
+class SQLTimings:
+    """Execute wrapper aggregating statement time by shape."""
+
+    def __init__(self):
+        self.shapes = defaultdict(lambda: {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        self.count = 0
+        self.total_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            shape = self.shapes[fingerprint(sql)]
+            shape["count"] += 1
+            shape["total_ms"] += elapsed_ms
+            shape["max_ms"] = max(shape["max_ms"], elapsed_ms)
+            self.count += 1
+            self.total_ms += elapsed_ms
+
+    def top(self, limit=PROFILING_SQL_SHAPES):
+        rows = [
+            {"sql": sql, "count": s["count"], "total_ms": round(s["total_ms"], 3), "max_ms": round(s["max_ms"], 3)}
+            for sql, s in self.shapes.items()
+        ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)[:limit]
+
+
+def pstats_dump(profiler):
+    """The profile in the on-disk format ``pstats.Stats(path)`` reads."""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def pstats_summary(profiler, lines=PROFILING_SUMMARY_LINES):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).strip_dirs().sort_stats("cumulative").print_stats(lines)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """Profiles superuser-requested and sampled requests into ``RequestProfile`` rows."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # What ``profile`` calls from its (worker) thread
+        self.sync_get_response = async_to_sync(get_response) if self.async_mode else get_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not PROFILING_ENABLED:
+            return self.get_response(request)
+
+        if _META_HEADER in request.META:
+            trigger = "header" if authenticates_as_superuser(request) else None
+        else:
+            trigger = self.sampled()
+        if trigger is None:
+            return self.get_response(request)
+
+        return self.profile(request, trigger)
+
+    async def __acall__(self, request):
+        if not PROFILING_ENABLED:
+            return await self.get_response(request)
+
+        if _META_HEADER in request.META:
+            # The JWT authenticators query the database
+            trigger = "header" if await sync_to_async(authenticates_as_superuser)(request) else None
+        else:
+            trigger = self.sampled()
+        if trigger is None:
+            return await self.get_response(request)
+
+        return await sync_to_async(self.profile)(request, trigger)
+
+    @staticmethod
+    def sampled():
+        if PROFILING_SAMPLE_RATE and random.random() < PROFILING_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    def profile(self, request, trigger):
+        if not _profiling_lock.acquire(blocking=False):
+            return self.sync_get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # Another profiler (coverage, a debugger) holds the interpreter's hook
+                logger.warning(f"Skipped profiling {request.method} {request.path}: {e}")
+                profiler = None
+            if profiler is not None:
+                timings = SQLTimings()
+                started = time.perf_counter()
+                try:
+                    with ExitStack() as stack:
+                        for alias in connections:
+                            stack.enter_context(connections[alias].execute_wrapper(timings))
+                        response = self.sync_get_response(request)
+                finally:
+                    profiler.disable()
+                duration_ms = (time.perf_counter() - started) * 1000
+        finally:
+            _profiling_lock.release()
+        if profiler is None:
+            return self.sync_get_response(request)
+
+        try:
+            saved = self.save(request, response, trigger, profiler, timings, duration_ms)
+            response["X-Profile-Id"] = str(saved.pk)
+        except Exception:
+            logger.exception(f"Failed to store request profile for {request.method} {request.path}")
+        return response
+
+    def save(self, request, response, trigger, profiler, timings, duration_ms):
+        from core.models import RequestProfile
+
+        user = getattr(request, "user", None)
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.path[:500],
+            view_name=view_name(request)[:200],
+            status_code=response.status_code,
+            trigger=trigger,
+            user=user if getattr(user, "is_authenticated", False) else None,
+            duration_ms=Decimal(f"{duration_ms:.3f}"),
+            db_queries=timings.count,
+            db_time_ms=Decimal(f"{timings.total_ms:.3f}"),
+            summary=pstats_summary(profiler),
+            sql=timings.top(),
+            profile_data=gzip.compress(pstats_dump(profiler)),
+        )
+        logger.info(
+            f"Stored request profile {profile.pk} ({trigger}): {request.method} {profile.view_name} "
+            f"{duration_ms:.1f}ms, {timings.count} queries"
+        )
+        return profile
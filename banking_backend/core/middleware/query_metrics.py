@@ -0,0 +1,202 @@
+"""Per-endpoint SQL instrumentation.
+
+``QueryMetricsMiddleware`` installs a database execute wrapper for the length
+of each request and records, per resolved URL name:
+
+* the number of SQL statements and the total time spent in the database;
+* the largest number of repeats of a single statement shape. The same query
+  issued over and over with different parameters is the N+1 signature;
+* the duration of the slowest statement.
+
+These are observed into Prometheus histograms labelled by view name (the
+default registry, exported by django_prometheus). When a request crosses one
+of the thresholds, a sampled warning is logged with the offending statement.
+Only the SQL text with placeholders is logged, never the parameters, because
+they can hold customer data.
+
+This middleware and the other per-request instrumentation (tracing, latency,
+profiling, replica stickiness) are sync and async capable, so under ASGI the
+async dashboards reach the view without a thread hop per layer.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.functional import SimpleLazyObject, empty
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+QUERY_METRICS_ENABLED = getattr(settings, "QUERY_METRICS_ENABLED", True)
+# Log a request when it crosses any of these thresholds...
+QUERY_METRICS_LOG_QUERIES = getattr(settings, "QUERY_METRICS_LOG_QUERIES", 50)
+QUERY_METRICS_LOG_DB_SECONDS = getattr(settings, "QUERY_METRICS_LOG_DB_SECONDS", 0.5)
+QUERY_METRICS_LOG_DUPLICATES = getattr(settings, "QUERY_METRICS_LOG_DUPLICATES", 10)
+# ...with this probability, so a hot endpoint cannot flood the logs.
+QUERY_METRICS_LOG_SAMPLE_RATE = getattr(settings, "QUERY_METRICS_LOG_SAMPLE_RATE", 0.1)
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+VIEW_DB_QUERIES = Histogram(
+    "django_view_db_queries",
+    "SQL statements executed per request, by view.",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+VIEW_DB_SECONDS = Histogram(
+    "django_view_db_seconds",
+    "Total database time per request, by view.",
+    ["view"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+VIEW_DB_DUPLICATE_QUERIES = Histogram(
+    "django_view_db_duplicate_queries",
+    "Largest number of executions of one statement shape per request (N+1 signature), by view.",
+    ["view"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+VIEW_DB_SLOWEST_SECONDS = Histogram(
+    "django_view_db_slowest_query_seconds",
+    "Duration of the slowest SQL statement per request, by view.",
+    ["view"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Shape of a statement: literals and ``IN`` lists collapsed so N+1 repeats compare equal."""
+    sql = _LITERALS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """SQL statistics for one request, filled in by ``execute_wrapper``."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest_sql = ""
+        self.slowest_seconds = 0.0
+        self.shapes = Counter()
+        self._lock = threading.Lock()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, seconds):
+        shape = fingerprint(sql)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+            if seconds > self.slowest_seconds:
+                self.slowest_seconds = seconds
+                self.slowest_sql = sql
+
+    def most_repeated(self):
+        """``(statement shape, executions)`` of the most repeated statement, or ``("", 0)``."""
+        return self.shapes.most_common(1)[0] if self.shapes else ("", 0)
+
+    def exceeds_thresholds(self):
+        return (
+            self.count >= QUERY_METRICS_LOG_QUERIES
+            or self.seconds >= QUERY_METRICS_LOG_DB_SECONDS
+            or self.most_repeated()[1] >= QUERY_METRICS_LOG_DUPLICATES
+        )
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name if match else None) or UNRESOLVED_VIEW
+
+
+async def arequest_user(request):
+    """``request.user`` for async middleware: an unevaluated session user is loaded with ``auser()``."""
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty and hasattr(request, "auser"):
+        return await request.auser()
+    return user
+
+
+class HybridMiddleware:
+    """Base for middleware with a sync ``__call__`` and a native async ``__acall__``.
+
+    Django picks the async path under ASGI, like ``MiddlewareMixin``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+
+class QueryMetricsMiddleware(HybridMiddleware):
+    """Records per-view SQL query counts, DB time, N+1 repeats and the slowest statement."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not QUERY_METRICS_ENABLED:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with self.capture(stats):
+            response = self.get_response(request)
+
+        self.observe(request, stats)
+        return response
+
+    async def __acall__(self, request):
+        if not QUERY_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        stats = QueryStats()
+        with self.capture(stats):
+            response = await self.get_response(request)
+
+        self.observe(request, stats)
+        return response
+
+    @staticmethod
+    def capture(stats):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats.execute_wrapper))
+        return stack
+
+    def observe(self, request, stats):
+        view = view_name(request)
+        shape, repeats = stats.most_repeated()
+        VIEW_DB_QUERIES.labels(view=view).observe(stats.count)
+        VIEW_DB_SECONDS.labels(view=view).observe(stats.seconds)
+        VIEW_DB_DUPLICATE_QUERIES.labels(view=view).observe(repeats)
+        VIEW_DB_SLOWEST_SECONDS.labels(view=view).observe(stats.slowest_seconds)
+
+        if stats.exceeds_thresholds() and random.random() < QUERY_METRICS_LOG_SAMPLE_RATE:
+            logger.warning(
+                f"SQL hotspot in {view} ({request.method}): {stats.count} queries, "
+                f"{stats.seconds * 1000:.1f}ms in DB; most repeated x{repeats}: {shape[:300]}; "
+                f"slowest {stats.slowest_seconds * 1000:.1f}ms: {stats.slowest_sql[:300]}"
+            )
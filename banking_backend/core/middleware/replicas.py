@@ -0,0 +1,37 @@
+"""Read-your-writes stickiness for replica reads.
+
+Opens a ``replica_session`` per request so ``ReplicaRouter`` sees every write
+the request makes. When the request wrote anything, the user's replica-eligible
+reads go to the primary for ``REPLICA_STICKY_SECONDS`` afterwards, across
+processes, so a dashboard loaded right after a deposit shows the deposit.
+"""
+
+from asgiref.sync import sync_to_async
+
+from core.db_router import remember_write, replica_aliases, replica_session
+from core.middleware.query_metrics import HybridMiddleware, arequest_user
+
+
+class ReplicaStickinessMiddleware(HybridMiddleware):
+    """Records requests that wrote to the primary; a no-op without replicas."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+        with replica_session() as state:
+            response = self.get_response(request)
+        if state["wrote"]:
+            remember_write(getattr(request, "user", None))
+        return response
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+        # The session lives in a context variable, which sync views' threads share
+        with replica_session() as state:
+            response = await self.get_response(request)
+        if state["wrote"]:
+            await sync_to_async(remember_write)(await arequest_user(request))
+        return response
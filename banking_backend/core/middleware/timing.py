@@ -0,0 +1,294 @@
+"""Per-middleware latency breakdown and path-based short-circuiting.
+
+``TimedWSGIHandler`` and ``TimedASGIHandler`` (served by ``config/wsgi.py``
+and ``config/asgi.py``) build the middleware chain from ``settings.MIDDLEWARE``
+as Django does, but wrap every class in a ``TimedMiddleware`` layer.
+``settings.MIDDLEWARE`` itself keeps the plain class paths, so Django's
+system checks still recognise them. Handlers created elsewhere, such as the
+test client's, are not instrumented.
+
+The layer also sits between the middleware and the handler it is given, so
+it can tell three phases apart:
+
+* **request phase**: from entering the middleware until it calls the next
+  layer (or until it returns, if it answers the request itself);
+* the rest of the stack and the view, which is not counted;
+* **response phase**: from the next layer returning until the middleware
+  returns.
+
+Both phases are observed into ``django_middleware_seconds{middleware, phase}``,
+so each layer's own cost is visible, excluding everything beneath it.
+
+Middlewares listed in ``MIDDLEWARE_SKIPPABLE`` are bypassed entirely,
+including their ``process_view``/``process_exception`` hooks, for request
+paths that start with one of ``MIDDLEWARE_SKIP_PATHS`` (health checks, static
+assets). Security middlewares can never be skipped: listing one is logged
+and ignored.
+"""
+
+import contextvars
+import logging
+import time
+from types import MethodType
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.utils.module_loading import import_string
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+MIDDLEWARE_TIMING_ENABLED = getattr(settings, "MIDDLEWARE_TIMING_ENABLED", True)
+MIDDLEWARE_SKIP_PATHS = tuple(getattr(settings, "MIDDLEWARE_SKIP_PATHS", ()))
+MIDDLEWARE_SKIPPABLE = tuple(getattr(settings, "MIDDLEWARE_SKIPPABLE", ()))
+
+# Layers that enforce a security property on every response.
+NEVER_SKIP = frozenset(
+    {
+        "corsheaders.middleware.CorsMiddleware",
+        "allow_cidr.middleware.AllowCIDRMiddleware",
+        "core.middleware.origin_verification.OriginVerificationMiddleware",
+        "core.middleware.mtls_verification.MTLSVerificationMiddleware",
+        "django.middleware.security.SecurityMiddleware",
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "csp.middleware.CSPMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    }
+)
+
+MIDDLEWARE_SECONDS = Histogram(
+    "django_middleware_seconds",
+    "Time spent in a middleware's own request or response phase, excluding the layers beneath it.",
+    ["middleware", "phase"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+HOOKS = ("process_view", "process_exception", "process_template_response")
+
+
+def short_name(path):
+    return path.rsplit(".", 1)[-1]
+
+
+class _Marks:
+    """When the wrapped middleware handed the request down, and when it came back."""
+
+    __slots__ = ("entered", "returned")
+
+    def __init__(self):
+        self.entered = None
+        self.returned = None
+
+
+class TimedMiddleware:
+    """One instrumented middleware layer; built by ``timed_middleware_factory``."""
+
+    def __init__(self, middleware_class, path, get_response, timed, skippable):
+        self.name = short_name(path)
+        self.get_response = get_response
+        self.timed = timed
+        self.skippable = skippable
+        self._marks = contextvars.ContextVar(f"middleware_marks_{self.name}")
+        self._request_phase = MIDDLEWARE_SECONDS.labels(middleware=self.name, phase="request")
+        self._response_phase = MIDDLEWARE_SECONDS.labels(middleware=self.name, phase="response")
+
+        inner = self._async_inner if iscoroutinefunction(get_response) else self._sync_inner
+        self.instance = middleware_class(inner)
+        self.is_async = iscoroutinefunction(self.instance) or iscoroutinefunction(type(self.instance).__call__)
+        if self.is_async:
+            markcoroutinefunction(self)
+        for hook in HOOKS:
+            if hasattr(self.instance, hook):
+                setattr(self, hook, self._skippable_hook(getattr(self.instance, hook)))
+
+    def skip(self, request):
+        return self.skippable and request.path.startswith(MIDDLEWARE_SKIP_PATHS)
+
+    def _skippable_hook(self, hook):
+        """``hook`` as a method of this layer that is bypassed on skipped paths.
+
+        Bound, because Django names ``method.__self__`` in its error messages.
+        A bypassed ``process_template_response`` passes the response through.
+        """
+        passthrough = hook.__name__ == "process_template_response"
+
+        if iscoroutinefunction(hook):
+
+            async def async_wrapper(layer, request, *args, **kwargs):
+                if layer.skip(request):
+                    return args[0] if passthrough else None
+                return await hook(request, *args, **kwargs)
+
+            return MethodType(async_wrapper, self)
+
+        def wrapper(layer, request, *args, **kwargs):
+            if layer.skip(request):
+                return args[0] if passthrough else None
+            return hook(request, *args, **kwargs)
+
+        return MethodType(wrapper, self)
+
+    # The next layer down, as seen by the wrapped middleware
+    def _sync_inner(self, request):
+        marks = self._marks.get(None)
+        if marks is not None:
+            marks.entered = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            if marks is not None:
+                marks.returned = time.perf_counter()
+
+    async def _async_inner(self, request):
+        marks = self._marks.get(None)
+        if marks is not None:
+            marks.entered = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            if marks is not None:
+                marks.returned = time.perf_counter()
+
+    def _observe(self, started, marks):
+        finished = time.perf_counter()
+        if marks.entered is None:  # answered the request itself
+            self._request_phase.observe(finished - started)
+            return
+        self._request_phase.observe(marks.entered - started)
+        self._response_phase.observe(finished - (marks.returned or finished))
+
+    def __call__(self, request):
+        if self.is_async:
+            return self._async_call(request)
+        if self.skip(request):
+            return self.get_response(request)
+        if not self.timed:
+            return self.instance(request)
+        marks = _Marks()
+        token = self._marks.set(marks)
+        started = time.perf_counter()
+        try:
+            return self.instance(request)
+        finally:
+            self._marks.reset(token)
+            self._observe(started, marks)
+
+    async def _async_call(self, request):
+        if self.skip(request):
+            return await self.get_response(request)
+        if not self.timed:
+            return await self.instance(request)
+        marks = _Marks()
+        token = self._marks.set(marks)
+        started = time.perf_counter()
+        try:
+            return await self.instance(request)
+        finally:
+            self._marks.reset(token)
+            self._observe(started, marks)
+
+
+def timed_middleware_factory(middleware_class, path, timed, skippable):
+    """A middleware "class" for Django's loader that builds a ``TimedMiddleware`` around ``middleware_class``."""
+
+    def factory(get_response):
+        return TimedMiddleware(middleware_class, path, get_response, timed, skippable)
+
+    factory.sync_capable = getattr(middleware_class, "sync_capable", True)
+    factory.async_capable = getattr(middleware_class, "async_capable", False)
+    factory.__name__ = factory.__qualname__ = f"Timed{short_name(path)}"
+    return factory
+
+
+def skippable_middleware():
+    skippable = set(MIDDLEWARE_SKIPPABLE) if MIDDLEWARE_SKIP_PATHS else set()
+    for path in skippable & NEVER_SKIP:
+        logger.warning(f"MIDDLEWARE_SKIPPABLE lists security middleware {path}; it will not be skipped")
+    return skippable - NEVER_SKIP
+
+
+def load_middleware_class(path):
+    """Import the middleware at ``path``, instrumented unless timing and skipping are both off for it."""
+    middleware_class = import_string(path)
+    skippable = path in skippable_middleware()
+    if not (MIDDLEWARE_TIMING_ENABLED or skippable):
+        return middleware_class
+    return timed_middleware_factory(middleware_class, path, MIDDLEWARE_TIMING_ENABLED, skippable)
+
+
+class TimedMiddlewareHandlerMixin:
+    """A ``BaseHandler`` whose middleware chain is built from ``load_middleware_class``.
+
+    Same as Django's ``BaseHandler.load_middleware`` except for how each
+    ``settings.MIDDLEWARE`` entry is imported.
+    """
+
+    def load_middleware(self, is_async=False):
+        self._view_middleware = []
+        self._template_response_middleware = []
+        self._exception_middleware = []
+
+        get_response = self._get_response_async if is_async else self._get_response
+        handler = convert_exception_to_response(get_response)
+        handler_is_async = is_async
+        for middleware_path in reversed(settings.MIDDLEWARE):
+            middleware = load_middleware_class(middleware_path)
+            middleware_can_sync = getattr(middleware, "sync_capable", True)
+            middleware_can_async = getattr(middleware, "async_capable", False)
+            if not middleware_can_sync and not middleware_can_async:
+                raise RuntimeError(
+                    f"Middleware {middleware_path} must have at least one of sync_capable/async_capable set to True."
+                )
+            elif not handler_is_async and middleware_can_sync:
+                middleware_is_async = False
+            else:
+                middleware_is_async = middleware_can_async
+            try:
+                adapted_handler = self.adapt_method_mode(
+                    middleware_is_async,
+                    handler,
+                    handler_is_async,
+                    debug=settings.DEBUG,
+                    name=f"middleware {middleware_path}",
+                )
+                mw_instance = middleware(adapted_handler)
+            except MiddlewareNotUsed as exc:
+                if settings.DEBUG:
+                    logger.debug(f"MiddlewareNotUsed({middleware_path!r}): {exc}")
+                continue
+            else:
+                handler = adapted_handler
+
+            if mw_instance is None:
+                raise ImproperlyConfigured(f"Middleware factory {middleware_path} returned None.")
+
+            if hasattr(mw_instance, "process_view"):
+                self._view_middleware.insert(0, self.adapt_method_mode(is_async, mw_instance.process_view))
+            if hasattr(mw_instance, "process_template_response"):
+                self._template_response_middleware.append(
+                    self.adapt_method_mode(is_async, mw_instance.process_template_response)
+                )
+            if hasattr(mw_instance, "process_exception"):
+                # Django runs the exception middleware synchronously
+                self._exception_middleware.append(self.adapt_method_mode(False, mw_instance.process_exception))
+
+            handler = convert_exception_to_response(mw_instance)
+            handler_is_async = middleware_is_async
+
+        handler = self.adapt_method_mode(is_async, handler, handler_is_async)
+        self._middleware_chain = handler
+
+
+class TimedWSGIHandler(TimedMiddlewareHandlerMixin, WSGIHandler):
+    """``WSGIHandler`` with instrumented middleware."""
+
+
+class TimedASGIHandler(TimedMiddlewareHandlerMixin, ASGIHandler):
+    """``ASGIHandler`` with instrumented middleware."""
@@ -0,0 +1,64 @@
+"""Root trace span per HTTP request.
+
+Continues an incoming W3C ``traceparent`` or starts a new trace, subject to
+``TRACING_SAMPLE_RATE``. The span is named after the resolved URL name, like
+the Prometheus and latency metrics. For sampled requests every SQL statement
+is recorded as a child span. Service, cache and outbound HTTP spans nest
+underneath through ``core.tracing``.
+"""
+
+from django.db import connections
+
+from core import tracing
+from core.middleware.query_metrics import HybridMiddleware, arequest_user, view_name
+
+
+def root_span(request):
+    parent = tracing.extract(request.META.get("HTTP_TRACEPARENT"))
+    return tracing.start_span(f"{request.method} {request.path}", "server", parent=parent)
+
+
+def annotate(span, request, response, user):
+    span.name = f"{request.method} {view_name(request)}"
+    span.set_attribute("http.method", request.method)
+    span.set_attribute("http.route", view_name(request))
+    span.set_attribute("http.status_code", response.status_code)
+    if getattr(user, "is_authenticated", False):
+        span.set_attribute("enduser.id", str(user.pk))
+    if response.status_code >= 500:
+        span.set_status("error", f"HTTP {response.status_code}")
+
+
+class TracingMiddleware(HybridMiddleware):
+    """Opens the request's root span and records SQL spans beneath it."""
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not tracing.TRACING_ENABLED:
+            return self.get_response(request)
+
+        with root_span(request) as span:
+            if not span.recording:
+                response = self.get_response(request)
+            else:
+                with tracing.trace_db_queries(connections):
+                    response = self.get_response(request)
+                annotate(span, request, response, getattr(request, "user", None))
+            response["traceresponse"] = span.traceparent()
+        return response
+
+    async def __acall__(self, request):
+        if not tracing.TRACING_ENABLED:
+            return await self.get_response(request)
+
+        # The current span is a context variable, so spans opened in sync views' threads nest under it
+        with root_span(request) as span:
+            if not span.recording:
+                response = await self.get_response(request)
+            else:
+                with tracing.trace_db_queries(connections):
+                    response = await self.get_response(request)
+                annotate(span, request, response, await arequest_user(request))
+            response["traceresponse"] = span.traceparent()
+        return response
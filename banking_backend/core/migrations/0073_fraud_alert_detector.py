@@ -0,0 +1,24 @@
+# Generated by Django 5.2.15 on 2026-10-18 21:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0072_security_hardening'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fraudalert',
+            name='detector',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='fraudalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('transaction__isnull', False), models.Q(('detector', ''), _negated=True)), fields=('transaction', 'detector'), name='fraud_alert_tx_detector_uniq'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.15 on 2026-10-18 22:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0073_fraud_alert_detector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performancemetric',
+            name='sample_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='performancemetric',
+            name='statistic',
+            field=models.CharField(blank=True, choices=[('', 'Value'), ('count', 'Count'), ('mean', 'Mean'), ('p50', 'p50'), ('p95', 'p95'), ('p99', 'p99'), ('max', 'Max')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='performancemetric',
+            name='window_seconds',
+            field=models.PositiveIntegerField(default=60),
+        ),
+        migrations.AlterField(
+            model_name='performancemetric',
+            name='recorded_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='performancemetric',
+            index=models.Index(fields=['window_seconds', 'recorded_at'], name='perf_metric_window_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.15 on 2026-10-18 22:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0074_performance_metric_aggregation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=500)),
+                ('view_name', models.CharField(blank=True, max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('trigger', models.CharField(choices=[('header', 'Requested by superuser'), ('sampled', 'Sampled')], max_length=10)),
+                ('duration_ms', models.DecimalField(decimal_places=3, max_digits=12)),
+                ('db_queries', models.PositiveIntegerField(default=0)),
+                ('db_time_ms', models.DecimalField(decimal_places=3, default=0, max_digits=12)),
+                ('summary', models.TextField(blank=True)),
+                ('sql', models.JSONField(blank=True, default=list)),
+                ('profile_data', models.BinaryField()),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Request Profile',
+                'verbose_name_plural': 'Request Profiles',
+                'db_table': 'core_requestprofile',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
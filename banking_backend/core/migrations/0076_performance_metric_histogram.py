@@ -0,0 +1,18 @@
+# Generated by Django 5.2.15 on 2026-10-19 00:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0075_request_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='performancemetric',
+            name='histogram',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
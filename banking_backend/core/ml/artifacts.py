@@ -0,0 +1,94 @@
+"""Versioned, memory-mappable fraud model artifacts.
+
+Unpickling the sklearn ``IsolationForest`` gives every gunicorn and Celery
+worker a private copy of the model (and drags in sklearn). Instead, training
+publishes the ``CompactForest`` arrays as an uncompressed joblib bundle.
+Workers load it with ``mmap_mode="r"``, so the arrays are read-only views of
+the page cache and every process on the node shares the same physical pages.
+
+Layout under the model directory::
+
+    artifacts/fraud-<version>.joblib   immutable, one file per training run
+    CURRENT                            name of the live artifact
+
+Publishing writes the new artifact first, then replaces ``CURRENT`` with
+``os.replace``. Readers therefore see either the old artifact or the new one,
+never a partial write. Superseded artifacts are pruned, keeping the newest
+``FRAUD_MODEL_KEEP_VERSIONS``. Unlinking a file that another process still
+has mapped is safe on POSIX; the pages live until the last mapping closes.
+"""
+
+import logging
+import os
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+
+import joblib
+
+from core.ml.compact_forest import CompactForest
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_SUBDIR = "artifacts"
+POINTER_NAME = "CURRENT"
+FRAUD_MODEL_KEEP_VERSIONS = getattr(settings, "FRAUD_MODEL_KEEP_VERSIONS", 3)
+
+
+def _artifact_dir(model_dir):
+    return os.path.join(model_dir, ARTIFACT_SUBDIR)
+
+
+def current_version(model_dir):
+    """Name of the live artifact, or None if nothing has been published."""
+    try:
+        with open(os.path.join(model_dir, POINTER_NAME)) as pointer:
+            return pointer.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(model_dir, compact: CompactForest):
+    """Write ``compact`` as a new immutable artifact and atomically make it current.
+
+    Returns the new version name, or None if the artifact could not be written.
+    """
+    artifact_dir = _artifact_dir(model_dir)
+    os.makedirs(artifact_dir, exist_ok=True)
+
+    version = f"fraud-{timezone.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}.joblib"
+    path = os.path.join(artifact_dir, version)
+    # compress=0 keeps the arrays contiguous on disk, which mmap_mode requires.
+    joblib.dump(compact.to_arrays(), path, compress=0)
+    if not os.path.exists(path):
+        # Never point workers at an artifact that is not on disk.
+        return None
+
+    pointer = os.path.join(model_dir, POINTER_NAME)
+    tmp_pointer = f"{pointer}.{os.getpid()}.tmp"
+    with open(tmp_pointer, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer)
+    logger.info(f"Published fraud model artifact {version}")
+
+    _prune(artifact_dir, keep=version)
+    return version
+
+
+def load(model_dir, version):
+    """Memory-map artifact ``version`` read-only and wrap it in a ``CompactForest``."""
+    arrays = joblib.load(os.path.join(_artifact_dir(model_dir), version), mmap_mode="r")
+    return CompactForest.from_arrays(arrays)
+
+
+def _prune(artifact_dir, keep):
+    versions = sorted(name for name in os.listdir(artifact_dir) if name.startswith("fraud-"))
+    stale = [name for name in versions[:-FRAUD_MODEL_KEEP_VERSIONS] if name != keep]
+    for name in stale:
+        try:
+            os.remove(os.path.join(artifact_dir, name))
+        except OSError as e:
+            logger.warning(f"Could not prune fraud model artifact {name}: {e}")
@@ -16,17 +16,23 @@ Usage:
 
 import logging
 import os
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 from django.conf import settings
-from django.db.models import Avg
+from django.db.models import Avg, F, Q, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 
 import joblib
 import numpy as np
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
+
+from core.db_router import read_from_replica
+from core.ml import artifacts
+from core.ml.compact_forest import CompactForest
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +45,7 @@ class MLFraudDetector:
     """
 
     # Model persistence paths
-    MODEL_DIR = os.path.join(settings.BASE_DIR, "ml_models")
+    MODEL_DIR = getattr(settings, "FRAUD_MODEL_DIR", os.path.join(settings.BASE_DIR, "ml_models"))
     MODEL_PATH = os.path.join(MODEL_DIR, "fraud_detector.joblib")
     SCALER_PATH = os.path.join(MODEL_DIR, "scaler.joblib")
 
@@ -60,15 +66,29 @@ class MLFraudDetector:
     ANOMALY_THRESHOLD = -0.5  # Isolation Forest score threshold
     HIGH_RISK_THRESHOLD = -0.8
 
+    # Seconds between checks of the shared artifact pointer for a newer model
+    ARTIFACT_CHECK_SECONDS = getattr(settings, "FRAUD_MODEL_POINTER_CHECK_SECONDS", 30)
+
     def __init__(self):
-        self.model: IsolationForest | None = None
-        self.scaler: StandardScaler | None = None
+        # sklearn IsolationForest / StandardScaler; None while serving from the shared artifact
+        self.model = None
+        self.scaler = None
+        self.artifact: CompactForest | None = None
+        self.artifact_version: str | None = None
+        self._artifact_checked_at = time.monotonic()
         self._load_or_initialize_model()
 
     def _load_or_initialize_model(self):
-        """Load existing model or initialize a new one."""
+        """Load existing model or initialize a new one.
+
+        The memory-mapped artifact is preferred: it is shared between processes and
+        does not require sklearn. The pickled estimator is the fallback.
+        """
         os.makedirs(self.MODEL_DIR, exist_ok=True)
 
+        if self._load_artifact(artifacts.current_version(self.MODEL_DIR)):
+            return
+
         if os.path.exists(self.MODEL_PATH) and os.path.exists(self.SCALER_PATH):
             try:
                 self.model = joblib.load(self.MODEL_PATH)
@@ -80,8 +100,36 @@ class MLFraudDetector:
         else:
             self._initialize_new_model()
 
+    def _load_artifact(self, version) -> bool:
+        if not version:
+            return False
+        try:
+            artifact = artifacts.load(self.MODEL_DIR, version)
+        except Exception as e:
+            logger.warning(f"Failed to load fraud model artifact {version}: {e}")
+            return False
+        self.model = None
+        self.scaler = None
+        self.artifact = artifact
+        self.artifact_version = version
+        logger.info(f"Memory-mapped fraud model artifact {version}")
+        return True
+
+    def refresh_artifact(self):
+        """Pick up a model published by another process (throttled to ``ARTIFACT_CHECK_SECONDS``)."""
+        now = time.monotonic()
+        if now - self._artifact_checked_at < self.ARTIFACT_CHECK_SECONDS:
+            return
+        self._artifact_checked_at = now
+        version = artifacts.current_version(self.MODEL_DIR)
+        if version and version != self.artifact_version:
+            self._load_artifact(version)
+
     def _initialize_new_model(self):
         """Initialize a new Isolation Forest model."""
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
         self.model = IsolationForest(
             n_estimators=100,
             contamination=0.01,  # Expected 1% fraud rate
@@ -158,6 +206,7 @@ class MLFraudDetector:
             "velocity_score": min(velocity_score, 50),  # Cap at 50 tx/day
         }
 
+    @traced()
     def predict(self, transaction) -> dict:
         """Predict if a transaction is potentially fraudulent.
 
@@ -177,43 +226,27 @@ class MLFraudDetector:
             features = self.extract_features(transaction)
             feature_array = np.array([[features[f] for f in self.FEATURES]])
 
-            # Scale features if scaler is fitted
-            if hasattr(self.scaler, "mean_") and self.scaler.mean_ is not None:
-                feature_array = self.scaler.transform(feature_array)
-
-            # Get anomaly score (-1 for anomalies, 1 for normal)
-            # decision_function returns negative scores for anomalies
-            try:
-                from sklearn.utils.validation import check_is_fitted
-
-                check_is_fitted(self.model)
-                raw_score = self.model.decision_function(feature_array)[0]
-            except (Exception, AttributeError):
-                # Handle unfitted model or any sklearn version differences
-                raw_score = 0.0  # Neutral score for unfitted model
-
-            # Convert to risk score (0-1, higher = riskier)
-            risk_score = max(0, min(1, (self.ANOMALY_THRESHOLD - raw_score) / abs(self.ANOMALY_THRESHOLD)))
-
-            # Determine risk level
-            if raw_score < self.HIGH_RISK_THRESHOLD:
-                risk_level = "critical"
-            elif raw_score < self.ANOMALY_THRESHOLD:
-                risk_level = "high"
-            elif raw_score < 0:
-                risk_level = "medium"
+            compact = self._compact_forest()
+            if compact is not None:
+                # Array-backed fast path: no sklearn validation or joblib dispatch per call.
+                raw_score = compact.score_row(feature_array[0])
             else:
-                risk_level = "low"
+                # Scale features if scaler is fitted
+                if hasattr(self.scaler, "mean_") and self.scaler.mean_ is not None:
+                    feature_array = self.scaler.transform(feature_array)
 
-            is_anomaly = raw_score < self.ANOMALY_THRESHOLD
+                # Get anomaly score (-1 for anomalies, 1 for normal)
+                # decision_function returns negative scores for anomalies
+                try:
+                    from sklearn.utils.validation import check_is_fitted
 
-            result = {
-                "is_anomaly": is_anomaly,
-                "risk_score": round(risk_score, 4),
-                "risk_level": risk_level,
-                "features": features,
-                "raw_score": round(raw_score, 4),
-            }
+                    check_is_fitted(self.model)
+                    raw_score = self.model.decision_function(feature_array)[0]
+                except (Exception, AttributeError):
+                    # Handle unfitted model or any sklearn version differences
+                    raw_score = 0.0  # Neutral score for unfitted model
+
+            result = self._result_from_score(raw_score, features)
 
             logger.info(f"Fraud prediction for transaction: {result['risk_level']} (score: {raw_score:.4f})")
 
@@ -231,6 +264,138 @@ class MLFraudDetector:
                 "error": "Internal prediction error",
             }
 
+    def _result_from_score(self, raw_score: float, features: dict) -> dict:
+        """Map an Isolation Forest decision score to the prediction result dict."""
+        # Convert to risk score (0-1, higher = riskier)
+        risk_score = max(0, min(1, (self.ANOMALY_THRESHOLD - raw_score) / abs(self.ANOMALY_THRESHOLD)))
+
+        # Determine risk level
+        if raw_score < self.HIGH_RISK_THRESHOLD:
+            risk_level = "critical"
+        elif raw_score < self.ANOMALY_THRESHOLD:
+            risk_level = "high"
+        elif raw_score < 0:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+
+        return {
+            "is_anomaly": bool(raw_score < self.ANOMALY_THRESHOLD),
+            "risk_score": round(float(risk_score), 4),
+            "risk_level": risk_level,
+            "features": features,
+            "raw_score": round(float(raw_score), 4),
+        }
+
+    def extract_features_batch(self, transactions) -> list[dict | None]:
+        """Extract features for many transactions with a single history query.
+
+        Produces the same values as ``extract_features`` for each transaction
+        (``None`` where a transaction has no account). The chunk's accounts are
+        loaded with their latest 101 outgoing transactions plus everything in the
+        last 7 days, which covers every window ``extract_features`` looks at. The
+        history query may be served by a read replica; real-time scoring of a
+        single transaction (``extract_features``) always reads the primary.
+        """
+        from core.models import Transaction
+
+        now = timezone.now()
+        day_ago = now - timedelta(hours=24)
+        week_ago = now - timedelta(days=7)
+
+        account_ids = {
+            (tx.from_account_id or tx.to_account_id) for tx in transactions if tx.from_account_id or tx.to_account_id
+        }
+        history = defaultdict(list)
+        rows = (
+            Transaction.objects.filter(from_account_id__in=account_ids)
+            .annotate(
+                recency=Window(RowNumber(), partition_by=[F("from_account_id")], order_by=F("timestamp").desc())
+            )
+            .filter(Q(recency__lte=101) | Q(timestamp__gte=week_ago))
+            .values_list("from_account_id", "id", "timestamp", "amount")
+        )
+        with read_from_replica():
+            for account_id, tx_id, timestamp, amount in rows:
+                history[account_id].append((tx_id, timestamp, amount))
+
+        features = []
+        for tx in transactions:
+            account = tx.from_account or tx.to_account
+            if account is None:
+                features.append(None)
+                continue
+
+            tx_time = tx.timestamp or now
+            day_of_week = tx_time.weekday()
+            account_created = account.created_at if hasattr(account, "created_at") else now
+            account_age_days = max((now - account_created).days, 1)
+
+            account_rows = sorted(history.get(account.pk, []), key=lambda row: row[1], reverse=True)
+            others = [row for row in account_rows if row[0] != tx.pk]
+
+            if others and others[0][1]:
+                days_since_last = (now - others[0][1]).total_seconds() / 86400
+            else:
+                days_since_last = account_age_days  # First transaction
+
+            recent_amounts = [row[2] for row in others[:100]]
+            avg_amount = (sum(recent_amounts) / len(recent_amounts)) if recent_amounts else None
+            avg_amount = avg_amount or Decimal("100")
+            amount_vs_avg = float(tx.amount) / float(avg_amount) if avg_amount else 1.0
+
+            transactions_24h = sum(1 for row in others if row[1] >= day_ago)
+            week_count = sum(1 for row in account_rows if row[1] >= week_ago)
+
+            features.append(
+                {
+                    "amount": float(tx.amount),
+                    "hour_of_day": tx_time.hour,
+                    "day_of_week": day_of_week,
+                    "days_since_last_transaction": min(days_since_last, 365),
+                    "transactions_last_24h": transactions_24h,
+                    "amount_vs_avg_ratio": min(amount_vs_avg, 100),
+                    "account_age_days": min(account_age_days, 3650),
+                    "is_weekend": 1 if day_of_week >= 5 else 0,
+                    "velocity_score": min(week_count / 7.0, 50),
+                }
+            )
+        return features
+
+    @traced()
+    def predict_batch(self, transactions) -> list[dict]:
+        """Vectorized ``predict`` for a chunk: one history query and one model call."""
+        transactions = list(transactions)
+        features = self.extract_features_batch(transactions)
+        valid = [i for i, f in enumerate(features) if f is not None]
+
+        raw_scores = np.zeros(len(valid))
+        if valid:
+            X = np.array([[features[i][name] for name in self.FEATURES] for i in valid], dtype=np.float64)
+            compact = self._compact_forest()
+            if compact is not None:
+                raw_scores = compact.decision_function(X)
+            else:
+                if hasattr(self.scaler, "mean_") and self.scaler.mean_ is not None:
+                    X = self.scaler.transform(X)
+                if self._is_fitted():
+                    raw_scores = self.model.decision_function(X)
+
+        results = [
+            {
+                "is_anomaly": False,
+                "risk_score": 0.0,
+                "risk_level": "unknown",
+                "features": {},
+                "raw_score": 0.0,
+                "error": "Transaction has no account",
+            }
+            for _ in transactions
+        ]
+        for i, raw_score in zip(valid, raw_scores, strict=True):
+            results[i] = self._result_from_score(raw_score, features[i])
+        return results
+
     def train(self, transactions_queryset=None, min_samples: int = 100) -> dict:
         """Train or retrain the fraud detection model.
 
@@ -269,6 +434,10 @@ class MLFraudDetector:
         # Convert to numpy array
         X = np.array(features_list)
 
+        if self.model is None:
+            # Serving from the shared artifact; fit a fresh estimator.
+            self._initialize_new_model()
+
         # Fit scaler
         self.scaler.fit(X)
         X_scaled = self.scaler.transform(X)
@@ -280,6 +449,14 @@ class MLFraudDetector:
         joblib.dump(self.model, self.MODEL_PATH)
         joblib.dump(self.scaler, self.SCALER_PATH)
 
+        # Publish the shared, memory-mappable artifact; workers switch to it on their next pointer check.
+        try:
+            version = artifacts.publish(self.MODEL_DIR, CompactForest.from_sklearn(self.model, self.scaler))
+            if version:
+                self.artifact_version = version
+        except Exception as e:
+            logger.warning(f"Failed to publish fraud model artifact: {e}")
+
         logger.info(f"Trained fraud detection model on {len(features_list)} samples")
 
         return {
@@ -302,9 +479,31 @@ class MLFraudDetector:
             "last_trained": model_mtime.isoformat() if model_mtime else None,
             "features": self.FEATURES,
             "anomaly_threshold": self.ANOMALY_THRESHOLD,
-            "is_fitted": self._is_fitted(),
+            "is_fitted": self._is_fitted() or self.artifact is not None,
+            "artifact_version": self.artifact_version,
         }
 
+    def _compact_forest(self) -> CompactForest | None:
+        """Array-backed export of the current model and scaler, rebuilt whenever either object changes."""
+        if self.model is None:
+            return self.artifact
+
+        source = (self.model, self.scaler)
+        cached = getattr(self, "_compact", None)
+        if cached is not None and cached[0][0] is source[0] and cached[0][1] is source[1]:
+            return cached[1]
+
+        from sklearn.ensemble import IsolationForest
+
+        compact = None
+        if isinstance(self.model, IsolationForest) and self._is_fitted():
+            try:
+                compact = CompactForest.from_sklearn(self.model, self.scaler)
+            except Exception as e:
+                logger.warning(f"Could not export compact fraud model, using sklearn scoring: {e}")
+        self._compact = (source, compact)
+        return compact
+
     def _is_fitted(self) -> bool:
         """Helper to check if model is fitted."""
         try:
@@ -325,6 +524,8 @@ def get_fraud_detector() -> MLFraudDetector:
     global _detector_instance
     if _detector_instance is None:
         _detector_instance = MLFraudDetector()
+    else:
+        _detector_instance.refresh_artifact()
     return _detector_instance
 
 
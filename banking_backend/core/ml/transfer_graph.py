@@ -0,0 +1,200 @@
+"""Transfer-graph analysis for money-mule detection.
+
+Per-account features cannot see a mule ring: each account looks ordinary
+until you notice that it collects transfers from many senders and forwards
+the money on within hours. This module loads every ``transfer`` in a rolling
+window as an edge list and builds sparse account-by-account matrices (summed
+amount and transfer count). Everything else is computed as whole-array
+operations:
+
+* weakly connected components (``scipy.sparse.csgraph``) group accounts into
+  clusters of linked accounts;
+* fan-in / fan-out are the numbers of distinct counterparties per account;
+* the rapid pass-through ratio is the share of an account's inflow that it
+  sent on within ``FRAUD_GRAPH_PASS_THROUGH_SECONDS`` of receiving money.
+
+An account is a mule candidate when it passes most of its money through
+quickly and has a wide fan-in or fan-out. Only candidates in a cluster of at
+least ``FRAUD_GRAPH_MIN_CLUSTER_SIZE`` accounts are reported. There is no
+per-account query or loop, so millions of edges take seconds on one core;
+loading the rows from the database is the dominant cost.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+logger = logging.getLogger(__name__)
+
+FRAUD_GRAPH_WINDOW_HOURS = getattr(settings, "FRAUD_GRAPH_WINDOW_HOURS", 72)
+FRAUD_GRAPH_PASS_THROUGH_SECONDS = getattr(settings, "FRAUD_GRAPH_PASS_THROUGH_SECONDS", 6 * 3600)
+FRAUD_GRAPH_PASS_THROUGH_RATIO = getattr(settings, "FRAUD_GRAPH_PASS_THROUGH_RATIO", 0.8)
+FRAUD_GRAPH_MIN_FAN = getattr(settings, "FRAUD_GRAPH_MIN_FAN", 5)
+FRAUD_GRAPH_MIN_CLUSTER_SIZE = getattr(settings, "FRAUD_GRAPH_MIN_CLUSTER_SIZE", 4)
+
+# Edge-list columns loaded from the database, in order.
+EDGE_FIELDS = ("id", "from_account_id", "to_account_id", "amount", "timestamp")
+
+
+@dataclass
+class TransferEdges:
+    """Column arrays of one transfer per row."""
+
+    tx_id: np.ndarray
+    source: np.ndarray
+    target: np.ndarray
+    amount: np.ndarray
+    seconds: np.ndarray  # POSIX timestamp, whole seconds
+
+    def __len__(self):
+        return len(self.tx_id)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from ``(id, from_account_id, to_account_id, amount, timestamp)`` tuples."""
+        rows = list(rows)
+        if not rows:
+            return cls(*(np.empty(0, dtype=np.int64) for _ in range(3)), np.empty(0), np.empty(0, dtype=np.int64))
+        tx_id, source, target, amount, timestamp = zip(*rows, strict=True)
+        return cls(
+            tx_id=np.fromiter(tx_id, dtype=np.int64, count=len(rows)),
+            source=np.fromiter(source, dtype=np.int64, count=len(rows)),
+            target=np.fromiter(target, dtype=np.int64, count=len(rows)),
+            amount=np.fromiter(amount, dtype=np.float64, count=len(rows)),
+            seconds=np.fromiter((int(ts.timestamp()) for ts in timestamp), dtype=np.int64, count=len(rows)),
+        )
+
+
+@dataclass
+class GraphReport:
+    """Per-account metrics (indexed like ``account_ids``) and the resulting mule candidates."""
+
+    account_ids: np.ndarray
+    component: np.ndarray
+    component_size: np.ndarray
+    fan_in: np.ndarray
+    fan_out: np.ndarray
+    inflow: np.ndarray
+    outflow: np.ndarray
+    pass_through: np.ndarray
+    latest_tx_id: np.ndarray
+    suspicious: np.ndarray  # bool mask of mule candidates
+
+    @property
+    def suspicious_accounts(self):
+        return self.account_ids[self.suspicious]
+
+    def cluster_mule_counts(self):
+        """Number of mule candidates in each account's cluster."""
+        per_component = np.bincount(self.component, weights=self.suspicious, minlength=self.component.max() + 1)
+        return per_component[self.component].astype(np.int64)
+
+
+def load_transfer_edges(since=None):
+    """Completed or held account-to-account transfers since ``since`` (default: the rolling window)."""
+    from core.models import Transaction
+
+    since = since or timezone.now() - timedelta(hours=FRAUD_GRAPH_WINDOW_HOURS)
+    rows = (
+        Transaction.objects.filter(
+            transaction_type="transfer",
+            status__in=["completed", "pending_approval"],
+            timestamp__gte=since,
+            from_account__isnull=False,
+            to_account__isnull=False,
+        )
+        .exclude(from_account_id=F("to_account_id"))
+        .values_list(*EDGE_FIELDS)
+        .iterator(chunk_size=20000)
+    )
+    return TransferEdges.from_rows(rows)
+
+
+def rapid_outflow(node, seconds, amount, incoming, window):
+    """Outgoing amount per event that left within ``window`` seconds of the node's latest receipt.
+
+    Events are (node, time) pairs, both directions mixed. Sorting by (node, time)
+    and taking a running maximum of "time of last receipt" gives every event the
+    time the node last received money. Node ids are folded into the running value
+    so that it restarts at each node.
+    """
+    order = np.lexsort((~incoming, seconds, node))  # receipts sort before sends at the same second
+    node, seconds, amount, incoming = node[order], seconds[order], amount[order], incoming[order]
+
+    rel = seconds - seconds.min() if len(seconds) else seconds
+    span = (int(rel.max()) if len(rel) else 0) + window + 2
+    base = node * span
+    # A receipt carries its own time; any other event carries a floor below the node's first receipt.
+    marker = np.where(incoming, base + rel, base - window - 1)
+    last_receipt = np.maximum.accumulate(marker) - base
+    rapid = ~incoming & (last_receipt >= 0) & (rel - last_receipt <= window)
+    return node[rapid], amount[rapid]
+
+
+def analyze_transfer_graph(
+    edges: TransferEdges,
+    pass_through_seconds=None,
+    pass_through_ratio=None,
+    min_fan=None,
+    min_cluster_size=None,
+) -> GraphReport:
+    """Compute per-account graph metrics and flag mule candidates."""
+    pass_through_seconds = FRAUD_GRAPH_PASS_THROUGH_SECONDS if pass_through_seconds is None else pass_through_seconds
+    pass_through_ratio = FRAUD_GRAPH_PASS_THROUGH_RATIO if pass_through_ratio is None else pass_through_ratio
+    min_fan = FRAUD_GRAPH_MIN_FAN if min_fan is None else min_fan
+    min_cluster_size = FRAUD_GRAPH_MIN_CLUSTER_SIZE if min_cluster_size is None else min_cluster_size
+
+    account_ids, index = np.unique(np.concatenate([edges.source, edges.target]), return_inverse=True)
+    n = len(account_ids)
+    src, dst = index[: len(edges)], index[len(edges) :]
+
+    # Duplicate (src, dst) pairs are summed when converting to CSR.
+    amounts = coo_matrix((edges.amount, (src, dst)), shape=(n, n)).tocsr()
+    counts = coo_matrix((np.ones(len(edges)), (src, dst)), shape=(n, n)).tocsr()
+
+    _, component = connected_components(counts, directed=True, connection="weak")
+    component_size = np.bincount(component)[component]
+
+    linked = counts.astype(bool)
+    fan_out = np.asarray(linked.sum(axis=1)).ravel()
+    fan_in = np.asarray(linked.sum(axis=0)).ravel()
+    outflow = np.asarray(amounts.sum(axis=1)).ravel()
+    inflow = np.asarray(amounts.sum(axis=0)).ravel()
+
+    nodes = np.concatenate([dst, src])
+    incoming = np.concatenate([np.ones(len(edges), dtype=bool), np.zeros(len(edges), dtype=bool)])
+    rapid_nodes, rapid_amounts = rapid_outflow(
+        nodes, np.tile(edges.seconds, 2), np.tile(edges.amount, 2), incoming, pass_through_seconds
+    )
+    rapid = np.bincount(rapid_nodes, weights=rapid_amounts, minlength=n)
+    pass_through = np.divide(rapid, inflow, out=np.zeros(n), where=inflow > 0).clip(max=1.0)
+
+    latest_tx_id = np.zeros(n, dtype=np.int64)
+    np.maximum.at(latest_tx_id, src, edges.tx_id)
+    np.maximum.at(latest_tx_id, dst, edges.tx_id)
+
+    suspicious = (
+        (pass_through >= pass_through_ratio)
+        & ((fan_in >= min_fan) | (fan_out >= min_fan))
+        & (component_size >= min_cluster_size)
+    )
+    return GraphReport(
+        account_ids=account_ids,
+        component=component,
+        component_size=component_size,
+        fan_in=fan_in,
+        fan_out=fan_out,
+        inflow=inflow,
+        outflow=outflow,
+        pass_through=pass_through,
+        latest_tx_id=latest_tx_id,
+        suspicious=suspicious,
+    )
@@ -42,6 +42,7 @@ from core.models.reporting import (  # noqa: F401
     Report,
     ReportSchedule,
     ReportTemplate,
+    RequestProfile,
     SystemHealth,
 )
 from core.models.transactions import (  # noqa: F401
@@ -27,6 +27,10 @@ class FraudAlert(models.Model):
     reason = models.TextField(blank=True)
     status = models.CharField(max_length=20, default="pending")
 
+    # Which detector raised the alert (e.g. "large_amount", "velocity", "ml", "rule:<id>").
+    # Together with ``transaction`` it makes automated alerts idempotent across runs.
+    detector = models.CharField(max_length=64, blank=True, default="")
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -36,6 +40,13 @@ class FraudAlert(models.Model):
             models.Index(fields=["user", "-created_at"], name="fraud_user_idx"),
             models.Index(fields=["severity", "is_resolved"], name="fraud_sev_res_idx"),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["transaction", "detector"],
+                condition=models.Q(transaction__isnull=False) & ~models.Q(detector=""),
+                name="fraud_alert_tx_detector_uniq",
+            ),
+        ]
 
     def __str__(self):
         return f"Fraud Alert - {self.user.username} ({self.severity})"
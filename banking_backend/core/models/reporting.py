@@ -5,6 +5,7 @@ Includes report templates, schedules, and system health metrics.
 
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class ReportTemplate(models.Model):
@@ -136,11 +137,29 @@ class PerformanceMetric(models.Model):
         ("transaction_volume", "Transaction Volume"),
     ]
 
+    STATISTIC_CHOICES = [
+        ("", "Value"),
+        ("count", "Count"),
+        ("mean", "Mean"),
+        ("p50", "p50"),
+        ("p95", "p95"),
+        ("p99", "p99"),
+        ("max", "Max"),
+    ]
+
     metric_type = models.CharField(max_length=30, choices=METRIC_TYPES)
     value = models.DecimalField(max_digits=15, decimal_places=4)
     unit = models.CharField(max_length=20)
     endpoint = models.CharField(max_length=200, blank=True)
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    # Which summary of the window ``value`` is (e.g. the p95 of response times)
+    statistic = models.CharField(max_length=10, choices=STATISTIC_CHOICES, blank=True, default="")
+    # Requests the row summarizes; weights the row when windows are combined
+    sample_count = models.PositiveIntegerField(default=0)
+    # Length of the aggregation window the row covers (60 for raw rows, 3600 once downsampled)
+    window_seconds = models.PositiveIntegerField(default=60)
+    # Latency histogram of the window (``LatencyHistogram.to_dict``); merged across rows to read percentiles
+    histogram = models.JSONField(null=True, blank=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         db_table = "core_performancemetric"
@@ -149,6 +168,7 @@ class PerformanceMetric(models.Model):
         verbose_name_plural = "Performance Metrics"
         indexes = [
             models.Index(fields=["metric_type", "recorded_at"]),
+            models.Index(fields=["window_seconds", "recorded_at"], name="perf_metric_window_idx"),
         ]
 
     def __str__(self):
@@ -178,3 +198,40 @@ class SystemHealth(models.Model):
 
     def __str__(self):
         return f"{self.service_name}: {self.status}"
+
+
+class RequestProfile(models.Model):
+    """A cProfile capture of one request, with its SQL timings (see ``core.middleware.profiling``)."""
+
+    TRIGGER_CHOICES = [
+        ("header", "Requested by superuser"),
+        ("sampled", "Sampled"),
+    ]
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="request_profiles"
+    )
+    duration_ms = models.DecimalField(max_digits=12, decimal_places=3)
+    db_queries = models.PositiveIntegerField(default=0)
+    db_time_ms = models.DecimalField(max_digits=12, decimal_places=3, default=0)
+    # Top functions by cumulative time, as printed by pstats
+    summary = models.TextField(blank=True)
+    # Statement shapes (no parameters) with count, total and slowest time in ms, slowest first
+    sql = models.JSONField(default=list, blank=True)
+    # gzip-compressed pstats dump; loadable by ``pstats``/snakeviz once decompressed
+    profile_data = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "core_requestprofile"
+        ordering = ["-created_at"]
+        verbose_name = "Request Profile"
+        verbose_name_plural = "Request Profiles"
+
+    def __str__(self):
+        return f"{self.method} {self.view_name or self.path} ({self.duration_ms} ms)"
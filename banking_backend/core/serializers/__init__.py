@@ -27,6 +27,7 @@ from core.serializers.messaging import (
     BlockedUserSerializer,
     MessageSerializer,
     MessageThreadSerializer,
+    MessageThreadSummarySerializer,
     UserMessagePreferenceSerializer,
 )
 from core.serializers.operational import (
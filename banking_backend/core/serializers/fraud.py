@@ -42,3 +42,25 @@ class FraudRuleSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "trigger_count", "false_positive_count", "last_triggered", "created_at", "updated_at"]
+
+    # Fields the screening engine compiles into the rule's predicate
+    condition_fields = ("field", "operator", "value", "additional_conditions")
+
+    def validate(self, attrs):
+        """Reject rules the screening engine could not compile."""
+        from core.services.fraud_rules import RuleCompilationError, compile_rule
+
+        if self.instance is not None and not any(field in attrs for field in self.condition_fields):
+            # e.g. deactivating a legacy rule that never compiled must not be refused
+            return attrs
+        candidate = FraudRule(
+            **{
+                field: attrs.get(field, getattr(self.instance, field, None))
+                for field in ("name", "severity", "field", "operator", "value", "additional_conditions", "auto_block")
+            }
+        )
+        try:
+            compile_rule(candidate)
+        except RuleCompilationError as e:
+            raise serializers.ValidationError({"non_field_errors": [str(e)]}) from e
+        return attrs
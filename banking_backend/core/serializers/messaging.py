@@ -289,6 +289,69 @@ class MessageThreadSerializer(serializers.ModelSerializer):
         return obj.created_by.get_full_name() if obj.created_by else None
 
 
+class MessageThreadSummarySerializer(serializers.ModelSerializer):
+    """Lightweight, read-only thread representation for inbox listings.
+
+    Expects a queryset prepared by ``MessageThreadViewSet.get_summary_queryset``:
+    counts and the last-message preview come from SQL annotations, and display
+    names are resolved once per page through the ``user_names`` context map
+    instead of decrypting per thread. Messages are loaded separately through
+    the paginated ``messages`` thread action.
+    """
+
+    message_count = serializers.IntegerField(source="total_messages", read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+    last_message_preview = serializers.SerializerMethodField()
+    created_by_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MessageThread
+        fields = [
+            "id",
+            "subject",
+            "thread_type",
+            "participants",
+            "created_by",
+            "created_by_name",
+            "is_archived",
+            "is_pinned",
+            "last_message_at",
+            "created_at",
+            "updated_at",
+            "message_count",
+            "unread_count",
+            "last_message_preview",
+        ]
+        read_only_fields = fields
+
+    def _is_manager(self):
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        return bool(
+            user
+            and user.is_authenticated
+            and (user.role in ["manager", "operations_manager", "admin"] or user.is_superuser)
+        )
+
+    def _display_name(self, user_id, default):
+        from core.utils import mask_generic
+
+        if user_id is None:
+            return default
+        name = self.context.get("user_names", {}).get(user_id, default)
+        return name if self._is_manager() else mask_generic(name)
+
+    def get_last_message_preview(self, obj):
+        if not getattr(obj, "last_message_created_at", None):
+            return ""
+        # SECURITY: Only preview encrypted content, never plain content
+        content_preview = (obj.last_message_encrypted_content or "[Encrypted]")[:100]
+        return f"{self._display_name(obj.last_message_sender_id, 'System')}: {content_preview}"
+
+    def get_created_by_name(self, obj):
+        return self._display_name(obj.created_by_id, None)
+
+
 class UserMessagePreferenceSerializer(serializers.ModelSerializer):
     """Serializer for user message preferences."""
 
@@ -130,7 +130,18 @@ class PerformanceMetricSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PerformanceMetric
-        fields = ["id", "metric_type", "metric_type_display", "value", "unit", "endpoint", "recorded_at"]
+        fields = [
+            "id",
+            "metric_type",
+            "metric_type_display",
+            "statistic",
+            "value",
+            "unit",
+            "endpoint",
+            "sample_count",
+            "window_seconds",
+            "recorded_at",
+        ]
         read_only_fields = ["id", "recorded_at"]
 
 
@@ -9,8 +9,10 @@ from decimal import Decimal
 
 from django.db import IntegrityError, transaction
 
+from core.dashboard_cache import invalidate_member_dashboards
 from core.exceptions import OperationalError
 from core.models.accounts import Account
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +39,7 @@ class AccountService:
         return (10 - (checksum % 10)) % 10
 
     @staticmethod
+    @traced()
     def create_account(user, account_type: str = "daily_susu", initial_balance: Decimal = Decimal("0.00")) -> Account:
         """Create a new account for a user with a unique structured account number."""
         branch_code = "2231"
@@ -61,6 +64,7 @@ class AccountService:
                         initial_balance=initial_balance,
                         balance=initial_balance,
                     )
+                    invalidate_member_dashboards(user.pk)
                     logger.info(f"Account created: {account.account_number} for user {user.email}")
                     return account
 
@@ -85,20 +89,24 @@ class AccountService:
         return f"...{account_number[-4:]}"
 
     @staticmethod
+    @traced()
     def update_balance(account: Account, amount: Decimal) -> Account:
         """Update an account's balance. This method MUST be called within a transaction.atomic() block."""
         account = Account.objects.select_for_update().get(pk=account.pk)
         account.balance += amount
         account.save(update_fields=["balance", "updated_at"])
+        invalidate_member_dashboards(account.user_id)
         return account
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def lock_account(account: Account, reason: str = "") -> Account:
         """Freeze an account (is_active=False) with a reason."""
         account = Account.objects.select_for_update().get(pk=account.pk)
         account.is_active = False
         account.save(update_fields=["is_active", "updated_at"])
+        invalidate_member_dashboards(account.user_id)
 
         from users.models import AuditLog
 
@@ -113,11 +121,13 @@ class AccountService:
         return account
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def unlock_account(account: Account) -> Account:
         """Unfreeze an account."""
         account = Account.objects.select_for_update().get(pk=account.pk)
         account.is_active = True
         account.save(update_fields=["is_active", "updated_at"])
+        invalidate_member_dashboards(account.user_id)
         logger.info(f"Account {account.account_number} unlocked.")
         return account
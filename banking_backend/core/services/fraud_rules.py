@@ -0,0 +1,338 @@
+"""Deterministic FraudRule screening for Coastal Banking.
+
+Staff manage ``FraudRule`` rows through ``FraudRuleViewSet``; this module
+turns the active rules into an in-process evaluator that sits in front of the
+(much more expensive) ML detector.
+
+* ``get_rule_engine()`` returns a ``CompiledRuleSet`` cached per worker. Each
+  rule is compiled once into plain Python predicates, so screening one
+  transaction is a handful of comparisons with no queries.
+* Saving or deleting any rule bumps a version key in the shared cache. Workers
+  re-check that key at most every ``FRAUD_RULES_VERSION_CHECK_SECONDS`` and
+  recompile when it moved; the saving process recompiles immediately.
+* ``CompiledRuleSet.evaluate_batch`` evaluates every rule against NumPy column
+  arrays for backfills (``screen_queryset``, run by the ``backfill_fraud_rules``
+  task and command), producing a rules x rows match matrix.
+* Trigger statistics are accumulated in memory and written with a single
+  ``UPDATE`` (``flush_rule_triggers``) instead of one save per hit.
+
+Rules compare ``field`` against ``value`` with ``operator``. Extra conditions
+in ``additional_conditions`` are ANDed: ``{"transaction_type": "withdrawal"}``
+is an equality test, a list value is a membership test, and
+``{"hour_of_day": {"operator": ">=", "value": 22}}`` uses an explicit operator.
+"""
+
+import logging
+import operator as op
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+import numpy as np
+
+from core.models.fraud import FraudRule
+
+logger = logging.getLogger(__name__)
+
+FRAUD_RULES_VERSION_KEY = "fraud_rules:version"
+# How often a worker consults the shared version key (seconds).
+FRAUD_RULES_VERSION_CHECK_SECONDS = getattr(settings, "FRAUD_RULES_VERSION_CHECK_SECONDS", 5)
+
+# Transaction facts a rule may reference, and whether they compare numerically.
+NUMERIC_FIELDS = {"amount", "hour_of_day", "day_of_week", "is_weekend"}
+TEXT_FIELDS = {"transaction_type", "status", "description"}
+SUPPORTED_FIELDS = NUMERIC_FIELDS | TEXT_FIELDS
+
+_COMPARISONS = {
+    ">": op.gt,
+    "<": op.lt,
+    ">=": op.ge,
+    "<=": op.le,
+    "==": op.eq,
+    "!=": op.ne,
+}
+SUPPORTED_OPERATORS = (*_COMPARISONS, "contains", "in")
+
+
+class RuleCompilationError(ValueError):
+    """A rule references an unknown field/operator or a value of the wrong type."""
+
+
+@dataclass(frozen=True)
+class Condition:
+    field: str
+    operator: str
+    value: object
+
+    def matches(self, facts):
+        actual = facts.get(self.field)
+        if actual is None:
+            return False
+        if self.operator == "contains":
+            return self.value in str(actual).lower()
+        if self.operator == "in":
+            return actual in self.value
+        return _COMPARISONS[self.operator](actual, self.value)
+
+    def matches_column(self, columns):
+        column = columns.get(self.field)
+        if column is None:
+            return None
+        if self.operator == "contains":
+            return np.char.find(np.char.lower(column.astype(str)), self.value) >= 0
+        if self.operator == "in":
+            return np.isin(column, list(self.value))
+        return _COMPARISONS[self.operator](column, self.value)
+
+
+def compile_condition(field, operator, value):
+    """Validate and coerce one ``field operator value`` triple."""
+    if field not in SUPPORTED_FIELDS:
+        choices = ", ".join(sorted(SUPPORTED_FIELDS))
+        raise RuleCompilationError(f"Unsupported field '{field}'. Choose one of: {choices}")
+    if operator not in SUPPORTED_OPERATORS:
+        raise RuleCompilationError(f"Unsupported operator '{operator}'")
+
+    if operator == "contains":
+        return Condition(field, operator, str(value).lower())
+
+    coerce = float if field in NUMERIC_FIELDS else str
+    try:
+        if operator == "in":
+            items = value if isinstance(value, list | tuple) else str(value).split(",")
+            return Condition(field, operator, frozenset(coerce(str(item).strip()) for item in items))
+        return Condition(field, operator, coerce(value))
+    except (TypeError, ValueError) as e:
+        raise RuleCompilationError(f"Invalid value {value!r} for field '{field}'") from e
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    name: str
+    severity: str
+    auto_block: bool
+    conditions: tuple[Condition, ...]
+
+    def matches(self, facts):
+        return all(condition.matches(facts) for condition in self.conditions)
+
+
+def compile_rule(rule):
+    """Compile a ``FraudRule`` into a ``CompiledRule``; raises ``RuleCompilationError``."""
+    conditions = [compile_condition(rule.field, rule.operator, rule.value)]
+    extra = rule.additional_conditions or {}
+    if not isinstance(extra, dict):
+        raise RuleCompilationError("additional_conditions must be an object mapping fields to conditions")
+    for field, spec in extra.items():
+        if isinstance(spec, dict):
+            conditions.append(compile_condition(field, spec.get("operator", "=="), spec.get("value")))
+        elif isinstance(spec, list):
+            conditions.append(compile_condition(field, "in", spec))
+        else:
+            conditions.append(compile_condition(field, "==", spec))
+    return CompiledRule(rule.id, rule.name, rule.severity, rule.auto_block, tuple(conditions))
+
+
+class CompiledRuleSet:
+    """Immutable evaluator for one version of the active rule set."""
+
+    def __init__(self, rules, version=None):
+        self.rules = tuple(rules)
+        self.version = version
+
+    @classmethod
+    def from_database(cls, version=None):
+        compiled = []
+        for rule in FraudRule.objects.filter(is_active=True).order_by("id"):
+            try:
+                compiled.append(compile_rule(rule))
+            except RuleCompilationError as e:
+                logger.warning(f"Skipping fraud rule {rule.id} ({rule.name}): {e}")
+        return cls(compiled, version)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def evaluate(self, facts):
+        """Return the rules matched by one transaction's facts."""
+        return [rule for rule in self.rules if rule.matches(facts)]
+
+    def evaluate_batch(self, columns):
+        """Evaluate every rule against column arrays (see ``transaction_columns``).
+
+        Returns a boolean matrix of shape ``(len(rules), n_rows)``.
+        """
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        matrix = np.zeros((len(self.rules), n_rows), dtype=bool)
+        for i, rule in enumerate(self.rules):
+            mask = np.ones(n_rows, dtype=bool)
+            for condition in rule.conditions:
+                matched = condition.matches_column(columns)
+                if matched is None:
+                    mask[:] = False
+                    break
+                mask &= matched
+            matrix[i] = mask
+        return matrix
+
+
+def transaction_facts(tx):
+    """Facts rules can reference, for a single ``Transaction``."""
+    timestamp = timezone.localtime(tx.timestamp or timezone.now())
+    return {
+        "amount": float(tx.amount),
+        "transaction_type": tx.transaction_type,
+        "status": tx.status,
+        "description": tx.description or "",
+        "hour_of_day": timestamp.hour,
+        "day_of_week": timestamp.weekday(),
+        "is_weekend": int(timestamp.weekday() >= 5),
+    }
+
+
+def transaction_columns(queryset):
+    """Build NumPy columns for ``evaluate_batch`` with one query; returns ``(ids, columns)``."""
+    rows = list(queryset.values_list("id", "amount", "transaction_type", "status", "description", "timestamp"))
+    if not rows:
+        return np.array([], dtype=np.int64), {}
+    ids, amounts, types, statuses, descriptions, timestamps = zip(*rows, strict=True)
+    local = [timezone.localtime(ts) for ts in timestamps]
+    day_of_week = np.array([ts.weekday() for ts in local], dtype=np.float64)
+    return np.array(ids, dtype=np.int64), {
+        "amount": np.array(amounts, dtype=np.float64),
+        "transaction_type": np.array(types, dtype=object),
+        "status": np.array(statuses, dtype=object),
+        "description": np.array([d or "" for d in descriptions], dtype=object),
+        "hour_of_day": np.array([ts.hour for ts in local], dtype=np.float64),
+        "day_of_week": day_of_week,
+        "is_weekend": (day_of_week >= 5).astype(np.float64),
+    }
+
+
+_engine: CompiledRuleSet | None = None
+_engine_checked_at = 0.0
+_engine_lock = threading.Lock()
+
+
+def _current_version():
+    try:
+        return cache.get(FRAUD_RULES_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Fraud rule version lookup failed: {e}")
+        return None
+
+
+def get_rule_engine():
+    """Return this worker's compiled rule set, recompiling if the shared version moved."""
+    global _engine, _engine_checked_at
+
+    now = time.monotonic()
+    engine = _engine
+    if engine is not None and now - _engine_checked_at < FRAUD_RULES_VERSION_CHECK_SECONDS:
+        return engine
+
+    with _engine_lock:
+        version = _current_version()
+        if _engine is None or version is None or version != _engine.version:
+            if version is None:
+                version = uuid.uuid4().hex
+                try:
+                    cache.add(FRAUD_RULES_VERSION_KEY, version, None)
+                    version = cache.get(FRAUD_RULES_VERSION_KEY) or version
+                except Exception as e:
+                    logger.warning(f"Fraud rule version publish failed: {e}")
+            _engine = CompiledRuleSet.from_database(version)
+        _engine_checked_at = now
+        return _engine
+
+
+def _publish_new_version():
+    try:
+        cache.set(FRAUD_RULES_VERSION_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.warning(f"Fraud rule version bump failed: {e}")
+
+
+def invalidate_rule_engine():
+    """Drop this worker's compiled copy now and publish a new version once the change commits."""
+    global _engine
+    with _engine_lock:
+        _engine = None
+    # Other workers must not recompile (and cache) the rule set before the change is visible to them.
+    transaction.on_commit(_publish_new_version)
+
+
+@receiver(post_save, sender=FraudRule)
+@receiver(post_delete, sender=FraudRule)
+def fraud_rule_changed(sender, instance, **kwargs):
+    invalidate_rule_engine()
+
+
+_pending_triggers: Counter = Counter()
+_pending_lock = threading.Lock()
+
+
+def record_rule_triggers(rule_ids):
+    """Accumulate trigger counts in memory; persisted by ``flush_rule_triggers``."""
+    if not rule_ids:
+        return
+    with _pending_lock:
+        _pending_triggers.update(rule_ids)
+
+
+def flush_rule_triggers():
+    """Write accumulated ``trigger_count``/``last_triggered`` updates in one UPDATE."""
+    with _pending_lock:
+        pending = dict(_pending_triggers)
+        _pending_triggers.clear()
+    if not pending:
+        return 0
+    FraudRule.objects.filter(id__in=pending).update(
+        trigger_count=F("trigger_count") + Case(*(When(id=rule_id, then=Value(n)) for rule_id, n in pending.items())),
+        last_triggered=timezone.now(),
+    )
+    return len(pending)
+
+
+def screen_transaction(tx):
+    """Evaluate the active rules against ``tx`` and record the hits."""
+    matched = get_rule_engine().evaluate(transaction_facts(tx))
+    record_rule_triggers([rule.id for rule in matched])
+    return matched
+
+
+def screen_queryset(queryset, chunk_size=5000):
+    """Vectorized backfill: evaluate the active rules over ``queryset`` chunk by chunk.
+
+    Returns ``{transaction_id: [CompiledRule, ...]}`` for transactions that matched
+    at least one rule. Hits are not recorded: transactions screened before would
+    count twice (``core.tasks.backfill_fraud_rules`` records the new ones).
+    """
+    engine = get_rule_engine()
+    hits = {}
+    if not len(engine):
+        return hits
+
+    last_id = 0
+    queryset = queryset.order_by("id")
+    while True:
+        ids, columns = transaction_columns(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not len(ids):
+            break
+        matrix = engine.evaluate_batch(columns)
+        rule_idx, row_idx = np.nonzero(matrix)
+        for i, j in zip(rule_idx.tolist(), row_idx.tolist(), strict=True):
+            hits.setdefault(int(ids[j]), []).append(engine.rules[i])
+        last_id = int(ids[-1])
+    return hits
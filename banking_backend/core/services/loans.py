@@ -13,6 +13,7 @@ from django.utils import timezone
 from core.exceptions import InsufficientFundsError
 from core.models.accounts import Account
 from core.models.loans import Loan
+from core.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,7 @@ class LoanService:
     """Service class for loan-related operations."""
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def create_loan(user, amount: Decimal, interest_rate: Decimal, term_months: int) -> Loan:
         """Create a new loan application for a user."""
@@ -31,6 +33,7 @@ class LoanService:
         return loan
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def approve_loan(loan: Loan, approved_by=None) -> Loan:
         """Approve a pending loan application and disburse funds."""
@@ -92,6 +95,7 @@ class LoanService:
         return loan
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def reject_loan(loan: Loan, notes: str = None) -> Loan:
         """Reject a pending loan application."""
@@ -142,6 +146,7 @@ class LoanService:
             logger.exception(f"Loan SMS notification service error for loan {loan.id}")
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def repay_loan(loan: Loan, amount: Decimal) -> Loan:
         """Record a loan repayment and update both loan balance and user account balance."""
@@ -0,0 +1,188 @@
+"""Real-time notification dispatch for Coastal Banking.
+
+Transaction notifications used to be pushed with
+``async_to_sync(channel_layer.group_send)`` from the ``on_commit`` hook of the
+request, so every transaction cost the cashier's request one Redis round-trip
+(plus an event-loop spin-up). Bulk posting and payroll disbursement runs paid
+that once per transaction.
+
+``NotificationDispatcher`` turns publishing into an in-memory append. A
+dedicated daemon thread, running its own event loop, drains the queue:
+
+* notifications published within ``NOTIFICATION_COALESCE_WINDOW_MS`` are
+  grouped per user, and several notifications for one user become a single
+  ``notification_batch`` frame;
+* the per-user group sends of one batch run concurrently on the dispatcher's
+  loop, bounded by ``NOTIFICATION_DISPATCH_CONCURRENCY``.
+
+Set ``NOTIFICATION_DISPATCHER_ENABLED = False`` to deliver inline instead
+(used by the test settings, where the in-memory channel layer is bound to the
+test's event loop). Clients then only ever receive plain ``notification``
+frames; the frame formats are documented in ``WEBSOCKET_API.md``.
+
+Delivery is best-effort, like the channel layer itself. The queue is drained
+when the interpreter exits normally (``atexit``) and when a Celery worker
+child shuts down, but notifications still queued when a process is killed
+are lost. Clients must treat the socket as a hint and reload state over the
+REST API after reconnecting.
+"""
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from asgiref.sync import async_to_sync
+from celery.signals import worker_process_shutdown
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+# Notifications for the same user published within this window share one frame.
+NOTIFICATION_COALESCE_WINDOW_MS = getattr(settings, "NOTIFICATION_COALESCE_WINDOW_MS", 200)
+# Maximum concurrent group sends per dispatch batch.
+NOTIFICATION_DISPATCH_CONCURRENCY = getattr(settings, "NOTIFICATION_DISPATCH_CONCURRENCY", 50)
+
+
+def notification_group_name(user_id):
+    """Channel-layer group joined by ``NotificationConsumer`` for ``user_id``."""
+    return f"notifications_{user_id}"
+
+
+def batching_enabled():
+    """Whether clients may receive ``notification_batch`` frames."""
+    return getattr(settings, "NOTIFICATION_DISPATCHER_ENABLED", True)
+
+
+def unbatch(frame):
+    """The individual notifications carried by a client frame."""
+    if frame.get("type") == "notification_batch":
+        return list(frame["notifications"])
+    return [frame]
+
+
+def build_frame(notifications):
+    """Coalesce the notifications queued for one user into a single client frame."""
+    if len(notifications) == 1:
+        return notifications[0]
+    return {"type": "notification_batch", "count": len(notifications), "notifications": list(notifications)}
+
+
+class NotificationDispatcher:
+    """Process-local queue plus background async dispatcher for user notifications."""
+
+    def __init__(self):
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    def publish(self, user_id, data):
+        """Queue ``data`` for delivery to ``user_id``'s notification sockets. Never blocks on I/O."""
+        if not batching_enabled():
+            self._send_inline(user_id, data)
+            return
+
+        with self._lock:
+            self._pending.append((user_id, data))
+            self._ensure_thread()
+        self._wakeup.set()
+
+    def _send_inline(self, user_id, data):
+        channel_layer = get_channel_layer()
+        if not channel_layer:
+            logger.warning("No channel layer configured, skipping WebSocket broadcast")
+            return
+        async_to_sync(channel_layer.group_send)(
+            notification_group_name(user_id), {"type": "send_notification", "data": data}
+        )
+
+    def _ensure_thread(self):
+        # Restart after fork (gunicorn/Celery prefork children inherit no running threads).
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+        self._thread.start()
+
+    def take_pending(self):
+        """Atomically remove and return everything queued so far."""
+        with self._lock:
+            items = list(self._pending)
+            self._pending.clear()
+        return items
+
+    async def dispatch(self, items, channel_layer):
+        """Deliver ``items`` (``(user_id, data)`` pairs), one coalesced frame per user."""
+        by_user = defaultdict(list)
+        for user_id, data in items:
+            by_user[user_id].append(data)
+
+        semaphore = asyncio.Semaphore(NOTIFICATION_DISPATCH_CONCURRENCY)
+
+        async def send(user_id, notifications):
+            async with semaphore:
+                try:
+                    await channel_layer.group_send(
+                        notification_group_name(user_id),
+                        {"type": "send_notification", "data": build_frame(notifications)},
+                    )
+                except Exception:
+                    logger.exception(f"Failed to dispatch {len(notifications)} notification(s) to user {user_id}")
+
+        await asyncio.gather(*(send(user_id, notifications) for user_id, notifications in by_user.items()))
+        return len(by_user)
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        channel_layer = get_channel_layer()
+        try:
+            while True:
+                self._wakeup.wait()
+                if not self._stopping:
+                    # Let the burst accumulate so it coalesces into fewer frames.
+                    time.sleep(NOTIFICATION_COALESCE_WINDOW_MS / 1000)
+                self._wakeup.clear()
+                items = self.take_pending()
+                if items and channel_layer:
+                    loop.run_until_complete(self.dispatch(items, channel_layer))
+                elif items:
+                    logger.warning(f"No channel layer configured, dropping {len(items)} notification(s)")
+                if self._stopping and not self._pending:
+                    break
+        except Exception:
+            logger.exception("Notification dispatcher stopped unexpectedly")
+        finally:
+            loop.close()
+
+    def shutdown(self, timeout=5):
+        """Deliver whatever is still queued, then stop the background thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread.join(timeout)
+
+
+notification_dispatcher = NotificationDispatcher()
+atexit.register(notification_dispatcher.shutdown)
+
+
+@worker_process_shutdown.connect
+def drain_on_worker_shutdown(**kwargs):
+    # Prefork children leave through os._exit, which skips atexit handlers
+    notification_dispatcher.shutdown()
+
+
+def publish_notification(user_id, data):
+    """Publish a real-time notification for ``user_id`` via the process dispatcher."""
+    notification_dispatcher.publish(user_id, data)
@@ -0,0 +1,307 @@
+"""Request latency aggregation into ``PerformanceMetric``.
+
+Writing a row per request would double the write load of every endpoint.
+Instead, ``RequestLatencyMiddleware`` records each request into an
+in-process ``LatencyAggregator``. That is one dict lookup and one counter
+increment under a lock. Every ``PERFORMANCE_METRICS_FLUSH_SECONDS`` a daemon
+thread swaps the histograms out and writes one ``response_time`` row per
+endpoint, plus one for all endpoints combined (``endpoint=""``), in a single
+``bulk_create``. Each row stores the whole histogram (bucket counts, request
+and error counts, sum and max) in its ``histogram`` column; ``value`` is the
+mean in milliseconds for display.
+
+``LatencyHistogram`` is an HDR-style log-linear histogram: latencies below
+``SUB_BUCKETS`` microseconds are counted exactly, and larger values fall into
+buckets no wider than 1/64 of their magnitude. Percentiles are therefore
+accurate to about 1.6%, and memory stays bounded whatever the traffic.
+
+Each process flushes its own rows. Readers (``summarize_response_times``)
+merge the stored histograms of every process and window before reading
+percentiles, so a p95 over a day is the p95 of that day's requests rather
+than an average of per-minute percentiles.
+
+``downsample_performance_metrics`` merges the raw one-minute histograms older
+than ``PERFORMANCE_METRICS_RAW_RETENTION_HOURS`` into one hourly row per
+endpoint and drops rows older than ``PERFORMANCE_METRICS_RETENTION_DAYS``.
+"""
+
+import atexit
+import logging
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_METRICS_FLUSH_SECONDS = getattr(settings, "PERFORMANCE_METRICS_FLUSH_SECONDS", 60)
+PERFORMANCE_METRICS_RAW_RETENTION_HOURS = getattr(settings, "PERFORMANCE_METRICS_RAW_RETENTION_HOURS", 48)
+PERFORMANCE_METRICS_RETENTION_DAYS = getattr(settings, "PERFORMANCE_METRICS_RETENTION_DAYS", 90)
+
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # exact below this many microseconds
+HALF_BUCKETS = SUB_BUCKETS // 2
+
+ALL_ENDPOINTS = ""
+HOURLY_WINDOW = 3600
+
+
+def bucket_index(microseconds):
+    """Histogram bucket of a latency in whole microseconds."""
+    if microseconds < SUB_BUCKETS:
+        return microseconds
+    shift = microseconds.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + ((microseconds >> shift) - HALF_BUCKETS)
+
+
+def bucket_value(index):
+    """Midpoint (in microseconds) of bucket ``index``."""
+    if index < SUB_BUCKETS:
+        return float(index)
+    shift, offset = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    shift += 1
+    return float(((offset + HALF_BUCKETS) << shift) + (1 << (shift - 1)))
+
+
+class LatencyHistogram:
+    """Sparse log-linear latency histogram with exact count, sum and max."""
+
+    __slots__ = ("buckets", "count", "errors", "max_us", "total_us")
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.errors = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds, is_error=False):
+        microseconds = max(0, int(seconds * 1_000_000))
+        self.buckets[bucket_index(microseconds)] += 1
+        self.count += 1
+        self.errors += bool(is_error)
+        self.total_us += microseconds
+        self.max_us = max(self.max_us, microseconds)
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.errors += other.errors
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def to_dict(self):
+        """Compact JSON form stored in ``PerformanceMetric.histogram``."""
+        return {
+            "buckets": sorted(self.buckets.items()),
+            "count": self.count,
+            "errors": self.errors,
+            "total_us": self.total_us,
+            "max_us": self.max_us,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.buckets = Counter(dict(data["buckets"]))
+        histogram.count = data["count"]
+        histogram.errors = data["errors"]
+        histogram.total_us = data["total_us"]
+        histogram.max_us = data["max_us"]
+        return histogram
+
+    def percentile(self, pct):
+        """Latency (microseconds) at percentile ``pct`` (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(bucket_value(index), float(self.max_us))
+        return float(self.max_us)
+
+    def statistics_ms(self):
+        """Mean, p50, p95, p99 and max in milliseconds."""
+        return {
+            "mean": self.total_us / self.count / 1000 if self.count else 0.0,
+            "p50": self.percentile(50) / 1000,
+            "p95": self.percentile(95) / 1000,
+            "p99": self.percentile(99) / 1000,
+            "max": self.max_us / 1000,
+        }
+
+
+def _decimal(value):
+    return Decimal(str(round(value, 4)))
+
+
+def histogram_row(endpoint, histogram, recorded_at, window_seconds):
+    """``PerformanceMetric`` storing ``histogram``; ``value`` is the mean for display."""
+    from core.models import PerformanceMetric
+
+    return PerformanceMetric(
+        metric_type="response_time",
+        statistic="mean",
+        value=_decimal(histogram.statistics_ms()["mean"]),
+        unit="ms",
+        endpoint=endpoint[:200],
+        sample_count=histogram.count,
+        histogram=histogram.to_dict(),
+        window_seconds=window_seconds,
+        recorded_at=recorded_at,
+    )
+
+
+class LatencyAggregator:
+    """Process-local per-endpoint latency histograms, flushed to the database periodically."""
+
+    def __init__(self):
+        self._histograms = defaultdict(LatencyHistogram)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    def record(self, endpoint, seconds, is_error=False):
+        with self._lock:
+            self._histograms[endpoint].record(seconds, is_error)
+            if getattr(settings, "PERFORMANCE_METRICS_FLUSH_ENABLED", True):
+                self._ensure_thread()
+
+    def take(self):
+        """Atomically remove and return the histograms collected so far."""
+        with self._lock:
+            histograms, self._histograms = self._histograms, defaultdict(LatencyHistogram)
+        return histograms
+
+    def build_rows(self, histograms, recorded_at=None, window_seconds=None):
+        """One ``PerformanceMetric`` row per endpoint in ``histograms``, plus an all-endpoints row."""
+        recorded_at = recorded_at or timezone.now()
+        window_seconds = window_seconds or PERFORMANCE_METRICS_FLUSH_SECONDS
+        if not histograms:
+            return []
+        combined = LatencyHistogram()
+        for histogram in histograms.values():
+            combined.merge(histogram)
+
+        return [
+            histogram_row(endpoint, histogram, recorded_at, window_seconds)
+            for endpoint, histogram in [*histograms.items(), (ALL_ENDPOINTS, combined)]
+        ]
+
+    def flush(self):
+        """Write everything recorded since the last flush with one ``bulk_create``."""
+        from core.models import PerformanceMetric
+
+        rows = self.build_rows(self.take())
+        if rows:
+            PerformanceMetric.objects.bulk_create(rows)
+        return len(rows)
+
+    def _ensure_thread(self):
+        # Restart after fork (gunicorn/Celery prefork children inherit no running threads).
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="latency-aggregator", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(PERFORMANCE_METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush request latency metrics")
+            finally:
+                close_old_connections()
+
+    def shutdown(self, timeout=5):
+        """Flush whatever is still buffered, then stop the background thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread.join(timeout)
+
+
+latency_aggregator = LatencyAggregator()
+atexit.register(latency_aggregator.shutdown)
+
+
+def record_request_latency(endpoint, seconds, is_error=False):
+    """Record one request's latency in the process aggregator (no I/O)."""
+    latency_aggregator.record(endpoint, seconds, is_error)
+
+
+def histogram_rows(**filters):
+    """Raw and hourly ``PerformanceMetric`` rows that carry a latency histogram."""
+    from core.models import PerformanceMetric
+
+    return PerformanceMetric.objects.filter(metric_type="response_time", histogram__isnull=False, **filters)
+
+
+def merged_histogram(rows):
+    """Merge the stored histograms of ``rows`` into one ``LatencyHistogram``."""
+    combined = LatencyHistogram()
+    for data in rows.values_list("histogram", flat=True).iterator():
+        combined.merge(LatencyHistogram.from_dict(data))
+    return combined
+
+
+def summarize_response_times(since, endpoint=ALL_ENDPOINTS):
+    """Response time statistics (ms), request count and error rate of the requests since ``since``.
+
+    Returns None when no latency has been recorded in the period.
+    """
+    histogram = merged_histogram(histogram_rows(recorded_at__gte=since, endpoint=endpoint))
+    if not histogram.count:
+        return None
+    summary = {statistic: round(value, 2) for statistic, value in histogram.statistics_ms().items()}
+    summary.update(
+        {
+            "requests": histogram.count,
+            "error_rate": round(histogram.errors / histogram.count * 100, 2),
+        }
+    )
+    return summary
+
+
+def downsample_performance_metrics(now=None):
+    """Merge raw histograms into hourly rows past the raw retention, and drop rows past full retention.
+
+    Only whole hours before the cutoff are rolled up, so running it repeatedly is safe.
+    """
+    from core.models import PerformanceMetric
+
+    now = now or timezone.now()
+    cutoff = (now - timedelta(hours=PERFORMANCE_METRICS_RAW_RETENTION_HOURS)).replace(minute=0, second=0, microsecond=0)
+    raw = histogram_rows(window_seconds__lt=HOURLY_WINDOW, recorded_at__lt=cutoff)
+
+    with transaction.atomic():
+        hourly = defaultdict(LatencyHistogram)
+        for endpoint, recorded_at, data in raw.values_list("endpoint", "recorded_at", "histogram").iterator():
+            hour = recorded_at.replace(minute=0, second=0, microsecond=0)
+            hourly[endpoint, hour].merge(LatencyHistogram.from_dict(data))
+        rolled = [
+            histogram_row(endpoint, histogram, hour, HOURLY_WINDOW) for (endpoint, hour), histogram in hourly.items()
+        ]
+        PerformanceMetric.objects.bulk_create(rolled, batch_size=1000)
+        raw_deleted, _ = raw.delete()
+
+    expired, _ = PerformanceMetric.objects.filter(
+        recorded_at__lt=now - timedelta(days=PERFORMANCE_METRICS_RETENTION_DAYS)
+    ).delete()
+    return {"rolled_up": len(rolled), "raw_deleted": raw_deleted, "expired": expired}
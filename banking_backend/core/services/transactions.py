@@ -13,14 +13,16 @@ if TYPE_CHECKING:
 from django.db import transaction
 from django.utils import timezone
 
+from core.dashboard_cache import invalidate_member_dashboards
 from core.exceptions import (
     AccountSuspendedError,
     InsufficientFundsError,
     InvalidTransactionError,
 )
-from core.ml.fraud_detector import MLFraudDetector
+from core.ml.fraud_detector import MLFraudDetector, get_fraud_detector
 from core.models.accounts import Account
 from core.models.transactions import Transaction
+from core.tracing import traced
 
 from .accounts import AccountService
 
@@ -31,6 +33,7 @@ class TransactionService:
     """Service class for transaction-related operations."""
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def create_transaction(
         from_account: Account | None,
@@ -86,7 +89,8 @@ class TransactionService:
                 transaction_type=transaction_type,
                 timestamp=timezone.now(),
             )
-            detector = MLFraudDetector()
+            # Process-wide detector; the model is loaded once, not per transaction.
+            detector: MLFraudDetector = get_fraud_detector()
             fraud_result = detector.predict(tx_candidate)
             is_anomaly = fraud_result.get("is_anomaly", False)
             fraud_risk_level = fraud_result.get("risk_level", "low")
@@ -120,6 +124,8 @@ class TransactionService:
             # Send SMS notification
             TransactionService._enqueue_notification(tx)
         else:
+            # Balances are untouched, but the pending transaction shows on both dashboards
+            TransactionService._invalidate_dashboards(tx)
             logger.info(f"Transaction {tx.id} requires approval (Amount: {amount} >= {threshold})")
 
         # Create AuditLog entry
@@ -146,6 +152,7 @@ class TransactionService:
         return tx
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def approve_transaction(transaction_id: int, approved_by: "User") -> Transaction:
         """Approve a pending transaction and execute balance changes."""
@@ -200,6 +207,7 @@ class TransactionService:
         return tx
 
     @staticmethod
+    @traced()
     def reject_transaction(transaction_id: int, rejected_by: "User", reason: str = "") -> Transaction:
         """Reject a pending transaction."""
         tx = Transaction.objects.get(pk=transaction_id)
@@ -209,11 +217,13 @@ class TransactionService:
         tx.status = "cancelled"
         tx.description = f"{tx.description} | Rejected: {reason}"
         tx.save()
+        TransactionService._invalidate_dashboards(tx)
 
         logger.info(f"Transaction {transaction_id} rejected by {rejected_by.email}")
         return tx
 
     @staticmethod
+    @traced()
     @transaction.atomic
     def reverse_transaction(transaction_id: str, reversed_by: "User", reason: str = "") -> Transaction:
         """Reverse a completed transaction and adjust balances accordingly."""
@@ -256,6 +266,14 @@ class TransactionService:
         logger.info(f"Transaction {transaction_id} reversed by {reversed_by.email}")
         return tx
 
+    @staticmethod
+    def _invalidate_dashboards(tx: Transaction):
+        """Refresh the member dashboards listing ``tx`` (balance changes do this in ``update_balance``)."""
+        invalidate_member_dashboards(
+            tx.from_account.user_id if tx.from_account_id else None,
+            tx.to_account.user_id if tx.to_account_id else None,
+        )
+
     @staticmethod
     def _enqueue_notification(tx: Transaction):
         """Helper to enqueue SMS and WebSocket notifications on commit."""
@@ -360,16 +378,11 @@ class TransactionService:
             if not account or not account.user:
                 return
 
-            from asgiref.sync import async_to_sync
-            from channels.layers import get_channel_layer
             from django.utils import timezone
 
-            user = account.user
-            channel_layer = get_channel_layer()
-            if not channel_layer:
-                logger.warning("No channel layer configured, skipping WebSocket broadcast")
-                return
+            from core.services.notifications import publish_notification
 
+            user = account.user
             notification_data = {
                 "type": "transaction",
                 "transaction_type": transaction_type,
@@ -381,14 +394,9 @@ class TransactionService:
                 "message": f"GHS {amount:.2f} {transaction_type} processed successfully."
             }
 
-            async_to_sync(channel_layer.group_send)(
-                f"notifications_{user.id}",
-                {
-                    "type": "send_notification",
-                    "data": notification_data
-                }
-            )
-            logger.info(f"WebSocket transaction notification sent to user {user.id}")
+            # Queued for the background dispatcher, which coalesces per user; no I/O on this thread.
+            publish_notification(user.id, notification_data)
+            logger.info(f"WebSocket transaction notification queued for user {user.id}")
 
         except Exception:
             logger.exception("Failed to send WebSocket transaction notification")
@@ -7,7 +7,8 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.mail import send_mail
-from django.db.models import Q, Sum
+from django.db.models import Count, Exists, Max, OuterRef, Q, Sum
+from django.db.models.functions import Coalesce
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -15,16 +16,28 @@ import psutil
 from celery import shared_task
 from celery.exceptions import MaxRetriesExceededError
 
+from .db_router import read_from_replica
 from .models import Account, FraudAlert, Loan, SystemHealth, Transaction
 
 logger = logging.getLogger(__name__)
 
+# analyze_fraud_patterns thresholds
+FRAUD_LARGE_TRANSACTION_THRESHOLD = Decimal(str(getattr(settings, "FRAUD_LARGE_TRANSACTION_THRESHOLD", "10000.00")))
+FRAUD_VELOCITY_MAX_PER_HOUR = getattr(settings, "FRAUD_VELOCITY_MAX_PER_HOUR", 10)
+# Transactions per batch rescoring chunk (one history query and one model call each)
+FRAUD_RESCORE_CHUNK_SIZE = getattr(settings, "FRAUD_RESCORE_CHUNK_SIZE", 2000)
+# Detectors whose alerts count as "already scored by the ML model"
+ML_DETECTORS = ("ml", "ml_batch")
+# Transactions screened per vectorized chunk and alerted per bulk insert by backfill_fraud_rules
+FRAUD_RULE_BACKFILL_CHUNK_SIZE = getattr(settings, "FRAUD_RULE_BACKFILL_CHUNK_SIZE", 5000)
+
 
 @shared_task(
     bind=True,
     max_retries=3,
     default_retry_delay=60,
 )
+@read_from_replica()
 def generate_daily_reports(self):
     """Generate daily financial reports and send to administrators."""
     try:
@@ -85,49 +98,77 @@ def generate_daily_reports(self):
     retry_backoff=True,
     retry_jitter=True,
 )
+@read_from_replica()
 def analyze_fraud_patterns(self):
-    """Analyze transactions for potential fraud patterns."""
+    """Analyze transactions for potential fraud patterns.
+
+    Detection runs as grouped SQL and alerts are keyed on (transaction, detector), so
+    re-running the sweep never duplicates alerts raised by a previous run.
+    """
     try:
-        # Check for unusual transaction patterns
-        suspicious_transactions = []
+        now = timezone.now()
+        active_statuses = ["completed", "pending_approval"]
+        owner = Coalesce("from_account__user_id", "to_account__user_id")
+        already_alerted = FraudAlert.objects.filter(transaction_id=OuterRef("id"), detector="large_amount")
 
         # Large transactions (check both completed and pending_approval)
-        large_transactions = Transaction.objects.filter(
-            amount__gt=Decimal("10000.00"), 
-            status__in=["completed", "pending_approval"], 
-            timestamp__gte=timezone.now() - timedelta(hours=24)
+        large_transactions = (
+            Transaction.objects.filter(
+                amount__gt=FRAUD_LARGE_TRANSACTION_THRESHOLD,
+                status__in=active_statuses,
+                timestamp__gte=now - timedelta(hours=24),
+            )
+            .annotate(owner_id=owner)
+            .filter(owner_id__isnull=False)
+            .exclude(Exists(already_alerted))
+            .values_list("id", "owner_id", "amount")
         )
-
-        for transaction in large_transactions:
-            FraudAlert.objects.create(
-                user=transaction.from_account.user if transaction.from_account else transaction.to_account.user,
-                message=f"Large transaction detected: ${transaction.amount}",
+        alerts = [
+            FraudAlert(
+                user_id=owner_id,
+                transaction_id=tx_id,
+                detector="large_amount",
+                message=f"Large transaction detected: ${amount}",
                 severity="high",
             )
-            suspicious_transactions.append(transaction.id)
+            for tx_id, owner_id, amount in large_transactions
+        ]
+        suspicious_transactions = [alert.transaction_id for alert in alerts]
 
-        # Rapid successive transactions
+        # Rapid successive transactions: GROUP BY owner HAVING count > limit, anchored on the latest
+        # transaction of the burst so a burst only re-alerts when it grows.
         recent_transactions = Transaction.objects.filter(
-            timestamp__gte=timezone.now() - timedelta(hours=1), 
-            status__in=["completed", "pending_approval"]
-        ).select_related("from_account__user")
-
-        user_transaction_counts = {}
-        for transaction in recent_transactions:
-            user_id = transaction.from_account.user.id if transaction.from_account else transaction.to_account.user.id
-            user_transaction_counts[user_id] = user_transaction_counts.get(user_id, 0) + 1
-
-        for user_id, count in user_transaction_counts.items():
-            if count > 10:  # More than 10 transactions in an hour
-                user = recent_transactions.filter(from_account__user_id=user_id).first().from_account.user
-                FraudAlert.objects.create(
-                    user=user,
-                    message=f"Unusual transaction frequency: {count} transactions in 1 hour",
-                    severity="medium",
-                )
+            timestamp__gte=now - timedelta(hours=1), status__in=active_statuses
+        ).annotate(owner_id=owner)
+        bursts = (
+            recent_transactions.filter(owner_id__isnull=False)
+            .values("owner_id")
+            .annotate(tx_count=Count("id"), latest_id=Max("id"))
+            .filter(tx_count__gt=FRAUD_VELOCITY_MAX_PER_HOUR)
+        )
+        bursts = list(bursts)
+        alerted_bursts = set(
+            FraudAlert.objects.filter(
+                detector="velocity", transaction_id__in=[burst["latest_id"] for burst in bursts]
+            ).values_list("transaction_id", flat=True)
+        )
+        alerts += [
+            FraudAlert(
+                user_id=burst["owner_id"],
+                transaction_id=burst["latest_id"],
+                detector="velocity",
+                message=f"Unusual transaction frequency: {burst['tx_count']} transactions in 1 hour",
+                severity="medium",
+            )
+            for burst in bursts
+            if burst["latest_id"] not in alerted_bursts
+        ]
+
+        # The unique (transaction, detector) key makes concurrent runs safe as well.
+        FraudAlert.objects.bulk_create(alerts, ignore_conflicts=True)
 
         logger.info(f"Fraud analysis completed. Found {len(suspicious_transactions)} suspicious transactions")
-        return f"Analyzed {recent_transactions.count()} transactions, created {len(suspicious_transactions)} alerts"
+        return f"Analyzed {recent_transactions.count()} transactions, created {len(alerts)} alerts"
 
     except Exception as exc:
         logger.error(f"Failed to analyze fraud patterns: {exc}")
@@ -171,6 +212,7 @@ def send_email_notification(self, user_id, subject, message, html_message=None):
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=180)
+@read_from_replica()
 def export_transaction_data(self, user_id, start_date, end_date, export_format="csv"):
     """Export transaction data for a user."""
     try:
@@ -358,29 +400,85 @@ def analyze_transaction_for_fraud(self, transaction_id: int):
     """
     try:
         from core.ml.fraud_detector import analyze_transaction
+        from core.services.fraud_rules import flush_rule_triggers, screen_transaction
+
+        transaction = Transaction.objects.select_related("from_account__user", "to_account__user").get(
+            pk=transaction_id
+        )
+
+        # Get user from transaction account
+        user = None
+        if transaction.from_account:
+            user = transaction.from_account.user
+        elif transaction.to_account:
+            user = transaction.to_account.user
+
+        # Deterministic rule screening first: microseconds, no queries beyond the alerts it raises.
+        matched_rules = screen_transaction(transaction)
+        if matched_rules:
+            if user:
+                FraudAlert.objects.bulk_create(
+                    [
+                        FraudAlert(
+                            user=user,
+                            transaction=transaction,
+                            detector=f"rule:{rule.id}",
+                            severity=rule.severity,
+                            risk_level=rule.severity,
+                            reason=f"Fraud rule '{rule.name}'",
+                            message=f"[RULE] {rule.name} triggered. "
+                            f"Transaction ID: {transaction.pk}, Amount: {transaction.amount}. "
+                            f"Type: {transaction.transaction_type}.",
+                        )
+                        for rule in matched_rules
+                    ],
+                    ignore_conflicts=True,
+                )
+            flush_rule_triggers()
+            logger.warning(
+                f"Transaction {transaction_id} matched fraud rules: {', '.join(rule.name for rule in matched_rules)}"
+            )
+
+            blocking = [rule.name for rule in matched_rules if rule.auto_block]
+            if blocking and transaction.from_account:
+                from core.services import AccountService
+
+                AccountService.lock_account(
+                    transaction.from_account, reason=f"Automated lock by fraud rule(s): {', '.join(blocking)}"
+                )
+                logger.critical(f"AUTOMATED LOCK: Account {transaction.from_account.account_number} frozen.")
+                # The account is already frozen; the ML detector has nothing left to decide.
+                return {
+                    "is_anomaly": True,
+                    "risk_level": "critical",
+                    "rules_triggered": [rule.name for rule in matched_rules],
+                    "blocked_by_rules": blocking,
+                }
 
-        transaction = Transaction.objects.get(pk=transaction_id)
         result = analyze_transaction(transaction)
+        result["rules_triggered"] = [rule.name for rule in matched_rules]
 
         if result["is_anomaly"]:
-            # Get user from transaction account
-            user = None
-            if transaction.from_account:
-                user = transaction.from_account.user
-            elif transaction.to_account:
-                user = transaction.to_account.user
-
             if user:
                 # Create fraud alert using existing model fields
                 severity = result["risk_level"]
                 risk_score = result["risk_score"]
 
-                FraudAlert.objects.create(
-                    user=user,
-                    severity=severity,
-                    message=f"[ML-ANOMALY] Risk score: {risk_score:.2%}. "
-                    f"Transaction ID: {transaction.pk}, Amount: {transaction.amount}. "
-                    f"Type: {transaction.transaction_type}.",
+                FraudAlert.objects.bulk_create(
+                    [
+                        FraudAlert(
+                            user=user,
+                            transaction=transaction,
+                            detector="ml",
+                            severity=severity,
+                            risk_level=severity,
+                            risk_score=risk_score,
+                            message=f"[ML-ANOMALY] Risk score: {risk_score:.2%}. "
+                            f"Transaction ID: {transaction.pk}, Amount: {transaction.amount}. "
+                            f"Type: {transaction.transaction_type}.",
+                        )
+                    ],
+                    ignore_conflicts=True,
                 )
                 logger.warning(f"Fraud alert created for transaction {transaction_id}: {severity}")
 
@@ -412,52 +510,34 @@ def analyze_transaction_for_fraud(self, transaction_id: int):
     autoretry_for=(Exception,),
     retry_backoff=True,
 )
+@read_from_replica()
 def batch_analyze_recent_transactions(self, hours: int = 24):
     """Batch analyze recent transactions for fraud.
     Useful for catching fraud that might have been missed.
+
+    Rescoring covers the whole window: transaction ids are split into chunks of
+    ``FRAUD_RESCORE_CHUNK_SIZE`` and each chunk is scored by ``score_transaction_chunk``.
+    With Celery enabled the chunks fan out across workers as a chord; otherwise they run inline.
     """
     try:
-        from django.utils import timezone
+        from celery import chord
 
-        from core.ml.fraud_detector import get_fraud_detector
-
-        detector = get_fraud_detector()
-
-        recent_transactions = Transaction.objects.filter(
-            timestamp__gte=timezone.now() - timedelta(hours=hours), status="completed"
+        recent_ids = list(
+            Transaction.objects.filter(timestamp__gte=timezone.now() - timedelta(hours=hours), status="completed")
+            .order_by("id")
+            .values_list("id", flat=True)
         )
+        chunks = [
+            recent_ids[i : i + FRAUD_RESCORE_CHUNK_SIZE] for i in range(0, len(recent_ids), FRAUD_RESCORE_CHUNK_SIZE)
+        ]
 
-        anomalies_found = 0
-        for transaction in recent_transactions[:1000]:  # Limit batch size
-            result = detector.predict(transaction)
-
-            if result["is_anomaly"]:
-                # Get user from transaction
-                user = None
-                if transaction.from_account:
-                    user = transaction.from_account.user
-                elif transaction.to_account:
-                    user = transaction.to_account.user
-
-                if user:
-                    # Check if similar alert already exists (avoid duplicates)
-                    existing = FraudAlert.objects.filter(
-                        user=user,
-                        message__contains=f"Transaction ID: {transaction.pk}",
-                        created_at__gte=timezone.now() - timedelta(hours=24),
-                    ).exists()
-
-                    if not existing:
-                        FraudAlert.objects.create(
-                            user=user,
-                            severity=result["risk_level"],
-                            message=f"[ML-BATCH] Risk score: {result['risk_score']:.2%}. "
-                            f"Transaction ID: {transaction.pk}, Amount: {transaction.amount}.",
-                        )
-                        anomalies_found += 1
+        if getattr(settings, "CELERY_ENABLED", False) and len(chunks) > 1:
+            chord(score_transaction_chunk.s(chunk) for chunk in chunks)(summarize_rescore_chunks.s())
+            logger.info(f"Batch fraud analysis dispatched: {len(recent_ids)} transactions in {len(chunks)} chunks")
+            return {"transactions_analyzed": len(recent_ids), "chunks": len(chunks), "status": "dispatched"}
 
-        logger.info(f"Batch fraud analysis complete: {anomalies_found} anomalies found")
-        return {"transactions_analyzed": recent_transactions.count(), "anomalies_found": anomalies_found}
+        summary = summarize_rescore_chunks([score_transaction_chunk(chunk) for chunk in chunks])
+        return {**summary, "chunks": len(chunks)}
 
     except Exception as exc:
         logger.error(f"Failed batch fraud analysis: {exc}")
@@ -465,3 +545,225 @@ def batch_analyze_recent_transactions(self, hours: int = 24):
             self.retry(countdown=600)
         except MaxRetriesExceededError:
             raise
+
+
+@shared_task(
+    bind=True,
+    max_retries=2,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+)
+@read_from_replica()
+def score_transaction_chunk(self, transaction_ids):
+    """Score one chunk of transactions with a single vectorized model call and raise ML alerts.
+
+    Alerts are deduplicated through ``FraudAlert.transaction``: a transaction that already
+    carries an ML alert (real-time or batch) is not alerted again.
+    """
+    from core.ml.fraud_detector import get_fraud_detector
+
+    transactions = list(
+        Transaction.objects.filter(id__in=transaction_ids).select_related("from_account", "to_account")
+    )
+    results = get_fraud_detector().predict_batch(transactions)
+
+    anomalies = [
+        (transaction, result) for transaction, result in zip(transactions, results, strict=True) if result["is_anomaly"]
+    ]
+    if not anomalies:
+        return {"transactions_analyzed": len(transactions), "anomalies_found": 0}
+
+    already_alerted = set(
+        FraudAlert.objects.filter(
+            transaction_id__in=[transaction.pk for transaction, _ in anomalies], detector__in=ML_DETECTORS
+        ).values_list("transaction_id", flat=True)
+    )
+    alerts = [
+        FraudAlert(
+            user_id=(transaction.from_account or transaction.to_account).user_id,
+            transaction=transaction,
+            detector="ml_batch",
+            severity=result["risk_level"],
+            risk_level=result["risk_level"],
+            risk_score=result["risk_score"],
+            message=f"[ML-BATCH] Risk score: {result['risk_score']:.2%}. "
+            f"Transaction ID: {transaction.pk}, Amount: {transaction.amount}.",
+        )
+        for transaction, result in anomalies
+        if transaction.pk not in already_alerted
+    ]
+    FraudAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+    return {"transactions_analyzed": len(transactions), "anomalies_found": len(alerts)}
+
+
+@shared_task
+def summarize_rescore_chunks(chunk_results):
+    """Chord callback: combine per-chunk rescoring results."""
+    summary = {
+        "transactions_analyzed": sum(r["transactions_analyzed"] for r in chunk_results),
+        "anomalies_found": sum(r["anomalies_found"] for r in chunk_results),
+    }
+    logger.info(f"Batch fraud analysis complete: {summary['anomalies_found']} anomalies found")
+    return summary
+
+
+@shared_task(
+    bind=True,
+    max_retries=2,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+)
+@read_from_replica()
+def detect_mule_accounts(self):
+    """Flag likely money-mule accounts from the transfer graph of the rolling window.
+
+    One alert per candidate account, anchored on that account's latest transfer, so a
+    quiet mule is not re-alerted every run but renewed activity raises a fresh alert.
+    """
+    from core.ml.transfer_graph import FRAUD_GRAPH_PASS_THROUGH_SECONDS, analyze_transfer_graph, load_transfer_edges
+
+    started = time.perf_counter()
+    edges = load_transfer_edges()
+    if not len(edges):
+        return {"transfers_analyzed": 0, "suspicious_accounts": 0, "alerts_created": 0}
+
+    report = analyze_transfer_graph(edges)
+    candidates = report.suspicious.nonzero()[0]
+    mules_in_cluster = report.cluster_mule_counts()
+    owners = {
+        account_id: (user_id, account_number)
+        for account_id, user_id, account_number in Account.objects.filter(
+            id__in=report.account_ids[candidates].tolist()
+        ).values_list("id", "user_id", "account_number")
+    }
+
+    hours = FRAUD_GRAPH_PASS_THROUGH_SECONDS / 3600
+    alerts = []
+    for i in candidates:
+        account_id = int(report.account_ids[i])
+        if account_id not in owners:
+            continue
+        user_id, account_number = owners[account_id]
+        severity = "critical" if mules_in_cluster[i] >= 3 else "high"
+        alerts.append(
+            FraudAlert(
+                user_id=user_id,
+                transaction_id=int(report.latest_tx_id[i]),
+                detector=f"mule_graph:{account_id}",
+                severity=severity,
+                risk_level=severity,
+                risk_score=float(report.pass_through[i]),
+                message=f"[GRAPH] Possible mule account {account_number}: {report.fan_in[i]} senders, "
+                f"{report.fan_out[i]} recipients, {report.pass_through[i]:.0%} of inflow forwarded "
+                f"within {hours:g}h.",
+                reason=f"Cluster of {report.component_size[i]} linked accounts containing "
+                f"{mules_in_cluster[i]} pass-through account(s).",
+            )
+        )
+    created = FraudAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Transfer graph analysis: {len(edges)} transfers, {len(report.account_ids)} accounts, "
+        f"{len(candidates)} mule candidates in {elapsed:.2f}s"
+    )
+    return {
+        "transfers_analyzed": len(edges),
+        "suspicious_accounts": len(candidates),
+        "alerts_created": len(created),
+    }
+
+
+@shared_task(
+    bind=True,
+    max_retries=2,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+)
+@read_from_replica()
+def backfill_fraud_rules(self, hours=24 * 30):
+    """Screen the last ``hours`` of transactions against the active fraud rules.
+
+    Run after adding or changing rules. Alerts are keyed on (transaction, rule), so
+    transactions already alerted by live screening or an earlier backfill are skipped
+    and do not count towards the rule's ``trigger_count`` again.
+    """
+    from core.services.fraud_rules import flush_rule_triggers, record_rule_triggers, screen_queryset
+
+    started = time.perf_counter()
+    queryset = Transaction.objects.filter(
+        timestamp__gte=timezone.now() - timedelta(hours=hours), status__in=["completed", "pending_approval"]
+    )
+    hits = screen_queryset(queryset, chunk_size=FRAUD_RULE_BACKFILL_CHUNK_SIZE)
+
+    created = 0
+    try:
+        hit_ids = list(hits)
+        for start in range(0, len(hit_ids), FRAUD_RULE_BACKFILL_CHUNK_SIZE):
+            chunk = hit_ids[start : start + FRAUD_RULE_BACKFILL_CHUNK_SIZE]
+            alerted = set(
+                FraudAlert.objects.filter(transaction_id__in=chunk, detector__startswith="rule:").values_list(
+                    "transaction_id", "detector"
+                )
+            )
+            alerts = []
+            for tx_id, owner_id, amount, transaction_type in (
+                Transaction.objects.filter(id__in=chunk)
+                .annotate(owner_id=Coalesce("from_account__user_id", "to_account__user_id"))
+                .filter(owner_id__isnull=False)
+                .values_list("id", "owner_id", "amount", "transaction_type")
+            ):
+                for rule in hits[tx_id]:
+                    if (tx_id, f"rule:{rule.id}") in alerted:
+                        continue
+                    alerts.append(
+                        FraudAlert(
+                            user_id=owner_id,
+                            transaction_id=tx_id,
+                            detector=f"rule:{rule.id}",
+                            severity=rule.severity,
+                            risk_level=rule.severity,
+                            reason=f"Fraud rule '{rule.name}' (backfill)",
+                            message=f"[RULE] {rule.name} triggered. "
+                            f"Transaction ID: {tx_id}, Amount: {amount}. Type: {transaction_type}.",
+                        )
+                    )
+            FraudAlert.objects.bulk_create(alerts, ignore_conflicts=True)
+            record_rule_triggers([int(alert.detector.split(":")[1]) for alert in alerts])
+            created += len(alerts)
+    finally:
+        # Trigger counts live in process memory until flushed
+        flush_rule_triggers()
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Fraud rule backfill: {len(hits)} of the last {hours}h of transactions matched, "
+        f"{created} new alerts in {elapsed:.2f}s"
+    )
+    return {"transactions_matched": len(hits), "alerts_created": created}
+
+
+@shared_task
+def downsample_performance_metrics():
+    """Roll raw request-latency rows into hourly rows and apply retention."""
+    from core.services.performance_metrics import downsample_performance_metrics as downsample
+
+    result = downsample()
+    logger.info(
+        f"Performance metrics downsampled: {result['rolled_up']} hourly rows from {result['raw_deleted']} raw rows, "
+        f"{result['expired']} expired"
+    )
+    return result
+
+
+@shared_task
+def prune_request_profiles():
+    """Delete request profiles older than ``PROFILING_RETENTION_DAYS``."""
+    from core.middleware.profiling import PROFILING_RETENTION_DAYS
+    from core.models import RequestProfile
+
+    deleted, _ = RequestProfile.objects.filter(
+        created_at__lt=timezone.now() - timedelta(days=PROFILING_RETENTION_DAYS)
+    ).delete()
+    logger.info(f"Pruned {deleted} request profiles older than {PROFILING_RETENTION_DAYS} days")
+    return deleted
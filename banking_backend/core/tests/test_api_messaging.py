@@ -128,6 +128,63 @@ class TestMessagingAPI:
         thread.refresh_from_db()
         assert thread.is_archived is True
 
+    def test_message_thread_summary_list(self, api_client, customer, staff, django_assert_max_num_queries):
+        """Summary mode returns annotated counts and a preview without embedding messages."""
+        threads = []
+        for i in range(5):
+            thread = MessageThread.objects.create(subject=f"Inbox {i}", created_by=staff)
+            thread.participants.add(customer, staff)
+            for j in range(3):
+                Message.objects.create(thread=thread, sender=staff, content=f"m{j}", encrypted_content=f"cipher-{i}-{j}")
+            threads.append(thread)
+        threads[0].messages.first().read_by.add(customer)
+
+        api_client.force_authenticate(user=customer)
+        url = reverse("core:message-thread-list")
+        # Query count must not grow with the number of threads or messages
+        with django_assert_max_num_queries(8):
+            response = api_client.get(url, {"mode": "summary"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 5
+        rows = {row["id"]: row for row in response.data["results"]}
+        first = rows[threads[0].id]
+        assert "messages" not in first
+        assert "participant_list" not in first
+        assert first["message_count"] == 3
+        assert first["unread_count"] == 2
+        assert rows[threads[1].id]["unread_count"] == 3
+        assert first["last_message_preview"].endswith(": cipher-0-2")
+        # Customers see masked display names
+        assert "Alice Smith" not in first["last_message_preview"]
+        assert sorted(first["participants"]) == sorted([customer.id, staff.id])
+
+    def test_message_thread_messages_paginated(self, api_client, customer, staff):
+        """Thread messages are lazily loaded newest-first through the paginated action."""
+        thread = MessageThread.objects.create(subject="Paged")
+        thread.participants.add(customer, staff)
+        for i in range(25):
+            Message.objects.create(thread=thread, sender=staff, content=f"msg {i}")
+
+        api_client.force_authenticate(user=customer)
+        url = reverse("core:message-thread-messages", kwargs={"pk": thread.id})
+        response = api_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["count"] == 25
+        assert len(response.data["results"]) == 20
+        ids = [m["id"] for m in response.data["results"]]
+        assert ids == sorted(ids, reverse=True)
+
+        response = api_client.get(url, {"page": 2})
+        assert len(response.data["results"]) == 5
+
+        # Non-participants cannot read another thread's messages
+        outsider = User.objects.create_user(
+            username="outsider_msg", email="outsider@example.com", password="password123", role="customer"
+        )
+        api_client.force_authenticate(user=outsider)
+        assert api_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+
     # =========================================================================
     # MessageViewSet Tests (basename="message")
     # =========================================================================
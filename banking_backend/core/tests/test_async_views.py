@@ -0,0 +1,143 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.utils.module_loading import import_string
+from rest_framework import VERSION as DRF_VERSION
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import AllowAny
+
+import pytest
+from asgiref.sync import iscoroutinefunction
+
+from core.async_views import AsyncAPIView, gather_queries
+from core.middleware import profiling
+from core.middleware.query_metrics import QueryMetricsMiddleware
+from core.services.performance_metrics import latency_aggregator
+
+
+@pytest.mark.asyncio
+async def test_gather_queries_overlaps_independent_queries():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def query(value):
+        def run():
+            # Only passes when all three run at the same time
+            barrier.wait()
+            return value
+
+        return run
+
+    started = time.monotonic()
+    results = await gather_queries({"a": query(1), "b": query(2), "c": query(3)}, concurrency=3)
+
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert time.monotonic() - started < 5
+
+
+@pytest.mark.asyncio
+async def test_gather_queries_runs_in_order_without_a_pool_and_propagates_errors():
+    calls = []
+
+    def record(name):
+        calls.append((name, threading.get_ident()))
+        return name
+
+    results = await gather_queries({"a": lambda: record("a"), "b": lambda: record("b")})
+    assert results == {"a": "a", "b": "b"}
+    assert [name for name, _ in calls] == ["a", "b"]
+    assert calls[0][1] == calls[1][1]
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await gather_queries({"ok": lambda: 1, "bad": fail}, concurrency=2)
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("concurrency", [1, 2])
+async def test_gathered_queries_are_counted_by_query_metrics(monkeypatch, concurrency):
+    def count_users():
+        return get_user_model().objects.count()
+
+    async def dashboard(request):
+        results = await gather_queries({"a": count_users, "b": count_users}, concurrency=concurrency)
+        return HttpResponse(str(sum(results.values())))
+
+    observed = []
+    middleware = QueryMetricsMiddleware(dashboard)
+    monkeypatch.setattr(middleware, "observe", lambda request, stats: observed.append(stats))
+
+    response = await middleware(RequestFactory().get("/"))
+
+    assert response.content == b"0"
+    assert observed[0].count == 2
+
+
+def test_async_api_view_dispatch_is_copied_from_the_pinned_drf():
+    # AsyncAPIView.dispatch mirrors APIView.dispatch: re-check the copy before bumping DRF
+    assert DRF_VERSION == "3.16.1"
+
+
+@pytest.mark.asyncio
+async def test_async_api_view_handles_exceptions_like_drf():
+    class MissingView(AsyncAPIView):
+        authentication_classes = []
+        permission_classes = [AllowAny]
+
+        async def get(self, request):
+            raise NotFound("no such account")
+
+    response = await MissingView.as_view()(RequestFactory().get("/"))
+
+    assert response.status_code == 404
+    assert response.data["detail"] == "no such account"
+
+
+INSTRUMENTATION = [
+    "core.middleware.tracing.TracingMiddleware",
+    "core.middleware.latency.RequestLatencyMiddleware",
+    "core.middleware.query_metrics.QueryMetricsMiddleware",
+    "core.middleware.profiling.ProfilingMiddleware",
+    "core.middleware.replicas.ReplicaStickinessMiddleware",
+]
+
+
+async def ok_view(request):
+    return HttpResponse("ok")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", INSTRUMENTATION)
+async def test_instrumentation_middleware_has_a_native_async_path(path):
+    middleware = import_string(path)(ok_view)
+
+    assert iscoroutinefunction(middleware)
+    assert (await middleware(RequestFactory().get("/"))).content == b"ok"
+
+
+@pytest.mark.asyncio
+async def test_profiled_async_request_runs_the_chain_from_a_thread(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 1.0)
+    middleware = profiling.ProfilingMiddleware(ok_view)
+    monkeypatch.setattr(middleware, "save", lambda *args: SimpleNamespace(pk=7))
+
+    response = await middleware(RequestFactory().get("/"))
+
+    assert response.content == b"ok"
+    assert response["X-Profile-Id"] == "7"
+
+
+@pytest.mark.asyncio
+async def test_async_request_is_recorded_by_the_instrumentation():
+    latency_aggregator.take()
+
+    response = await AsyncClient().get("/api/health/simple/")
+
+    assert response.status_code == 200
+    assert latency_aggregator.take()["health-check-simple"].count == 1
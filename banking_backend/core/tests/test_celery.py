@@ -101,6 +101,40 @@ class CeleryTasksTestCase(TestCase):
         self.assertIsNotNone(alert)
         self.assertIn("frequency", alert.message)
 
+    def test_analyze_fraud_patterns_is_idempotent(self):
+        """Re-running the sweep must not duplicate alerts; a growing burst re-alerts once."""
+        large = Transaction.objects.create(
+            from_account=self.account, amount=Decimal("15000.00"), transaction_type="transfer", status="completed"
+        )
+        for _ in range(11):
+            Transaction.objects.create(
+                to_account=self.account, amount=Decimal("10.00"), transaction_type="deposit", status="completed"
+            )
+
+        # Two detection queries, one dedup lookup, one INSERT and the summary count
+        with self.assertNumQueries(5):
+            analyze_fraud_patterns()
+        analyze_fraud_patterns()
+
+        self.assertEqual(FraudAlert.objects.filter(detector="large_amount", transaction=large).count(), 1)
+        velocity = FraudAlert.objects.filter(detector="velocity")
+        self.assertEqual(velocity.count(), 1)
+        self.assertEqual(velocity.get().user, self.user)
+        self.assertIn("12 transactions", velocity.get().message)
+
+        Transaction.objects.create(
+            from_account=self.account, amount=Decimal("5.00"), transaction_type="transfer", status="completed"
+        )
+        result = analyze_fraud_patterns()
+        self.assertIn("created 1 alerts", result)
+        self.assertEqual(FraudAlert.objects.filter(detector="velocity").count(), 2)
+
+    def test_analyze_fraud_patterns_is_scheduled(self):
+        from config.celery import app
+
+        tasks = {entry["task"] for entry in app.conf.beat_schedule.values()}
+        self.assertIn("core.tasks.analyze_fraud_patterns", tasks)
+
     @patch("core.tasks.send_mail")
     def test_send_email_notification_success(self, mock_send_mail):
         """Test successful email notification."""
@@ -0,0 +1,352 @@
+import asyncio
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+import pytest
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config.asgi import application
+from conftest import TEST_PASSWORD
+from core.chat_presence import RoomPresence, presence_cache_key
+from core.models import ChatMessage, ChatRoom
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Principal and membership lookups are cached; start every test cold."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+async def connect(user, room_id):
+    token = str(AccessToken.for_user(user))
+    communicator = WebsocketCommunicator(
+        application,
+        f"ws/messaging/{room_id}/?token={token}",
+        headers=[(b"origin", b"http://testserver"), (b"host", b"testserver")],
+    )
+    connected, _ = await communicator.connect()
+    assert connected is True
+    snapshot = await communicator.receive_json_from(timeout=3)
+    assert snapshot["type"] == "presence_snapshot"
+    return communicator
+
+
+async def receive_event(communicator):
+    """Next non-presence frame (presence changes are broadcast as members come and go)."""
+    while True:
+        event = await communicator.receive_json_from(timeout=3)
+        if event["type"] != "presence_update":
+            return event
+
+
+@database_sync_to_async
+def create_room_with_members():
+    alice = User.objects.create_user(
+        email="alice.chat@coastal.com", username="alice_chat", password=TEST_PASSWORD, role="cashier",
+        first_name="Alice", last_name="Teller", is_approved=True,
+    )
+    bob = User.objects.create_user(
+        email="bob.chat@coastal.com", username="bob_chat", password=TEST_PASSWORD, role="manager",
+        first_name="Bob", last_name="Boss", is_approved=True,
+    )
+    room = ChatRoom.objects.create(is_group=True, name="Ops")
+    room.members.add(alice, bob)
+    return alice, bob, room
+
+
+@database_sync_to_async
+def room_messages(room):
+    return [(m.id, m.content, m.sender_id) for m in ChatMessage.objects.filter(room=room).order_by("id")]
+
+
+@database_sync_to_async
+def read_state(message_id):
+    message = ChatMessage.objects.get(id=message_id)
+    return message.is_read, list(message.read_by.values_list("id", flat=True))
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_burst_of_messages_is_persisted_and_broadcast_in_order():
+    alice, bob, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+    bob_ws = await connect(bob, room.id)
+
+    for i in range(5):
+        await alice_ws.send_to(text_data=json.dumps({"type": "message", "content": f"msg {i}"}))
+
+    received = [await receive_event(bob_ws) for _ in range(5)]
+    assert [r["content"] for r in received] == [f"msg {i}" for i in range(5)]
+    assert all(r["sender_name"] == "Alice Teller" for r in received)
+
+    stored = await room_messages(room)
+    assert [content for _, content, _ in stored] == [f"msg {i}" for i in range(5)]
+    # Broadcast ids are the committed row ids
+    assert [r["id"] for r in received] == [message_id for message_id, _, _ in stored]
+
+    await alice_ws.disconnect()
+    await bob_ws.disconnect()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_read_receipts_are_batched_and_deduplicated():
+    alice, bob, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+    bob_ws = await connect(bob, room.id)
+
+    await alice_ws.send_to(text_data=json.dumps({"type": "message", "content": "please review"}))
+    message = await receive_event(bob_ws)
+    await receive_event(alice_ws)
+
+    # Duplicate receipts in the same window, plus a receipt for the sender's own message
+    for _ in range(3):
+        await bob_ws.send_to(text_data=json.dumps({"type": "message_read", "message_id": message["id"]}))
+    await alice_ws.send_to(text_data=json.dumps({"type": "message_read", "message_id": message["id"]}))
+
+    receipt = await receive_event(alice_ws)
+    assert receipt["type"] == "read_receipt"
+    assert receipt["message_id"] == message["id"]
+    assert receipt["read_by"] == bob.id
+
+    await asyncio.sleep(0.1)
+    # Only one receipt is broadcast for the duplicated reads
+    assert await alice_ws.receive_nothing(timeout=0.2)
+
+    is_read, readers = await read_state(message["id"])
+    assert is_read is True
+    assert readers == [bob.id]
+
+    await alice_ws.disconnect()
+    await bob_ws.disconnect()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_reply_to_message_from_another_room_is_dropped():
+    alice, bob, room = await create_room_with_members()
+    other_room = await database_sync_to_async(ChatRoom.objects.create)()
+    foreign = await database_sync_to_async(ChatMessage.objects.create)(room=other_room, sender=bob, content="elsewhere")
+
+    alice_ws = await connect(alice, room.id)
+    await alice_ws.send_to(text_data=json.dumps({"type": "message", "content": "reply", "parent_id": foreign.id}))
+    payload = await receive_event(alice_ws)
+    assert payload["content"] == "reply"
+    assert payload["parent_id"] is None
+
+    await alice_ws.disconnect()
+
+
+async def try_connect(user, room_id):
+    token = str(AccessToken.for_user(user))
+    communicator = WebsocketCommunicator(
+        application,
+        f"ws/messaging/{room_id}/?token={token}",
+        headers=[(b"origin", b"http://testserver"), (b"host", b"testserver")],
+    )
+    connected, code = await communicator.connect()
+    return communicator, connected, code
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_cached_principal_is_invalidated_on_deactivation():
+    from django.core.cache import cache
+
+    from core.channels_cache import principal_cache_key
+
+    alice, _, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+    await alice_ws.disconnect()
+
+    # Authorization fields only: no encrypted PII or lookup hashes in the shared cache
+    cached = await cache.aget(principal_cache_key(alice.id))
+    assert cached == {"id": alice.id, "role": "cashier", "is_active": True, "is_staff": True, "is_superuser": False}
+
+    alice.is_active = False
+    await database_sync_to_async(alice.save)()
+    assert await cache.aget(principal_cache_key(alice.id)) is None
+
+    _, connected, code = await try_connect(alice, room.id)
+    assert connected is False
+    assert code == 4001
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_bulk_deactivation_drops_the_cached_principal():
+    from django.contrib.admin.sites import site
+    from django.test import RequestFactory
+
+    from users.admin import UserAdmin
+
+    alice, bob, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+    await alice_ws.disconnect()
+
+    request = RequestFactory().post("/admin/users/user/")
+    request.user = bob
+
+    def deactivate():
+        admin = UserAdmin(User, site)
+        admin.message_user = lambda *args, **kwargs: None
+        admin.deactivate_users(request, User.objects.filter(pk=alice.pk))
+
+    await database_sync_to_async(deactivate)()
+
+    _, connected, code = await try_connect(alice, room.id)
+    assert connected is False
+    assert code == 4001
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_cached_membership_is_invalidated_on_member_change():
+    _, bob, room = await create_room_with_members()
+    bob_ws = await connect(bob, room.id)
+    await bob_ws.disconnect()
+
+    await database_sync_to_async(room.members.remove)(bob)
+    _, connected, code = await try_connect(bob, room.id)
+    assert connected is False
+    assert code == 4003
+
+    # Reverse-side changes (user.chat_rooms) invalidate too
+    await database_sync_to_async(bob.chat_rooms.add)(room)
+    bob_ws, connected, _ = await try_connect(bob, room.id)
+    assert connected is True
+    await bob_ws.disconnect()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_typing_frames_are_throttled_with_trailing_stop(monkeypatch):
+    monkeypatch.setattr("core.chat_presence.CHAT_TYPING_THROTTLE_MS", 200)
+    alice, bob, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+    bob_ws = await connect(bob, room.id)
+
+    for _ in range(10):
+        await alice_ws.send_to(text_data=json.dumps({"type": "typing_start"}))
+    await alice_ws.send_to(text_data=json.dumps({"type": "typing_stop"}))
+
+    first = await receive_event(bob_ws)
+    assert first["type"] == "typing_start"
+    assert first["user_name"] == "Alice Teller"
+    # The burst collapses into one start and the trailing stop
+    second = await receive_event(bob_ws)
+    assert second["type"] == "typing_stop"
+    assert await bob_ws.receive_nothing(timeout=0.4)
+
+    await alice_ws.disconnect()
+    await bob_ws.disconnect()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_presence_snapshot_and_change_only_broadcasts():
+    alice, bob, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+
+    token = str(AccessToken.for_user(bob))
+    bob_ws = WebsocketCommunicator(
+        application,
+        f"ws/messaging/{room.id}/?token={token}",
+        headers=[(b"origin", b"http://testserver"), (b"host", b"testserver")],
+    )
+    connected, _ = await bob_ws.connect()
+    assert connected is True
+    snapshot = await bob_ws.receive_json_from(timeout=3)
+    assert snapshot == {"type": "presence_snapshot", "users": [{"user_id": alice.id, "status": "online"}]}
+
+    joined = await alice_ws.receive_json_from(timeout=3)
+    assert joined == {"type": "presence_update", "user_id": bob.id, "status": "online"}
+
+    # Repeating the current status is not re-broadcast; a real change is
+    await bob_ws.send_to(text_data=json.dumps({"type": "presence_update", "status": "online"}))
+    await bob_ws.send_to(text_data=json.dumps({"type": "presence_update", "status": "away"}))
+    changed = await alice_ws.receive_json_from(timeout=3)
+    assert changed["status"] == "away"
+    assert await alice_ws.receive_nothing(timeout=0.2)
+
+    await bob_ws.send_to(text_data=json.dumps({"type": "ping"}))
+    assert (await bob_ws.receive_json_from(timeout=3))["type"] == "pong"
+
+    await bob_ws.disconnect()
+    left = await alice_ws.receive_json_from(timeout=3)
+    assert left == {"type": "presence_update", "user_id": bob.id, "status": "offline"}
+    await alice_ws.disconnect()
+
+
+class RecordingLayer:
+    def __init__(self):
+        self.sent = []
+
+    async def group_send(self, group, event):
+        self.sent.append(event)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_one_bad_row_does_not_drop_the_rest_of_the_batch():
+    from django.db import IntegrityError
+
+    from core.chat_buffer import RoomWriteBuffer
+
+    alice, bob, room = await create_room_with_members()
+    layer = RecordingLayer()
+    buffer = RoomWriteBuffer(room.id, layer, f"chat_{room.id}")
+
+    # The third sender no longer exists: its foreign key fails the batch's commit
+    results = await asyncio.gather(
+        buffer.submit_message(alice.id, "Alice Teller", "first"),
+        buffer.submit_message(bob.id, "Bob Boss", "second"),
+        buffer.submit_message(bob.id + 1000, "Ghost", "orphan"),
+        buffer.submit_message(alice.id, "Alice Teller", "third"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[2], IntegrityError)
+    assert [r["content"] for r in results if isinstance(r, dict)] == ["first", "second", "third"]
+    assert [event["content"] for event in layer.sent] == ["first", "second", "third"]
+    assert [content for _, content, _ in await room_messages(room)] == ["first", "second", "third"]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+async def test_member_stays_online_until_their_last_connection_leaves():
+    alice, bob, room = await create_room_with_members()
+    alice_ws = await connect(alice, room.id)
+    bob_phone = await connect(bob, room.id)
+    assert (await alice_ws.receive_json_from(timeout=3))["status"] == "online"
+    bob_laptop = await connect(bob, room.id)
+
+    # Closing one of two tabs is not a presence change
+    await bob_phone.disconnect()
+    assert await alice_ws.receive_nothing(timeout=0.3)
+
+    await bob_laptop.disconnect()
+    left = await alice_ws.receive_json_from(timeout=3)
+    assert left == {"type": "presence_update", "user_id": bob.id, "status": "offline"}
+    await alice_ws.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_joins_are_both_counted():
+    cache.clear()
+    phone, laptop = RoomPresence(1, 2), RoomPresence(1, 2)
+    await asyncio.gather(phone.join(), laptop.join())
+    await phone.set_status("online")
+
+    assert await phone.leave() is False
+    assert await cache.aget(presence_cache_key(1, 2)) == "online"
+    assert await laptop.leave() is True
+    assert await cache.aget(presence_cache_key(1, 2)) is None
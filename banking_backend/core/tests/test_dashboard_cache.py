@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+import pytest
+
+from core.dashboard_cache import version_cache_key
+from core.models.accounts import Account
+from core.services.transactions import TransactionService
+
+User = get_user_model()
+
+URL = "/api/users/member-dashboard/"
+
+
+@pytest.fixture
+def member(db):
+    cache.clear()
+    user = User.objects.create_user(username="snapshot", email="snapshot@coastal.test", password="x")
+    account = Account.objects.create(user=user, account_number="SNAP0001", balance=Decimal("100.00"))
+    client = APIClient()
+    client.force_authenticate(user=user)
+    yield client, account
+    cache.clear()
+
+
+def test_polls_are_served_from_the_snapshot(member, django_assert_num_queries):
+    client, account = member
+    first = client.get(URL).json()
+
+    # Changes outside the write paths are not seen until the snapshot is invalidated
+    Account.objects.filter(pk=account.pk).update(balance=Decimal("999.00"))
+    with django_assert_num_queries(0):
+        assert client.get(URL).json() == first
+
+    cache.delete(version_cache_key(account.user_id))
+    assert Decimal(client.get(URL).json()["total_balance"]) == Decimal("999.00")
+
+
+def test_committed_transaction_invalidates_the_snapshot(member, django_capture_on_commit_callbacks):
+    client, account = member
+    assert Decimal(client.get(URL).json()["total_balance"]) == Decimal("100.00")
+
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        TransactionService.create_transaction(None, account, Decimal("50.00"), "deposit", "Cash deposit")
+
+    # Not before the commit: a rebuild could still read the old balance
+    assert Decimal(client.get(URL).json()["total_balance"]) == Decimal("100.00")
+
+    for callback in callbacks:
+        callback()
+    body = client.get(URL).json()
+    assert Decimal(body["total_balance"]) == Decimal("150.00")
+    assert Decimal(body["recent_transactions"][0]["amount"]) == Decimal("50.00")
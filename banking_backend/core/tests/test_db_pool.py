@@ -0,0 +1,33 @@
+from prometheus_client import CollectorRegistry
+
+from core import db_pool
+
+
+def test_pool_collector_exports_saturation_and_wait_time(monkeypatch):
+    stats = {
+        "default": {
+            "pool_max": 10,
+            "pool_size": 8,
+            "pool_available": 2,
+            "requests_waiting": 3,
+            "requests_num": 120,
+            "requests_wait_ms": 4500,
+        }
+    }
+    monkeypatch.setattr(db_pool, "pool_stats", lambda: stats)
+    registry = CollectorRegistry()
+    registry.register(db_pool.PoolCollector())
+
+    def sample(name):
+        return registry.get_sample_value(name, {"alias": "default"})
+
+    assert sample("django_db_pool_saturation") == 0.6
+    assert sample("django_db_pool_requests_waiting") == 3
+    assert sample("django_db_pool_requests_total") == 120
+    assert sample("django_db_pool_requests_wait_seconds_total") == 4.5
+    assert sample("django_db_pool_timeouts_total") == 0
+
+
+def test_unpooled_databases_register_no_collector():
+    assert db_pool.pooled_aliases() == []
+    assert db_pool.register_pool_metrics(CollectorRegistry()) is None
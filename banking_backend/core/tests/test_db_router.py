@@ -0,0 +1,94 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+import pytest
+
+from core import db_router
+from core.db_router import ReplicaRouter, read_from_replica, remember_write
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def fresh_lag_cache():
+    db_router._lag.clear()
+    yield
+    db_router._lag.clear()
+
+
+@pytest.fixture
+def lag(monkeypatch):
+    measured = {"replica": 0.0}
+    calls = []
+
+    def measure(alias):
+        calls.append(alias)
+        return measured[alias]
+
+    monkeypatch.setattr(db_router, "measure_lag", measure)
+    measured["calls"] = calls
+    return measured
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+def test_only_annotated_reads_go_to_an_up_to_date_replica(lag):
+    router = ReplicaRouter()
+
+    assert router.db_for_read(User) is None
+    with read_from_replica():
+        assert router.db_for_read(User) == "replica"
+        assert router.db_for_read(User) == "replica"
+        assert lag["calls"] == ["replica"]  # lag is cached between checks
+
+        assert router.db_for_write(User) == "default"
+        assert router.db_for_read(User) is None  # the scope wrote: stay on the primary
+
+    db_router._lag.clear()
+    lag["replica"] = db_router.REPLICA_MAX_LAG_SECONDS + 1
+    with read_from_replica():
+        assert router.db_for_read(User) is None
+
+
+@pytest.fixture
+def sqlite_replica(settings):
+    """Route to the test settings' "replica" alias, a mirror of the test database."""
+    settings.DATABASE_REPLICAS = ["replica"]
+    settings.DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+    return connections["replica"]
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_dashboard_reads_from_replica_until_the_user_writes(sqlite_replica, api_client, manager_user):
+    cache.clear()
+    api_client.force_authenticate(user=manager_user)
+
+    with CaptureQueriesContext(sqlite_replica) as replica_queries:
+        assert api_client.get("/api/operations/cash-flow/").status_code == 200
+    assert len(replica_queries) > 0
+
+    remember_write(manager_user)
+    with CaptureQueriesContext(sqlite_replica) as replica_queries:
+        assert api_client.get("/api/operations/cash-flow/").status_code == 200
+    assert len(replica_queries) == 0
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_requests_that_write_make_the_user_sticky(sqlite_replica, manager_user):
+    from django.test import RequestFactory
+
+    from core.middleware.replicas import ReplicaStickinessMiddleware
+
+    cache.clear()
+    request = RequestFactory().post("/")
+    request.user = manager_user
+
+    def view(request):
+        request.user.save(update_fields=["last_login"])
+        return None
+
+    ReplicaStickinessMiddleware(view)(request)
+
+    assert db_router.recently_wrote(manager_user)
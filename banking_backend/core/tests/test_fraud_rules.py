@@ -0,0 +1,219 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+import numpy as np
+import pytest
+
+from core.models.accounts import Account
+from core.models.fraud import FraudAlert, FraudRule
+from core.models.transactions import Transaction
+from core.services import fraud_rules
+from core.services.fraud_rules import (
+    FRAUD_RULES_VERSION_KEY,
+    flush_rule_triggers,
+    get_rule_engine,
+    record_rule_triggers,
+    screen_queryset,
+    transaction_columns,
+    transaction_facts,
+)
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def fresh_engine():
+    cache.delete(FRAUD_RULES_VERSION_KEY)
+    fraud_rules._engine = None
+    fraud_rules._pending_triggers.clear()
+    yield
+    fraud_rules._engine = None
+
+
+@pytest.fixture
+def account(db):
+    user = User.objects.create_user(username="rules_test", email="rules@test.com")
+    return Account.objects.create(user=user, account_number="RULES123", balance=Decimal("50000.00"))
+
+
+def make_transactions(account):
+    specs = [
+        ("withdrawal", "9000.00", "cash out"),
+        ("withdrawal", "200.00", "ATM"),
+        ("deposit", "12000.00", "salary"),
+        ("transfer", "7500.00", "Crypto exchange top-up"),
+    ]
+    return [
+        Transaction.objects.create(
+            from_account=account if tx_type != "deposit" else None,
+            to_account=account if tx_type == "deposit" else None,
+            amount=Decimal(amount),
+            transaction_type=tx_type,
+            description=description,
+        )
+        for tx_type, amount, description in specs
+    ]
+
+
+@pytest.mark.django_db
+class TestRuleEvaluation:
+    def test_rule_with_additional_conditions(self, account):
+        FraudRule.objects.create(
+            name="Large withdrawal",
+            field="amount",
+            operator=">",
+            value="5000",
+            additional_conditions={"transaction_type": ["withdrawal", "transfer"]},
+        )
+        FraudRule.objects.create(name="Crypto", field="description", operator="contains", value="crypto")
+        large_withdrawal, small_withdrawal, deposit, crypto = make_transactions(account)
+
+        engine = get_rule_engine()
+        assert [r.name for r in engine.evaluate(transaction_facts(large_withdrawal))] == ["Large withdrawal"]
+        assert engine.evaluate(transaction_facts(small_withdrawal)) == []
+        assert engine.evaluate(transaction_facts(deposit)) == []
+        assert sorted(r.name for r in engine.evaluate(transaction_facts(crypto))) == ["Crypto", "Large withdrawal"]
+
+    def test_batch_evaluation_matches_row_evaluation(self, account):
+        FraudRule.objects.create(name="Big", field="amount", operator=">=", value="7500")
+        FraudRule.objects.create(
+            name="Deposit late", field="transaction_type", operator="==", value="deposit",
+            additional_conditions={"hour_of_day": {"operator": ">=", "value": 0}},
+        )
+        FraudRule.objects.create(name="ATM", field="description", operator="contains", value="atm")
+        transactions = make_transactions(account)
+
+        engine = get_rule_engine()
+        _, columns = transaction_columns(Transaction.objects.order_by("id"))
+        matrix = engine.evaluate_batch(columns)
+
+        assert matrix.shape == (3, len(transactions))
+        expected = np.array(
+            [[rule.matches(transaction_facts(tx)) for tx in transactions] for rule in engine.rules]
+        )
+        assert (matrix == expected).all()
+
+        hits = screen_queryset(Transaction.objects.all(), chunk_size=2)
+        assert {tx_id: [r.name for r in rules] for tx_id, rules in hits.items()} == {
+            transactions[0].id: ["Big"],
+            transactions[1].id: ["ATM"],
+            transactions[2].id: ["Big", "Deposit late"],
+            transactions[3].id: ["Big"],
+        }
+
+    def test_invalid_rules_are_skipped(self, account):
+        FraudRule.objects.create(name="Bad field", field="location", operator="==", value="Accra")
+        FraudRule.objects.create(name="Bad value", field="amount", operator=">", value="lots")
+        FraudRule.objects.create(name="Inactive", field="amount", operator=">", value="0", is_active=False)
+        assert len(get_rule_engine()) == 0
+
+
+@pytest.mark.django_db
+class TestRuleEngineCache:
+    def test_engine_is_cached_until_a_rule_changes(self, django_assert_num_queries, django_capture_on_commit_callbacks):
+        rule = FraudRule.objects.create(name="Big", field="amount", operator=">", value="1000")
+        engine = get_rule_engine()
+        with django_assert_num_queries(0):
+            assert get_rule_engine() is engine
+
+        version = cache.get(FRAUD_RULES_VERSION_KEY)
+        with django_capture_on_commit_callbacks(execute=True):
+            rule.value = "5000"
+            rule.save()
+        assert cache.get(FRAUD_RULES_VERSION_KEY) != version
+
+        recompiled = get_rule_engine()
+        assert recompiled is not engine
+        assert recompiled.rules[0].conditions[0].value == 5000.0
+
+    def test_other_workers_recompile_when_version_moves(self, monkeypatch):
+        monkeypatch.setattr(fraud_rules, "FRAUD_RULES_VERSION_CHECK_SECONDS", 0)
+        engine = get_rule_engine()
+        assert get_rule_engine() is engine
+
+        # Another process saved a rule and published a new version
+        cache.set(FRAUD_RULES_VERSION_KEY, "someone-else")
+        assert get_rule_engine() is not engine
+
+
+@pytest.mark.django_db
+def test_trigger_counts_are_flushed_in_one_update(django_assert_num_queries):
+    first = FraudRule.objects.create(name="One", field="amount", operator=">", value="1")
+    second = FraudRule.objects.create(name="Two", field="amount", operator=">", value="2", trigger_count=5)
+
+    record_rule_triggers([first.id, second.id])
+    record_rule_triggers([first.id])
+    with django_assert_num_queries(1):
+        assert flush_rule_triggers() == 2
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.trigger_count, second.trigger_count) == (2, 6)
+    assert first.last_triggered is not None
+    assert flush_rule_triggers() == 0
+
+
+@pytest.mark.django_db
+def test_auto_block_rule_alerts_and_locks_account(account):
+    from core.tasks import analyze_transaction_for_fraud
+
+    rule = FraudRule.objects.create(
+        name="Block huge", field="amount", operator=">", value="8000", severity="critical", auto_block=True
+    )
+    large_withdrawal = make_transactions(account)[0]
+
+    result = analyze_transaction_for_fraud(large_withdrawal.id)
+
+    assert result["blocked_by_rules"] == ["Block huge"]
+    alert = FraudAlert.objects.get(transaction=large_withdrawal)
+    assert alert.severity == "critical"
+    assert alert.message.startswith("[RULE] Block huge")
+    account.refresh_from_db()
+    assert account.is_active is False
+    rule.refresh_from_db()
+    assert rule.trigger_count == 1
+
+
+@pytest.mark.django_db
+def test_rule_api_rejects_uncompilable_rules(api_client, staff_user):
+    api_client.force_authenticate(user=staff_user)
+    payload = {"name": "Odd", "field": "amount", "operator": "~=", "value": "10"}
+    response = api_client.post("/api/fraud/rules/", payload, format="json")
+    assert response.status_code == 400
+
+    payload["operator"] = ">="
+    response = api_client.post("/api/fraud/rules/", payload, format="json")
+    assert response.status_code == 201
+
+
+@pytest.mark.django_db
+def test_rule_api_only_recompiles_when_conditions_change(api_client, staff_user):
+    api_client.force_authenticate(user=staff_user)
+    legacy = FraudRule.objects.create(name="Legacy", field="location", operator="==", value="Accra")
+
+    response = api_client.patch(f"/api/fraud/rules/{legacy.id}/", {"is_active": False}, format="json")
+    assert response.status_code == 200
+
+    response = api_client.patch(f"/api/fraud/rules/{legacy.id}/", {"value": "Kumasi"}, format="json")
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_backfill_alerts_new_matches_once_and_flushes_trigger_counts(account):
+    from core.tasks import backfill_fraud_rules
+
+    rule = FraudRule.objects.create(name="Big", field="amount", operator=">=", value="7500", severity="high")
+    transactions = make_transactions(account)
+    # Live screening already alerted the first one
+    FraudAlert.objects.create(user=account.user, transaction=transactions[0], detector=f"rule:{rule.id}")
+
+    assert backfill_fraud_rules(hours=1) == {"transactions_matched": 3, "alerts_created": 2}
+    rule.refresh_from_db()
+    assert rule.trigger_count == 2
+    assert not fraud_rules._pending_triggers
+
+    assert backfill_fraud_rules(hours=1)["alerts_created"] == 0
+    rule.refresh_from_db()
+    assert rule.trigger_count == 2
@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F, Q, Sum
+
+import pytest
+
+from core.models import Account, ChatMessage, ChatRoom, Loan, Transaction
+from core.utils.field_encryption import hash_field
+from users.models import AuditLog, User
+
+
+def generate(**options):
+    out = StringIO()
+    options = {"users": 60, "transactions": 800, "audit_rows": 50, "batch_size": 250, "workers": 1, **options}
+    call_command("generate_synthetic_data", stdout=out, **options)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_generates_consistent_encrypted_dataset():
+    output = generate(seed=3)
+
+    assert "Synthetic dataset generated" in output
+    member = User.objects.filter(email__endswith="@synthetic.coastal.test", role="customer").first()
+    assert member.first_name and member.first_name_hash == hash_field(member.first_name)
+    assert member.phone_number.startswith("+233") and member.member_number.startswith("CB-")
+    assert member.assigned_banker.role == "mobile_banker"
+    assert not member.has_usable_password()
+
+    assert Transaction.objects.filter(transaction_type="transfer").exists()
+    assert Transaction.objects.filter(transaction_type="disbursement").count() == Loan.objects.exclude(
+        status__in=["pending", "rejected"]
+    ).count()
+    for account in Account.objects.all():
+        completed = Transaction.objects.filter(status="completed")
+        credits = completed.filter(to_account=account).aggregate(total=Sum("amount"))["total"] or 0
+        debits = completed.filter(from_account=account).aggregate(total=Sum("amount"))["total"] or 0
+        assert account.balance >= 0
+        assert abs(account.balance - (account.initial_balance + credits - debits)) < 0.01
+    assert not Transaction.objects.filter(
+        Q(to_account__created_at__gt=F("timestamp")) | Q(from_account__created_at__gt=F("timestamp"))
+    ).exists()
+
+    message = ChatMessage.objects.select_related("room").first()
+    assert message.content and message.sender in message.room.members.all()
+    assert ChatRoom.objects.count() == User.objects.filter(role="customer").count() // 5
+    assert AuditLog.objects.count() == 50
+
+    # New rows after the run get ids past the generated ones
+    assert Transaction.objects.create(amount=1, transaction_type="fee", description="x").id > max(
+        Transaction.objects.exclude(description="x").values_list("id", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_refuses_to_run_twice():
+    generate(users=10, transactions=10, audit_rows=0)
+
+    with pytest.raises(CommandError):
+        generate(users=10, transactions=10, audit_rows=0)
@@ -0,0 +1,130 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+
+import pytest
+from cryptography.fernet import Fernet
+
+from core.models import ChatMessage, ChatRoom
+from core.utils import rotation
+from core.utils.field_encryption import decrypt_field
+from core.utils.secret_service import SecretManager
+
+User = get_user_model()
+
+V2_KEY = Fernet.generate_key().decode()
+
+
+@pytest.fixture
+def v2_key():
+    SecretManager.get_encryption_key.cache_clear()
+    with override_settings(FIELD_ENCRYPTION_KEY_V2=V2_KEY):
+        yield
+    SecretManager.get_encryption_key.cache_clear()
+
+
+def legacy(value):
+    return Fernet(SecretManager.get_encryption_key(version=1)).encrypt(value.encode()).decode()
+
+
+def make_users(count):
+    users = []
+    for i in range(count):
+        user = User.objects.create_user(username=f"rot{i}", email=f"rot{i}@coastal.test", password="x")
+        user.first_name = f"Ama{i}"
+        user.phone_number = f"+23320000{i:04d}"
+        user.save()
+        users.append(user)
+    return users
+
+
+@pytest.mark.django_db
+def test_rotates_versioned_fields_and_upgrades_legacy_ciphertexts(v2_key, tmp_path):
+    (user,) = make_users(1)
+    User.objects.filter(pk=user.pk).update(last_name_encrypted=legacy("Mensah"))
+    room = ChatRoom.objects.create(name="r")
+    message = ChatMessage.objects.create(room=room, sender=user, content_encrypted=legacy("hello"))
+
+    out = StringIO()
+    call_command("rotate_keys", target_version=2, workers=1, checkpoint=str(tmp_path / "cp.json"), stdout=out)
+
+    user.refresh_from_db()
+    assert user.key_version == 2
+    assert (user.first_name, user.last_name) == ("Ama0", "Mensah")
+    assert user.last_name_encrypted.startswith("v2GCM:")
+    with pytest.raises(ValueError):
+        decrypt_field(user.first_name_encrypted, version=1)
+    # Phone numbers are always read with the primary key: left as they were
+    assert user.phone_number == "+233200000000"
+
+    message.refresh_from_db()
+    assert message.content_encrypted.startswith("v2GCM:") and message.content == "hello"
+    assert "Integrity Check passed" in out.getvalue()
+    assert "All rows use AES-GCM under key version 2" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_interrupted_rotation_resumes_from_checkpoint(v2_key, tmp_path, monkeypatch):
+    users = make_users(5)
+    path = str(tmp_path / "cp.json")
+    targets = rotation.rotation_targets(["users.User"])
+
+    writes = []
+    original_write = rotation.KeyRotation.write
+
+    def crash_on_second_chunk(self, target, rows, updates):
+        if writes:
+            raise RuntimeError("worker node lost")
+        writes.append([row[0] for row in rows])
+        return original_write(self, target, rows, updates)
+
+    monkeypatch.setattr(rotation.KeyRotation, "write", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        rotation.KeyRotation(2, chunk_size=2, checkpoint=rotation.Checkpoint(path, 2)).run(targets)
+
+    with open(path) as f:
+        assert json.load(f)["models"]["users.User"] == {"last_pk": users[1].pk, "rotated": 2, "skipped": 0, "failed": 0}
+    assert list(User.objects.order_by("pk").values_list("key_version", flat=True)) == [2, 2, 1, 1, 1]
+
+    monkeypatch.setattr(rotation.KeyRotation, "write", original_write)
+    fetched = []
+    original_fetch = rotation.KeyRotation.fetch
+
+    def recording_fetch(self, target, after):
+        fetched.append(after)
+        return original_fetch(self, target, after)
+
+    monkeypatch.setattr(rotation.KeyRotation, "fetch", recording_fetch)
+    state = rotation.KeyRotation(2, chunk_size=2, checkpoint=rotation.Checkpoint(path, 2)).run(targets)
+
+    assert fetched[0] == users[1].pk
+    assert state["users.User"]["rotated"] == 5
+    assert [u.first_name for u in User.objects.order_by("pk")] == [f"Ama{i}" for i in range(5)]
+
+
+@pytest.mark.django_db
+def test_rows_changed_during_rotation_are_left_for_the_next_run(v2_key):
+    (user,) = make_users(1)
+    target = rotation.rotation_targets(["users.User"])[0]
+    engine = rotation.KeyRotation(2)
+    rows = engine.fetch(target, None)
+    updates, _ = rotation.reencrypt_rows((rows, len(target.versioned), 2))
+
+    User.objects.filter(pk=user.pk).update(first_name_encrypted=legacy("Changed"))
+
+    assert engine.write(target, rows, updates) == (0, 1)
+    assert engine.status([target])["users.User"]["pending"] == 1
+
+
+def test_throttle_backs_off_while_writes_are_slow():
+    sleeps = []
+    throttle = rotation.LoadThrottle(max_slowdown=3.0, sleep=sleeps.append)
+
+    assert throttle.observe(0.1, 100) == 0.0
+    assert throttle.observe(0.5, 100) == 0.05
+    assert throttle.observe(0.5, 100) == 0.1
+    assert throttle.observe(0.1, 100) == 0.05
+    assert sleeps == [0.05, 0.1, 0.05]
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+from django.core.handlers import base
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.client import ClientHandler
+from django.utils.module_loading import import_string
+
+import pytest
+from asgiref.sync import iscoroutinefunction
+from prometheus_client import REGISTRY
+
+from core.middleware import timing
+
+
+def observed(middleware, phase, suffix="count"):
+    return REGISTRY.get_sample_value(
+        f"django_middleware_seconds_{suffix}", {"middleware": middleware, "phase": phase}
+    ) or 0.0
+
+
+class SlowMiddleware:
+    """Spends 20ms before and 10ms after the layers beneath it."""
+
+    calls = 0
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        SlowMiddleware.calls += 1
+        time.sleep(0.02)
+        response = self.get_response(request)
+        time.sleep(0.01)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return HttpResponse("from process_view")
+
+
+def slow_view(request):
+    time.sleep(0.05)
+    return HttpResponse("ok")
+
+
+def layer(middleware_class, get_response, skippable=False, name="tests.SlowMiddleware"):
+    return timed_factory(middleware_class, name, skippable)(get_response)
+
+
+def timed_factory(middleware_class, name, skippable):
+    return timing.timed_middleware_factory(middleware_class, name, True, skippable)
+
+
+def test_phases_exclude_the_layers_beneath():
+    before_request = observed("SlowMiddleware", "request", "sum")
+    before_response = observed("SlowMiddleware", "response", "sum")
+
+    response = layer(SlowMiddleware, slow_view)(RequestFactory().get("/api/accounts/"))
+
+    assert response.content == b"ok"
+    request_phase = observed("SlowMiddleware", "request", "sum") - before_request
+    response_phase = observed("SlowMiddleware", "response", "sum") - before_response
+    assert 0.02 <= request_phase < 0.045  # the 50ms view is not charged to the middleware
+    assert 0.01 <= response_phase < 0.035
+
+
+def test_allow_listed_paths_bypass_skippable_middleware(monkeypatch):
+    monkeypatch.setattr(timing, "MIDDLEWARE_SKIP_PATHS", ("/api/health/",))
+    wrapped = layer(SlowMiddleware, lambda request: HttpResponse("ok"), skippable=True)
+    SlowMiddleware.calls = 0
+
+    health = RequestFactory().get("/api/health/simple/")
+    assert wrapped(health).content == b"ok"
+    assert wrapped.process_view(health, slow_view, (), {}) is None
+    assert SlowMiddleware.calls == 0
+
+    other = RequestFactory().get("/api/accounts/")
+    wrapped(other)
+    assert wrapped.process_view(other, slow_view, (), {}).content == b"from process_view"
+    assert SlowMiddleware.calls == 1
+
+
+def test_security_middleware_is_never_skippable(monkeypatch):
+    monkeypatch.setattr(timing, "MIDDLEWARE_SKIP_PATHS", ("/api/health/",))
+    monkeypatch.setattr(
+        timing,
+        "MIDDLEWARE_SKIPPABLE",
+        ("django.middleware.security.SecurityMiddleware", "core.middleware.base.RequestContextMiddleware"),
+    )
+    with patch.object(timing, "logger") as mock_logger:
+        assert timing.skippable_middleware() == {"core.middleware.base.RequestContextMiddleware"}
+    assert "SecurityMiddleware" in mock_logger.warning.call_args[0][0]
+
+
+def test_async_middleware_stays_async():
+    class AsyncMiddleware:
+        sync_capable = False
+        async_capable = True
+
+        def __init__(self, get_response):
+            self.get_response = get_response
+
+        async def __call__(self, request):
+            return await self.get_response(request)
+
+    async def view(request):
+        return HttpResponse("async")
+
+    wrapped = layer(AsyncMiddleware, view, name="tests.AsyncMiddleware")
+    assert iscoroutinefunction(wrapped)
+    before = observed("AsyncMiddleware", "response")
+    assert asyncio.run(wrapped(RequestFactory().get("/"))).content == b"async"
+    assert observed("AsyncMiddleware", "response") == before + 1
+
+
+class TimedClientHandler(timing.TimedMiddlewareHandlerMixin, ClientHandler):
+    """The test client's handler, instrumented like ``config/wsgi.py``'s."""
+
+
+@pytest.mark.django_db
+def test_stack_is_instrumented_and_health_checks_skip_layers(client):
+    client.handler = TimedClientHandler()
+    xframe_before = observed("XFrameOptionsMiddleware", "request")
+    bulk_before = observed("BulkAccessDetectionMiddleware", "request")
+
+    client.get("/api/health/simple/")
+
+    assert observed("XFrameOptionsMiddleware", "request") == xframe_before + 1
+    assert observed("BulkAccessDetectionMiddleware", "request") == bulk_before
+
+    client.get("/api/users/me/")
+    assert observed("BulkAccessDetectionMiddleware", "request") == bulk_before + 1
+
+
+@pytest.mark.django_db
+def test_stock_handlers_are_left_alone(client):
+    assert base.import_string is import_string
+
+    before = observed("XFrameOptionsMiddleware", "request")
+    client.get("/api/health/simple/")
+    assert observed("XFrameOptionsMiddleware", "request") == before
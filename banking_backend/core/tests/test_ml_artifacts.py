@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from core.ml import artifacts
+from core.ml.compact_forest import CompactForest
+from core.ml.fraud_detector import MLFraudDetector
+
+
+def compact_forest(seed=0, n_estimators=10):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, len(MLFraudDetector.FEATURES))) * 100
+    scaler = StandardScaler().fit(X)
+    model = IsolationForest(n_estimators=n_estimators, random_state=seed).fit(scaler.transform(X))
+    return CompactForest.from_sklearn(model, scaler), X
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(MLFraudDetector, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(MLFraudDetector, "MODEL_PATH", str(tmp_path / "fraud_model.joblib"))
+    monkeypatch.setattr(MLFraudDetector, "SCALER_PATH", str(tmp_path / "scaler.joblib"))
+    return str(tmp_path)
+
+
+def test_publish_and_memory_map(model_dir):
+    compact, X = compact_forest()
+    assert artifacts.current_version(model_dir) is None
+
+    version = artifacts.publish(model_dir, compact)
+    assert artifacts.current_version(model_dir) == version
+
+    loaded = artifacts.load(model_dir, version)
+    assert isinstance(loaded.threshold, np.memmap)
+    assert not loaded.threshold.flags.writeable
+    np.testing.assert_array_equal(loaded.decision_function(X[:20]), compact.decision_function(X[:20]))
+
+
+def test_publish_swaps_pointer_and_prunes_old_versions(model_dir, monkeypatch):
+    monkeypatch.setattr(artifacts, "FRAUD_MODEL_KEEP_VERSIONS", 2)
+    compact, _ = compact_forest()
+
+    versions = [artifacts.publish(model_dir, compact) for _ in range(4)]
+
+    assert artifacts.current_version(model_dir) == versions[-1]
+    remaining = sorted(os.listdir(os.path.join(model_dir, artifacts.ARTIFACT_SUBDIR)))
+    assert remaining == sorted(versions[-2:])
+    assert not [name for name in os.listdir(model_dir) if name.endswith(".tmp")]
+
+
+def test_detector_serves_from_artifact_without_sklearn_model(model_dir):
+    compact, _ = compact_forest()
+    version = artifacts.publish(model_dir, compact)
+
+    detector = MLFraudDetector()
+
+    assert detector.model is None
+    assert detector.artifact_version == version
+    assert detector._compact_forest() is detector.artifact
+    info = detector.get_model_info()
+    assert info["is_fitted"] is True
+    assert info["artifact_version"] == version
+
+
+def test_detector_picks_up_newly_published_model(model_dir, monkeypatch):
+    first, X = compact_forest(seed=0)
+    artifacts.publish(model_dir, first)
+    detector = MLFraudDetector()
+    original = detector.artifact
+
+    second, _ = compact_forest(seed=1)
+    version = artifacts.publish(model_dir, second)
+
+    # Pointer checks are throttled
+    detector.refresh_artifact()
+    assert detector.artifact is original
+
+    monkeypatch.setattr(MLFraudDetector, "ARTIFACT_CHECK_SECONDS", 0)
+    detector.refresh_artifact()
+    assert detector.artifact_version == version
+    np.testing.assert_array_equal(detector.artifact.decision_function(X[:5]), second.decision_function(X[:5]))
+
+
+def test_broken_artifact_falls_back_to_pickled_model(model_dir):
+    with open(os.path.join(model_dir, artifacts.POINTER_NAME), "w") as pointer:
+        pointer.write("fraud-missing.joblib")
+
+    detector = MLFraudDetector()
+
+    assert detector.artifact is None
+    assert isinstance(detector.model, IsolationForest)
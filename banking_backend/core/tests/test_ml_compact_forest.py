@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+from core.ml.compact_forest import CompactForest, average_path_length
+
+
+def fitted(n_samples=500, n_features=9, seed=0, **params):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, n_features)) * rng.uniform(0.1, 1000, size=n_features)
+    X[: n_samples // 50] *= 8  # a few outliers
+    scaler = StandardScaler().fit(X)
+    model = IsolationForest(random_state=seed, **params).fit(scaler.transform(X))
+    return model, scaler, X
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"n_estimators": 100, "contamination": 0.01},
+        {"n_estimators": 50, "contamination": "auto"},
+        {"n_estimators": 30, "max_samples": 64, "contamination": 0.05},
+        {"n_estimators": 40, "max_features": 0.5},
+        {"n_estimators": 10, "max_samples": 1.0, "max_features": 3},
+        {"n_estimators": 25, "bootstrap": True},
+    ],
+)
+def test_matches_sklearn_decision_function(params):
+    model, scaler, X = fitted(**params)
+    compact = CompactForest.from_sklearn(model, scaler)
+
+    rng = np.random.default_rng(1)
+    probes = np.vstack([X[:200], rng.normal(size=(100, X.shape[1])) * 5000, X[:5] * 100])
+    expected = model.decision_function(scaler.transform(probes))
+    np.testing.assert_allclose(compact.decision_function(probes), expected, rtol=0, atol=1e-12)
+
+
+def test_single_row_matches_batch():
+    model, scaler, X = fitted()
+    compact = CompactForest.from_sklearn(model, scaler)
+    batch = compact.decision_function(X[:20])
+    for row, score in zip(X[:20], batch, strict=True):
+        assert compact.score_row(row) == pytest.approx(score, abs=1e-12)
+
+
+def test_without_scaler_and_pre_scaled_input():
+    model, scaler, X = fitted(n_estimators=20)
+    scaled = scaler.transform(X[:50])
+    expected = model.decision_function(scaled)
+
+    np.testing.assert_allclose(CompactForest.from_sklearn(model).decision_function(scaled), expected, atol=1e-12)
+    compact = CompactForest.from_sklearn(model, scaler)
+    np.testing.assert_allclose(compact.decision_function(scaled, scaled=True), expected, atol=1e-12)
+
+
+def test_round_trips_through_arrays(tmp_path):
+    model, scaler, X = fitted(n_estimators=15)
+    compact = CompactForest.from_sklearn(model, scaler)
+
+    path = tmp_path / "forest.npz"
+    np.savez(path, **compact.to_arrays())
+    with np.load(path) as arrays:
+        restored = CompactForest.from_arrays(dict(arrays))
+
+    np.testing.assert_array_equal(restored.decision_function(X[:30]), compact.decision_function(X[:30]))
+
+
+def test_tiny_training_set():
+    # One sample: sklearn defines the score via a zero denominator
+    model = IsolationForest(n_estimators=5, random_state=0).fit(np.ones((1, 3)))
+    compact = CompactForest.from_sklearn(model)
+    probe = np.array([[1.0, 2.0, 3.0]])
+    np.testing.assert_allclose(compact.decision_function(probe), model.decision_function(probe), atol=1e-12)
+
+
+def test_average_path_length_reference_values():
+    np.testing.assert_allclose(average_path_length([0, 1, 2]), [0.0, 0.0, 1.0])
+    n = 256.0
+    assert average_path_length([n])[0] == pytest.approx(2 * (np.log(n - 1) + np.euler_gamma) - 2 * (n - 1) / n)
+
+
+def test_detector_uses_compact_export_of_current_model():
+    from unittest.mock import MagicMock
+
+    from core.ml.fraud_detector import MLFraudDetector
+
+    model, scaler, X = fitted(n_estimators=20)
+    detector = MLFraudDetector()
+    detector.model, detector.scaler = model, scaler
+
+    compact = detector._compact_forest()
+    assert compact is not None
+    assert detector._compact_forest() is compact
+    np.testing.assert_allclose(
+        compact.decision_function(X[:10]), model.decision_function(scaler.transform(X[:10])), atol=1e-12
+    )
+
+    # Swapping in a new (or mocked) model drops the stale export
+    detector.model = MagicMock()
+    assert detector._compact_forest() is None
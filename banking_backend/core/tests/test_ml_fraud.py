@@ -158,3 +158,85 @@ class TestMLFraudDetector:
             mock_predict.return_value = {"is_anomaly": False}
             result = analyze_transaction(real_transaction)
             assert get_fraud_detector() is get_fraud_detector()
+
+
+@pytest.fixture
+def account_with_history(db):
+    from datetime import timedelta
+
+    user = User.objects.create_user(username="batch_ml", email="batch_ml@example.com", password="Password123!")
+    account = Account.objects.create(user=user, account_number="MLBATCH1", balance=Decimal("5000.00"))
+    other = Account.objects.create(user=user, account_number="MLBATCH2", balance=Decimal("10.00"))
+    now = timezone.now()
+    transactions = []
+    for i, (hours_ago, amount) in enumerate([(0, "900.00"), (2, "50.00"), (30, "75.00"), (200, "20.00"), (0, "5.00")]):
+        tx = Transaction.objects.create(
+            from_account=account, amount=Decimal(amount), transaction_type="withdrawal", status="completed"
+        )
+        # timestamp is auto_now_add; backdate explicitly
+        Transaction.objects.filter(pk=tx.pk).update(timestamp=now - timedelta(hours=hours_ago, minutes=i))
+        transactions.append(tx)
+    transactions.append(
+        Transaction.objects.create(to_account=other, amount=Decimal("300.00"), transaction_type="deposit")
+    )
+    return list(
+        Transaction.objects.select_related("from_account", "to_account")
+        .filter(pk__in=[tx.pk for tx in transactions])
+        .order_by("id")
+    )
+
+
+@pytest.mark.django_db
+class TestMLFraudDetectorBatch:
+    def test_batch_features_match_single_extraction(self, account_with_history, django_assert_num_queries):
+        detector = MLFraudDetector()
+        with django_assert_num_queries(1):
+            batch = detector.extract_features_batch(account_with_history)
+
+        for tx, features in zip(account_with_history, batch, strict=True):
+            single = detector.extract_features(tx)
+            assert features.keys() == single.keys()
+            for name in MLFraudDetector.FEATURES:
+                assert features[name] == pytest.approx(single[name], rel=1e-4, abs=1e-3), (tx.pk, name)
+
+    def test_predict_batch_matches_predict(self, account_with_history):
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(200, len(MLFraudDetector.FEATURES)))
+        detector = MLFraudDetector()
+        detector.scaler = StandardScaler().fit(X)
+        detector.model = IsolationForest(n_estimators=20, random_state=0).fit(detector.scaler.transform(X))
+
+        batch = detector.predict_batch(account_with_history)
+        for tx, result in zip(account_with_history, batch, strict=True):
+            single = detector.predict(tx)
+            assert result["risk_level"] == single["risk_level"]
+            assert result["raw_score"] == pytest.approx(single["raw_score"], abs=1e-3)
+
+    def test_batch_rescoring_covers_window_and_dedups_by_transaction(self, account_with_history, monkeypatch):
+        from core.models import FraudAlert
+        from core.tasks import batch_analyze_recent_transactions
+
+        detector = MLFraudDetector()
+        detector.model = MagicMock()
+        detector.model.decision_function.side_effect = lambda features: np.full(len(features), -0.9)
+        monkeypatch.setattr(detector, "_is_fitted", lambda: True)
+        monkeypatch.setattr("core.ml.fraud_detector._detector_instance", detector)
+        monkeypatch.setattr("core.tasks.FRAUD_RESCORE_CHUNK_SIZE", 2)
+
+        # The real-time detector already alerted on one of them
+        FraudAlert.objects.create(
+            user=account_with_history[0].from_account.user, transaction=account_with_history[0], detector="ml",
+            message="[ML-ANOMALY]",
+        )
+
+        result = batch_analyze_recent_transactions(hours=24)
+        # The four transactions inside the window, in chunks of 2, minus the one already alerted
+        assert result == {"transactions_analyzed": 4, "anomalies_found": 3, "chunks": 2}
+        assert FraudAlert.objects.filter(detector="ml_batch").count() == 3
+
+        result = batch_analyze_recent_transactions(hours=24)
+        assert result["anomalies_found"] == 0
+        assert FraudAlert.objects.filter(detector="ml_batch").count() == 3
@@ -1,3 +1,6 @@
+import asyncio
+import json
+
 import pytest
 from decimal import Decimal
 from django.contrib.auth import get_user_model
@@ -7,7 +10,9 @@ from channels.db import database_sync_to_async
 from channels.testing import WebsocketCommunicator
 
 from config.asgi import application
+from core.consumers import NotificationConsumer
 from core.models.accounts import Account
+from core.services.notifications import NotificationDispatcher
 from core.services.transactions import TransactionService
 from conftest import TEST_PASSWORD
 
@@ -77,6 +82,116 @@ async def test_notification_websocket_unauthenticated():
     assert connected is False
 
 
+@pytest.mark.asyncio
+async def test_dispatcher_coalesces_notifications_per_user():
+    from channels.layers import InMemoryChannelLayer
+
+    layer = InMemoryChannelLayer()
+    alice_channel = await layer.new_channel()
+    bob_channel = await layer.new_channel()
+    await layer.group_add("notifications_1", alice_channel)
+    await layer.group_add("notifications_2", bob_channel)
+
+    items = [(1, {"type": "transaction", "reference": str(i)}) for i in range(3)]
+    items.append((2, {"type": "transaction", "reference": "solo"}))
+    frames_sent = await NotificationDispatcher().dispatch(items, layer)
+    assert frames_sent == 2
+
+    alice_event = await layer.receive(alice_channel)
+    assert alice_event["type"] == "send_notification"
+    assert alice_event["data"]["type"] == "notification_batch"
+    assert alice_event["data"]["count"] == 3
+    assert [n["reference"] for n in alice_event["data"]["notifications"]] == ["0", "1", "2"]
+
+    # A lone notification keeps its original shape
+    bob_event = await layer.receive(bob_channel)
+    assert bob_event["data"] == {"type": "transaction", "reference": "solo"}
+
+
+def test_dispatcher_publish_only_queues_when_enabled(settings, monkeypatch):
+    settings.NOTIFICATION_DISPATCHER_ENABLED = True
+    dispatcher = NotificationDispatcher()
+    monkeypatch.setattr(dispatcher, "_ensure_thread", lambda: None)
+
+    dispatcher.publish(7, {"type": "transaction", "reference": "1"})
+    dispatcher.publish(7, {"type": "transaction", "reference": "2"})
+
+    assert dispatcher.take_pending() == [
+        (7, {"type": "transaction", "reference": "1"}),
+        (7, {"type": "transaction", "reference": "2"}),
+    ]
+    assert dispatcher.take_pending() == []
+
+
+class SlowSocket:
+    """Stand-in for the ASGI send side: each write waits until released."""
+
+    def __init__(self):
+        self.frames = []
+        self.release = asyncio.Event()
+
+    async def send(self, text_data=None, **kwargs):
+        await self.release.wait()
+        self.frames.append(json.loads(text_data))
+
+
+def notification_consumer(socket):
+    consumer = NotificationConsumer()
+    consumer.user = User(id=1)
+    consumer.send = socket.send
+    consumer.start_outbox()
+    return consumer
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("batching", [True, False])
+async def test_notification_consumer_drops_oldest_for_slow_client(monkeypatch, settings, batching):
+    settings.NOTIFICATION_DISPATCHER_ENABLED = batching
+    monkeypatch.setattr("core.consumers.NOTIFICATION_OUTBOX_LIMIT", 3)
+    socket = SlowSocket()
+    consumer = notification_consumer(socket)
+
+    await consumer.send_notification({"data": {"reference": "0"}})
+    await asyncio.sleep(0)  # the sender task picks up frame 0 and blocks on the socket
+    for i in range(1, 8):
+        await consumer.send_notification({"data": {"reference": str(i)}})
+
+    socket.release.set()
+    expected = 3 if batching else 5
+    for _ in range(20):
+        if len(socket.frames) == expected:
+            break
+        await asyncio.sleep(0.01)
+    consumer.sender_task.cancel()
+
+    assert socket.frames[0] == {"reference": "0"}
+    assert socket.frames[1] == {"type": "notifications_dropped", "count": 4}
+    if batching:
+        assert socket.frames[2]["type"] == "notification_batch"
+        assert [n["reference"] for n in socket.frames[2]["notifications"]] == ["5", "6", "7"]
+    else:
+        # Clients without batch support only ever see plain frames
+        assert socket.frames[2:] == [{"reference": "5"}, {"reference": "6"}, {"reference": "7"}]
+
+
+@pytest.mark.asyncio
+async def test_notification_consumer_closes_stalled_socket(monkeypatch):
+    monkeypatch.setattr("core.consumers.NOTIFICATION_SEND_TIMEOUT", 0.05)
+    socket = SlowSocket()
+    consumer = notification_consumer(socket)
+    closed = []
+
+    async def close(code=None, reason=None):
+        closed.append(code)
+
+    consumer.close = close
+    await consumer.send_notification({"data": {"reference": "0"}})
+    await asyncio.wait_for(consumer.sender_task, 1)
+
+    assert closed == [4008]
+    assert socket.frames == []
+
+
 # Helper functions to run database operations inside async tests
 @database_sync_to_async
 def django_db_create_user(**kwargs):
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+import numpy as np
+import pytest
+
+from core.models import PerformanceMetric
+from core.services.performance_metrics import (
+    LatencyAggregator,
+    LatencyHistogram,
+    bucket_index,
+    bucket_value,
+    downsample_performance_metrics,
+    latency_aggregator,
+    summarize_response_times,
+)
+
+
+def test_histogram_percentiles_are_within_bucket_precision():
+    rng = np.random.default_rng(0)
+    samples = rng.lognormal(mean=-3.5, sigma=1.0, size=20_000)  # seconds, median ~30ms
+    histogram = LatencyHistogram()
+    for seconds in samples:
+        histogram.record(seconds, is_error=seconds > 0.5)
+
+    for pct in (50, 95, 99):
+        expected_us = np.percentile(samples, pct) * 1_000_000
+        assert histogram.percentile(pct) == pytest.approx(expected_us, rel=0.02)
+    assert histogram.max_us == int(samples.max() * 1_000_000)
+    assert histogram.errors == int((samples > 0.5).sum())
+
+
+def test_bucket_boundaries_round_trip():
+    for microseconds in [0, 1, 127, 128, 255, 256, 1_000, 65_535, 1_000_000, 30_000_000]:
+        index = bucket_index(microseconds)
+        assert bucket_value(index) == pytest.approx(microseconds, rel=1 / 64, abs=1)
+        assert bucket_index(microseconds + 1) >= index
+
+
+@pytest.mark.django_db
+def test_flush_writes_one_row_per_endpoint_in_one_bulk_insert(django_assert_num_queries):
+    aggregator = LatencyAggregator()
+    for ms in range(1, 101):
+        aggregator.record("core:operations-metrics", ms / 1000)
+    aggregator.record("users:member-dashboard", 0.020, is_error=True)
+
+    with django_assert_num_queries(1):
+        assert aggregator.flush() == 3  # 2 endpoints + all
+    assert aggregator.flush() == 0
+
+    row = PerformanceMetric.objects.get(endpoint="core:operations-metrics")
+    assert (row.metric_type, row.statistic, row.value) == ("response_time", "mean", Decimal("50.5"))
+    histogram = LatencyHistogram.from_dict(row.histogram)
+    assert histogram.percentile(50) / 1000 == pytest.approx(50, rel=0.02)
+    assert histogram.max_us == 100_000
+
+    combined = PerformanceMetric.objects.get(endpoint="")
+    assert combined.sample_count == combined.histogram["count"] == 101
+    assert combined.histogram["errors"] == 1
+
+
+@pytest.mark.django_db
+def test_requests_are_recorded_by_view_name(api_client, staff_user):
+    latency_aggregator.take()
+    api_client.force_authenticate(user=staff_user)
+    api_client.get("/api/operations/metrics/")
+
+    histograms = latency_aggregator.take()
+    assert histograms["core:operations-metrics"].count == 1
+    assert histograms["core:operations-metrics"].errors == 0
+
+
+def window(requests, recorded_at, window_seconds=60):
+    """Flushed rows of one window; ``requests`` is a list of ``(count, seconds, is_error)``."""
+    histogram = LatencyHistogram()
+    for count, seconds, is_error in requests:
+        for _ in range(count):
+            histogram.record(seconds, is_error)
+    return LatencyAggregator().build_rows({"core:operations-metrics": histogram}, recorded_at, window_seconds)
+
+
+def two_windows(recorded_at):
+    """A busy fast minute (90 requests at 10ms) and a quiet slow one (10 requests at 110ms, 1 failing)."""
+    return window([(90, 0.010, False)], recorded_at) + window([(9, 0.110, False), (1, 0.400, True)], recorded_at)
+
+
+@pytest.mark.django_db
+def test_summary_reads_percentiles_from_the_merged_histograms():
+    PerformanceMetric.objects.bulk_create(two_windows(timezone.now()))
+
+    summary = summarize_response_times(timezone.now() - timedelta(hours=1))
+
+    # An average of the two windows' p95 would be (90*10 + 10*400) / 100 = 49ms
+    assert summary["p50"] == pytest.approx(10, rel=0.02)
+    assert summary["p95"] == pytest.approx(110, rel=0.02)
+    assert summary["max"] == 400
+    assert summary["mean"] == pytest.approx((90 * 10 + 9 * 110 + 400) / 100)
+    assert summary["requests"] == 100
+    assert summary["error_rate"] == pytest.approx(1.0)
+    assert summarize_response_times(timezone.now() - timedelta(hours=1), endpoint="nothing") is None
+    assert (
+        summarize_response_times(timezone.now() - timedelta(hours=1), endpoint="core:operations-metrics")["requests"]
+        == 100
+    )
+
+
+@pytest.mark.django_db
+def test_downsampling_merges_old_histograms_and_applies_retention():
+    now = timezone.now().replace(minute=30)
+    old_hour = (now - timedelta(days=3)).replace(minute=0, second=0, microsecond=0)
+    PerformanceMetric.objects.bulk_create(
+        two_windows(old_hour + timedelta(minutes=5))
+        + two_windows(now)  # recent: untouched
+        + window([(1, 0.005, False)], now - timedelta(days=200), window_seconds=3600)  # expired
+    )
+
+    result = downsample_performance_metrics(now=now)
+
+    assert result == {"rolled_up": 2, "raw_deleted": 4, "expired": 2}
+    hourly = {row.endpoint: row for row in PerformanceMetric.objects.filter(window_seconds=3600)}
+    assert hourly.keys() == {"", "core:operations-metrics"}
+    assert hourly[""].recorded_at == old_hour
+    assert hourly[""].sample_count == 100
+    assert LatencyHistogram.from_dict(hourly[""].histogram).percentile(95) / 1000 == pytest.approx(110, rel=0.02)
+    assert PerformanceMetric.objects.filter(window_seconds=60).count() == 4
+
+    # Old hours still count towards long-range summaries
+    assert summarize_response_times(old_hour)["requests"] == 200
+
+    # Idempotent
+    assert downsample_performance_metrics(now=now) == {"rolled_up": 0, "raw_deleted": 0, "expired": 0}
+
+
+@pytest.mark.django_db
+def test_performance_dashboard_reports_percentiles(api_client, staff_user):
+    from django.core.cache import cache
+
+    cache.clear()
+    PerformanceMetric.objects.bulk_create(two_windows(timezone.now()))
+    api_client.force_authenticate(user=staff_user)
+
+    response = api_client.get("/api/performance/dashboard-data/")
+    assert response.status_code == 200, response.data
+    summary = response.data["performance_summary"]
+
+    assert summary["p95_response_time"] == pytest.approx(110, rel=0.02)
+    assert summary["throughput"] == round(100 / 900, 4)
@@ -0,0 +1,145 @@
+import gzip
+import marshal
+import pstats
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from conftest import TEST_PASSWORD
+from core.middleware import profiling
+from core.models import RequestProfile
+from core.tasks import prune_request_profiles
+
+User = get_user_model()
+
+METRICS_URL = "/api/operations/metrics/"
+
+
+@pytest.fixture
+def superuser(db):
+    return User.objects.create_superuser(
+        email="root@coastal.com", username="root", password=TEST_PASSWORD, role="admin", is_approved=True
+    )
+
+
+def bearer(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(user)}"}
+
+
+@pytest.mark.django_db
+def test_superuser_header_stores_profile_with_sql(client, superuser):
+    cache.clear()
+    response = client.get(METRICS_URL, HTTP_X_PROFILE="1", **bearer(superuser))
+
+    assert response.status_code == 200
+    profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+    assert profile.trigger == "header"
+    assert profile.user == superuser
+    assert profile.view_name == "core:operations-metrics"
+    assert profile.db_queries > 0
+    assert profile.sql[0]["count"] >= 1
+    assert profile.sql[0]["total_ms"] >= profile.sql[-1]["total_ms"]
+    assert "cumulative" in profile.summary
+
+    stats = pstats.Stats()
+    stats.stats = marshal.loads(gzip.decompress(bytes(profile.profile_data)))
+    assert stats.stats
+
+
+@pytest.mark.django_db
+def test_header_is_ignored_for_non_superusers(client, staff_user):
+    response = client.get(METRICS_URL, HTTP_X_PROFILE="1", **bearer(staff_user))
+
+    assert "X-Profile-Id" not in response
+    assert not RequestProfile.objects.exists()
+
+
+@pytest.mark.django_db
+def test_sampled_requests_are_profiled(client, staff_user, monkeypatch):
+    client.get(METRICS_URL, **bearer(staff_user))
+    assert not RequestProfile.objects.exists()
+
+    monkeypatch.setattr(profiling, "PROFILING_SAMPLE_RATE", 1.0)
+    client.get(METRICS_URL, **bearer(staff_user))
+
+    profile = RequestProfile.objects.get()
+    assert profile.trigger == "sampled"
+    assert profile.user == staff_user
+
+
+@pytest.mark.django_db
+def test_admin_lists_and_downloads_profiles(client, superuser, staff_user, settings):
+    # The admin templates need static files; the test run has no collectstatic manifest.
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+    response = client.get(METRICS_URL, HTTP_X_PROFILE="1", **bearer(superuser))
+    profile_id = response["X-Profile-Id"]
+    download_url = reverse("admin:core_requestprofile_download", args=[profile_id])
+
+    client.force_login(superuser)
+    assert client.get(reverse("admin:core_requestprofile_changelist")).status_code == 200
+    assert client.get(reverse("admin:core_requestprofile_change", args=[profile_id])).status_code == 200
+    download = client.get(download_url)
+    assert download.status_code == 200
+    assert download["Content-Disposition"] == f'attachment; filename="request-profile-{profile_id}.prof"'
+    assert marshal.loads(download.content)
+
+    client.force_login(staff_user)
+    assert client.get(download_url).status_code == 403
+
+
+def test_overlapping_profiles_run_unprofiled(rf, monkeypatch):
+    nested = {}
+
+    def get_response(request):
+        if request.path == "/outer/":
+            # A second profile is requested while this one is running
+            nested["response"] = middleware.profile(rf.get("/inner/"), "sampled")
+        return HttpResponse("ok")
+
+    middleware = profiling.ProfilingMiddleware(get_response)
+    monkeypatch.setattr(middleware, "save", lambda *args: SimpleNamespace(pk=1))
+
+    outer = middleware.profile(rf.get("/outer/"), "sampled")
+
+    assert outer["X-Profile-Id"] == "1"
+    assert nested["response"].status_code == 200
+    assert "X-Profile-Id" not in nested["response"]
+
+
+def test_profiler_hook_taken_by_another_tool_serves_the_request(rf, monkeypatch):
+    class BusyProfile:
+        def enable(self):
+            raise ValueError("Another profiling tool is already active")
+
+    middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse("ok"))
+    monkeypatch.setattr(profiling.cProfile, "Profile", BusyProfile)
+
+    response = middleware.profile(rf.get("/"), "sampled")
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response
+    assert not profiling._profiling_lock.locked()
+
+
+@pytest.mark.django_db
+def test_old_profiles_are_pruned(client, superuser):
+    response = client.get(METRICS_URL, HTTP_X_PROFILE="1", **bearer(superuser))
+    kept = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+    expired = RequestProfile.objects.create(
+        method="GET", path="/old/", status_code=200, trigger="header", duration_ms=1, profile_data=b""
+    )
+    RequestProfile.objects.filter(pk=expired.pk).update(created_at=timezone.now() - timedelta(days=15))
+
+    assert prune_request_profiles() == 1
+    assert list(RequestProfile.objects.all()) == [kept]
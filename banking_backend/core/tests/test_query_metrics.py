@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+
+import pytest
+from prometheus_client import REGISTRY
+
+from core.middleware import query_metrics
+from core.middleware.query_metrics import QueryStats, fingerprint
+from core.models import Account
+
+
+def sample(metric, view, suffix):
+    return REGISTRY.get_sample_value(f"{metric}_{suffix}", {"view": view}) or 0.0
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    assert fingerprint('SELECT * FROM "t" WHERE "id" = 42 AND "name" = \'bob\'') == (
+        'SELECT * FROM "t" WHERE "id" = ? AND "name" = ?'
+    )
+    assert fingerprint('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s)') == fingerprint(
+        'SELECT 1 FROM "t" WHERE "id" IN (%s)'
+    )
+
+
+@pytest.mark.django_db
+def test_stats_detect_repeated_statements():
+    stats = QueryStats()
+    with connection.execute_wrapper(stats.execute_wrapper), connection.cursor() as cursor:
+        for user_id in range(4):
+            cursor.execute('SELECT id FROM "users_user" WHERE id = %s', [user_id])
+        cursor.execute(f'SELECT COUNT(*) FROM "{Account._meta.db_table}"')
+
+    assert stats.count == 5
+    shape, repeats = stats.most_repeated()
+    assert repeats == 4
+    assert shape == 'SELECT id FROM "users_user" WHERE id = %s'
+    assert stats.slowest_sql
+    assert stats.seconds >= stats.slowest_seconds > 0
+
+
+@pytest.mark.django_db
+def test_middleware_records_histograms_by_view_name(api_client, staff_user):
+    view = "core:operations-metrics"
+    before = sample("django_view_db_queries", view, "count")
+    before_sum = sample("django_view_db_queries", view, "sum")
+
+    cache.clear()
+    api_client.force_authenticate(user=staff_user)
+    response = api_client.get("/api/operations/metrics/")
+
+    assert response.status_code == 200
+    assert sample("django_view_db_queries", view, "count") == before + 1
+    assert sample("django_view_db_queries", view, "sum") > before_sum
+    assert sample("django_view_db_seconds", view, "count") >= 1
+    assert sample("django_view_db_duplicate_queries", view, "count") >= 1
+    assert sample("django_view_db_slowest_query_seconds", view, "count") >= 1
+
+
+@pytest.mark.django_db
+def test_hotspots_are_logged_when_sampled(api_client, staff_user, monkeypatch):
+    monkeypatch.setattr(query_metrics, "QUERY_METRICS_LOG_QUERIES", 1)
+    cache.clear()
+    api_client.force_authenticate(user=staff_user)
+
+    monkeypatch.setattr(query_metrics, "QUERY_METRICS_LOG_SAMPLE_RATE", 0.0)
+    with patch.object(query_metrics, "logger") as mock_logger:
+        api_client.get("/api/operations/metrics/")
+    mock_logger.warning.assert_not_called()
+
+    monkeypatch.setattr(query_metrics, "QUERY_METRICS_LOG_SAMPLE_RATE", 1.0)
+    cache.clear()  # the view caches its payload
+    with patch.object(query_metrics, "logger") as mock_logger:
+        api_client.get("/api/operations/metrics/")
+    message = mock_logger.warning.call_args[0][0]
+    assert message.startswith("SQL hotspot in core:operations-metrics (GET)")
@@ -0,0 +1,102 @@
+import uuid
+
+from django.core.cache.backends.locmem import LocMemCache
+
+import pytest
+
+from core.utils import cache as cache_module
+from core.utils.cache import TieredRedisCache
+
+UNREACHABLE_REDIS = "redis://127.0.0.1:1/0"
+
+
+class FakeBus:
+    """Stands in for Redis pub/sub: delivers each publish to every subscribed tier."""
+
+    def __init__(self):
+        self.tiers = []
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append(message)
+        for tier in self.tiers:
+            tier.handle(message)
+
+
+@pytest.fixture
+def processes(monkeypatch):
+    """Two 'processes' sharing one L2 store and one invalidation bus."""
+    monkeypatch.setattr(cache_module.LocalTier, "ensure_listener", lambda self, get_client: None)
+    bus = FakeBus()
+    shared = LocMemCache(f"l2-{uuid.uuid4().hex}", {})
+
+    def make(name):
+        backend = TieredRedisCache(
+            f"redis://{name}-{uuid.uuid4().hex}:6379/0",
+            {"OPTIONS": {"L1_NAMESPACES": ["hot:"], "L1_MAX_ENTRIES": 3, "L1_TIMEOUT": 60}},
+        )
+        backend._redis_cache = shared
+        backend._redis_client = lambda: bus
+        backend._l1.node_id = name
+        backend._l1._set_live(True)
+        bus.tiers.append(backend._l1)
+        return backend
+
+    return make("a"), make("b"), shared, bus
+
+
+def test_hot_keys_are_served_from_l1_and_invalidated_everywhere(processes):
+    a, b, shared, bus = processes
+    a.set("hot:rules", ["r1"])
+    assert b.get("hot:rules") == ["r1"]
+
+    # Served from L1: the shared tier is not consulted again
+    shared.set("hot:rules", ["changed behind our back"])
+    value = b.get("hot:rules")
+    assert value == ["r1"]
+    value.append("mutated by caller")
+    assert b.get("hot:rules") == ["r1"]
+
+    # A write in one process evicts the key in the other
+    a.set("hot:rules", ["r2"])
+    assert b.get("hot:rules") == ["r2"]
+    a.delete("hot:rules")
+    assert b.get("hot:rules", "gone") == "gone"
+
+    # Keys outside the opted-in namespaces never touch L1 or the bus
+    published = len(bus.published)
+    a.set("cold:key", 1)
+    shared.set("cold:key", 2)
+    assert a.get("cold:key") == 2
+    assert len(bus.published) == published
+
+    stats = b.tier_stats()
+    assert stats["l1_live"]
+    assert stats["l1"]["hits"] == 2 and stats["l1"]["misses"] == 3
+    assert stats["l2"] == {"hits": 2, "misses": 1, "hit_ratio": 0.6667}
+
+
+def test_l1_is_bounded_and_drops_fills_raced_by_an_invalidation(processes):
+    a, b, _, _ = processes
+    a.set_many({f"hot:{i}": i for i in range(5)})
+    assert a.get_many([f"hot:{i}" for i in range(5)]) == {f"hot:{i}": i for i in range(5)}
+    assert a.tier_stats()["l1_entries"] == 3
+
+    epoch = b._l1.epoch
+    key = b.make_key("hot:race")
+    a.set("hot:race", "new")
+    b._l1.fill(key, "old", epoch)
+    assert b._l1.lookup(key) is cache_module._MISSING
+
+
+def test_falls_back_to_locmem_and_bypasses_l1_when_redis_is_down():
+    backend = TieredRedisCache(
+        UNREACHABLE_REDIS, {"OPTIONS": {"L1_NAMESPACES": ["hot:"], "L1_CHANNEL": f"test-{uuid.uuid4().hex}"}}
+    )
+    backend.set("hot:limit", 3)
+
+    assert backend._fallback_active
+    assert backend.get("hot:limit") == 3
+    assert backend.incr("hot:limit") == 4
+    assert backend.get("hot:limit") == 4
+    assert not backend.tier_stats()["l1_live"]
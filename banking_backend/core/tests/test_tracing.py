@@ -0,0 +1,128 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache
+
+import httpx
+import pytest
+
+from core import tracing
+from core.services.transactions import TransactionService
+
+
+@pytest.fixture
+def exported(monkeypatch, tmp_path):
+    """Enable tracing at 100% sampling; returns a function that flushes and reads the exported spans."""
+    tracing.install()
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing.span_processor, "exporter", tracing.FileSpanExporter(str(tmp_path / "traces.jsonl")))
+    tracing.span_processor.flush()
+    (tmp_path / "traces.jsonl").unlink(missing_ok=True)
+
+    def read():
+        tracing.span_processor.flush()
+        path = tmp_path / "traces.jsonl"
+        return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+    yield read
+    tracing.span_processor.flush()  # nothing may leak to the default exporter once the patches are undone
+
+
+def attributes(span):
+    return {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+
+
+def test_traceparent_round_trip(exported):
+    with tracing.start_span("root", parent=tracing.SpanContext("ab" * 16, "cd" * 8, True)) as span:
+        headers = tracing.inject({})
+
+    remote = tracing.extract(headers["traceparent"])
+    assert (remote.trace_id, remote.span_id, remote.sampled) == ("ab" * 16, span.span_id, True)
+    assert tracing.extract("00-" + "0" * 32 + "-" + "cd" * 8 + "-01") is None
+    assert tracing.extract("garbage") is None
+    assert tracing.extract(None) is None
+
+
+def test_unsampled_traces_propagate_but_record_nothing(exported, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 0.0)
+    with tracing.start_span("root") as root, tracing.start_span("child") as child:
+        assert not child.recording
+        assert child.trace_id == root.trace_id
+        assert tracing.inject({})["traceparent"].endswith("-00")
+    assert exported() == []
+
+    # An upstream decision to sample wins over the local rate.
+    with tracing.start_span("continued", parent=tracing.extract("00-" + "ab" * 16 + "-" + "cd" * 8 + "-01")):
+        pass
+    assert [span["parentSpanId"] for span in exported()] == ["cd" * 8]
+
+
+@pytest.mark.django_db
+def test_request_span_with_sql_children(exported, api_client, staff_user):
+    cache.clear()
+    api_client.force_authenticate(user=staff_user)
+    response = api_client.get("/api/operations/metrics/")
+
+    spans = exported()
+    root = next(span for span in spans if span["kind"] == tracing.SPAN_KINDS["server"])
+    assert root["name"] == "GET core:operations-metrics"
+    assert attributes(root)["http.status_code"] == "200"
+    assert response["traceresponse"] == f"00-{root['traceId']}-{root['spanId']}-01"
+
+    queries = [span for span in spans if span["name"].startswith("db ")]
+    assert queries and all(span["traceId"] == root["traceId"] for span in queries)
+    assert any(span["parentSpanId"] == root["spanId"] for span in queries)
+    assert any(span["name"] == "cache get" for span in spans)
+
+
+@pytest.mark.django_db
+def test_service_and_outbound_http_spans_nest(exported, sender_account, receiver_account):
+    seen_headers = {}
+
+    def handler(request):
+        seen_headers.update(request.headers)
+        return httpx.Response(200, json={"ok": True})
+
+    with tracing.start_span("test") as root:
+        TransactionService.create_transaction(sender_account, receiver_account, Decimal("10.00"), "transfer")
+        with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+            client.post("https://sms.example.com/send?to=233200000000", json={})
+
+    spans = {span["name"]: span for span in exported()}
+    service = spans["TransactionService.create_transaction"]
+    assert service["parentSpanId"] == root.span_id
+    assert spans["MLFraudDetector.predict"]["traceId"] == root.trace_id
+
+    http = spans["HTTP POST"]
+    assert attributes(http)["http.url"] == "https://sms.example.com/send"
+    assert seen_headers["traceparent"] == f"00-{root.trace_id}-{http['spanId']}-01"
+
+
+@pytest.mark.django_db
+def test_celery_headers_carry_context_and_tasks_continue_it(exported):
+    from core.tasks import downsample_performance_metrics
+
+    with tracing.start_span("publisher") as root:
+        headers = {}
+        tracing._inject_task_headers(headers=headers)
+        assert tracing.extract(headers["traceparent"]).span_id == root.span_id
+
+        downsample_performance_metrics.apply()
+
+    task = next(span for span in exported() if span["name"] == "core.tasks.downsample_performance_metrics")
+    assert task["parentSpanId"] == root.span_id
+    assert attributes(task)["celery.state"] == "SUCCESS"
+
+
+def test_otlp_payload_shape():
+    span = tracing.Span("op", "ab" * 16, "cd" * 8)
+    span.set_attribute("retries", 2)
+    span.end_ns = span.start_ns + 1_000
+
+    payload = tracing.OTLPHttpSpanExporter("http://collector:4318/v1/traces", "coastal").payload([span])
+    resource = payload["resourceSpans"][0]
+    assert resource["resource"]["attributes"][0] == {"key": "service.name", "value": {"stringValue": "coastal"}}
+    otlp = resource["scopeSpans"][0]["spans"][0]
+    assert otlp["traceId"] == "ab" * 16 and otlp["parentSpanId"] == "cd" * 8
+    assert {"key": "retries", "value": {"intValue": "2"}} in otlp["attributes"]
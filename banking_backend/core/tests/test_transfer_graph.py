@@ -0,0 +1,137 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+import numpy as np
+import pytest
+
+from core.ml.transfer_graph import TransferEdges, analyze_transfer_graph, rapid_outflow
+from core.models.accounts import Account
+from core.models.fraud import FraudAlert
+from core.models.transactions import Transaction
+
+User = get_user_model()
+
+HOUR = 3600
+
+
+def make_edges(transfers):
+    """``(source, target, amount, hour)`` tuples to ``TransferEdges``."""
+    source, target, amount, hours = zip(*transfers, strict=True)
+    return TransferEdges(
+        tx_id=np.arange(1, len(transfers) + 1, dtype=np.int64),
+        source=np.array(source, dtype=np.int64),
+        target=np.array(target, dtype=np.int64),
+        amount=np.array(amount, dtype=np.float64),
+        seconds=1_700_000_000 + (np.array(hours, dtype=np.float64) * HOUR).astype(np.int64),
+    )
+
+
+def mule_ring(mule=100, senders=range(1, 7), cash_out=(200, 201), forward_after=1.0):
+    """Six victims pay the mule, which forwards everything to two cash-out accounts."""
+    transfers = [(sender, mule, 500.0, 0.0) for sender in senders]
+    share = 500.0 * len(senders) / len(cash_out)
+    transfers += [(mule, target, share, forward_after) for target in cash_out]
+    return transfers
+
+
+class TestTransferGraphAnalysis:
+    def test_flags_fan_in_pass_through_account(self):
+        # Plus an unrelated, ordinary pair of accounts
+        report = analyze_transfer_graph(make_edges(mule_ring() + [(300, 301, 50.0, 2.0)]))
+
+        assert report.suspicious_accounts.tolist() == [100]
+        mule = report.account_ids.tolist().index(100)
+        assert (report.fan_in[mule], report.fan_out[mule]) == (6, 2)
+        assert report.pass_through[mule] == pytest.approx(1.0)
+        assert report.component_size[mule] == 9
+        assert report.latest_tx_id[mule] == 8
+
+        other = report.account_ids.tolist().index(300)
+        assert report.component[other] != report.component[mule]
+        assert report.component_size[other] == 2
+
+    def test_slow_forwarding_is_not_pass_through(self):
+        report = analyze_transfer_graph(make_edges(mule_ring(forward_after=30.0)), pass_through_seconds=6 * HOUR)
+        mule = report.account_ids.tolist().index(100)
+        assert report.pass_through[mule] == 0.0
+        assert not report.suspicious.any()
+
+    def test_small_fan_or_small_cluster_is_ignored(self):
+        few_senders = analyze_transfer_graph(make_edges(mule_ring(senders=range(1, 3))))
+        assert not few_senders.suspicious.any()
+
+        strict = analyze_transfer_graph(make_edges(mule_ring()), min_cluster_size=20)
+        assert not strict.suspicious.any()
+
+    def test_cluster_mule_counts(self):
+        ring = mule_ring(mule=100, cash_out=(200,)) + mule_ring(mule=101, senders=range(10, 16), cash_out=(200,))
+        report = analyze_transfer_graph(make_edges(ring))
+
+        assert sorted(report.suspicious_accounts.tolist()) == [100, 101]
+        assert set(report.cluster_mule_counts().tolist()) == {2}
+
+    def test_rapid_outflow_restarts_per_account(self):
+        # Node 0 receives at t=0 and sends at t=10 (rapid) and t=100 (too late);
+        # node 1 sends at t=5 without ever receiving.
+        node = np.array([0, 0, 0, 1])
+        seconds = np.array([0, 10, 100, 5])
+        amount = np.array([1.0, 2.0, 3.0, 4.0])
+        incoming = np.array([True, False, False, False])
+
+        rapid_nodes, rapid_amounts = rapid_outflow(node, seconds, amount, incoming, window=50)
+
+        assert rapid_nodes.tolist() == [0]
+        assert rapid_amounts.tolist() == [2.0]
+
+
+@pytest.mark.django_db
+def test_detect_mule_accounts_alerts_once_per_activity():
+    from core.tasks import detect_mule_accounts
+
+    def account(name):
+        user = User.objects.create_user(username=name, email=f"{name}@test.com")
+        return Account.objects.create(user=user, account_number=f"ACC-{name}", balance=Decimal("10000.00"))
+
+    mule = account("mule")
+    senders = [account(f"victim{i}") for i in range(6)]
+    cash_out = account("cashout")
+
+    def transfer(source, target, amount):
+        return Transaction.objects.create(
+            from_account=source, to_account=target, amount=Decimal(amount), transaction_type="transfer"
+        )
+
+    for sender in senders:
+        transfer(sender, mule, "400.00")
+    last = transfer(mule, cash_out, "2400.00")
+
+    result = detect_mule_accounts()
+
+    assert result == {"transfers_analyzed": 7, "suspicious_accounts": 1, "alerts_created": 1}
+    alert = FraudAlert.objects.get(detector=f"mule_graph:{mule.id}")
+    assert alert.user == mule.user
+    assert alert.transaction == last
+    assert alert.severity == "high"
+    assert "ACC-mule" in alert.message
+
+    # Re-running without new activity does not duplicate the alert
+    detect_mule_accounts()
+    assert FraudAlert.objects.filter(detector__startswith="mule_graph:").count() == 1
+
+
+@pytest.mark.django_db
+def test_dashboard_stats_counts_each_mule_account_once(api_client, staff_user):
+    def mule(name, alerts):
+        user = User.objects.create_user(username=name, email=f"{name}@test.com")
+        for i in range(alerts):
+            FraudAlert.objects.create(user=user, message=f"alert {i}", detector=f"mule_graph:{user.id}")
+
+    mule("mule1", alerts=2)
+    mule("mule2", alerts=1)
+    api_client.force_authenticate(user=staff_user)
+
+    response = api_client.get("/api/fraud-alerts/dashboard-stats/")
+
+    assert response.status_code == 200
+    assert response.data["mule_accounts"] == 2
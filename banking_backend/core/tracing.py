@@ -0,0 +1,528 @@
+"""Distributed tracing for requests, services, SQL, cache, outbound HTTP, consumers and Celery tasks.
+
+This is a small OpenTelemetry-compatible tracer. Spans are named and attributed
+the way OTel does it, trace context uses the W3C ``traceparent`` header, and
+spans are exported as OTLP/JSON. Any OTel collector (or Jaeger/Tempo behind
+one) can therefore ingest them:
+
+* ``TRACING_EXPORTER = "otlp"`` posts batches to ``TRACING_OTLP_ENDPOINT``
+  (e.g. ``http://localhost:4318/v1/traces``);
+* ``TRACING_EXPORTER = "file"`` appends one OTLP span per line to
+  ``TRACING_FILE_PATH``.
+
+Root spans are opened by ``TracingMiddleware`` (HTTP), by the Celery
+``task_prerun`` signal and by Channels consumer dispatch. Whether a trace is
+recorded is decided once, at the root: a ``TRACING_SAMPLE_RATE`` fraction of
+trace ids, or whatever an incoming ``traceparent`` says. Everything below a
+root inherits that decision, so an unsampled request costs one context-variable
+lookup per instrumented call.
+
+``install()`` (called from ``CoreConfig.ready`` when ``TRACING_ENABLED``)
+hooks the configured cache backends, ``requests`` and ``httpx`` clients,
+``AsyncConsumer.dispatch`` and the Celery publish/run signals. Service methods
+opt in with ``@traced()``. SQL statements are recorded without their
+parameters and URLs without their query string, because both can carry
+customer data.
+"""
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = getattr(settings, "TRACING_ENABLED", False)
+TRACING_SAMPLE_RATE = getattr(settings, "TRACING_SAMPLE_RATE", 0.05)
+TRACING_SERVICE_NAME = getattr(settings, "TRACING_SERVICE_NAME", "coastal-banking")
+TRACING_EXPORTER = getattr(settings, "TRACING_EXPORTER", "file")  # "file" | "otlp"
+TRACING_FILE_PATH = getattr(settings, "TRACING_FILE_PATH", os.path.join(settings.BASE_DIR, "logs", "traces.jsonl"))
+TRACING_OTLP_ENDPOINT = getattr(settings, "TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACING_EXPORT_INTERVAL_SECONDS = getattr(settings, "TRACING_EXPORT_INTERVAL_SECONDS", 5)
+# Finished spans waiting for export; the oldest are dropped beyond this so a dead collector cannot exhaust memory.
+TRACING_MAX_QUEUE_SIZE = getattr(settings, "TRACING_MAX_QUEUE_SIZE", 20_000)
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_SAMPLED_FLAG = 0x01
+
+# OTLP SpanKind / StatusCode enum values
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+STATUS_CODES = {"unset": 0, "ok": 1, "error": 2}
+
+CACHE_METHODS = ("get", "set", "add", "delete", "get_many", "set_many", "delete_many", "incr", "decr", "touch")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_random = random.SystemRandom()
+
+
+class SpanContext:
+    """Identity of a span and the trace's sampling decision, as carried in ``traceparent``."""
+
+    __slots__ = ("sampled", "span_id", "trace_id")
+    recording = False
+
+    def __init__(self, trace_id, span_id, sampled):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{_SAMPLED_FLAG if self.sampled else 0:02x}"
+
+    # No-op recording API, so callers never need to check whether a trace is sampled.
+    def set_attribute(self, key, value):
+        pass
+
+    def set_status(self, status, description=""):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+
+class Span(SpanContext):
+    """A recorded operation. Ended (and queued for export) when its ``start_span`` block exits."""
+
+    __slots__ = ("attributes", "end_ns", "kind", "name", "parent_span_id", "start_ns", "status", "status_message")
+    recording = True
+
+    def __init__(self, name, trace_id, parent_span_id, kind="internal", attributes=None):
+        super().__init__(trace_id, _new_span_id(), True)
+        self.name = name
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = "unset"
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_status(self, status, description=""):
+        self.status = status
+        self.status_message = description
+
+    def record_exception(self, exc):
+        self.set_status("error", f"{type(exc).__name__}: {exc}"[:500])
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            span_processor.on_end(self)
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KINDS[self.kind],
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": STATUS_CODES[self.status], "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _new_trace_id():
+    return f"{_random.getrandbits(128):032x}"
+
+
+def _new_span_id():
+    return f"{_random.getrandbits(64):016x}"
+
+
+def should_sample(trace_id):
+    """Trace-id ratio sampling: deterministic per trace, so every service makes the same decision."""
+    return int(trace_id[16:], 16) < TRACING_SAMPLE_RATE * (1 << 64)
+
+
+def current_span():
+    """The active span or propagated span context, or None outside any trace."""
+    return _current_span.get()
+
+
+def is_recording():
+    span = _current_span.get()
+    return span is not None and span.recording
+
+
+def inject(carrier):
+    """Write the active trace context into a header mapping."""
+    span = _current_span.get()
+    if span is not None:
+        carrier[TRACEPARENT] = span.traceparent()
+    return carrier
+
+
+def extract(traceparent):
+    """Parse a ``traceparent`` header value into a remote ``SpanContext``; None if absent or malformed."""
+    match = _TRACEPARENT_RE.match((traceparent or "").strip().lower())
+    if not match or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    return SpanContext(match.group(1), match.group(2), bool(int(match.group(3), 16) & _SAMPLED_FLAG))
+
+
+@contextmanager
+def start_span(name, kind="internal", attributes=None, parent=None):
+    """Open a span as the current span for the block.
+
+    ``parent`` defaults to the current span. Without any parent this starts a
+    new trace, subject to ``TRACING_ENABLED`` and the sampler. Unsampled
+    traces yield a ``SpanContext``: it propagates, but records nothing.
+    """
+    parent = parent or _current_span.get()
+    if parent is None:
+        if not TRACING_ENABLED:
+            yield SpanContext("0" * 32, "0" * 16, False)
+            return
+        trace_id = _new_trace_id()
+        sampled = should_sample(trace_id)
+        parent_span_id = None
+    else:
+        trace_id, sampled, parent_span_id = parent.trace_id, parent.sampled, parent.span_id
+
+    span = Span(name, trace_id, parent_span_id, kind, attributes) if sampled else SpanContext(trace_id, _new_span_id(), False)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        if span.recording:
+            span.end()
+
+
+def traced(name=None, kind="internal"):
+    """Decorator recording a span for every call made inside a sampled trace (sync or async)."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not is_recording():
+                    return await func(*args, **kwargs)
+                with start_span(span_name, kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_recording():
+                return func(*args, **kwargs)
+            with start_span(span_name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON span per line."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            for span in spans:
+                handle.write(json.dumps(span.to_otlp(), separators=(",", ":")) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    """Posts batches to an OpenTelemetry collector's OTLP/HTTP JSON endpoint."""
+
+    def __init__(self, endpoint, service_name, timeout=5):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans):
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": [span.to_otlp() for span in spans]}],
+                }
+            ]
+        }
+
+    def export(self, spans):
+        import requests
+
+        response = requests.post(self.endpoint, json=self.payload(spans), timeout=self.timeout)
+        response.raise_for_status()
+
+
+def build_exporter():
+    if TRACING_EXPORTER == "otlp":
+        return OTLPHttpSpanExporter(TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME)
+    return FileSpanExporter(TRACING_FILE_PATH)
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them from a daemon thread, off the request path."""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+        self._queue = deque(maxlen=TRACING_MAX_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+
+    def on_end(self, span):
+        self._queue.append(span)
+        if self._thread is None or self._pid != os.getpid():
+            with self._lock:
+                self._ensure_thread()
+
+    def flush(self):
+        """Export everything queued so far; returns the number of spans exported."""
+        spans = []
+        while self._queue:
+            try:
+                spans.append(self._queue.popleft())
+            except IndexError:
+                break
+        if spans:
+            if self.exporter is None:
+                self.exporter = build_exporter()
+            self.exporter.export(spans)
+        return len(spans)
+
+    def _ensure_thread(self):
+        # Restart after fork (gunicorn/Celery prefork children inherit no running threads).
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(TRACING_EXPORT_INTERVAL_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Failed to export trace spans: {e}")
+
+    def shutdown(self, timeout=5):
+        """Export whatever is still queued, then stop the background thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._wakeup.set()
+        thread.join(timeout)
+
+
+span_processor = BatchSpanProcessor()
+atexit.register(span_processor.shutdown)
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+
+def db_execute_wrapper(vendor):
+    """Database execute wrapper recording one client span per statement (SQL text only)."""
+
+    def wrapper(execute, sql, params, many, context):
+        if not is_recording():
+            return execute(sql, params, many, context)
+        attributes = {"db.system": vendor, "db.statement": sql[:2000]}
+        with start_span(f"db {sql.split(None, 1)[0].upper() if sql else 'query'}", "client", attributes):
+            return execute(sql, params, many, context)
+
+    return wrapper
+
+
+@contextmanager
+def trace_db_queries(connections):
+    """Record SQL spans on every connection for the duration of the block."""
+    with ExitStack() as stack:
+        for alias in connections:
+            connection = connections[alias]
+            stack.enter_context(connection.execute_wrapper(db_execute_wrapper(connection.vendor)))
+        yield
+
+
+def _strip_query(url):
+    return str(url).split("?", 1)[0]
+
+
+def _wrap_method(owner, method_name, make_wrapper):
+    original = getattr(owner, method_name, None)
+    if original is None or getattr(original, "__traced__", False):
+        return
+    wrapper = functools.wraps(original)(make_wrapper(original))
+    wrapper.__traced__ = True
+    setattr(owner, method_name, wrapper)
+
+
+def _cache_wrapper(original, method_name):
+    def wrapper(self, *args, **kwargs):
+        if not is_recording():
+            return original(self, *args, **kwargs)
+        with start_span(f"cache {method_name}", "client", {"cache.backend": type(self).__name__}) as span:
+            result = original(self, *args, **kwargs)
+            if method_name == "get":
+                span.set_attribute("cache.hit", result is not None)
+            return result
+
+    return wrapper
+
+
+def instrument_caches():
+    from django.utils.module_loading import import_string
+
+    for config in settings.CACHES.values():
+        backend = import_string(config["BACKEND"])
+        for method_name in CACHE_METHODS:
+            _wrap_method(backend, method_name, lambda original, name=method_name: _cache_wrapper(original, name))
+
+
+def _http_wrapper(original):
+    def wrapper(self, request, *args, **kwargs):
+        if not is_recording():
+            return original(self, request, *args, **kwargs)
+        attributes = {"http.method": request.method, "http.url": _strip_query(request.url)}
+        with start_span(f"HTTP {request.method}", "client", attributes) as span:
+            inject(request.headers)
+            response = original(self, request, *args, **kwargs)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                span.set_status("error", f"HTTP {response.status_code}")
+            return response
+
+    return wrapper
+
+
+def instrument_http_clients():
+    import requests
+
+    _wrap_method(requests.Session, "send", _http_wrapper)
+    try:
+        import httpx
+    except ImportError:
+        return
+    _wrap_method(httpx.Client, "send", _http_wrapper)
+
+
+def _dispatch_wrapper(original):
+    async def wrapper(self, message):
+        with start_span(f"{type(self).__name__} {message.get('type', 'message')}", "consumer") as span:
+            if span.recording:
+                span.set_attribute("messaging.system", "channels")
+                user = self.scope.get("user") if hasattr(self, "scope") else None
+                if getattr(user, "pk", None) is not None:
+                    span.set_attribute("enduser.id", str(user.pk))
+            return await original(self, message)
+
+    return wrapper
+
+
+def instrument_consumers():
+    from channels.consumer import AsyncConsumer
+
+    _wrap_method(AsyncConsumer, "dispatch", _dispatch_wrapper)
+
+
+_task_spans = {}
+
+
+def _inject_task_headers(headers=None, **kwargs):
+    if headers is not None and TRACEPARENT not in headers:
+        inject(headers)
+
+
+def _start_task_span(task_id=None, task=None, **kwargs):
+    parent = extract(getattr(task.request, TRACEPARENT, None)) if task is not None else None
+    span_cm = start_span(task.name if task is not None else "celery.task", "consumer", parent=parent)
+    span = span_cm.__enter__()
+    span.set_attribute("celery.task_id", task_id or "")
+    _task_spans[task_id] = (span_cm, span)
+
+
+def _end_task_span(task_id=None, state=None, **kwargs):
+    entry = _task_spans.pop(task_id, None)
+    if entry is None:
+        return
+    span_cm, span = entry
+    span.set_attribute("celery.state", state or "")
+    span_cm.__exit__(None, None, None)
+
+
+def _fail_task_span(task_id=None, exception=None, **kwargs):
+    entry = _task_spans.get(task_id)
+    if entry is not None and exception is not None:
+        entry[1].record_exception(exception)
+
+
+def instrument_celery():
+    from celery import signals
+
+    signals.before_task_publish.connect(_inject_task_headers, weak=False, dispatch_uid="tracing_publish")
+    signals.task_prerun.connect(_start_task_span, weak=False, dispatch_uid="tracing_prerun")
+    signals.task_failure.connect(_fail_task_span, weak=False, dispatch_uid="tracing_failure")
+    signals.task_postrun.connect(_end_task_span, weak=False, dispatch_uid="tracing_postrun")
+
+
+_installed = False
+
+
+def install():
+    """Hook caches, HTTP clients, consumers and Celery. Idempotent; hooks are inert outside a sampled trace."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    instrument_caches()
+    instrument_http_clients()
+    instrument_consumers()
+    instrument_celery()
+    logger.info(f"Tracing enabled: exporter={TRACING_EXPORTER}, sample rate={TRACING_SAMPLE_RATE}")
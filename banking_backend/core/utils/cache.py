@@ -1,9 +1,18 @@
+import json
 import logging
+import os
+import pickle
+import threading
 import time
+import uuid
+from collections import OrderedDict
+
 from django.core.cache.backends.base import BaseCache
 from django.core.cache.backends.redis import RedisCache
 from django.core.cache.backends.locmem import LocMemCache
 
+from prometheus_client import Counter
+
 logger = logging.getLogger(__name__)
 
 class FallbackRedisCache(BaseCache):
@@ -97,3 +106,304 @@ class FallbackRedisCache(BaseCache):
 
     def has_key(self, key, version=None):
         return self._call_safe("has_key", key, version=version)
+
+
+# Options consumed by TieredRedisCache; everything else in OPTIONS goes to the Redis client.
+L1_OPTION_DEFAULTS = {
+    "L1_NAMESPACES": (),
+    "L1_MAX_ENTRIES": 2000,
+    "L1_TIMEOUT": 5,
+    "L1_CHANNEL": "cache:l1-invalidate",
+}
+L1_RECONNECT_SECONDS = 5
+
+CACHE_TIER_READS = Counter(
+    "django_cache_tier_reads",
+    "Cache key lookups by tier (l1 in-process, l2 Redis or its fallback) and outcome.",
+    ["tier", "result"],
+)
+
+_MISSING = object()
+_FLUSH = "*"
+
+
+class LocalTier:
+    """
+    The in-process L1 tier: a bounded LRU of pickled values with a per-entry expiry.
+
+    Django builds one cache instance per thread, so the tier is shared process-wide
+    (see ``_local_tiers``). It only serves reads while subscribed to the invalidation
+    channel; while unsubscribed it is empty and every read goes to Redis.
+    """
+
+    def __init__(self, max_entries, timeout, channel):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.channel = channel
+        self.node_id = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        self._live = False
+        self._pid = None
+        self._reads = {(tier, result): 0 for tier in ("l1", "l2") for result in ("hit", "miss")}
+
+    @property
+    def live(self):
+        return self._live
+
+    @property
+    def epoch(self):
+        """Bumped by every invalidation; a fill is dropped if it moved while the value was fetched."""
+        return self._epoch
+
+    def record(self, tier, hit, count=1):
+        result = "hit" if hit else "miss"
+        with self._lock:
+            self._reads[(tier, result)] += count
+        CACHE_TIER_READS.labels(tier=tier, result=result).inc(count)
+
+    def stats(self):
+        """Per-tier hit and miss counts and hit ratio for this process."""
+        with self._lock:
+            reads = dict(self._reads)
+        stats = {"l1_entries": len(self._data)}
+        for tier in ("l1", "l2"):
+            hits, misses = reads[(tier, "hit")], reads[(tier, "miss")]
+            stats[tier] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            }
+        return stats
+
+    def lookup(self, key):
+        with self._lock:
+            if not self._live:
+                return _MISSING
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+        self.record("l1", entry is not None)
+        return _MISSING if entry is None else pickle.loads(entry[1])
+
+    def fill(self, key, value, epoch):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if not self._live or epoch != self._epoch:
+                return
+            self._data[key] = (time.monotonic() + self.timeout, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            self._epoch += 1
+            if keys == _FLUSH:
+                self._data.clear()
+                return
+            for key in keys:
+                self._data.pop(key, None)
+
+    def handle(self, data):
+        """Apply an invalidation message published by another process."""
+        message = json.loads(data)
+        if message["node"] != self.node_id:
+            self.invalidate(message["keys"])
+
+    def message(self, keys):
+        return json.dumps({"node": self.node_id, "keys": keys})
+
+    def ensure_listener(self, get_client):
+        """Start the invalidation subscriber once per process (again in a forked child)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self.node_id = uuid.uuid4().hex
+            self._live = False
+            self._data.clear()
+        threading.Thread(
+            target=self._listen, args=(get_client, pid), name="cache-l1-invalidation", daemon=True
+        ).start()
+
+    def _set_live(self, live):
+        with self._lock:
+            self._epoch += 1
+            self._data.clear()
+            self._live = live
+
+    def _listen(self, get_client, pid):
+        while self._pid == pid:
+            pubsub = None
+            try:
+                pubsub = get_client().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._set_live(True)
+                while self._pid == pid:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.handle(message["data"])
+            except Exception as e:
+                if self._live:
+                    logger.warning(f"L1 CACHE: invalidation channel lost, serving from Redis only. Error: {e}")
+                self._set_live(False)
+                time.sleep(L1_RECONNECT_SECONDS)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+
+_local_tiers = {}
+_local_tiers_lock = threading.Lock()
+
+
+def _local_tier(server, max_entries, timeout, channel):
+    name = (str(server), channel)
+    with _local_tiers_lock:
+        if name not in _local_tiers:
+            _local_tiers[name] = LocalTier(max_entries, timeout, channel)
+        return _local_tiers[name]
+
+
+class TieredRedisCache(FallbackRedisCache):
+    """
+    FallbackRedisCache with an in-process L1 tier for hot, read-mostly keys.
+
+    Only keys starting with one of ``OPTIONS["L1_NAMESPACES"]`` use L1; the rest
+    behave exactly like FallbackRedisCache. L1 holds at most ``L1_MAX_ENTRIES``
+    values for ``L1_TIMEOUT`` seconds (least recently used evicted first). Every
+    write to an L1 key is published on the ``L1_CHANNEL`` pub/sub channel and
+    evicts that key from L1 in every process. A missed message is therefore stale
+    for at most ``L1_TIMEOUT`` seconds.
+
+    While Redis is down (or the subscription is lost) L1 is emptied and bypassed,
+    so reads fall through to the LocMemCache fallback as before.
+    """
+
+    def __init__(self, server, params):
+        options = dict(params.get("OPTIONS", {}))
+        l1 = {name: options.pop(name, default) for name, default in L1_OPTION_DEFAULTS.items()}
+        super().__init__(server, {**params, "OPTIONS": options})
+        self._l1_namespaces = tuple(l1["L1_NAMESPACES"])
+        self._l1 = _local_tier(server, l1["L1_MAX_ENTRIES"], l1["L1_TIMEOUT"], l1["L1_CHANNEL"])
+
+    def _redis_client(self):
+        return self._redis_cache._cache.get_client(write=True)
+
+    def _uses_l1(self, key):
+        if not self._l1_namespaces or not key.startswith(self._l1_namespaces):
+            return False
+        self._l1.ensure_listener(self._redis_client)
+        return not self._fallback_active
+
+    def _invalidate(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys if self._uses_l1(key)]
+        if keys:
+            self._broadcast(keys)
+
+    def _broadcast(self, keys):
+        self._l1.invalidate(keys)
+        try:
+            self._redis_client().publish(self._l1.channel, self._l1.message(keys))
+        except Exception as e:
+            logger.warning(f"L1 CACHE: invalidation broadcast failed, other processes may serve stale data. Error: {e}")
+
+    def tier_stats(self):
+        stats = self._l1.stats()
+        stats["l1_live"] = self._l1.live and not self._fallback_active
+        return stats
+
+    def get(self, key, default=None, version=None):
+        if not self._uses_l1(key):
+            value = super().get(key, _MISSING, version=version)
+            self._l1.record("l2", value is not _MISSING)
+            return default if value is _MISSING else value
+
+        made_key = self.make_and_validate_key(key, version=version)
+        value = self._l1.lookup(made_key)
+        if value is not _MISSING:
+            return value
+        epoch = self._l1.epoch
+        value = super().get(key, _MISSING, version=version)
+        self._l1.record("l2", value is not _MISSING)
+        if value is _MISSING:
+            return default
+        if not self._fallback_active:
+            self._l1.fill(made_key, value, epoch)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote = []
+        for key in keys:
+            value = _MISSING
+            if self._uses_l1(key):
+                value = self._l1.lookup(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                found[key] = value
+        if not remote:
+            return found
+
+        epoch = self._l1.epoch
+        fetched = super().get_many(remote, version=version)
+        self._l1.record("l2", True, len(fetched))
+        self._l1.record("l2", False, len(remote) - len(fetched))
+        for key, value in fetched.items():
+            if self._uses_l1(key):
+                self._l1.fill(self.make_and_validate_key(key, version=version), value, epoch)
+        return {**fetched, **found}
+
+    def add(self, key, value, timeout=None, version=None):
+        added = super().add(key, value, timeout=timeout, version=version)
+        if added:
+            self._invalidate([key], version)
+        return added
+
+    def set(self, key, value, timeout=None, version=None):
+        result = super().set(key, value, timeout=timeout, version=version)
+        self._invalidate([key], version)
+        return result
+
+    def delete(self, key, version=None):
+        result = super().delete(key, version=version)
+        self._invalidate([key], version)
+        return result
+
+    def set_many(self, data, timeout=None, version=None):
+        result = super().set_many(data, timeout=timeout, version=version)
+        self._invalidate(list(data), version)
+        return result
+
+    def delete_many(self, keys, version=None):
+        result = super().delete_many(keys, version=version)
+        self._invalidate(list(keys), version)
+        return result
+
+    def incr(self, key, delta=1, version=None):
+        result = super().incr(key, delta=delta, version=version)
+        self._invalidate([key], version)
+        return result
+
+    def decr(self, key, delta=1, version=None):
+        result = super().decr(key, delta=delta, version=version)
+        self._invalidate([key], version)
+        return result
+
+    def clear(self):
+        result = super().clear()
+        if self._l1_namespaces:
+            self._broadcast(_FLUSH)
+        return result
@@ -1,55 +1,366 @@
-"""Encryption key rotation utility for Coastal Banking.
+"""Parallel, resumable re-encryption of PII fields.
 
-This script allows administrators to rotate the FIELD_ENCRYPTION_KEY by
-re-encrypting all sensitive fields in the database with a new key.
+A ``KeyRotation`` walks each model in primary-key order, a chunk of rows at a
+time. Worker processes decrypt and re-encrypt the chunks while the main
+process writes the previous one back with batched ``UPDATE`` statements.
+After every committed chunk, the last primary key is saved to a JSON
+checkpoint, so a crashed run resumes where it stopped.
+
+Two kinds of encrypted columns are handled:
+
+* versioned fields are read with the row's ``key_version``. They are
+  re-encrypted under the target key, and ``key_version`` is bumped;
+* every other ``*_encrypted`` column is always read with the primary key.
+  Only its legacy Fernet ciphertexts (``gAAAAA``) are rewritten as AES-GCM,
+  under the same key.
+
+A row that changed between being read and written back is left alone. The
+next run picks it up. ``LoadThrottle`` slows the walk while the database is
+busy.
 """
 
+import json
 import logging
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
 
-from django.db import transaction
+from django.apps import apps
+from django.db import connection, transaction
+from django.db.models import Count, Q
 
-from cryptography.fernet import Fernet
-
-from core.models.accounts import AccountOpeningRequest
-from users.models import User
+from core.utils.field_encryption import decrypt_field, encrypt_field
 
 logger = logging.getLogger(__name__)
 
+LEGACY_PREFIX = "gAAAAA"
+
+# Fields whose model properties decrypt and encrypt with ``version=self.key_version``
+VERSIONED_FIELDS = {
+    "users.User": (
+        "first_name_encrypted", "last_name_encrypted", "staff_id_encrypted", "profile_photo_encrypted",
+        "date_of_birth_encrypted", "digital_address_encrypted", "occupation_encrypted", "work_address_encrypted",
+        "position_encrypted", "next_of_kin_encrypted", "bank_name_encrypted", "bank_account_number_encrypted",
+        "bank_branch_encrypted",
+    ),
+    "core.AccountOpeningRequest": (
+        "first_name_encrypted", "last_name_encrypted", "date_of_birth_encrypted", "address_encrypted",
+        "occupation_encrypted", "work_address_encrypted", "position_encrypted", "digital_address_encrypted_val",
+        "location_encrypted", "next_of_kin_encrypted", "photo_encrypted", "id_number_encrypted",
+        "phone_number_encrypted",
+    ),
+    "core.AccountClosureRequest": ("phone_number_encrypted",),
+    "core.Loan": (
+        "date_of_birth_encrypted", "id_number_encrypted", "digital_address_encrypted",
+        "next_of_kin_1_name_encrypted", "next_of_kin_1_phone_encrypted", "next_of_kin_1_address_encrypted",
+        "next_of_kin_2_name_encrypted", "next_of_kin_2_phone_encrypted", "next_of_kin_2_address_encrypted",
+        "guarantor_1_name_encrypted", "guarantor_1_id_number_encrypted", "guarantor_1_phone_encrypted",
+        "guarantor_1_address_encrypted", "guarantor_2_name_encrypted", "guarantor_2_id_number_encrypted",
+        "guarantor_2_phone_encrypted", "guarantor_2_address_encrypted",
+    ),
+}  # fmt: skip
+
+SKIPPED_APPS = ("admin", "contenttypes", "sessions", "migrations")
+
+
+@dataclass
+class RotationTarget:
+    """The encrypted columns of one model."""
+
+    model: type
+    versioned: tuple
+    unversioned: tuple
+
+    @property
+    def label(self):
+        return self.model._meta.label
+
+    @property
+    def columns(self):
+        return self.versioned + self.unversioned
+
+    def legacy(self):
+        q = Q()
+        for name in self.columns:
+            q |= Q(**{f"{name}__startswith": LEGACY_PREFIX})
+        return q
+
+    def pending(self, target_version):
+        """Rows still on a legacy ciphertext or, for versioned models, an older key."""
+        q = self.legacy()
+        if self.versioned:
+            q |= Q(key_version__lt=target_version)
+        return q
+
+
+def rotation_targets(labels=None):
+    """Every model with encrypted columns, or only those named in ``labels`` (``app_label.Model``)."""
+    targets = []
+    for model in apps.get_models():
+        if model._meta.app_label in SKIPPED_APPS or (labels and model._meta.label not in labels):
+            continue
+        names = tuple(
+            f.name for f in model._meta.concrete_fields if f.name.endswith(("_encrypted", "_encrypted_val"))
+        )
+        if not names:
+            continue
+        versioned = VERSIONED_FIELDS.get(model._meta.label, ())
+        targets.append(RotationTarget(model, versioned, tuple(n for n in names if n not in versioned)))
+    return targets
+
+
+def reencrypt_rows(job):
+    """Re-encrypt one chunk; runs in a worker process.
+
+    ``rows`` are ``(pk, key_version, *values)`` with the versioned columns first.
+    Returns ``(updates, failed)``: ``(pk, values)`` with every column's new value,
+    and the primary keys of rows that did not decrypt.
+    """
+    rows, versioned_count, target_version = job
+    updates, failed = [], []
+    for pk, version, *values in rows:
+        try:
+            new = []
+            for index, value in enumerate(values):
+                if not value:
+                    new.append(value)
+                elif index < versioned_count:
+                    if version != target_version or value.startswith(LEGACY_PREFIX):
+                        value = encrypt_field(decrypt_field(value, version=version), version=target_version)
+                    new.append(value)
+                elif value.startswith(LEGACY_PREFIX):
+                    new.append(encrypt_field(decrypt_field(value)))
+                else:
+                    new.append(value)
+            updates.append((pk, new))
+        except ValueError:
+            failed.append(pk)
+    return updates, failed
+
+
+def _init_worker():
+    import django
+
+    if not apps.ready:
+        django.setup()
+
+
+class Checkpoint:
+    """Per-model progress in a JSON file, rewritten atomically after every chunk.
+
+    A checkpoint belongs to one target version; a file for another version is ignored.
+    """
+
+    def __init__(self, path, target_version, restart=False):
+        self.path = path
+        self.state = {"target_version": target_version, "models": {}}
+        if path and not restart and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved.get("target_version") == target_version:
+                self.state = saved
+
+    def model(self, label):
+        return self.state["models"].setdefault(label, {"last_pk": None, "rotated": 0, "skipped": 0, "failed": 0})
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+class LoadThrottle:
+    """Sleep between chunks while the database looks busy.
+
+    Load is measured as the time per row of each chunk's write, against the
+    fastest seen so far, and on PostgreSQL also as the number of other active
+    sessions. The delay doubles while the database is busy and halves once it
+    recovers.
+    """
+
+    def __init__(self, max_slowdown=3.0, max_active=None, max_delay=5.0, sleep=time.sleep):
+        self.max_slowdown = max_slowdown
+        self.max_active = max_active
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.fastest = None
+        self.delay = 0.0
+
+    def active_sessions(self):
+        if self.max_active is None or connection.vendor != "postgresql":
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE state = 'active' AND pid <> pg_backend_pid()")
+            return cursor.fetchone()[0]
+
+    def observe(self, seconds, rows):
+        per_row = seconds / max(rows, 1)
+        self.fastest = per_row if self.fastest is None else min(self.fastest, per_row)
+        busy = per_row > self.fastest * self.max_slowdown
+        if self.max_active is not None:
+            busy = busy or self.active_sessions() > self.max_active
+        if busy:
+            self.delay = min(self.max_delay, max(self.delay * 2, 0.05))
+        else:
+            self.delay = self.delay / 2 if self.delay > 0.01 else 0.0
+        if self.delay:
+            self.sleep(self.delay)
+        return self.delay
+
+
+class KeyRotation:
+    """Re-encrypt every pending row of the given models under ``target_version``."""
+
+    def __init__(
+        self,
+        target_version,
+        chunk_size=500,
+        workers=1,
+        checkpoint=None,
+        throttle=None,
+        dry_run=False,
+        progress=None,
+    ):
+        self.target_version = target_version
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.checkpoint = checkpoint or Checkpoint(None, target_version)
+        self.throttle = throttle or LoadThrottle()
+        self.dry_run = dry_run
+        self.progress = progress or (lambda label, state, remaining, rate, delay: None)
+        self.pool = None
+
+    def status(self, targets):
+        """One aggregate query per model: total rows, rows still pending, with a legacy ciphertext, on an older key."""
+        report = {}
+        for target in targets:
+            counts = {
+                "total": Count("pk"),
+                "pending": Count("pk", filter=target.pending(self.target_version)),
+                "legacy": Count("pk", filter=target.legacy()),
+            }
+            if target.versioned:
+                counts["old_key_version"] = Count("pk", filter=Q(key_version__lt=self.target_version))
+            report[target.label] = {"old_key_version": 0, **target.model.objects.aggregate(**counts)}
+        return report
+
+    def run(self, targets):
+        if self.workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        try:
+            for target in targets:
+                self.rotate(target)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+        return self.checkpoint.state["models"]
+
+    def submit(self, job):
+        if self.pool is None:
+            future = Future()
+            future.set_result(reencrypt_rows(job))
+            return future
+        return self.pool.submit(reencrypt_rows, job)
+
+    def fetch(self, target, after):
+        queryset = target.model.objects.filter(target.pending(self.target_version)).order_by("pk")
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+        if target.versioned:
+            return list(queryset.values_list("pk", "key_version", *target.columns)[: self.chunk_size])
+        return [(pk, None, *values) for pk, *values in queryset.values_list("pk", *target.columns)[: self.chunk_size]]
+
+    def rotate(self, target):
+        state = self.checkpoint.model(target.label)
+        remaining = target.model.objects.filter(target.pending(self.target_version))
+        if state["last_pk"] is not None:
+            remaining = remaining.filter(pk__gt=state["last_pk"])
+        remaining = remaining.count()
+        started, done = time.monotonic(), 0
 
-def rotate_keys(old_key: str, new_key: str):
-    """Iterate through models and re-encrypt data with the new key."""
-    old_cipher = Fernet(old_key.encode())
-    new_cipher = Fernet(new_key.encode())
+        # Keep every worker busy: read ahead while earlier chunks are re-encrypted
+        in_flight, after, exhausted = deque(), state["last_pk"], False
+        while True:
+            while not exhausted and len(in_flight) < max(self.workers, 1) * 2:
+                rows = self.fetch(target, after)
+                if not rows:
+                    exhausted = True
+                    break
+                after = rows[-1][0]
+                in_flight.append((rows, self.submit((rows, len(target.versioned), self.target_version))))
+            if not in_flight:
+                break
 
-    with transaction.atomic():
-        # 1. Rotate Users
-        users = User.objects.all()
-        logger.info(f"Rotating keys for {users.count()} users...")
-        for user in users:
-            # Re-encrypt ID Number
-            if user.id_number_encrypted:
-                decrypted = old_cipher.decrypt(user.id_number_encrypted).decode()
-                user.id_number_encrypted = new_cipher.encrypt(decrypted.encode())
+            rows, future = in_flight.popleft()
+            updates, failed = future.result()
+            for pk in failed:
+                logger.error(f"Key rotation: {target.label} pk={pk} could not be decrypted")
+            written_at = time.monotonic()
+            rotated, skipped = (len(updates), 0) if self.dry_run else self.write(target, rows, updates)
+            delay = self.throttle.observe(time.monotonic() - written_at, len(rows))
 
-            # Re-encrypt Phone
-            if user.phone_number_encrypted:
-                decrypted = old_cipher.decrypt(user.phone_number_encrypted).decode()
-                user.phone_number_encrypted = new_cipher.encrypt(decrypted.encode())
+            done += len(rows)
+            state["last_pk"] = rows[-1][0]
+            state["rotated"] += rotated
+            state["skipped"] += skipped
+            state["failed"] += len(failed)
+            if not self.dry_run:
+                self.checkpoint.save()
+            self.progress(target.label, state, remaining - done, done / max(time.monotonic() - started, 1e-9), delay)
 
-            user.save(update_fields=["id_number_encrypted", "phone_number_encrypted"])
+    def write(self, target, rows, updates):
+        """Write a re-encrypted chunk back. Returns ``(rotated, skipped)``.
 
-        # 2. Rotate Account Opening Requests
-        requests = AccountOpeningRequest.objects.all()
-        logger.info(f"Rotating keys for {requests.count()} account applications...")
-        for req in requests:
-            if req.id_number_encrypted:
-                decrypted = old_cipher.decrypt(req.id_number_encrypted).decode()
-                req.id_number_encrypted = new_cipher.encrypt(decrypted.encode())
+        Each row is a compare-and-set ``UPDATE`` of the columns that changed,
+        guarded by their old ciphertexts and key version, so a row written by
+        the application since it was read is left alone.
+        """
+        quote = connection.ops.quote_name
+        table, pk_column = quote(target.model._meta.db_table), quote(target.model._meta.pk.column)
+        columns = [quote(target.model._meta.get_field(name).column) for name in target.columns]
+        read = {row[0]: row for row in rows}
 
-            if req.phone_number_encrypted:
-                decrypted = old_cipher.decrypt(req.phone_number_encrypted).decode()
-                req.phone_number_encrypted = new_cipher.encrypt(decrypted.encode())
+        statements = defaultdict(list)
+        for pk, values in updates:
+            _, version, *old = read[pk]
+            changed = tuple(index for index, value in enumerate(values) if value != old[index])
+            if not changed and not target.versioned:
+                continue
+            params = [values[index] for index in changed]
+            guards = [old[index] for index in changed]
+            if target.versioned:
+                params.append(self.target_version)
+                guards.append(version)
+            statements[changed].append((*params, pk, *guards))
 
-            req.save(update_fields=["id_number_encrypted", "phone_number_encrypted"])
+        rotated = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            for changed, params in statements.items():
+                assignments = [f"{columns[index]} = %s" for index in changed]
+                conditions = [f"{columns[index]} = %s" for index in changed]
+                if target.versioned:
+                    assignments.append("key_version = %s")
+                    conditions.append("key_version = %s")
+                where = " AND ".join([f"{pk_column} = %s", *conditions])
+                cursor.executemany(f"UPDATE {table} SET {', '.join(assignments)} WHERE {where}", params)
+                rotated += cursor.rowcount
+        return rotated, len(updates) - rotated
 
-    logger.info("Key rotation completed successfully.")
+    def verify(self, target, sample=5):
+        """Decrypt a few rotated rows with the target key; returns the primary keys that fail."""
+        queryset = target.model.objects.exclude(target.pending(self.target_version)).order_by("-pk")
+        failures = []
+        for pk, *values in queryset.values_list("pk", *target.columns)[:sample]:
+            for index, value in enumerate(values):
+                try:
+                    decrypt_field(value, version=self.target_version if index < len(target.versioned) else None)
+                except ValueError:
+                    failures.append(pk)
+                    break
+        return failures
@@ -19,6 +19,7 @@ from rest_framework.viewsets import GenericViewSet
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.dashboard_cache import invalidate_member_dashboards
 from core.models.accounts import Account
 from core.models.operational import CashAdvance, CashDrawer, CashDrawerDenomination
 from core.models.transactions import CheckDeposit
@@ -444,6 +445,7 @@ class CheckDepositViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixi
             check.account.balance += check.amount
             check.account.save()
             check.save()
+            invalidate_member_dashboards(check.account.user_id)
             return Response({"status": "success", "message": "Check approved and amount credited"})
         except PermissionDenied as e:
             logger.warning(f"Permission denied in check approval: {e}")
@@ -19,6 +19,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from core.async_views import AsyncAPIView, gather_queries
+from core.db_router import ReplicaReadMixin
 from core.models.accounts import Account, AccountClosureRequest, AccountOpeningRequest
 from core.models.fraud import FraudAlert
 from core.models.hr import Expense
@@ -27,57 +29,54 @@ from core.models.operational import Complaint, ServiceRequest
 from core.models.reporting import SystemHealth
 from core.models.transactions import Refund, Transaction
 from core.permissions import IsManagerOrAdmin, IsStaff
+from core.services.performance_metrics import summarize_response_times
 
 logger = logging.getLogger(__name__)
 
 
-class CashFlowView(APIView):
+class CashFlowView(ReplicaReadMixin, AsyncAPIView):
     """View for retrieving cash flow metrics."""
 
     permission_classes = [IsStaff]
 
-    def get(self, request):
+    async def get(self, request):
         """Calculate and return cash flow metrics for the current month including inflows and outflows."""
         today = timezone.now()
         start_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-        try:
-            # Inflow: Deposits + Loan Repayments
-            deposits = (
-                Transaction.objects.filter(
-                    transaction_type="deposit", status="completed", timestamp__gte=start_of_month
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-
-            loan_repayments = (
+        def month_total(transaction_type):
+            return lambda: (
                 Transaction.objects.filter(
-                    transaction_type="repayment", status="completed", timestamp__gte=start_of_month
+                    transaction_type=transaction_type, status="completed", timestamp__gte=start_of_month
                 ).aggregate(total=Sum("amount"))["total"]
                 or 0
             )
 
-            # Outflow: Withdrawals + Loan Disbursements + Expenses
-            withdrawals = (
-                Transaction.objects.filter(
-                    transaction_type="withdrawal", status="completed", timestamp__gte=start_of_month
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-
-            loan_disbursements = (
-                Loan.objects.filter(status="active", created_at__gte=start_of_month).aggregate(total=Sum("amount"))[
-                    "total"
-                ]
-                or 0
-            )
-
-            operational_expenses = (
-                Expense.objects.filter(date__gte=start_of_month.date(), status__in=["paid", "pending"]).aggregate(
-                    total=Sum("amount")
-                )["total"]
-                or 0
+        try:
+            totals = await gather_queries(
+                {
+                    # Inflow: Deposits + Loan Repayments
+                    "deposits": month_total("deposit"),
+                    "loan_repayments": month_total("repayment"),
+                    # Outflow: Withdrawals + Loan Disbursements + Expenses
+                    "withdrawals": month_total("withdrawal"),
+                    "loan_disbursements": lambda: (
+                        Loan.objects.filter(status="active", created_at__gte=start_of_month).aggregate(
+                            total=Sum("amount")
+                        )["total"]
+                        or 0
+                    ),
+                    "operational_expenses": lambda: (
+                        Expense.objects.filter(
+                            date__gte=start_of_month.date(), status__in=["paid", "pending"]
+                        ).aggregate(total=Sum("amount"))["total"]
+                        or 0
+                    ),
+                }
             )
+            deposits, loan_repayments = totals["deposits"], totals["loan_repayments"]
+            withdrawals = totals["withdrawals"]
+            loan_disbursements, operational_expenses = totals["loan_disbursements"], totals["operational_expenses"]
 
             total_inflow = deposits + loan_repayments
             total_outflow = withdrawals + loan_disbursements + operational_expenses
@@ -104,7 +103,7 @@ class CashFlowView(APIView):
             )
 
 
-class ExpensesView(APIView):
+class ExpensesView(ReplicaReadMixin, APIView):
     """View for retrieving and creating operational expense metrics."""
 
     permission_classes = [IsStaff]
@@ -183,7 +182,7 @@ class WorkflowStatusView(APIView):
 
 
 @method_decorator(cache_page(60 * 5), name="get")
-class BranchActivityView(APIView):
+class BranchActivityView(ReplicaReadMixin, APIView):
     """View to return branch activity metrics from real transaction data."""
 
     permission_classes = [IsStaff]
@@ -261,7 +260,7 @@ class SystemAlertsView(APIView):
 
 
 @method_decorator(cache_page(60 * 5), name="get")
-class OperationsMetricsView(APIView):
+class OperationsMetricsView(ReplicaReadMixin, APIView):
     """View for operations metrics used by ManagerDashboard."""
 
     permission_classes = [IsAuthenticated]
@@ -515,7 +514,7 @@ class OperationsMetricsView(APIView):
             )
 
 
-class AuditDashboardView(APIView):
+class AuditDashboardView(ReplicaReadMixin, APIView):
     """Stub view for audit dashboard."""
 
     permission_classes = [IsStaff]  # SECURITY: Restrict to staff only
@@ -535,12 +534,12 @@ class AuditDashboardView(APIView):
 
 
 @method_decorator(cache_page(60 * 1), name="get")
-class PerformanceDashboardView(APIView):
+class PerformanceDashboardView(ReplicaReadMixin, AsyncAPIView):
     """View for performance dashboard data (consolidated nested structure)."""
 
     permission_classes = [IsStaff]
 
-    def get(self, request):
+    async def get(self, request):
         """Return system-level performance health and resource utilization metrics in a consolidated format."""
         from django.db.models import Avg, Count, Sum
         from django.db.models.functions import TruncHour
@@ -551,40 +550,66 @@ class PerformanceDashboardView(APIView):
         day_ago = now - datetime.timedelta(hours=24)
         week_ago = now - datetime.timedelta(days=7)
 
-        # 1. Latest Health Data
-        latest_health = SystemHealth.objects.order_by("-checked_at").first()
-        status_val = latest_health.status if latest_health else "healthy"  # Default to healthy if no checks yet
+        def response_time_summary():
+            # Request latency percentiles in last 24h, aggregated from the per-minute PerformanceMetric rows
+            latency = summarize_response_times(day_ago)
+            if latency:
+                return latency, latency["mean"]
+            # No request latency recorded yet: fall back to health-check response times
+            performance_stats = SystemHealth.objects.filter(checked_at__gte=day_ago, status="healthy").aggregate(
+                avg_resp=Avg("response_time_ms")
+            )
+            return None, performance_stats["avg_resp"] or 125
 
-        # 2. Performance Summary Calculation - Optimized with DB Aggregation
-        # Avg response time in last 24h
-        performance_stats = SystemHealth.objects.filter(checked_at__gte=day_ago, status="healthy").aggregate(
-            avg_resp=Avg("response_time_ms")
+        def recent_throughput():
+            # Throughput (req/sec) from recorded requests in last 15 mins; transactions as a proxy otherwise
+            recent_latency = summarize_response_times(fifteen_mins_ago)
+            if recent_latency:
+                return round(recent_latency["requests"] / (15 * 60), 4)
+            t_count_15m = Transaction.objects.filter(timestamp__gte=fifteen_mins_ago).count()
+            return round(t_count_15m / (15 * 60), 4) if t_count_15m > 0 else 0
+
+        results = await gather_queries(
+            {
+                # 1. Latest Health Data
+                "latest_health": SystemHealth.objects.order_by("-checked_at").first,
+                # 2. Performance Summary Calculation - Optimized with DB Aggregation
+                "response_times": response_time_summary,
+                "throughput": recent_throughput,
+                # Error Rate in last 24h
+                "transactions_24h": lambda: Transaction.objects.filter(timestamp__gte=day_ago).aggregate(
+                    total=Count("id"), failed=Count("id", filter=Q(status="failed"))
+                ),
+                # 3. System Health Breakdown
+                "checks_week": lambda: SystemHealth.objects.filter(checked_at__gte=week_ago).aggregate(
+                    total=Count("id"),
+                    healthy=Count("id", filter=Q(status="healthy")),
+                    warning=Count("id", filter=Q(status="warning")),
+                    critical=Count("id", filter=Q(status="critical")),
+                ),
+                # 4. Transaction Volume (Hourly)
+                "volume": lambda: list(
+                    Transaction.objects.filter(timestamp__gte=day_ago, status="completed")
+                    .annotate(period=TruncHour("timestamp"))
+                    .values("period")
+                    .annotate(volume=Sum("amount"), count=Count("id"))
+                    .order_by("period")
+                ),
+            }
         )
-        avg_resp_time = performance_stats["avg_resp"] or 125
 
-        # Throughput (req/sec proxy) based on transactions in last 15 mins
-        t_count_15m = Transaction.objects.filter(timestamp__gte=fifteen_mins_ago).count()
-        throughput = round(t_count_15m / (15 * 60), 4) if t_count_15m > 0 else 0
+        latest_health = results["latest_health"]
+        status_val = latest_health.status if latest_health else "healthy"  # Default to healthy if no checks yet
+        latency, avg_resp_time = results["response_times"]
+        throughput = results["throughput"]
 
-        # Error Rate in last 24h
-        total_t_24h = Transaction.objects.filter(timestamp__gte=day_ago).count()
-        failed_t_24h = Transaction.objects.filter(timestamp__gte=day_ago, status="failed").count()
+        total_t_24h, failed_t_24h = results["transactions_24h"]["total"], results["transactions_24h"]["failed"]
         error_rate = round((failed_t_24h / total_t_24h * 100), 1) if total_t_24h > 0 else 0.0
 
-        # 3. System Health Breakdown
-        total_checks_week = SystemHealth.objects.filter(checked_at__gte=week_ago).count()
-        healthy_checks_week = SystemHealth.objects.filter(checked_at__gte=week_ago, status="healthy").count()
-        warning_checks_week = SystemHealth.objects.filter(checked_at__gte=week_ago, status="warning").count()
-        critical_checks_week = SystemHealth.objects.filter(checked_at__gte=week_ago, status="critical").count()
-
-        # 4. Transaction Volume (Hourly)
-        volume_query = (
-            Transaction.objects.filter(timestamp__gte=day_ago, status="completed")
-            .annotate(period=TruncHour("timestamp"))
-            .values("period")
-            .annotate(volume=Sum("amount"), count=Count("id"))
-            .order_by("period")
-        )
+        checks_week = results["checks_week"]
+        total_checks_week, healthy_checks_week = checks_week["total"], checks_week["healthy"]
+        warning_checks_week, critical_checks_week = checks_week["warning"], checks_week["critical"]
+        volume_query = results["volume"]
 
         transaction_volume = []
         for item in volume_query:
@@ -678,6 +703,10 @@ class PerformanceDashboardView(APIView):
                     "metric_types": {"system": 4, "business": 4},
                     "time_range": "Last 24 Hours",
                     "average_response_time": avg_resp_time,
+                    "p50_response_time": latency["p50"] if latency else None,
+                    "p95_response_time": latency["p95"] if latency else None,
+                    "p99_response_time": latency["p99"] if latency else None,
+                    "http_error_rate": latency["error_rate"] if latency else None,
                     "error_rate": error_rate,
                     "throughput": throughput,
                 },
@@ -723,11 +752,20 @@ class PerformanceMetricsView(APIView):
                 sum(float(h.details.get("cpu_usage", 0)) for h in health_checks) / health_checks.count()
             )
 
+        latency = summarize_response_times(yesterday)
+        avg_response_time = latency["mean"] if latency else performance_stats["avg_resp"]
+
         stats = [
-            {"name": "Avg Response Time", "score": int(performance_stats["avg_resp"] or 0)},
+            {"name": "Avg Response Time", "score": int(avg_response_time or 0)},
             {"name": "Avg CPU Usage", "score": cpu_usage_avg},
             {"name": "System Stability", "score": 98},
         ]
+        if latency:
+            stats += [
+                {"name": "p50 Response Time", "score": int(latency["p50"])},
+                {"name": "p95 Response Time", "score": int(latency["p95"])},
+                {"name": "p99 Response Time", "score": int(latency["p99"])},
+            ]
 
         return Response(stats)
 
@@ -861,7 +899,7 @@ class PerformanceRecommendationsView(APIView):
         return Response(recommendations)
 
 
-class ManagerOverviewView(APIView):
+class ManagerOverviewView(ReplicaReadMixin, AsyncAPIView):
     """Dashboard overview for branch managers and operations managers.
 
     Provides key metrics for managerial oversight:
@@ -878,54 +916,55 @@ class ManagerOverviewView(APIView):
 
     permission_classes = [IsManagerOrAdmin]
 
-    def get(self, request):
+    async def get(self, request):
         """GET /api/accounts/manager/overview/
 
         Returns manager dashboard overview metrics.
         """
-        today = timezone.now().date()
+        # Staff metrics (import User model locally to avoid circular imports)
+        from users.models import User
 
-        try:
-            # Account metrics
-            total_accounts = Account.objects.filter(is_active=True).count()
-            new_accounts_today = AccountOpeningRequest.objects.filter(created_at__date=today, status="approved").count()
+        today = timezone.now().date()
 
-            # Transaction metrics for today
-            deposits_today = (
+        def today_total(transaction_type):
+            return lambda: (
                 Transaction.objects.filter(
-                    transaction_type="deposit", status="completed", timestamp__date=today
+                    transaction_type=transaction_type, status="completed", timestamp__date=today
                 ).aggregate(total=Sum("amount"))["total"]
                 or 0
             )
 
-            withdrawals_today = (
-                Transaction.objects.filter(
-                    transaction_type="withdrawal", status="completed", timestamp__date=today
-                ).aggregate(total=Sum("amount"))["total"]
-                or 0
+        try:
+            metrics = await gather_queries(
+                {
+                    # Account metrics
+                    "total_accounts": Account.objects.filter(is_active=True).count,
+                    "new_accounts_today": AccountOpeningRequest.objects.filter(
+                        created_at__date=today, status="approved"
+                    ).count,
+                    # Transaction metrics for today
+                    "deposits_today": today_total("deposit"),
+                    "withdrawals_today": today_total("withdrawal"),
+                    # Loan metrics
+                    "pending_loans": Loan.objects.filter(status="pending").count,
+                    "active_staff": User.objects.filter(
+                        is_active=True, role__in=["cashier", "mobile_banker", "manager", "operations_manager", "admin"]
+                    ).count,
+                }
             )
-
-            # Loan metrics
-            pending_loans = Loan.objects.filter(status="pending").count()
-
-            # Staff metrics (import User model locally to avoid circular imports)
-            from users.models import User
-
-            active_staff = User.objects.filter(
-                is_active=True, role__in=["cashier", "mobile_banker", "manager", "operations_manager", "admin"]
-            ).count()
+            deposits_today, withdrawals_today = metrics["deposits_today"], metrics["withdrawals_today"]
 
             return Response(
                 {
                     "success": True,
                     "data": {
-                        "total_accounts": total_accounts,
-                        "new_accounts_today": new_accounts_today,
+                        "total_accounts": metrics["total_accounts"],
+                        "new_accounts_today": metrics["new_accounts_today"],
                         "total_deposits_today": str(deposits_today),
                         "total_withdrawals_today": str(withdrawals_today),
                         "net_flow_today": str(deposits_today - withdrawals_today),
-                        "pending_loans": pending_loans,
-                        "active_staff": active_staff,
+                        "pending_loans": metrics["pending_loans"],
+                        "active_staff": metrics["active_staff"],
                         "date": str(today),
                     },
                 }
@@ -55,12 +55,19 @@ class FraudAlertViewSet(
         unresolved = FraudAlert.objects.filter(is_resolved=False).count()
         by_severity = FraudAlert.objects.values("severity").annotate(count=Count("id"))
         recent = FraudAlert.objects.filter(is_resolved=False).order_by("-created_at")[:5]
+        mule_accounts = (
+            FraudAlert.objects.filter(is_resolved=False, detector__startswith="mule_graph:")
+            .values("detector")
+            .distinct()
+            .count()
+        )
 
         return Response(
             {
                 "total": total,
                 "unresolved": unresolved,
                 "by_severity": list(by_severity),
+                "mule_accounts": mule_accounts,
                 "recent_alerts": FraudAlertSerializer(recent, many=True).data,
             }
         )
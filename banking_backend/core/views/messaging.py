@@ -79,12 +79,75 @@ class MessageThreadViewSet(ModelViewSet):
         return MessageThread.objects.filter(participants=self.request.user).distinct()
 
     def get_serializer_class(self):
+        if self.action == "list" and self.is_summary_mode():
+            from core.serializers.messaging import MessageThreadSummarySerializer
+
+            return MessageThreadSummarySerializer
+
         from core.serializers.messaging import MessageThreadSerializer
 
         return MessageThreadSerializer
 
+    def is_summary_mode(self):
+        """Return True when the client asked for the lightweight inbox listing (``?mode=summary``)."""
+        return self.request.query_params.get("mode") == "summary"
+
+    def get_summary_queryset(self):
+        """Annotate threads with message/unread counts and last-message preview data in SQL.
+
+        Each value is a correlated subquery, so listing a page of threads costs a
+        fixed number of queries regardless of how many messages each thread holds.
+        """
+        from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+        from django.db.models.functions import Coalesce
+
+        from core.models.messaging import Message
+
+        user = self.request.user
+        thread_messages = Message.objects.filter(thread=OuterRef("pk")).order_by()
+        last_message = Message.objects.filter(thread=OuterRef("pk")).order_by("-created_at", "-id")
+
+        def count_of(queryset):
+            return Coalesce(
+                Subquery(queryset.values("thread").annotate(total=Count("pk")).values("total"), output_field=IntegerField()),
+                Value(0),
+            )
+
+        return (
+            self.filter_queryset(self.get_queryset())
+            .annotate(
+                total_messages=count_of(thread_messages),
+                unread_count=count_of(thread_messages.exclude(read_by=user)),
+                last_message_encrypted_content=Subquery(last_message.values("encrypted_content")[:1]),
+                last_message_sender_id=Subquery(last_message.values("sender_id")[:1]),
+                last_message_created_at=Subquery(last_message.values("created_at")[:1]),
+            )
+            .prefetch_related("participants")
+        )
+
     def list(self, request):
-        """Return threads for the current user."""
+        """Return threads for the current user.
+
+        ``?mode=summary`` returns a paginated inbox listing without embedded
+        messages or participant details; use the ``messages`` action to load a
+        thread's messages on demand.
+        """
+        if self.is_summary_mode():
+            from django.contrib.auth import get_user_model
+
+            queryset = self.get_summary_queryset()
+            page = self.paginate_queryset(queryset)
+            threads = page if page is not None else list(queryset)
+            user_ids = {t.created_by_id for t in threads} | {t.last_message_sender_id for t in threads}
+            user_ids.discard(None)
+            # Decrypt each distinct display name once per page rather than once per thread.
+            user_names = {u.id: u.get_full_name() for u in get_user_model().objects.filter(id__in=user_ids)}
+            context = {**self.get_serializer_context(), "user_names": user_names}
+            serializer = self.get_serializer_class()(threads, many=True, context=context)
+            if page is None:
+                return Response(serializer.data)
+            return self.get_paginated_response(serializer.data)
+
         queryset = self.get_queryset()
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -95,6 +158,19 @@ class MessageThreadViewSet(ModelViewSet):
         serializer = self.get_serializer(thread)
         return Response(serializer.data)
 
+    @action(detail=True, methods=["get"])
+    def messages(self, request, pk=None):
+        """Return a thread's messages newest-first, one page at a time."""
+        from core.serializers.messaging import MessageSerializer
+
+        thread = self.get_object()
+        queryset = thread.messages.select_related("sender").prefetch_related("read_by").order_by("-created_at", "-id")
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(MessageSerializer(queryset, many=True, context=self.get_serializer_context()).data)
+        serializer = MessageSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=["post"], url_path="send-message")
     def send_message(self, request, pk=None):
         """Send a message to a thread."""
@@ -28,6 +28,7 @@ from rest_framework.viewsets import GenericViewSet
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.db_router import ReplicaReadMixin, read_from_replica
 from core.models.accounts import Account, AccountOpeningRequest
 from core.models.hr import Expense, Payslip
 from core.models.loans import Loan
@@ -148,7 +149,7 @@ class GenerateReportView(APIView):
         )
 
 
-class ReportAnalyticsView(APIView):
+class ReportAnalyticsView(ReplicaReadMixin, APIView):
     """View to provide system-wide financial analytics and report generation KPIs."""
 
     permission_classes = [IsStaff]
@@ -297,7 +298,9 @@ class ReportViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.Cre
                 try:
                     from core.xlsx_services import generate_xlsx_report
 
-                    xlsx_buffer = generate_xlsx_report()
+                    # Bank-wide aggregates: independent of the Report row created above
+                    with read_from_replica(independent=True):
+                        xlsx_buffer = generate_xlsx_report()
                     filename = f"report_{report.id}_{timezone.now().strftime('%Y%m%d%H%M')}.xlsx"
                     path = default_storage.save(
                         f"reports/{filename}", ContentFile(xlsx_buffer.getvalue())
@@ -493,7 +496,7 @@ class ReportViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.Cre
                     data.append(
                         [
                             metric.recorded_at.strftime("%Y-%m-%d %H:%M") if metric.recorded_at else "N/A",
-                            metric.get_metric_type_display(),
+                            " ".join(filter(None, [metric.get_metric_type_display(), metric.statistic])),
                             f"{metric.value:,.4f}",
                             metric.unit,
                             metric.endpoint or "—",
@@ -847,11 +850,15 @@ class GenerateStatementView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        transactions = Transaction.objects.filter(
-            models.Q(from_account=account) | models.Q(to_account=account),
-            timestamp__date__range=[start_date, end_date],
-            status="completed",
-        ).order_by("timestamp")
+        # Statement history is read from a replica when one is up to date
+        with read_from_replica():
+            transactions = list(
+                Transaction.objects.filter(
+                    models.Q(from_account=account) | models.Q(to_account=account),
+                    timestamp__date__range=[start_date, end_date],
+                    status="completed",
+                ).order_by("timestamp")
+            )
 
         statement = AccountStatement.objects.create(
             account=account,
@@ -859,12 +866,12 @@ class GenerateStatementView(APIView):
             start_date=start_date,
             end_date=end_date,
             status="pending",
-            transaction_count=transactions.count(),
+            transaction_count=len(transactions),
             opening_balance=0,
             closing_balance=account.balance,
         )
 
-        pdf_buffer = generate_statement_pdf(statement, list(transactions))
+        pdf_buffer = generate_statement_pdf(statement, transactions)
         filename = f"statement_{account_number}_{start_date}_{end_date}.pdf"
         statement.pdf_file.save(filename, ContentFile(pdf_buffer.read()))
         statement.status = "generated"
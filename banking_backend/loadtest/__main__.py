@@ -0,0 +1,139 @@
+"""Command line for the load-test suite; see ``loadtest/README.md``.
+
+    python -m loadtest seed [--members N] [--out loadtest/fixtures.json]
+    python -m loadtest fake-sendexa [--port 8765] [--latency-ms 150]
+    python -m loadtest run --base-url http://127.0.0.1:8000 [--users 50] [--duration 120] [--report PATH]
+    python -m loadtest compare old.json new.json [--threshold 10]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures.json")
+
+
+def seed(args):
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings_loadtest")
+    django.setup()
+
+    from loadtest.seed import main
+
+    return main(args)
+
+
+def run(args):
+    from loadtest.runner import environment
+    from loadtest.runner import run as run_load
+
+    with open(args.fixtures) as f:
+        fixtures = json.load(f)
+    think_time = (args.think_min, args.think_max)
+    stats, sms = asyncio.run(
+        run_load(
+            args.base_url,
+            fixtures,
+            users=args.users,
+            duration=args.duration,
+            ramp_up=args.ramp_up,
+            warmup=args.warmup,
+            think_time=think_time,
+            seed=args.seed,
+            sendexa=args.fake_sendexa,
+        )
+    )
+    config = {
+        "users": args.users,
+        "duration_s": args.duration,
+        "ramp_up_s": args.ramp_up,
+        "warmup_s": args.warmup,
+        "think_time_s": list(think_time),
+        "seed": args.seed,
+        "members": len(fixtures["members"]),
+    }
+    report = stats.report(environment(args.base_url), config)
+    if sms is not None:
+        report["sms_gateway"] = sms
+
+    print(f"{'scenario':44} {'req':>7} {'fail':>5} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, result in report["results"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:44} {result['requests']:>7} {result['failures']:>5} {result['throughput_rps']:>8.2f} "
+            f"{latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}"
+        )
+    totals = report["totals"]
+    print(f"{'total':44} {totals['requests']:>7} {totals['failures']:>5} {totals['throughput_rps']:>8.2f}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0
+
+
+def fake_gateway(args):
+    from loadtest.fake_sendexa import main
+
+    return main(args)
+
+
+def compare(args):
+    from loadtest.compare import main
+
+    return main(args)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Scenario-based load tests.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Seed the database and write the fixtures file.")
+    seed_parser.add_argument("--members", type=int, default=200)
+    seed_parser.add_argument("--transactions", type=int, default=10, help="Seeded history per account.")
+    seed_parser.add_argument("--seed", type=int, default=20240601)
+    seed_parser.add_argument("--password", default=None, help="Password for every seeded user.")
+    seed_parser.add_argument("--out", default=DEFAULT_FIXTURES)
+    seed_parser.set_defaults(handler=seed)
+
+    run_parser = commands.add_parser("run", help="Run the load test against a server.")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    run_parser.add_argument("--users", type=int, default=50, help="Concurrent virtual users.")
+    run_parser.add_argument("--duration", type=float, default=120, help="Measured seconds.")
+    run_parser.add_argument("--ramp-up", type=float, default=20, help="Seconds over which users start.")
+    run_parser.add_argument("--warmup", type=float, default=10, help="Unmeasured seconds after the ramp-up.")
+    run_parser.add_argument("--think-min", type=float, default=0.5)
+    run_parser.add_argument("--think-max", type=float, default=2.0)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument(
+        "--fake-sendexa", type=int, default=None, metavar="PORT", help="Also serve the fake SMS gateway on PORT."
+    )
+    run_parser.add_argument("--report", default=None, help="Write the JSON report to this path.")
+    run_parser.set_defaults(handler=run)
+
+    gateway_parser = commands.add_parser("fake-sendexa", help="Serve the fake Sendexa SMS API.")
+    gateway_parser.add_argument("--host", default="127.0.0.1")
+    gateway_parser.add_argument("--port", type=int, default=8765)
+    gateway_parser.add_argument("--latency-ms", type=float, default=0)
+    gateway_parser.add_argument("--failure-rate", type=float, default=0.0)
+    gateway_parser.set_defaults(handler=fake_gateway)
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports.")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 slowdown in percent.")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
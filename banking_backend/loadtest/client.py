@@ -0,0 +1,102 @@
+"""HTTP and WebSocket client for one virtual user.
+
+Logs in once through ``/api/users/auth/login/`` and keeps the access and
+refresh cookies in its cookie jar, like the web frontend. Every later request
+authenticates with the cookie JWT. State-changing requests carry the CSRF
+token that cookie authentication requires. An expired access token is
+refreshed once through ``/api/users/auth/refresh/`` and the request is retried.
+
+Requests also send the header Cloudflare adds after verifying a client
+certificate, so the staff endpoints behind the mTLS check answer as they do in
+production. When the server sets ``ORIGIN_VERIFICATION_SECRET``, export the
+same variable for the load clients.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import aiohttp
+
+CSRF_COOKIE = "csrftoken"
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+REQUEST_TIMEOUT_SECONDS = 60
+
+
+class Client:
+    """An aiohttp session that records every request into ``stats`` under a scenario name."""
+
+    def __init__(self, base_url, stats):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        headers = {"CF-Client-Cert-Verified": "SUCCESS", "User-Agent": "coastal-loadtest/1.0"}
+        if os.environ.get("ORIGIN_VERIFICATION_SECRET"):
+            headers["X-Origin-Verification-Secret"] = os.environ["ORIGIN_VERIFICATION_SECRET"]
+        self.session = aiohttp.ClientSession(
+            base_url=self.base_url,
+            headers=headers,
+            # The jar refuses cookies from IP-address hosts such as 127.0.0.1 unless unsafe.
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        )
+        self.credentials = None
+
+    async def close(self):
+        await self.session.close()
+
+    def csrf_token(self):
+        cookie = self.session.cookie_jar.filter_cookies(self.base_url).get(CSRF_COOKIE)
+        return cookie.value if cookie else None
+
+    async def login(self, email, password):
+        self.credentials = {"email": email, "password": password}
+        status, _ = await self.request("auth.login", "POST", "/api/users/auth/login/", json=self.credentials)
+        if status != 200:
+            raise RuntimeError(f"Login failed for {email}: HTTP {status}")
+        await self.request("auth.csrf", "GET", "/api/users/csrf/")
+
+    async def refresh(self):
+        status, _ = await self.request("auth.refresh", "POST", "/api/users/auth/refresh/", retry=False)
+        return status == 200
+
+    async def request(self, name, method, path, expect=(200, 201), retry=True, **kwargs):
+        """Send a request and return ``(status, body)``; ``body`` is parsed JSON, bytes, or ``None`` on error.
+
+        Statuses outside ``expect`` count as failures. The body is always read in
+        full, so downloads are timed to their last byte.
+        """
+        headers = kwargs.pop("headers", {})
+        if method in UNSAFE_METHODS and self.csrf_token():
+            headers["X-CSRFToken"] = self.csrf_token()
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, path, headers=headers, **kwargs) as response:
+                content = await response.read()
+                status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats.record(name, (time.perf_counter() - started) * 1000, type(e).__name__, ok=False)
+            return None, None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if status == 401 and retry and self.credentials and await self.refresh():
+            return await self.request(name, method, path, expect=expect, retry=False, headers=headers, **kwargs)
+        self.stats.record(name, elapsed_ms, status, ok=status in expect)
+
+        if response.content_type == "application/json":
+            try:
+                return status, json.loads(content)
+            except ValueError:
+                return status, None
+        return status, content
+
+    async def websocket(self, name, path):
+        """Open a WebSocket authenticated by the session cookies; ``None`` if the handshake fails."""
+        started = time.perf_counter()
+        try:
+            ws = await self.session.ws_connect(path, origin=self.base_url, heartbeat=30)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats.record(name, (time.perf_counter() - started) * 1000, type(e).__name__, ok=False)
+            return None
+        self.stats.record(name, (time.perf_counter() - started) * 1000, 101)
+        return ws
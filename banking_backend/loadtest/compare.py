@@ -0,0 +1,51 @@
+"""Compare two load-test reports.
+
+Usage::
+
+    python -m loadtest compare old.json new.json [--threshold 10]
+
+Prints one line per scenario with the p95 latency, throughput and error rate
+of both reports, marking a p95 more than ``--threshold`` percent slower or a
+higher error rate. Exits with status 1 when any scenario regressed. Only
+compare reports from runs with the same options and fixtures.
+"""
+
+import json
+
+
+def error_rate(result):
+    return result["failures"] / result["requests"] if result["requests"] else 0.0
+
+
+def compare(old, new, threshold=10.0):
+    """Yield ``(name, before, after, regressed)``; ``before`` or ``after`` is ``None`` if only one report has it."""
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        before, after = old["results"].get(name), new["results"].get(name)
+        if before is None or after is None:
+            yield name, before, after, False
+            continue
+        old_p95, new_p95 = before["latency_ms"]["p95"], after["latency_ms"]["p95"]
+        slower = old_p95 > 0 and (new_p95 - old_p95) / old_p95 * 100 > threshold
+        yield name, before, after, slower or error_rate(after) > error_rate(before)
+
+
+def main(args):
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    regressions = 0
+    print(f"{'scenario':44} {'p95 ms (old → new)':>24} {'req/s (old → new)':>22} {'errors %':>16}")
+    for name, before, after, regressed in compare(old, new, args.threshold):
+        if before is None or after is None:
+            print(f"{name:44} {'only in ' + ('new' if before is None else 'old'):>24}")
+            continue
+        regressions += regressed
+        marker = "  REGRESSED" if regressed else ""
+        print(
+            f"{name:44} {before['latency_ms']['p95']:>10.1f} → {after['latency_ms']['p95']:>10.1f} "
+            f"{before['throughput_rps']:>9.2f} → {after['throughput_rps']:>9.2f} "
+            f"{error_rate(before) * 100:>6.1f} → {error_rate(after) * 100:<6.1f}{marker}"
+        )
+    return 1 if regressions else 0
@@ -0,0 +1,66 @@
+"""Local stand-in for the Sendexa SMS API.
+
+Accepts ``POST /v1/messages`` like the real gateway, after an optional
+simulated latency, and counts what it received. ``GET /_stats`` returns the
+counts. The load-test settings point ``SENDEXA_API_URL`` here, so transaction
+alerts follow the production code path without leaving the machine::
+
+    python -m loadtest fake-sendexa --port 8765 --latency-ms 150
+"""
+
+import asyncio
+import itertools
+import random
+
+from aiohttp import web
+
+STATS_KEY = web.AppKey("stats", dict)
+
+
+def create_app(latency_ms=0, failure_rate=0.0, seed=0):
+    """The fake gateway; ``failure_rate`` of requests answer 503, chosen deterministically from ``seed``."""
+    rng = random.Random(seed)
+    ids = itertools.count(1)
+
+    async def send(request):
+        stats = request.app[STATS_KEY]
+        payload = await request.json()
+        if not request.headers.get("Authorization") or not payload.get("to") or not payload.get("message"):
+            stats["rejected"] += 1
+            return web.json_response({"status": "error", "message": "Invalid request"}, status=400)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if failure_rate and rng.random() < failure_rate:
+            stats["failed"] += 1
+            return web.json_response({"status": "error", "message": "Service unavailable"}, status=503)
+        stats["sent"] += 1
+        data = {"id": f"fake-{next(ids)}", "to": payload["to"]}
+        return web.json_response({"status": "success", "data": data}, status=201)
+
+    async def show_stats(request):
+        return web.json_response(request.app[STATS_KEY])
+
+    app = web.Application()
+    app[STATS_KEY] = {"sent": 0, "failed": 0, "rejected": 0}
+    app.router.add_post("/v1/messages", send)
+    app.router.add_get("/_stats", show_stats)
+    return app
+
+
+async def start(host="127.0.0.1", port=8765, **options):
+    """Start the fake gateway on the running loop; returns the ``AppRunner`` to clean up."""
+    runner = web.AppRunner(create_app(**options))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def main(args):
+    print(f"Fake Sendexa listening on http://{args.host}:{args.port}/v1/messages")
+    web.run_app(
+        create_app(latency_ms=args.latency_ms, failure_rate=args.failure_rate),
+        host=args.host,
+        port=args.port,
+        print=None,
+    )
+    return 0
@@ -0,0 +1,343 @@
+"""Weighted user personas and their flows.
+
+Each virtual user plays one persona, picked by ``Persona.weight``, with a user
+from the persona's pool in the fixtures file. It logs in once, then loops:
+it picks a task by its ``@task`` weight, runs it, and waits a think time.
+
+Money-moving flows run both below and above ``TRANSACTION_APPROVAL_THRESHOLD``.
+Amounts above it create ``pending_approval`` transactions, and the manager
+persona approves them.
+"""
+
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import aiohttp
+
+CHAT_ECHO_TIMEOUT_SECONDS = 10
+
+
+def server_date():
+    """Today on the server (``TIME_ZONE = "UTC"``); the load clients run without Django settings."""
+    return datetime.now(timezone.utc).date()
+
+
+def task(weight=1):
+    """Mark a persona method as a task, picked ``weight`` times as often as a weight-1 task."""
+
+    def decorate(fn):
+        fn.task_weight = weight
+        return fn
+
+    return decorate
+
+
+class Persona:
+    """Base class: ``pool`` names the fixtures list the persona's users come from."""
+
+    name = None
+    pool = None
+    weight = 1
+
+    def __init__(self, client, fixtures, user, rng):
+        self.client = client
+        self.fixtures = fixtures
+        self.user = user
+        self.rng = rng
+        self.threshold = Decimal(fixtures["approval_threshold"])
+
+    @classmethod
+    def tasks(cls):
+        return [
+            getattr(cls, attr) for attr in dir(cls) if getattr(getattr(cls, attr), "task_weight", None) is not None
+        ]
+
+    async def on_start(self):
+        await self.client.login(self.user["email"], self.fixtures["password"])
+
+    async def on_stop(self):
+        pass
+
+    async def run_one(self):
+        tasks = self.tasks()
+        chosen = self.rng.choices(tasks, weights=[t.task_weight for t in tasks])[0]
+        await chosen(self)
+
+    def below_threshold(self):
+        return Decimal(self.rng.randrange(1_000, int(self.threshold * 50))) / 100
+
+    def above_threshold(self):
+        return self.threshold + Decimal(self.rng.randrange(100, 200_000)) / 100
+
+    def member(self):
+        return self.rng.choice(self.fixtures["members"])
+
+    def scenario(self, suffix):
+        return f"{self.name}.{suffix}"
+
+
+class Member(Persona):
+    """A customer on the web or mobile app: dashboard, transfers, statements, chat and live notifications."""
+
+    name = "member"
+    pool = "members"
+    weight = 60
+
+    async def on_start(self):
+        await super().on_start()
+        self.transfer_sent_at = None
+        self.chat = await self.client.websocket("ws.chat.connect", f"/ws/messaging/{self.user['room_id']}/")
+        self.notifications = await self.client.websocket("ws.notifications.connect", "/ws/notifications/")
+        self.listener = asyncio.create_task(self.listen_for_notifications()) if self.notifications else None
+
+    async def on_stop(self):
+        if self.listener:
+            self.listener.cancel()
+        for ws in (self.chat, self.notifications):
+            if ws is not None:
+                await ws.close()
+
+    async def listen_for_notifications(self):
+        """Time the first notification after a completed transfer from the transfer request.
+
+        Approximate: a notification for an incoming transfer that lands first is counted instead.
+        """
+        async for message in self.notifications:
+            if message.type != aiohttp.WSMsgType.TEXT:
+                continue
+            if self.transfer_sent_at is not None:
+                elapsed_ms = (time.perf_counter() - self.transfer_sent_at) * 1000
+                self.transfer_sent_at = None
+                self.client.stats.record("ws.notifications.delivery", elapsed_ms, "frame")
+
+    @task(6)
+    async def dashboard(self):
+        await self.client.request(self.scenario("dashboard"), "GET", "/api/users/member-dashboard/")
+
+    @task(3)
+    async def history(self):
+        await self.client.request(self.scenario("transactions"), "GET", "/api/transactions/")
+
+    async def transfer(self, suffix, amount):
+        payee = self.member()
+        if payee["account_id"] == self.user["account_id"]:
+            return
+        if amount <= self.threshold:  # pending transfers notify no one until approved
+            self.transfer_sent_at = time.perf_counter()
+        await self.client.request(
+            self.scenario(f"transfer.{suffix}"),
+            "POST",
+            "/api/transactions/",
+            json={
+                "from_account": self.user["account_id"],
+                "to_account": payee["account_id"],
+                "amount": str(amount),
+                "transaction_type": "transfer",
+                "description": "Load test transfer",
+            },
+        )
+
+    @task(4)
+    async def transfer_below_threshold(self):
+        await self.transfer("below_threshold", self.below_threshold())
+
+    @task(1)
+    async def transfer_above_threshold(self):
+        await self.transfer("above_threshold", self.above_threshold())
+
+    @task(1)
+    async def statement(self):
+        end = server_date()
+        status, body = await self.client.request(
+            self.scenario("statement.request"),
+            "POST",
+            "/api/operations/statements/request-statement/",
+            json={
+                "account_id": self.user["account_id"],
+                "start_date": (end - timedelta(days=30)).isoformat(),
+                "end_date": end.isoformat(),
+            },
+        )
+        if status == 200 and body:
+            download = f"/api/operations/statements/{body['statement_id']}/download/"
+            await self.client.request(self.scenario("statement.download"), "GET", download)
+
+    @task(2)
+    async def chat(self):
+        """Send a chat message and wait for the room's broadcast of it."""
+        if self.chat is None or self.chat.closed:
+            return
+        content = f"load test {self.rng.getrandbits(48):012x}"
+        started = time.perf_counter()
+        deadline = started + CHAT_ECHO_TIMEOUT_SECONDS
+        try:
+            await self.chat.send_str(json.dumps({"type": "message", "content": content}))
+            while True:
+                message = await self.chat.receive(timeout=max(deadline - time.perf_counter(), 0))
+                if message.type != aiohttp.WSMsgType.TEXT:
+                    outcome = "closed"
+                    break
+                event = json.loads(message.data)
+                if event.get("type") == "message" and event.get("content") == content:
+                    self.client.stats.record("ws.chat.round_trip", (time.perf_counter() - started) * 1000, "echo")
+                    return
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            outcome = type(e).__name__
+        self.client.stats.record("ws.chat.round_trip", (time.perf_counter() - started) * 1000, outcome, ok=False)
+
+
+class Cashier(Persona):
+    """A teller posting counter deposits and withdrawals for walk-in members."""
+
+    name = "cashier"
+    pool = "cashiers"
+    weight = 15
+
+    async def counter(self, tx_type, suffix, amount):
+        member = self.member()
+        await self.client.request(
+            self.scenario(f"{tx_type}.{suffix}"),
+            "POST",
+            "/api/transactions/process/",
+            json={
+                "member_id": member["id"],
+                "amount": str(amount),
+                "type": tx_type,
+                "account_type": member["account_type"],
+            },
+        )
+
+    @task(5)
+    async def deposit_below_threshold(self):
+        await self.counter("deposit", "below_threshold", self.below_threshold())
+
+    @task(1)
+    async def deposit_above_threshold(self):
+        await self.counter("deposit", "above_threshold", self.above_threshold())
+
+    @task(4)
+    async def withdrawal_below_threshold(self):
+        await self.counter("withdrawal", "below_threshold", self.below_threshold())
+
+    @task(1)
+    async def withdrawal_above_threshold(self):
+        await self.counter("withdrawal", "above_threshold", self.above_threshold())
+
+    @task(2)
+    async def search(self):
+        params = {"type": "deposit"}
+        await self.client.request(self.scenario("search"), "GET", "/api/transactions/search/", params=params)
+
+
+class MobileBanker(Persona):
+    """A field agent collecting deposits and paying out withdrawals for assigned members."""
+
+    name = "mobile_banker"
+    pool = "mobile_bankers"
+    weight = 15
+
+    async def field(self, action, suffix, amount):
+        member = self.member()
+        await self.client.request(
+            self.scenario(f"{action}.{suffix}"),
+            "POST",
+            f"/api/operations/process-{action}/",
+            json={"member_id": member["id"], "amount": str(amount), "account_type": member["account_type"]},
+        )
+
+    @task(5)
+    async def deposit_below_threshold(self):
+        await self.field("deposit", "below_threshold", self.below_threshold())
+
+    @task(1)
+    async def deposit_above_threshold(self):
+        await self.field("deposit", "above_threshold", self.above_threshold())
+
+    @task(3)
+    async def withdrawal_below_threshold(self):
+        await self.field("withdrawal", "below_threshold", self.below_threshold())
+
+    @task(1)
+    async def withdrawal_above_threshold(self):
+        await self.field("withdrawal", "above_threshold", self.above_threshold())
+
+    @task(2)
+    async def metrics(self):
+        await self.client.request(self.scenario("metrics"), "GET", "/api/operations/mobile-banker-metrics/")
+
+
+class Manager(Persona):
+    """A branch manager: approvals of above-threshold transactions, dashboards and report downloads."""
+
+    name = "manager"
+    pool = "managers"
+    weight = 10
+
+    @task(4)
+    async def approve(self):
+        status, body = await self.client.request(
+            self.scenario("pending"), "GET", "/api/transactions/", params={"status": "pending_approval"}
+        )
+        pending = (body.get("results", []) if isinstance(body, dict) else body) if status == 200 else []
+        if pending:
+            # Another manager may approve the same one first: that 400 is expected.
+            tx = self.rng.choice(pending)
+            await self.client.request(
+                self.scenario("approve"), "POST", f"/api/transactions/{tx['id']}/approve/", expect=(200, 400)
+            )
+
+    @task(3)
+    async def overview(self):
+        await self.client.request(self.scenario("overview"), "GET", "/api/accounts/manager/overview/")
+
+    @task(2)
+    async def cash_flow(self):
+        await self.client.request(self.scenario("cash_flow"), "GET", "/api/operations/cash-flow/")
+
+    @task(2)
+    async def performance(self):
+        await self.client.request(self.scenario("performance"), "GET", "/api/performance/dashboard-data/")
+
+    async def report(self, format_type):
+        end = server_date()
+        await self.client.request(
+            self.scenario(f"report.{format_type}"),
+            "POST",
+            "/api/operations/generate-report/",
+            json={
+                "type": "transactions",
+                "format": format_type,
+                "date_from": (end - timedelta(days=30)).isoformat(),
+                "date_to": end.isoformat(),
+                "limit": 500,
+            },
+        )
+
+    @task(1)
+    async def report_csv(self):
+        await self.report("csv")
+
+    @task(1)
+    async def report_pdf(self):
+        await self.report("pdf")
+
+    @task(1)
+    async def statement(self):
+        member = self.member()
+        end = server_date()
+        await self.client.request(
+            self.scenario("statement.generate"),
+            "POST",
+            "/api/banking/generate-statement/",
+            json={
+                "account_number": member["account_number"],
+                "start_date": (end - timedelta(days=30)).isoformat(),
+                "end_date": end.isoformat(),
+            },
+        )
+
+
+PERSONAS = (Member, Cashier, MobileBanker, Manager)
@@ -0,0 +1,124 @@
+"""Drives the virtual users of a run and builds its report.
+
+Virtual users start evenly over ``ramp_up`` seconds. Samples are recorded
+only during the ``duration`` that follows ``ramp_up + warmup``, so connection
+setup and cold caches don't skew comparisons between releases. Personas are
+assigned from a seeded RNG: the same options give the same mix of users and
+the same sequence of tasks per user.
+"""
+
+import asyncio
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from loadtest import fake_sendexa
+from loadtest.client import Client
+from loadtest.personas import PERSONAS
+from loadtest.stats import Stats
+
+logger = logging.getLogger(__name__)
+
+
+def assign_personas(users, seed, personas=PERSONAS):
+    """One persona per virtual user: each persona once while there is room, then by weight."""
+    rng = random.Random(seed)
+    assigned = list(personas[:users])
+    assigned += rng.choices(personas, weights=[p.weight for p in personas], k=max(users - len(personas), 0))
+    return assigned
+
+
+async def virtual_user(index, persona_class, user, base_url, fixtures, stats, start_at, stop_at, think_time, seed):
+    rng = random.Random(seed * 1_000_003 + index)
+    await asyncio.sleep(max(start_at - time.perf_counter(), 0))
+    client = Client(base_url, stats)
+    persona = persona_class(client, fixtures, user, rng)
+    try:
+        await persona.on_start()
+    except Exception as e:
+        logger.error(f"Virtual user {index} ({persona_class.name}) could not start: {e}")
+        await client.close()
+        return
+    try:
+        while time.perf_counter() < stop_at:
+            try:
+                await persona.run_one()
+            except Exception:
+                logger.exception(f"Virtual user {index} ({persona_class.name}) task failed")
+                stats.record(f"{persona_class.name}.task_error", 0.0, "exception", ok=False)
+            await asyncio.sleep(rng.uniform(*think_time))
+    finally:
+        await persona.on_stop()
+        await client.close()
+
+
+async def run(
+    base_url, fixtures, users=50, duration=120, ramp_up=20, warmup=10, think_time=(0.5, 2.0), seed=1, sendexa=None
+):
+    """Run the load test and return ``(stats, sms_stats)``; ``sendexa`` is the fake gateway's port, if any."""
+    gateway = await fake_sendexa.start(port=sendexa) if sendexa else None
+    stats = Stats()
+    personas = assign_personas(users, seed)
+    counts = {}
+
+    def next_user(persona):
+        pool = fixtures[persona.pool]
+        counts[persona] = counts.get(persona, -1) + 1
+        return pool[counts[persona] % len(pool)]
+
+    began = time.perf_counter()
+    measure_from = began + ramp_up + warmup
+    stop_at = measure_from + duration
+    tasks = [
+        asyncio.create_task(
+            virtual_user(
+                i,
+                persona,
+                next_user(persona),
+                base_url,
+                fixtures,
+                stats,
+                began + ramp_up * i / max(users, 1),
+                stop_at,
+                think_time,
+                seed,
+            )
+        )
+        for i, persona in enumerate(personas)
+    ]
+    await asyncio.sleep(max(measure_from - time.perf_counter(), 0))
+    stats.start()
+    await asyncio.sleep(max(stop_at - time.perf_counter(), 0))
+    stats.stop()
+    await asyncio.gather(*tasks)
+
+    sms_stats = None
+    if gateway is not None:
+        sms_stats = dict(gateway.app[fake_sendexa.STATS_KEY])
+        await gateway.cleanup()
+    return stats, sms_stats
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment(base_url):
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "base_url": base_url,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
@@ -0,0 +1,107 @@
+"""Seed a database for the load test and write the fixtures file the load clients read.
+
+Builds on the benchmark bank (``benchmarks.seed``) and adds what HTTP clients
+need: a known password for every user, a mobile banker assigned to every
+member, balances large enough for transfers above the approval threshold, and
+group chat rooms. Members get phone numbers, so transaction alerts go out
+through the SMS gateway. The fixtures file lists the credentials, account numbers and
+room ids per persona; it holds no secrets beyond the load-test password.
+
+Run from ``banking_backend`` against the database the server under test uses::
+
+    python -m loadtest seed --members 200 --out loadtest/fixtures.json
+"""
+
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from benchmarks.seed import SEED, seed_bank
+from core.models import Account, ChatRoom
+from core.models.operational import ClientAssignment
+
+PASSWORD = "LoadTest!Coastal-2024"
+MEMBERS = 200
+TRANSACTIONS_PER_ACCOUNT = 10
+ROOM_SIZE = 8
+# Enough for every member to move well past TRANSACTION_APPROVAL_THRESHOLD many times over
+OPENING_BALANCE = Decimal("250000.00")
+
+
+@transaction.atomic
+def seed_loadtest(seed=SEED, members=MEMBERS, transactions_per_account=TRANSACTIONS_PER_ACCOUNT, password=PASSWORD):
+    """Seed the bank and return the fixtures dict for the load clients."""
+    User = get_user_model()
+    if User.objects.filter(email="bench.manager@coastal.test").exists():
+        raise RuntimeError("The database is already seeded; reuse its fixtures file or seed a fresh database.")
+
+    bank = seed_bank(seed=seed, members=members, transactions_per_account=transactions_per_account)
+    mobile_banker = User.objects.create_user(
+        username="bench_mobile_banker",
+        email="bench.mobile_banker@coastal.test",
+        first_name="Bench",
+        last_name="Mobile Banker",
+        role="mobile_banker",
+        is_staff=True,
+        is_approved=True,
+    )
+    staff = [bank.manager, bank.cashier, mobile_banker]
+
+    # One hash for everyone: the load test measures logins, not the seeding.
+    User.objects.filter(pk__in=[user.pk for user in [*staff, *bank.members]]).update(password=make_password(password))
+    Account.objects.filter(pk__in=[account.pk for account in bank.accounts]).update(balance=OPENING_BALANCE)
+    # A phone number per member sends every transaction alert through the (fake) SMS gateway.
+    for i, member in enumerate(bank.members):
+        member.phone_number = f"+23320{i:07d}"
+    User.objects.bulk_update(bank.members, ["phone_number_encrypted", "phone_number_hash"], batch_size=500)
+    ClientAssignment.objects.bulk_create(
+        ClientAssignment(mobile_banker=mobile_banker, client=member) for member in bank.members
+    )
+
+    rooms = []
+    for start in range(0, len(bank.members), ROOM_SIZE):
+        group = bank.members[start : start + ROOM_SIZE]
+        room = ChatRoom.objects.create(is_group=True, name=f"Load test {start // ROOM_SIZE}", created_by=bank.manager)
+        room.members.add(*group)
+        rooms.append((room, group))
+    room_of = {member.pk: room.pk for room, group in rooms for member in group}
+
+    def credentials(user):
+        return {"id": user.pk, "email": user.email}
+
+    return {
+        "seed": seed,
+        "password": password,
+        "approval_threshold": str(getattr(settings, "TRANSACTION_APPROVAL_THRESHOLD", Decimal("5000.00"))),
+        "members": [
+            {
+                **credentials(member),
+                "account_id": account.pk,
+                "account_number": account.account_number,
+                "account_type": account.account_type,
+                "room_id": room_of[member.pk],
+            }
+            for member, account in zip(bank.members, bank.accounts, strict=True)
+        ],
+        "cashiers": [credentials(bank.cashier)],
+        "mobile_bankers": [credentials(mobile_banker)],
+        "managers": [credentials(bank.manager)],
+    }
+
+
+def main(args):
+    fixtures = seed_loadtest(
+        seed=args.seed,
+        members=args.members,
+        transactions_per_account=args.transactions,
+        password=args.password or PASSWORD,
+    )
+    with open(args.out, "w") as f:
+        json.dump(fixtures, f, indent=2)
+        f.write("\n")
+    print(f"Seeded {len(fixtures['members'])} members; fixtures written to {args.out}")
+    return 0
@@ -0,0 +1,89 @@
+"""Per-scenario latency samples, throughput and the JSON report.
+
+A scenario is one named step of a persona's flow, e.g. ``member.transfer.below_threshold``
+or ``ws.chat.round_trip``. Samples recorded before ``start()`` (ramp-up and
+warm-up) are discarded, so reports from runs with the same options can be
+compared across releases with ``python -m loadtest compare``.
+"""
+
+import time
+from collections import Counter, defaultdict
+
+from benchmarks.harness import percentile
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class ScenarioStats:
+    """Samples for one scenario."""
+
+    def __init__(self):
+        self.latency_ms = []
+        self.failures = 0
+        self.outcomes = Counter()
+
+    def record(self, elapsed_ms, outcome, ok):
+        self.latency_ms.append(elapsed_ms)
+        self.outcomes[str(outcome)] += 1
+        if not ok:
+            self.failures += 1
+
+    def summary(self, duration_s):
+        samples = self.latency_ms
+        return {
+            "requests": len(samples),
+            "failures": self.failures,
+            "throughput_rps": round(len(samples) / duration_s, 3) if duration_s else 0.0,
+            "latency_ms": {
+                "mean": round(sum(samples) / len(samples), 3) if samples else 0.0,
+                **{f"p{pct}": round(percentile(samples, pct), 3) for pct in PERCENTILES},
+                "max": round(max(samples), 3) if samples else 0.0,
+            },
+            "outcomes": dict(sorted(self.outcomes.items())),
+        }
+
+
+class Stats:
+    """Collects samples from every virtual user of a run."""
+
+    def __init__(self):
+        self.scenarios = defaultdict(ScenarioStats)
+        self.started = None
+        self.finished = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def measuring(self):
+        return self.started is not None and self.finished is None
+
+    def record(self, name, elapsed_ms, outcome, ok=True):
+        """Record one sample; ``outcome`` is the HTTP status or a short error name."""
+        if self.measuring:
+            self.scenarios[name].record(elapsed_ms, outcome, ok)
+
+    @property
+    def duration_s(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def report(self, environment=None, config=None):
+        duration = self.duration_s
+        results = {name: stats.summary(duration) for name, stats in sorted(self.scenarios.items())}
+        requests = sum(result["requests"] for result in results.values())
+        return {
+            "environment": environment or {},
+            "config": config or {},
+            "duration_s": round(duration, 3),
+            "totals": {
+                "requests": requests,
+                "failures": sum(result["failures"] for result in results.values()),
+                "throughput_rps": round(requests / duration, 3) if duration else 0.0,
+            },
+            "results": results,
+        }
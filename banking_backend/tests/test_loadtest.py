@@ -0,0 +1,73 @@
+"""Tests for the load-test suite's seeding, fake SMS gateway and reports."""
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from core.models.operational import ClientAssignment
+from loadtest import compare, fake_sendexa
+from loadtest.personas import PERSONAS
+from loadtest.runner import assign_personas
+from loadtest.seed import seed_loadtest
+from loadtest.stats import Stats
+
+
+@pytest.mark.django_db
+def test_seeded_users_log_in_with_the_fixtures_password(client):
+    fixtures = seed_loadtest(members=3, transactions_per_account=1, password="Seeded!Pass-1")
+
+    assert len(fixtures["members"]) == 3
+    assert ClientAssignment.objects.filter(mobile_banker_id=fixtures["mobile_bankers"][0]["id"]).count() == 3
+    for pool in ("members", "cashiers", "mobile_bankers", "managers"):
+        user = fixtures[pool][0]
+        response = client.post(
+            "/api/users/auth/login/",
+            {"email": user["email"], "password": fixtures["password"]},
+            content_type="application/json",
+        )
+        assert response.status_code == 200, pool
+        assert "access" in response.cookies
+
+    with pytest.raises(RuntimeError):
+        seed_loadtest(members=1)
+
+
+@pytest.mark.asyncio
+async def test_fake_sendexa_accepts_and_counts_messages():
+    async with TestClient(TestServer(fake_sendexa.create_app())) as gateway:
+        sent = await gateway.post(
+            "/v1/messages", json={"to": "+233200000001", "message": "hi"}, headers={"Authorization": "Bearer x"}
+        )
+        rejected = await gateway.post("/v1/messages", json={"to": "+233200000001", "message": "hi"})
+        stats = await (await gateway.get("/_stats")).json()
+
+    assert sent.status == 201
+    assert rejected.status == 400
+    assert stats == {"sent": 1, "failed": 0, "rejected": 1}
+
+
+def test_report_and_comparison():
+    stats = Stats()
+    stats.record("member.dashboard", 5.0, 200)  # before start(): ramp-up, discarded
+    stats.start()
+    for ms in range(1, 101):
+        stats.record("member.dashboard", float(ms), 200)
+    stats.record("member.dashboard", 250.0, 500, ok=False)
+    stats.stop()
+
+    old = stats.report()
+    result = old["results"]["member.dashboard"]
+    assert result["requests"] == 101 and result["failures"] == 1
+    assert result["latency_ms"]["p50"] == 51.0 and result["latency_ms"]["max"] == 250.0
+    assert result["outcomes"] == {"200": 100, "500": 1}
+
+    new = {"results": {"member.dashboard": {**result, "latency_ms": {**result["latency_ms"], "p95": 200.0}}}}
+    assert [row[3] for row in compare.compare(old, new, threshold=10)] == [True]
+    assert [row[3] for row in compare.compare(old, old, threshold=10)] == [False]
+
+
+def test_every_persona_runs_once_the_rest_by_weight():
+    assigned = assign_personas(40, seed=7)
+
+    assert assigned[: len(PERSONAS)] == list(PERSONAS)
+    assert assigned == assign_personas(40, seed=7)
+    assert assign_personas(2, seed=7) == list(PERSONAS[:2])
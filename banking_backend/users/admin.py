@@ -12,6 +12,8 @@ from django.http import HttpResponse
 from django.utils import timezone
 from django.utils.html import format_html
 
+from core.channels_cache import invalidate_principals
+
 from .models import AdminNotification, AuditLog, User, UserActivity
 
 # =============================================================================
@@ -186,7 +188,9 @@ class UserAdmin(BaseUserAdmin):
     # Bulk Actions
     @admin.action(description="Activate selected users")
     def activate_users(self, request, queryset):
+        user_ids = list(queryset.values_list("pk", flat=True))
         updated = queryset.update(is_active=True)
+        invalidate_principals(user_ids)
         self.message_user(request, f"{updated} users activated successfully.", messages.SUCCESS)
         # Log the action
         for user in queryset:
@@ -194,7 +198,10 @@ class UserAdmin(BaseUserAdmin):
 
     @admin.action(description="Deactivate selected users")
     def deactivate_users(self, request, queryset):
+        user_ids = list(queryset.values_list("pk", flat=True))
         updated = queryset.update(is_active=False)
+        # update() sends no post_save: drop cached WebSocket principals explicitly
+        invalidate_principals(user_ids)
         self.message_user(request, f"{updated} users deactivated successfully.", messages.SUCCESS)
         for user in queryset:
             self._log_admin_action(request, user, "account_locked")
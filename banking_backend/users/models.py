@@ -221,7 +221,7 @@ class User(AbstractUser):
         """Decrypt and return the Staff ID."""
         from core.utils.field_encryption import decrypt_field
 
-        return decrypt_field(self.staff_id_encrypted)
+        return decrypt_field(self.staff_id_encrypted, version=self.key_version)
 
     @staff_id.setter
     def staff_id(self, value):
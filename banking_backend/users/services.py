@@ -7,6 +7,8 @@ from django.utils import timezone
 
 import httpx
 
+from core.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 # E.164 international phone number pattern: + followed by 8-15 digits
@@ -61,6 +63,7 @@ class SendexaService:
         return bool(_E164_PATTERN.match(phone_number))
 
     @staticmethod
+    @traced()
     def send_sms(phone_number: str, message: str, max_retries: int = 3) -> tuple[bool, str]:
         """Send an SMS via Sendexa with retry logic."""
         if not phone_number:
@@ -14,11 +14,14 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from asgiref.sync import sync_to_async
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from core.async_views import AsyncAPIView, gather_queries
+from core.dashboard_cache import aget_member_dashboard, astore_member_dashboard
 from core.permissions import IsAdmin, IsManagerOrAdmin, IsStaff, IsManagerOrAdminOnly, IsClientRegistrar, IsSuperUser
 
 from .models import User
@@ -350,41 +353,53 @@ class UserListView(generics.ListAPIView):
     permission_classes = [IsAdmin]
 
 
-class MemberDashboardView(APIView):
+class MemberDashboardView(AsyncAPIView):
     """Get dashboard data for the authenticated member/customer."""
 
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    async def get(self, request):
         """Retrieve a summary of account balances and recent transactions for the member dashboard."""
         user = request.user
 
+        # Served from the member's snapshot until a write to their accounts or profile commits
+        version, payload = await aget_member_dashboard(user.pk)
+        if payload is None:
+            payload = await self.build_payload(user)
+            await astore_member_dashboard(user.pk, version, payload)
+        return Response(payload)
+
+    async def build_payload(self, user):
         # Import here to avoid circular imports
         from decimal import Decimal
 
+        from django.db.models import Q, Sum
+
         from core.models import Account, Transaction
 
         # Get user's accounts
         accounts = Account.objects.filter(user=user, is_active=True)
 
-        # Calculate totals using aggregation to avoid N+1 and repeated QuerySet evaluation
-        from django.db.models import Q, Sum
-
-        totals = accounts.aggregate(
-            total=Sum("balance"), daily_susu=Sum("balance", filter=Q(account_type="daily_susu"))
+        # Totals, accounts and recent transactions are independent: fetched concurrently
+        results = await gather_queries(
+            {
+                # Calculate totals using aggregation to avoid N+1 and repeated QuerySet evaluation
+                "totals": lambda: accounts.aggregate(
+                    total=Sum("balance"), daily_susu=Sum("balance", filter=Q(account_type="daily_susu"))
+                ),
+                "accounts": lambda: list(accounts),
+                # Get recent transactions (last 10) - use Q objects instead of union to avoid ORDER BY in subquery
+                "recent_transactions": lambda: list(
+                    Transaction.objects.filter(Q(from_account__user=user) | Q(to_account__user=user))
+                    .select_related("from_account", "to_account")
+                    .order_by("-timestamp")[:10]
+                ),
+            }
         )
+        totals = results["totals"]
         total_balance = totals["total"] or Decimal("0.00")
         total_daily_susu = totals["daily_susu"] or Decimal("0.00")
 
-        # Get recent transactions (last 10) - use Q objects instead of union to avoid ORDER BY in subquery
-        from django.db.models import Q
-
-        recent_transactions = (
-            Transaction.objects.filter(Q(from_account__user=user) | Q(to_account__user=user))
-            .select_related("from_account", "to_account")
-            .order_by("-timestamp")[:10]
-        )
-
         # Build response
         accounts_data = [
             {
@@ -394,7 +409,7 @@ class MemberDashboardView(APIView):
                 "balance": str(acc.balance),
                 "is_active": acc.is_active,
             }
-            for acc in accounts
+            for acc in results["accounts"]
         ]
 
         transactions_data = [
@@ -406,19 +421,17 @@ class MemberDashboardView(APIView):
                 "status": tx.status,
                 "timestamp": tx.timestamp.isoformat() if tx.timestamp else None,
             }
-            for tx in recent_transactions
+            for tx in results["recent_transactions"]
         ]
 
-        return Response(
-            {
-                "total_balance": str(total_balance),
-                "total_daily_susu": str(total_daily_susu),
-                "available_balance": str(total_balance),
-                "accounts": accounts_data,
-                "recent_transactions": transactions_data,
-                "user": UserSerializer(user).data,
-            }
-        )
+        return {
+            "total_balance": str(total_balance),
+            "total_daily_susu": str(total_daily_susu),
+            "available_balance": str(total_balance),
+            "accounts": accounts_data,
+            "recent_transactions": transactions_data,
+            "user": await sync_to_async(lambda: dict(UserSerializer(user).data))(),
+        }
 
 
 class SendOTPView(APIView):
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { api, PaginatedResponse } from '../services/api';
 import type { FraudAlert } from '../api/types.gen';
-import { AlertTriangle, Clock, CheckCircle2, ShieldAlert } from 'lucide-react';
+import { AlertTriangle, Clock, CheckCircle2, ShieldAlert, Network } from 'lucide-react';
 import { Pagination } from '../components/ui/Pagination';
 import './FraudAlerts.css';
 
@@ -10,6 +10,7 @@ interface FraudStats {
   unresolved?: number;
   by_severity?: { severity: string; count: number }[];
   critical_alerts?: number;
+  mule_accounts?: number;
 }
 
 const FraudAlerts = () => {
@@ -181,6 +182,18 @@ const FraudAlerts = () => {
             </div>
           </div>
         </div>
+
+        <div className="fraud-stat-card">
+          <div className="fraud-stat-content">
+            <div className="fraud-stat-icon fraud-stat-icon--danger">
+              <Network className="w-6 h-6" />
+            </div>
+            <div>
+              <p className="fraud-stat-value">{stats.mule_accounts || 0}</p>
+              <p className="fraud-stat-label">Mule Accounts</p>
+            </div>
+          </div>
+        </div>
       </div>
 
       {/* Filter Tabs */}
@@ -424,7 +424,7 @@ const FraudRules: React.FC = React.memo(() => {
                     value={formData.field}
                     onChange={(e) => setFormData({ ...formData, field: e.target.value })}
                     placeholder="amount"
-                    title="The transaction field to evaluate (e.g., amount, location)"
+                    title="The transaction field to evaluate (amount, transaction_type, status, description, hour_of_day, day_of_week, is_weekend)"
                   />
                 </div>
                 <div className="input-group-small">
@@ -438,9 +438,12 @@ const FraudRules: React.FC = React.memo(() => {
                   >
                     <option value=">">{'>'}</option>
                     <option value="<">{'<'}</option>
+                    <option value=">=">{'>='}</option>
+                    <option value="<=">{'<='}</option>
                     <option value="==">==</option>
                     <option value="!=">!=</option>
                     <option value="contains">contains</option>
+                    <option value="in">in (comma-separated)</option>
                   </select>
                 </div>
                 <div className="input-group-small">